@@ -0,0 +1,151 @@
+"""
+Micro-benchmarks for the NLP, feature and DB hot paths (kept out of tests/, run explicitly):
+    python -m pytest benchmarks -q
+    python -m pytest benchmarks -q --benchmark-autosave                    # with pytest-benchmark
+    python -m pytest benchmarks -q --benchmark-compare --benchmark-compare-fail=median:20%
+
+- fixtures are deterministic: seeded inputs, and a synthetic AIS DB built once per session
+  by tools/make_synthetic_db.py (BENCH_DB_ROWS, default 200k; BENCH_DB_PATH reuses a file)
+- `bench(fn, *args)` times fn with pytest-benchmark when it is installed, else with a small
+  built-in timer (median of calibrated rounds), then fails the test when the median exceeds
+  its ceiling in thresholds.json
+- ceilings are absolute, for the reference machine and the default DB size. --bench-scale
+  (or BENCH_THRESHOLD_SCALE) multiplies them on slower hardware, and --bench-record rewrites
+  thresholds.json from this run's medians with RECORD_HEADROOM. Benchmarks without an entry
+  are timed but not checked.
+"""
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent / "src" / "app"))
+sys.path.insert(0, str(HERE.parent / "tools"))
+
+THRESHOLDS_PATH = HERE / "thresholds.json"
+RECORD_HEADROOM = 2.0
+MIN_CEILING_MS = 1.0  # sub-millisecond medians are mostly timer and scheduler noise
+# built-in timer: rounds until MIN_TIME seconds are spent (bounded), after one warm-up call
+MIN_ROUNDS, MAX_ROUNDS, MIN_TIME = 3, 1000, 0.5
+
+try:
+    import pytest_benchmark  # noqa: F401
+    HAVE_PYTEST_BENCHMARK = True
+except ImportError:
+    HAVE_PYTEST_BENCHMARK = False
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("maritime benchmarks")
+    group.addoption("--bench-scale", type=float, default=float(os.environ.get("BENCH_THRESHOLD_SCALE", 1.0)),
+                    help="multiply the thresholds.json ceilings (slower machines)")
+    group.addoption("--bench-record", action="store_true",
+                    help=f"rewrite thresholds.json as {RECORD_HEADROOM}x this run's medians")
+
+
+def pytest_configure(config):
+    config._bench_medians = {}
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    if config.getoption("--bench-record") and config._bench_medians:
+        thresholds = load_thresholds()
+        thresholds.update({name: round(max(ms * RECORD_HEADROOM, MIN_CEILING_MS), 3) for name, ms in config._bench_medians.items()})
+        THRESHOLDS_PATH.write_text(json.dumps(dict(sorted(thresholds.items())), indent=2) + "\n")
+
+
+def load_thresholds() -> dict:
+    return json.loads(THRESHOLDS_PATH.read_text()) if THRESHOLDS_PATH.exists() else {}
+
+
+class SimpleBenchmark:
+    """The subset of pytest-benchmark's fixture the suite uses: benchmark(fn, *args, **kwargs)"""
+
+    def __init__(self):
+        self.stats = None
+
+    def __call__(self, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        first = time.perf_counter() - start
+        rounds = int(min(MAX_ROUNDS, max(MIN_ROUNDS, MIN_TIME / max(first, 1e-9))))
+        times = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            fn(*args, **kwargs)
+            times.append(time.perf_counter() - start)
+        self.stats = {"min": min(times), "median": statistics.median(times), "mean": statistics.mean(times),
+                      "rounds": rounds}
+        return result
+
+    def median(self):
+        return self.stats["median"] if self.stats else None
+
+
+if not HAVE_PYTEST_BENCHMARK:
+    @pytest.fixture
+    def benchmark():
+        return SimpleBenchmark()
+
+
+def _median_seconds(benchmark):
+    if isinstance(benchmark, SimpleBenchmark):
+        return benchmark.median()
+    stats = getattr(benchmark, "stats", None)  # None with --benchmark-disable
+    return stats.stats.median if stats is not None else None
+
+
+@pytest.fixture
+def bench(benchmark, request):
+    """Run `benchmark` and enforce this test's ceiling from thresholds.json"""
+    config = request.config
+    name = request.node.name
+    ceiling = load_thresholds().get(name)
+
+    def run(fn, *args, **kwargs):
+        result = benchmark(fn, *args, **kwargs)
+        median = _median_seconds(benchmark)
+        if median is None:
+            return result
+        median_ms = median * 1000.0
+        config._bench_medians[name] = median_ms
+        if ceiling is not None and not config.getoption("--bench-record"):
+            limit = ceiling * config.getoption("--bench-scale")
+            if median_ms > limit:
+                pytest.fail(f"{name}: median {median_ms:.3f} ms exceeds the {limit:.3f} ms threshold")
+        return result
+
+    return run
+
+
+# --- shared fixtures ---
+@pytest.fixture(scope="session")
+def synthetic_db(tmp_path_factory):
+    """Path + facts of a seeded synthetic AIS DB with every index / snapshot the app builds"""
+    from make_synthetic_db import generate, parse_count
+    from anomaly_job import run_anomaly_job
+    from db_handler import MaritimeDB
+
+    path = os.environ.get("BENCH_DB_PATH")
+    rows = parse_count(os.environ.get("BENCH_DB_ROWS", "200k"))
+    if not path or not os.path.exists(path):
+        path = path or str(tmp_path_factory.mktemp("bench") / "ais.db")
+        generate(path, rows, vessels=max(100, rows // 1000), start="2020-01-01 00:00:00", interval=60, seed=0,
+                 chunk_rows=500000)
+        db = MaritimeDB(path)
+        db.create_tables()
+        db.ensure_latest_positions()
+        db.ensure_track_tiers()
+        db.ensure_spatial_index()
+        run_anomaly_job(path, workers=1)
+    db = MaritimeDB(path)
+    first, last = db._read("SELECT MIN(BaseDateTime) AS a, MAX(BaseDateTime) AS b FROM vessel_data;").iloc[0]
+    vessel = db._read("SELECT MMSI, VesselName, LAT, LON FROM vessel_data WHERE rowid = 1;").iloc[0]
+    return {"path": path, "first": first, "last": last, "mmsi": int(vessel["MMSI"]), "name": vessel["VesselName"],
+            "lat": float(vessel["LAT"]), "lon": float(vessel["LON"])}
@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+from db_handler import READ_METHODS, MaritimeDB
+
+
+def _at(ts: str, minutes: float) -> str:
+    return (pd.Timestamp(ts) + pd.Timedelta(minutes=minutes)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def call_args(d: dict) -> dict:
+    """(args, kwargs) per MaritimeDB read method, on the fixture DB's first vessel"""
+    mid = _at(d["first"], (pd.Timestamp(d["last"]) - pd.Timestamp(d["first"])).total_seconds() / 120)
+    box = (d["lat"] - 0.5, d["lon"] - 0.5, d["lat"] + 0.5, d["lon"] + 0.5)
+    return {
+        "get_all_vessel_names": ((), {}),
+        "search_vessels_prefix": ((d["name"][:4],), {"limit": 20}),
+        "get_unique_vessels_df": ((), {}),
+        "fetch_vessel_by_name_like": ((d["name"][:6] + "%",), {"limit": 1000}),
+        "fetch_vessel_by_name_at_or_before": ((d["name"], mid), {}),
+        "fetch_vessel_by_mmsi_at_or_before": ((d["mmsi"], mid), {}),
+        "fetch_track_ending_at": ((), {"mmsi": d["mmsi"], "end_dt": mid, "limit": 12}),
+        "fetch_vessel_by_name": ((d["name"],), {"limit": 1000}),
+        "fetch_vessel_by_mmsi": ((d["mmsi"],), {"limit": 1000}),
+        "fetch_by_time_range": ((_at(mid, -60), mid), {"limit": 1000}),
+        "fetch_page": ((), {"start": _at(mid, -60), "end": mid, "page_size": 500}),
+        "fetch_tracks_in_range": ((_at(mid, -10), mid), {}),
+        "get_latest_timestamp": ((), {}),
+        "fetch_recent_points_per_vessel": ((mid, _at(mid, -30)), {}),
+        "get_latest_anomaly_run": ((), {}),
+        "fetch_anomalies": ((), {"mmsi": d["mmsi"]}),
+        "fetch_in_bbox": (box, {"start": _at(mid, -60), "end": mid}),
+        "fetch_within_radius": ((d["lat"], d["lon"], 10.0), {"start": _at(mid, -60), "end": mid}),
+        "latest_within_radius": ((d["lat"], d["lon"], 10.0), {"start": _at(mid, -60), "end": mid}),
+        "latest_positions_in_bbox": (box, {"start": _at(mid, -60), "end": mid}),
+        "fetch_latest_position": ((), {"mmsi": d["mmsi"]}),
+        "fetch_latest_positions": ((), {}),
+        "fetch_track_tiered": ((), {"mmsi": d["mmsi"], "max_points": 500}),
+    }
+
+
+@pytest.fixture(scope="module")
+def db(synthetic_db):
+    return MaritimeDB(synthetic_db["path"])
+
+
+def test_every_read_method_is_benchmarked(synthetic_db):
+    assert set(call_args(synthetic_db)) == set(READ_METHODS)
+
+
+@pytest.mark.parametrize("method", READ_METHODS)
+def test_read_method(bench, db, synthetic_db, method):
+    args, kwargs = call_args(synthetic_db)[method]
+    result = bench(getattr(db, method), *args, **kwargs)
+    if isinstance(result, tuple):
+        result = result[0]
+    if isinstance(result, (pd.DataFrame, list)):
+        assert len(result) > 0 or method in ("fetch_anomalies",)
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from xgboost_predictor import XGBoostPredictor
+
+BATCH_SIZES = [1, 32, 256]
+TIMESTEPS = 12
+
+
+@pytest.fixture(scope="module")
+def predictor(tmp_path_factory):
+    # no artifacts: the feature pipeline does not need a model
+    return XGBoostPredictor.load(str(tmp_path_factory.mktemp("no_model")))
+
+
+def raw_batch(batch: int) -> np.ndarray:
+    """(batch, TIMESTEPS, 6) LAT, LON, SOG, COG, Heading, VesselType sequences"""
+    rng = np.random.default_rng(batch)
+    lat = 25 + np.cumsum(rng.normal(0, 1e-3, (batch, TIMESTEPS)), axis=1)
+    lon = -80 + np.cumsum(rng.normal(0, 1e-3, (batch, TIMESTEPS)), axis=1)
+    return np.stack([lat, lon, rng.uniform(0, 20, (batch, TIMESTEPS)), rng.uniform(0, 360, (batch, TIMESTEPS)),
+                     rng.uniform(0, 360, (batch, TIMESTEPS)), np.full((batch, TIMESTEPS), 70.0)], axis=2)
+
+
+@pytest.mark.parametrize("batch", BATCH_SIZES)
+def test_adapt_6_to_28_dimensions(bench, predictor, batch):
+    X = bench(predictor._adapt_6_to_28_dimensions, raw_batch(batch))
+    assert X.shape == (batch, TIMESTEPS, 28)
+
+
+@pytest.mark.parametrize("batch", BATCH_SIZES)
+def test_extract_features_from_3d_array(bench, predictor, batch):
+    X = predictor._adapt_6_to_28_dimensions(raw_batch(batch))
+    features = bench(predictor.extract_features_from_3d_array, X)
+    assert features.shape == (batch, 476)
+
+
+@pytest.mark.parametrize("batch", BATCH_SIZES)
+def test_add_haversine_features_3d(bench, predictor, batch):
+    X = predictor._adapt_6_to_28_dimensions(raw_batch(batch))
+    features = bench(predictor.add_haversine_features_3d, X)
+    assert features.shape == (batch, 7)
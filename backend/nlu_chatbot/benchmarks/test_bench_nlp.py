@@ -0,0 +1,63 @@
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from make_synthetic_db import vessel_fleet
+
+VESSEL_COUNTS = [1000, 10000, 100000]
+CORPUS = [
+    "Where was {name} at 6:25 PM on Jan 5, 2020?",
+    "show the track of {name} for the last 2 hours",
+    "predict the position of MMSI 367000001 in 30 minutes",
+    "which vessels were near Miami within 10 nm yesterday",
+    "list ships around 25.76, -80.19 on 2020-01-03",
+    "what is the speed of {name} at 12:00",
+    "Where will {name} be after 30 minutes?",
+    "verify the course of {name} between 08:00 and 10:00 on 2020-01-02",
+]
+
+
+def fleet_names(count: int):
+    return vessel_fleet(count, np.random.default_rng(0))["name"]
+
+
+def interpreter(names):
+    """Interpreter on a blank English pipeline: the benchmarks time this repo's matchers,
+    regexes and vessel lookup rather than spaCy's statistical model, so they run (and are
+    checked against thresholds.json) without en_core_web_sm installed"""
+    spacy = pytest.importorskip("spacy")
+    import nlp_interpreter
+    with mock.patch.object(nlp_interpreter.spacy, "load", lambda name, **kwargs: spacy.blank("en")):
+        return nlp_interpreter.MaritimeNLPInterpreter(vessel_list=names)
+
+
+@pytest.fixture(scope="module")
+def corpus_nlp():
+    return interpreter(fleet_names(1000))
+
+
+@pytest.fixture(scope="module", params=VESSEL_COUNTS, ids=str)
+def sized_nlp(request):
+    names = fleet_names(request.param)
+    return interpreter(names), names
+
+
+def test_parse_query_corpus(bench, corpus_nlp):
+    names = fleet_names(1000)
+    queries = [q.format(name=names[i * 97 % len(names)]) for i, q in enumerate(CORPUS)]
+    parsed = bench(lambda: [corpus_nlp.parse_query(q) for q in queries])
+    assert len(parsed) == len(CORPUS)
+
+
+def test_extract_vessel_name_hit(bench, sized_nlp):
+    nlp, names = sized_nlp
+    name = names[len(names) // 2]
+    found = bench(nlp._extract_vessel_name, f"show the track of {name.lower()} for the last 2 hours")
+    assert found and found.lower() == name.lower()
+
+
+def test_extract_vessel_name_miss(bench, sized_nlp):
+    # no known name: the list fallback scans every vessel
+    nlp, _ = sized_nlp
+    bench(nlp._extract_vessel_name, "which vessels were near miami within 10 nm yesterday")
@@ -31,13 +31,15 @@ with col1:
                 st.subheader("Parsed NLU")
                 st.json(parsed)
 
-                # Helper to submit background job and poll for result
-                def _submit_and_poll(params, timeout_seconds=60, poll_interval=1.5):
-                    """Submit /admin/submit_query_job with params and poll /admin/job_status/{job_id}.
+                # Helper to submit background job and wait for its result
+                def _submit_and_poll(params, timeout_seconds=60, wait_seconds=20):
+                    """Submit /admin/submit_query_job with params and long-poll /admin/job_status/{job_id}.
+                    The server holds each request until the job changes (or `wait_seconds` pass), so
+                    this issues one request per progress update instead of one every 1.5 s.
                     Returns the job result dict or None on timeout/failure."""
                     job_id = None
                     try:
-                        submit = requests.post(f"{backend_base}/admin/submit_query_job", params=params, timeout=10)
+                        submit = requests.post(f"{backend_base}/admin/submit_query_job", json=params, timeout=10)
                         job = submit.json()
                         job_id = job.get("job_id")
                     except Exception as e:
@@ -46,26 +48,38 @@ with col1:
 
                     poll_url = f"{backend_base}/admin/job_status/{job_id}"
                     import time
-                    elapsed = 0.0
-                    with st.spinner("Query running on server, polling for result..."):
-                        while elapsed < timeout_seconds:
+                    deadline = time.time() + timeout_seconds
+                    version = 0
+                    with st.spinner("Query running on server, waiting for result..."):
+                        progress_box = st.empty()
+                        while time.time() < deadline:
+                            wait = max(0.0, min(wait_seconds, deadline - time.time()))
                             try:
-                                rcheck = requests.get(poll_url, timeout=10)
+                                rcheck = requests.get(poll_url, params={"wait": wait, "after_version": version},
+                                                      timeout=wait + 10)
                                 status = rcheck.json()
                             except Exception as e:
                                 st.warning(f"Polling error: {e}")
-                                status = {"status": "PENDING"}
+                                time.sleep(1.5)
+                                continue
 
+                            if status.get("error") == "unknown job id":
+                                st.error("Background job expired or is unknown to the server")
+                                return None
+                            version = status.get("version", version)
                             if status.get("status") == "DONE":
                                 return status.get("result")
-                            if status.get("status") == "FAILED":
-                                st.error(f"Background job failed: {status.get('error')}")
+                            if status.get("status") in ("FAILED", "CANCELLED"):
+                                st.error(f"Background job {status.get('status').lower()}: {status.get('error')}")
                                 return status.get("result")
+                            if status.get("progress"):
+                                progress_box.caption(f"Progress: {status.get('progress')}")
 
-                            time.sleep(poll_interval)
-                            elapsed += poll_interval
-
-                    # timed out
+                    # timed out: stop the job rather than leave it running for nobody
+                    try:
+                        requests.post(f"{backend_base}/admin/jobs/{job_id}/cancel", timeout=5)
+                    except Exception:
+                        pass
                     st.info("Background job timed out waiting for result")
                     return None
 
@@ -147,40 +161,7 @@ with col1:
                     if end_dt:
                         params["end_dt"] = end_dt
                     # Submit a background job to avoid timeouts for large DB queries
-                    try:
-                        submit = requests.post(f"{backend_base}/admin/submit_query_job", params=params, timeout=10)
-                        job = submit.json()
-                        job_id = job.get("job_id")
-                    except Exception as e:
-                        st.error(f"Failed to submit background job: {e}")
-                        job_id = None
-
-                    describe = None
-                    if job_id:
-                        # Poll for job completion with a spinner and timeout
-                        import time
-                        poll_url = f"{backend_base}/admin/job_status/{job_id}"
-                        with st.spinner("Query running on server, polling for result..."):
-                            timeout_seconds = 60
-                            interval = 1.5
-                            elapsed = 0.0
-                            while elapsed < timeout_seconds:
-                                try:
-                                    rcheck = requests.get(poll_url, timeout=10)
-                                    status = rcheck.json()
-                                except Exception as e:
-                                    st.warning(f"Polling error: {e}")
-                                    status = {"status": "PENDING"}
-
-                                if status.get("status") == "DONE":
-                                    describe = status.get("result")
-                                    break
-                                if status.get("status") == "FAILED":
-                                    st.error(f"Background job failed: {status.get('error')}")
-                                    describe = status.get("result")
-                                    break
-                                time.sleep(interval)
-                                elapsed += interval
+                    describe = _submit_and_poll(params, timeout_seconds=60)
 
                     if describe is None:
                         st.info("No result yet. Try increasing the polling timeout or check server logs.")
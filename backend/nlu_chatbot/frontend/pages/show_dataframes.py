@@ -21,6 +21,11 @@ except ImportError:
         """Fallback send_query function"""
         pass
 
+try:
+    from utils import fetch_frame
+except ImportError:
+    fetch_frame = None
+
 try:
     from dateutil import parser as _dateutil_parser
 except Exception:
@@ -210,8 +215,8 @@ def parse_datetime(dt_str):
     return None
 
 # Helper function to create folium map with track
-def create_track_map(track_data, vessel_name):
-    """Create folium map with vessel track"""
+def create_track_map(track_data, vessel_name, max_markers=200):
+    """Create folium map with vessel track (markers thinned to at most max_markers)"""
     if not track_data or len(track_data) == 0:
         return None
 
@@ -244,8 +249,11 @@ def create_track_map(track_data, vessel_name):
         popup=f'{vessel_name} Track'
     ).add_to(m)
 
-    # Add markers for each point
+    # Add markers for each point (every k-th one on long tracks, endpoints always)
+    step = max(1, -(-len(coords) // max(max_markers, 2)))
     for i, (lat, lon, ts) in enumerate(coords):
+        if i % step and i != len(coords) - 1:
+            continue
         if i == 0:
             # Most recent point - green
             color = 'green'
@@ -899,6 +907,24 @@ if 'current_track' in st.session_state and st.session_state['current_track']:
                 mime="application/json"
             )
 
+        # Full-history track: tiered server-side, fetched columnar (Arrow when available)
+        if fetch_frame is not None:
+            st.markdown("---")
+            st.markdown("**Full Track History**")
+            full_points = st.number_input("Max points", min_value=100, max_value=50000, value=2000, step=100)
+            if st.button("📡 Load full track"):
+                try:
+                    full_df, meta = fetch_frame(f"{backend_base}/tracks",
+                                                {"vessel_name": vessel_name, "max_points": int(full_points)})
+                    tier = meta.get("tier_seconds")
+                    st.caption(f"{len(full_df)} of {meta.get('raw_points')} fixes "
+                               f"({'raw' if not tier else f'{tier // 60} min tier'})")
+                    if not full_df.empty:
+                        st.map(full_df.rename(columns={"LAT": "lat", "LON": "lon"})[["lat", "lon"]].dropna())
+                        st.dataframe(full_df, use_container_width=True)
+                except Exception as e:
+                    st.error(f"Could not load full track: {e}")
+
 else:
     st.info("Pleas enter a vessel name or your Query  to see visualizations and time series data")
 
@@ -28,4 +28,32 @@ def send_query(text: str):
 
     st.session_state.chat_history.append(("User", text))
     st.session_state.chat_history.append(("Bot", resp))
-    st.session_state.last_bot_response = resp
\ No newline at end of file
+    st.session_state.last_bot_response = resp
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def fetch_frame(url: str, params: dict = None, key: str = "track", timeout: int = 30):
+    """GET a track/fleet endpoint as a DataFrame without per-row dicts.
+
+    Asks for Arrow IPC when pyarrow is installed, otherwise for column-oriented JSON.
+    Returns (DataFrame, metadata dict).
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        pa = None
+    params = dict(params or {}, format="arrow" if pa is not None else "columns")
+    r = requests.get(url, params=params, timeout=timeout)
+    if r.status_code == 406:
+        # server without pyarrow
+        r = requests.get(url, params=dict(params, format="columns"), timeout=timeout)
+    if pa is not None and r.headers.get("content-type", "").startswith(ARROW_MEDIA_TYPE):
+        table = pa.ipc.open_stream(r.content).read_all()
+        meta = json.loads((table.schema.metadata or {}).get(b"meta", b"{}"))
+        return table.to_pandas(), meta
+    payload = r.json()
+    if "error" in payload:
+        raise RuntimeError(payload["error"])
+    columns = payload.pop(key, None) or {}
+    return pandas.DataFrame(columns), payload
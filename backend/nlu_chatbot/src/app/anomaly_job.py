@@ -0,0 +1,256 @@
+"""
+Fleet-wide Spoofing / AIS-gap Screening Job
+Streams vessel_data ordered by (MMSI, BaseDateTime) in bounded chunks, scores every fix
+with the vectorized track_validation rules (jumps, speed mismatch, turns, gaps,
+duplicate MMSI) and writes findings to an `anomalies` table indexed by (MMSI, BaseDateTime)
+MMSI ranges are scanned in parallel by a process pool; only the parent writes to SQLite.
+The pool uses the spawn start method: the API process runs threads, which fork does not
+copy safely. ANOMALY_JOB_WORKERS caps the pool size of jobs submitted through the API.
+"""
+
+import logging
+import multiprocessing
+import os
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .track_validation import CHECK_TYPES, CHECK_WEIGHTS, GAP_MINUTES, score_tracks
+except ImportError:
+    from track_validation import CHECK_TYPES, CHECK_WEIGHTS, GAP_MINUTES, score_tracks
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = 200000
+START_METHOD = "spawn"
+# fixes of the last vessel in a chunk carried into the next one (duplicate-MMSI needs i-2)
+CONTEXT_ROWS = 3
+
+ANOMALY_COLUMNS = [
+    "MMSI", "BaseDateTime", "VesselName", "LAT", "LON", "SOG", "anomaly_type", "score",
+    "distance_nm", "dt_seconds", "implied_speed_kn", "course_change", "turn_rate",
+]
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS anomalies (
+        MMSI INTEGER,
+        BaseDateTime TEXT,
+        VesselName TEXT,
+        LAT REAL,
+        LON REAL,
+        SOG REAL,
+        anomaly_type TEXT,
+        score REAL,
+        distance_nm REAL,
+        dt_seconds REAL,
+        implied_speed_kn REAL,
+        course_change REAL,
+        turn_rate REAL,
+        run_id TEXT
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_anomalies_mmsi_time ON anomalies(MMSI, BaseDateTime);",
+    "CREATE INDEX IF NOT EXISTS idx_anomalies_time ON anomalies(BaseDateTime);",
+    """
+    CREATE TABLE IF NOT EXISTS anomaly_runs (
+        run_id TEXT PRIMARY KEY,
+        status TEXT,
+        started_at REAL,
+        finished_at REAL,
+        rows_scanned INTEGER,
+        anomalies INTEGER,
+        shards INTEGER,
+        gap_minutes REAL,
+        data_start TEXT,
+        data_end TEXT,
+        error TEXT
+    );
+    """,
+]
+
+
+def ensure_anomaly_tables(conn: sqlite3.Connection):
+    """Create anomalies / anomaly_runs and the (MMSI, BaseDateTime) scan index on vessel_data"""
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_vessel_mmsi_time ON vessel_data(MMSI, BaseDateTime);")
+    conn.commit()
+
+
+def plan_shards(conn: sqlite3.Connection, n_shards: int) -> List[Tuple[int, int]]:
+    """Split the MMSI space into up to `n_shards` contiguous ranges with similar row counts"""
+    counts = pd.read_sql_query("SELECT MMSI, COUNT(*) AS n FROM vessel_data GROUP BY MMSI ORDER BY MMSI;", conn)
+    counts = counts.dropna(subset=["MMSI"])
+    if counts.empty:
+        return []
+    n_shards = max(1, min(n_shards, len(counts)))
+    cumulative = counts["n"].cumsum().to_numpy()
+    # shard index of every MMSI by cumulative row share
+    shard_of = np.minimum((cumulative - 1) * n_shards // cumulative[-1], n_shards - 1)
+    mmsi = counts["MMSI"].astype("int64").to_numpy()
+    shards = []
+    for shard in np.unique(shard_of):
+        members = mmsi[shard_of == shard]
+        shards.append((int(members[0]), int(members[-1])))
+    return shards
+
+
+def anomalies_from_scored(scored: pd.DataFrame) -> pd.DataFrame:
+    """Long table: one row per (flagged fix, check)"""
+    frames = []
+    for check in CHECK_WEIGHTS:
+        hit = scored[scored[check].to_numpy(dtype=bool)]
+        if hit.empty:
+            continue
+        frame = hit.reindex(columns=ANOMALY_COLUMNS).copy()
+        frame["anomaly_type"] = CHECK_TYPES[check]
+        frame["score"] = hit["anomaly_score"].to_numpy()
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=ANOMALY_COLUMNS)
+    return pd.concat(frames, ignore_index=True)[ANOMALY_COLUMNS]
+
+
+def scan_shard(db_path: str, mmsi_lo: int, mmsi_hi: int, chunk_rows: int = CHUNK_ROWS,
+               gap_minutes: float = GAP_MINUTES) -> Tuple[pd.DataFrame, int]:
+    """Stream one MMSI range in (MMSI, BaseDateTime) order and return (anomalies, rows scanned)
+
+    Runs in a worker process: opens its own read-only connection. A chunk boundary may split
+    a vessel's track, so the last CONTEXT_ROWS fixes of the chunk's last vessel are prepended
+    to the next chunk and their (already reported) flags are dropped.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        cur = conn.execute(
+            """
+            SELECT MMSI, BaseDateTime, LAT, LON, SOG, COG, VesselName FROM vessel_data
+            WHERE MMSI BETWEEN ? AND ?
+            ORDER BY MMSI, BaseDateTime;
+            """,
+            (mmsi_lo, mmsi_hi),
+        )
+        columns = [c[0] for c in cur.description]
+        context = pd.DataFrame(columns=columns)
+        found, scanned = [], 0
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            if not rows:
+                break
+            chunk = pd.DataFrame(rows, columns=columns)
+            scanned += len(chunk)
+            n_context = len(context)
+            batch = pd.concat([context, chunk], ignore_index=True) if n_context else chunk
+            batch["_seq"] = np.arange(len(batch))
+            scored = score_tracks(batch, gap_minutes=gap_minutes)
+            scored = scored[scored["_seq"].to_numpy() >= n_context]
+            found.append(anomalies_from_scored(scored[scored["anomaly_score"].to_numpy() > 0]))
+
+            last_mmsi = chunk["MMSI"].iloc[-1]
+            context = chunk[chunk["MMSI"] == last_mmsi].tail(CONTEXT_ROWS)
+        anomalies = pd.concat(found, ignore_index=True) if found else pd.DataFrame(columns=ANOMALY_COLUMNS)
+        return anomalies, scanned
+    finally:
+        conn.close()
+
+
+def _scan_shard_args(args):
+    return scan_shard(*args)
+
+
+def api_job_workers() -> int:
+    """Most scan processes a job submitted through the API may use: ANOMALY_JOB_WORKERS, else
+    half the cores (at most 4), leaving the rest to the compute pool and the API workers"""
+    configured = os.environ.get("ANOMALY_JOB_WORKERS")
+    if configured is not None:
+        return max(1, int(configured))
+    return max(1, min(4, (os.cpu_count() or 2) // 2))
+
+
+def run_anomaly_job(db_path: str, workers: Optional[int] = None, chunk_rows: int = CHUNK_ROWS,
+                    gap_minutes: float = GAP_MINUTES, progress: Callable[[Dict], None] = None) -> Dict:
+    """Screen the whole vessel_data table and replace the anomalies table with the results
+
+    `workers` processes scan one MMSI shard each (default: CPU count; 1 runs in-process).
+    `progress` is called with a status dict after each finished shard.
+    """
+    workers = workers or os.cpu_count() or 1
+    run_id = str(uuid.uuid4())
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_anomaly_tables(conn)
+        started = time.time()
+        bounds = pd.read_sql_query("SELECT MIN(BaseDateTime) AS s, MAX(BaseDateTime) AS e FROM vessel_data;", conn)
+        conn.execute(
+            "INSERT INTO anomaly_runs (run_id, status, started_at, gap_minutes, data_start, data_end) VALUES (?, ?, ?, ?, ?, ?);",
+            (run_id, "RUNNING", started, gap_minutes, bounds["s"].iloc[0], bounds["e"].iloc[0]),
+        )
+        conn.commit()
+
+        shards = plan_shards(conn, workers * 4 if workers > 1 else 1)
+        tasks = [(db_path, lo, hi, chunk_rows, gap_minutes) for lo, hi in shards]
+        results = []
+        status = {"run_id": run_id, "shards": len(tasks), "shards_done": 0, "rows_scanned": 0, "anomalies": 0}
+        try:
+            if workers > 1 and len(tasks) > 1:
+                with ProcessPoolExecutor(max_workers=workers,
+                                         mp_context=multiprocessing.get_context(START_METHOD)) as pool:
+                    outputs = pool.map(_scan_shard_args, tasks)
+                    for anomalies, scanned in outputs:
+                        results.append(anomalies)
+                        status.update(shards_done=status["shards_done"] + 1,
+                                      rows_scanned=status["rows_scanned"] + scanned,
+                                      anomalies=status["anomalies"] + len(anomalies))
+                        if progress:
+                            progress(dict(status))
+            else:
+                for task in tasks:
+                    anomalies, scanned = scan_shard(*task)
+                    results.append(anomalies)
+                    status.update(shards_done=status["shards_done"] + 1,
+                                  rows_scanned=status["rows_scanned"] + scanned,
+                                  anomalies=status["anomalies"] + len(anomalies))
+                    if progress:
+                        progress(dict(status))
+
+            found = pd.concat(results, ignore_index=True) if results else pd.DataFrame(columns=ANOMALY_COLUMNS)
+            found = found.astype({"MMSI": "int64"}) if not found.empty else found
+            found["run_id"] = run_id
+            # single writer: swap the previous results for this run's in one transaction
+            with conn:
+                conn.execute("DELETE FROM anomalies;")
+                conn.executemany(
+                    f"INSERT INTO anomalies ({', '.join(ANOMALY_COLUMNS)}, run_id) VALUES ({', '.join('?' * (len(ANOMALY_COLUMNS) + 1))});",
+                    found[ANOMALY_COLUMNS + ["run_id"]].astype(object).where(found.notna(), None).itertuples(index=False, name=None),
+                )
+                conn.execute(
+                    "UPDATE anomaly_runs SET status = ?, finished_at = ?, rows_scanned = ?, anomalies = ?, shards = ? WHERE run_id = ?;",
+                    ("DONE", time.time(), status["rows_scanned"], len(found), len(tasks), run_id),
+                )
+        except Exception as e:
+            conn.execute("UPDATE anomaly_runs SET status = ?, finished_at = ?, error = ? WHERE run_id = ?;",
+                         ("FAILED", time.time(), str(e), run_id))
+            conn.commit()
+            raise
+
+        elapsed = time.time() - started
+        logger.info(f"✅ Anomaly job {run_id}: {status['rows_scanned']} rows, {len(found)} anomalies "
+                    f"in {elapsed:.1f}s across {len(tasks)} shards")
+        return {
+            "run_id": run_id,
+            "status": "DONE",
+            "rows_scanned": status["rows_scanned"],
+            "anomalies": int(len(found)),
+            "by_type": found["anomaly_type"].value_counts().to_dict() if not found.empty else {},
+            "shards": len(tasks),
+            "workers": workers,
+            "seconds": elapsed,
+        }
+    finally:
+        conn.close()
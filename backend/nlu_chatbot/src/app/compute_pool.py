@@ -0,0 +1,282 @@
+"""
+Process-Pool Execution Tier for CPU-bound Work
+spaCy parsing and XGBoost feature extraction / prediction hold the GIL, so threads do not
+scale them. This runs them in worker processes instead:
+- each worker is initialized once with its own MaritimeNLPInterpreter (spaCy model +
+  PhraseMatcher over the vessel list) and a ModelRegistry holding the parent's models
+- tasks are module-level functions taking and returning plain data (DataFrames / dicts),
+  so DB access, traffic-split routing and metrics stay in the API process
+- stage timings measured in a worker (parse / resolve, features / scale / pca / predict)
+  travel back with the result and are added to the calling request (metrics.py)
+- COMPUTE_WORKERS sets the pool size (0 runs tasks in-process on the caller's objects);
+  COMPUTE_START_METHOD picks the multiprocessing start method (spawn by default: the API
+  process already runs threads, which fork does not copy safely)
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+try:
+    from . import metrics
+except ImportError:
+    import metrics
+
+logger = logging.getLogger(__name__)
+
+# per-process state: set by _init_worker in pool workers, by ComputePool in inline mode
+_state: Dict = {}
+
+
+def default_workers() -> int:
+    """COMPUTE_WORKERS, else one worker per core (leaving one for the event loop), at most 4"""
+    configured = os.environ.get("COMPUTE_WORKERS")
+    if configured is not None:
+        return max(0, int(configured))
+    return max(1, min(4, (os.cpu_count() or 2) - 1))
+
+
+def _init_worker(vessel_list: List[str], models: List[Dict]):
+    """Pool initializer: load the heavy, read-only state once per worker process"""
+    try:
+        from .nlp_interpreter import MaritimeNLPInterpreter
+        from .model_registry import ModelRegistry
+    except ImportError:
+        from nlp_interpreter import MaritimeNLPInterpreter
+        from model_registry import ModelRegistry
+
+    started = time.time()
+    _state["nlp"] = MaritimeNLPInterpreter(vessel_list=vessel_list)
+    registry = ModelRegistry()
+    for model in models:
+        registry.register(model["model_id"], model["model_dir"], activate=model.get("active", False))
+    _state["registry"] = registry
+    _state["pid"] = os.getpid()
+    logger.info(f"✅ Compute worker {os.getpid()} ready in {time.time() - started:.1f}s")
+
+
+def _predictor(model_id: str, model_dir: str = None, live_ids: List[str] = None):
+    """Worker-side predictor for a model resolved by the parent. Models registered after the
+    pool started are loaded on first use, an id the parent re-registered from another directory
+    is loaded again, and models the parent no longer has (`live_ids`) are dropped."""
+    registry = _state["registry"]
+    try:
+        predictor = registry.resolve(model_id)[1]
+    except KeyError:
+        if model_dir is None:
+            raise
+        predictor = None
+    if predictor is None or (model_dir is not None and str(getattr(predictor, "model_dir", model_dir)) != model_dir):
+        predictor = registry.register(model_id, model_dir)
+    if live_ids is not None:
+        _prune(registry, model_id, live_ids)
+    return predictor
+
+
+def _prune(registry, model_id: str, live_ids: List[str]):
+    # the requested model stays even when the parent just unregistered it (a pinned predictor)
+    stale = [m["model_id"] for m in registry.list_models() if m["model_id"] not in live_ids and m["model_id"] != model_id]
+    if not stale:
+        return
+    if registry.active_id in stale:
+        registry.activate(model_id)
+    for stale_id in stale:
+        registry.unregister(stale_id)
+
+
+def _traced(fn, *args, **kwargs):
+    """Run a task under its own stage timing -> (result, stages)"""
+    with metrics.collect() as timing:
+        result = fn(*args, **kwargs)
+    return result, timing.stages
+
+
+def ping() -> int:
+    return os.getpid()
+
+
+def parse_query(text: str) -> Dict:
+    return _state["nlp"].parse_query(text)
+
+
+def predict_track(track_df: pd.DataFrame, model_id: str, model_dir: str = None, sequence_length: int = 12,
+                  steps: int = None, horizon_minutes: float = None, predictor=None,
+                  live_ids: List[str] = None) -> Dict:
+    """Single-step prediction, or a multi-step rollout when steps / horizon_minutes is given.
+    In-process callers may pass the predictor they already resolved."""
+    predictor = predictor if predictor is not None else _predictor(model_id, model_dir, live_ids)
+    if steps or horizon_minutes:
+        result = predictor.rollout_trajectory(track_df, steps=steps, horizon_minutes=horizon_minutes,
+                                              sequence_length=sequence_length)
+    else:
+        result = predictor.predict_single_vessel(track_df, sequence_length=sequence_length)
+    result["model_id"] = model_id
+    return result
+
+
+def predict_many(tracks: List[pd.DataFrame], model_id: str, model_dir: str = None,
+                 sequence_length: int = 12, live_ids: List[str] = None) -> List[Dict]:
+    """One task for a chunk of vessels (amortizes the IPC round trip in batch jobs)"""
+    predictor = _predictor(model_id, model_dir, live_ids)
+    return [predict_track(df, model_id, model_dir, sequence_length=sequence_length, predictor=predictor)
+            for df in tracks]
+
+
+class ComputePool:
+    """Dispatches CPU-bound tasks to pre-initialized worker processes"""
+
+    def __init__(self, vessel_list: List[str], registry, nlp_engine=None, workers: int = None,
+                 start_method: str = None):
+        self.vessel_list = list(vessel_list)
+        self.registry = registry
+        self.nlp_engine = nlp_engine
+        self.workers = default_workers() if workers is None else max(0, int(workers))
+        self.start_method = start_method or os.environ.get("COMPUTE_START_METHOD", "spawn")
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._restart_lock = threading.Lock()
+        self.started_seconds = None
+
+    # --- lifecycle ---
+    def _models(self) -> List[Dict]:
+        return [{"model_id": m["model_id"], "model_dir": m["model_dir"], "active": m["active"]}
+                for m in self.registry.list_models()]
+
+    def start(self):
+        """Start the workers and wait until every one has finished loading"""
+        if self.workers == 0:
+            _state.update(nlp=self.nlp_engine, registry=self.registry, pid=os.getpid())
+            logger.info("Compute pool disabled (COMPUTE_WORKERS=0); CPU-bound work runs in-process")
+            return
+        if self._pool is not None:
+            return
+        started = time.time()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_init_worker,
+            initargs=(self.vessel_list, self._models()),
+        )
+        # one ping per worker forces every process up (and through its initializer) now,
+        # not on the first user request
+        pids = {f.result() for f in [self._pool.submit(ping) for _ in range(self.workers * 2)]}
+        self.started_seconds = time.time() - started
+        logger.info(f"✅ Compute pool started: {len(pids)}/{self.workers} workers ({self.start_method}) "
+                    f"in {self.started_seconds:.1f}s")
+
+    def stop(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> Dict:
+        return {"workers": self.workers, "start_method": self.start_method, "running": self._pool is not None,
+                "started_seconds": self.started_seconds}
+
+    # --- dispatch ---
+    def _inline(self, fn, *args, **kwargs):
+        if "nlp" not in _state:
+            _state.update(nlp=self.nlp_engine, registry=self.registry, pid=os.getpid())
+        return _traced(fn, *args, **kwargs)
+
+    @staticmethod
+    def _unwrap(traced):
+        result, stages = traced
+        metrics.add_stages(stages)
+        return result
+
+    def _recover(self, broken: ProcessPoolExecutor, fn, *args, **kwargs):
+        """A worker died (OOM kill, segfault): replace the broken pool once, however many
+        calls saw it fail, and serve this call in-process. Blocking: keep off the event loop."""
+        with self._restart_lock:
+            if self._pool is broken:
+                logger.error("❌ Compute pool broken; restarting workers")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+                self.start()
+        return self._inline(fn, *args, **kwargs)
+
+    def call(self, fn, *args, **kwargs):
+        """Run `fn` on a worker and block for its result (for sync endpoints / job threads)"""
+        pool = self._pool
+        if pool is None:
+            return self._unwrap(self._inline(fn, *args, **kwargs))
+        try:
+            return self._unwrap(pool.submit(_traced, fn, *args, **kwargs).result())
+        except BrokenProcessPool:
+            return self._unwrap(self._recover(pool, fn, *args, **kwargs))
+
+    async def run(self, fn, *args, **kwargs):
+        """Awaitable dispatch for async endpoints; the event loop never runs the CPU work"""
+        loop = asyncio.get_running_loop()
+        pool = self._pool
+        if pool is None:
+            return self._unwrap(await loop.run_in_executor(None, lambda: self._inline(fn, *args, **kwargs)))
+        try:
+            return self._unwrap(await asyncio.wrap_future(pool.submit(_traced, fn, *args, **kwargs)))
+        except BrokenProcessPool:
+            return self._unwrap(await loop.run_in_executor(None, lambda: self._recover(pool, fn, *args, **kwargs)))
+
+    # --- tasks ---
+    def _resolve(self, model_id: str = None, routing_key=None, predictor=None):
+        """Route in the parent (traffic split / active model) and send the worker an explicit id
+        with its directory; a predictor the caller already resolved is used as is"""
+        if predictor is None:
+            model_id, predictor = self.registry.resolve(model_id, routing_key)
+        return model_id, str(getattr(predictor, "model_dir", "")) or None
+
+    def _live_ids(self) -> List[str]:
+        """Models the parent still has; workers drop the others (in-process there is nothing to drop)"""
+        return [m["model_id"] for m in self.registry.list_models()] if self._pool is not None else None
+
+    def _timed(self, model_id: str, fn, *args, **kwargs) -> Dict:
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = self.call(fn, *args, **kwargs)
+            ok = bool(result.get("prediction_available"))
+        finally:
+            self.registry.record_prediction(model_id, time.perf_counter() - start, ok=ok)
+        return result
+
+    async def parse_query(self, text: str) -> Dict:
+        return await self.run(parse_query, text)
+
+    def predict_track(self, track_df: pd.DataFrame, sequence_length: int = 12, model_id: str = None,
+                      routing_key=None, steps: int = None, horizon_minutes: float = None,
+                      predictor=None) -> Dict:
+        """`predictor` (with its `model_id`) pins a model resolved earlier in the request, so it
+        still serves the request if the model is unregistered meanwhile"""
+        resolved_id, model_dir = self._resolve(model_id, routing_key, predictor)
+        # workers load their own copy from model_dir; in-process the object is used directly
+        inline = predictor if self._pool is None else None
+        return self._timed(resolved_id, predict_track, track_df, resolved_id, model_dir,
+                           sequence_length=sequence_length, steps=steps, horizon_minutes=horizon_minutes,
+                           predictor=inline, live_ids=self._live_ids())
+
+    def predict_many(self, tracks: List[pd.DataFrame], sequence_length: int = 12, model_id: str = None,
+                     chunk_size: int = 16) -> List[Dict]:
+        """Predict a batch of vessel tracks, spread over every worker in chunks"""
+        resolved_id, model_dir = self._resolve(model_id)
+        chunks = [tracks[i:i + chunk_size] for i in range(0, len(tracks), chunk_size)]
+        start = time.perf_counter()
+        if self._pool is None:
+            results = [r for chunk in chunks for r in self._inline(predict_many, chunk, resolved_id, model_dir,
+                                                                   sequence_length)[0]]
+        else:
+            live_ids = self._live_ids()
+            futures = [self._pool.submit(predict_many, chunk, resolved_id, model_dir, sequence_length, live_ids)
+                       for chunk in chunks]
+            results = [r for f in futures for r in f.result()]
+        # wall time is shared by the whole batch; metrics get the per-vessel average
+        per_vessel = (time.perf_counter() - start) / max(len(results), 1)
+        for result in results:
+            self.registry.record_prediction(resolved_id, per_vessel, ok=bool(result.get("prediction_available")))
+        return results
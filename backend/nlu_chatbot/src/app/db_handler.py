@@ -1,23 +1,87 @@
+import functools
+import os
 import sqlite3
+import time
+import numpy as np
 import pandas as pd
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 import sqlalchemy
 import aiosqlite
 
+try:
+    from .spatial_index import RTREE_TABLE, ensure_spatial_index, epoch_seconds, has_spatial_index, radius_bboxes, split_bbox
+    from .kinematics import haversine_nm
+    from .latest_positions import LATEST_TABLE, ensure_latest_positions, has_latest_positions
+    from .pagination import DEFAULT_PAGE_SIZE, KEYSET_INDEX, next_cursor, page_query
+    from .track_tiers import TIER_PREFIX, TIER_TABLE, bucket_bounds, choose_tier, ensure_track_tiers, has_track_tiers
+    from . import metrics
+    from .query_trace import TRACER
+except ImportError:
+    from spatial_index import RTREE_TABLE, ensure_spatial_index, epoch_seconds, has_spatial_index, radius_bboxes, split_bbox
+    from kinematics import haversine_nm
+    from latest_positions import LATEST_TABLE, ensure_latest_positions, has_latest_positions
+    from pagination import DEFAULT_PAGE_SIZE, KEYSET_INDEX, next_cursor, page_query
+    from track_tiers import TIER_PREFIX, TIER_TABLE, bucket_bounds, choose_tier, ensure_track_tiers, has_track_tiers
+    import metrics
+    from query_trace import TRACER
+
+# rows per fetchmany() batch for streamed exports
+STREAM_BATCH_ROWS = 5000
+# bytes of the DB file read through mmap: pages come straight from the OS page cache,
+# shared by every worker process instead of copied into each connection's cache
+MMAP_BYTES = int(os.environ.get("SQLITE_MMAP_BYTES", 1 << 30))
+
+
+def _configure_connection(conn):
+    conn.execute(f"PRAGMA mmap_size={MMAP_BYTES};")
+
+
+# read methods (decorated with @timed_read) timed into maritime_db_call_seconds{method}
+# and the request's "db" stage
+READ_METHODS: List[str] = []
+
+
+def timed_read(method):
+    name = method.__name__
+    READ_METHODS.append(name)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            with metrics.stage("db"):
+                return method(self, *args, **kwargs)
+        finally:
+            metrics.DB_CALLS.inc(method=name)
+            metrics.DB_SECONDS.observe(time.perf_counter() - start, method=name)
+    return wrapper
+
 
 class MaritimeDB:
     def __init__(self, db_path: str):
         self.db_path = db_path
+        # every statement is reported to the tracer (see query_trace.py, /admin/slow_queries)
+        self.tracer = TRACER
         # Prefer SQLAlchemy engine for connection pooling when available
         try:
             from sqlalchemy import create_engine
             # Use check_same_thread via connect_args for sqlite
             self.engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False}, pool_pre_ping=True)
+            sqlalchemy.event.listen(self.engine, "connect", lambda dbapi_conn, _: _configure_connection(dbapi_conn))
             self.conn = None
         except Exception:
             self.engine = None
             # synchronous fallback connection used by legacy codepaths
             self.conn = sqlite3.connect(db_path, check_same_thread=False)
+            _configure_connection(self.conn)
+
+    def after_fork(self):
+        """Call in a forked worker: never reuse the parent's pooled SQLite connections"""
+        if self.engine is not None:
+            self.engine.dispose(close=False)
+        else:
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            _configure_connection(self.conn)
 
     # --- Async helpers (useful for FastAPI endpoints to avoid blocking) ---
     async def async_fetch(self, query: str, params: tuple = (), limit: Optional[int] = None) -> pd.DataFrame:
@@ -25,9 +89,7 @@ class MaritimeDB:
             import aiosqlite
         except Exception:
             # fallback to sync call if aiosqlite not available
-            if self.engine is not None:
-                return pd.read_sql_query(query, con=self.engine, params=params)
-            return pd.read_sql_query(query, self.conn, params=params)
+            return self._read(query, params)
 
         async with aiosqlite.connect(self.db_path) as db:
             db.row_factory = aiosqlite.Row
@@ -35,10 +97,12 @@ class MaritimeDB:
                 # append limit if not present
                 if "LIMIT" not in query.upper():
                     query = query.rstrip("; ") + f" LIMIT {limit};"
+            start = time.perf_counter()
             async with db.execute(query, params) as cur:
                 cols = [c[0] for c in cur.description]
                 rows = await cur.fetchall()
-                return pd.DataFrame([dict(zip(cols, r)) for r in rows])
+            await self.tracer.record_async(self.db_path, query, params, time.perf_counter() - start, len(rows))
+            return pd.DataFrame([dict(zip(cols, r)) for r in rows])
 
     def create_tables(self):
         query = """
@@ -63,6 +127,7 @@ class MaritimeDB:
                 try:
                     conn.execute(text("CREATE INDEX IF NOT EXISTS idx_vessel_mmsi ON vessel_data(MMSI);"))
                     conn.execute(text("CREATE INDEX IF NOT EXISTS idx_vessel_basedatetime ON vessel_data(BaseDateTime);"))
+                    conn.execute(text(KEYSET_INDEX))
                 except Exception:
                     pass
             # Try to set pragmatic PRAGMAs for better concurrent reads on sqlite
@@ -78,42 +143,45 @@ class MaritimeDB:
             try:
                 self.conn.execute("CREATE INDEX IF NOT EXISTS idx_vessel_mmsi ON vessel_data(MMSI);")
                 self.conn.execute("CREATE INDEX IF NOT EXISTS idx_vessel_basedatetime ON vessel_data(BaseDateTime);")
+                self.conn.execute(KEYSET_INDEX)
                 self.conn.commit()
             except Exception:
                 # if index creation fails, continue without raising (admin can create later)
                 pass
 
+    @timed_read
     def get_all_vessel_names(self) -> List[str]:
         query = "SELECT DISTINCT VesselName FROM vessel_data WHERE VesselName IS NOT NULL;"
-        if self.engine is not None:
-            df = pd.read_sql_query(query, con=self.engine)
-        else:
-            df = pd.read_sql_query(query, self.conn)
+        df = self._read(query, ())
         # return cleaned list
         return df['VesselName'].astype(str).str.strip().tolist()
 
+    @timed_read
     def search_vessels_prefix(self, prefix: str, limit: int = 50) -> List[str]:
         """Return up to `limit` vessel names matching the given prefix (case-insensitive).
         This avoids loading all vessel names at once for large DBs.
         """
         pattern = prefix.strip().lower() + "%"
         query = "SELECT DISTINCT VesselName FROM vessel_data WHERE LOWER(VesselName) LIKE ? ORDER BY VesselName ASC LIMIT ?;"
-        if self.engine is not None:
-            df = pd.read_sql_query(query, con=self.engine, params=(pattern, limit))
-        else:
-            df = pd.read_sql_query(query, self.conn, params=(pattern, limit))
+        df = self._read(query, (pattern, limit))
         return df['VesselName'].astype(str).str.strip().tolist()
 
+    @timed_read
     def get_unique_vessels_df(self) -> pd.DataFrame:
-        """Return a DataFrame with distinct VesselName values (cleaned)."""
+        """Return a DataFrame with distinct VesselName values (cleaned), plus last_seen when the
+        latest_position snapshot exists (read from the snapshot, not vessel_data)."""
+        if self.has_latest_positions():
+            query = f"SELECT VesselName, MAX(BaseDateTime) AS last_seen FROM {LATEST_TABLE} WHERE VesselName IS NOT NULL GROUP BY VesselName;"
+            df = self._read(query, ())
+            df['VesselName'] = df['VesselName'].astype(str).str.strip()
+            df = df.sort_values('last_seen').drop_duplicates('VesselName', keep='last')
+            return df.sort_values('VesselName').reset_index(drop=True)
         query = "SELECT DISTINCT VesselName FROM vessel_data WHERE VesselName IS NOT NULL;"
-        if self.engine is not None:
-            df = pd.read_sql_query(query, con=self.engine)
-        else:
-            df = pd.read_sql_query(query, self.conn)
+        df = self._read(query, ())
         df['VesselName'] = df['VesselName'].astype(str).str.strip()
         return df.dropna().drop_duplicates().sort_values('VesselName').reset_index(drop=True)
 
+    @timed_read
     def fetch_vessel_by_name_like(self, vessel_name_pattern: str, limit: int = 1000) -> pd.DataFrame:
         """Perform a case-insensitive LIKE query on VesselName.
         vessel_name_pattern should include '%' wildcards as needed.
@@ -124,10 +192,9 @@ class MaritimeDB:
         ORDER BY BaseDateTime ASC
         LIMIT ?;
         """
-        if self.engine is not None:
-            return pd.read_sql_query(query, con=self.engine, params=(vessel_name_pattern, limit))
-        return pd.read_sql_query(query, self.conn, params=(vessel_name_pattern, limit))
+        return self._read(query, (vessel_name_pattern, limit))
 
+    @timed_read
     def fetch_vessel_by_name_at_or_before(self, vessel_name: str, target_dt: str) -> pd.DataFrame:
         """Return the single row for vessel_name with BaseDateTime <= target_dt ordered by BaseDateTime DESC limit 1"""
         query = """
@@ -136,10 +203,9 @@ class MaritimeDB:
         ORDER BY BaseDateTime DESC
         LIMIT 1;
         """
-        if self.engine is not None:
-            return pd.read_sql_query(query, con=self.engine, params=(vessel_name, target_dt))
-        return pd.read_sql_query(query, self.conn, params=(vessel_name, target_dt))
+        return self._read(query, (vessel_name, target_dt))
 
+    @timed_read
     def fetch_vessel_by_mmsi_at_or_before(self, mmsi: int, target_dt: str) -> pd.DataFrame:
         query = """
         SELECT * FROM vessel_data
@@ -147,37 +213,37 @@ class MaritimeDB:
         ORDER BY BaseDateTime DESC
         LIMIT 1;
         """
-        if self.engine is not None:
-            return pd.read_sql_query(query, con=self.engine, params=(int(mmsi), target_dt))
-        return pd.read_sql_query(query, self.conn, params=(int(mmsi), target_dt))
+        return self._read(query, (int(mmsi), target_dt))
 
+    @timed_read
     def fetch_track_ending_at(self, vessel_name: str = None, mmsi: int = None, end_dt: str = None, limit: int = 10) -> pd.DataFrame:
-        """Return up to `limit` rows for the vessel with BaseDateTime <= end_dt ordered ASC (oldest->newest)
+        """Return the latest `limit` rows for the vessel with BaseDateTime <= end_dt ordered ASC (oldest->newest)
         If vessel_name provided, use it; otherwise use mmsi.
         """
         if vessel_name:
             query = """
-            SELECT * FROM vessel_data
-            WHERE VesselName = ? AND BaseDateTime <= ?
-            ORDER BY BaseDateTime ASC
-            LIMIT ?;
+            SELECT * FROM (
+                SELECT * FROM vessel_data
+                WHERE VesselName = ? AND BaseDateTime <= ?
+                ORDER BY BaseDateTime DESC
+                LIMIT ?
+            ) ORDER BY BaseDateTime ASC;
             """
-            if self.engine is not None:
-                return pd.read_sql_query(query, con=self.engine, params=(vessel_name, end_dt, limit))
-            return pd.read_sql_query(query, self.conn, params=(vessel_name, end_dt, limit))
+            return self._read(query, (vessel_name, end_dt, limit))
         elif mmsi:
             query = """
-            SELECT * FROM vessel_data
-            WHERE MMSI = ? AND BaseDateTime <= ?
-            ORDER BY BaseDateTime ASC
-            LIMIT ?;
+            SELECT * FROM (
+                SELECT * FROM vessel_data
+                WHERE MMSI = ? AND BaseDateTime <= ?
+                ORDER BY BaseDateTime DESC
+                LIMIT ?
+            ) ORDER BY BaseDateTime ASC;
             """
-            if self.engine is not None:
-                return pd.read_sql_query(query, con=self.engine, params=(int(mmsi), end_dt, limit))
-            return pd.read_sql_query(query, self.conn, params=(int(mmsi), end_dt, limit))
+            return self._read(query, (int(mmsi), end_dt, limit))
         else:
             return pd.DataFrame()
 
+    @timed_read
     def fetch_vessel_by_name(self, vessel_name: str, limit: int = 1000) -> pd.DataFrame:
         query = """
         SELECT * FROM vessel_data
@@ -185,10 +251,9 @@ class MaritimeDB:
         ORDER BY BaseDateTime ASC
         LIMIT ?;
         """
-        if self.engine is not None:
-            return pd.read_sql_query(query, con=self.engine, params=(vessel_name, limit))
-        return pd.read_sql_query(query, self.conn, params=(vessel_name, limit))
+        return self._read(query, (vessel_name, limit))
 
+    @timed_read
     def fetch_vessel_by_mmsi(self, mmsi: int, limit: int = 1000) -> pd.DataFrame:
         query = """
         SELECT * FROM vessel_data
@@ -196,19 +261,443 @@ class MaritimeDB:
         ORDER BY BaseDateTime ASC
         LIMIT ?;
         """
-        if self.engine is not None:
-            return pd.read_sql_query(query, con=self.engine, params=(int(mmsi), limit))
-        return pd.read_sql_query(query, self.conn, params=(int(mmsi), limit))
+        return self._read(query, (int(mmsi), limit))
+
+    @timed_read
+    def fetch_by_time_range(self, start: str, end: str, limit: int = 1000,
+                            cursor: str = None) -> Tuple[pd.DataFrame, Optional[str]]:
+        """Fixes in [start, end], oldest first, `limit` at a time -> (rows, next_cursor)
+        (a keyset page, see fetch_page; pass next_cursor back for the following rows)"""
+        return self.fetch_page(start=start, end=end, cursor=cursor, page_size=limit)
+
 
-    def fetch_by_time_range(self, start: str, end: str, limit: int = 1000) -> pd.DataFrame:
+
+    @timed_read
+    def fetch_page(self, start: str = None, end: str = None, mmsi: int = None, vessel_name: str = None,
+                   cursor: str = None, page_size: int = DEFAULT_PAGE_SIZE,
+                   descending: bool = False) -> Tuple[pd.DataFrame, Optional[str]]:
+        """One keyset page of vessel_data ordered by (BaseDateTime, MMSI, rowid) -> (rows, next_cursor)
+
+        Optional time window / vessel filters; pass the returned cursor back (with the same
+        filters) for the next page. next_cursor is None on the last page.
+        Raises ValueError for a malformed or mismatched cursor.
+        """
+        query, params, filters = page_query(start=start, end=end, mmsi=mmsi, vessel_name=vessel_name,
+                                            cursor=cursor, page_size=page_size, descending=descending)
+        df = self._read(query, params)
+        size = params[-1] - 1
+        token = None
+        if len(df) > size:
+            df = df.iloc[:size]
+            token = next_cursor(df.iloc[-1], filters)
+        return df.drop(columns=["_rowid"]), token
+
+    def ensure_keyset_index(self):
+        """(BaseDateTime, MMSI) index that keyset pages walk without sorting"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute(KEYSET_INDEX)
+            conn.commit()
+        finally:
+            conn.close()
+
+    @timed_read
+    def fetch_tracks_in_range(self, start: str, end: str, max_points: int = 1000000) -> pd.DataFrame:
+        """Return every vessel's fixes with start <= BaseDateTime <= end, ordered by MMSI then
+        BaseDateTime ASC, capped at `max_points` rows (input for fleet-wide track validation)."""
         query = """
-        SELECT * FROM vessel_data
+        SELECT MMSI, BaseDateTime, LAT, LON, SOG, COG, Heading, VesselName FROM vessel_data
         WHERE BaseDateTime BETWEEN ? AND ?
-        ORDER BY BaseDateTime ASC
+        ORDER BY MMSI, BaseDateTime ASC
         LIMIT ?;
         """
+        return self._read(query, (start, end, max_points))
+
+    @timed_read
+    def get_latest_timestamp(self) -> Optional[str]:
+        """Newest BaseDateTime in vessel_data (index lookup on idx_vessel_basedatetime)"""
+        query = "SELECT MAX(BaseDateTime) AS latest FROM vessel_data;"
+        df = self._read(query, ())
+        return df['latest'].iloc[0] if not df.empty else None
+
+    @timed_read
+    def fetch_recent_points_per_vessel(self, end_dt: str, start_dt: str, points_per_vessel: int = 5) -> pd.DataFrame:
+        """Return the last `points_per_vessel` rows of every vessel with start_dt <= BaseDateTime <= end_dt,
+        ordered by MMSI then BaseDateTime ASC (input for fleet-wide kinematics)."""
+        query = """
+        SELECT MMSI, BaseDateTime, LAT, LON, SOG, COG, Heading, VesselName FROM (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY MMSI ORDER BY BaseDateTime DESC) AS rn
+            FROM vessel_data
+            WHERE BaseDateTime BETWEEN ? AND ?
+        )
+        WHERE rn <= ?
+        ORDER BY MMSI, BaseDateTime ASC;
+        """
+        return self._read(query, (start_dt, end_dt, points_per_vessel))
+
+    @timed_read
+    def get_latest_anomaly_run(self) -> Optional[dict]:
+        """Most recent finished anomaly screening run (see anomaly_job), or None if never run"""
+        query = "SELECT * FROM anomaly_runs WHERE status = 'DONE' ORDER BY finished_at DESC LIMIT 1;"
+        try:
+            df = self._read(query, ())
+        except Exception:
+            # anomalies tables are created by the first job run
+            return None
+        return df.iloc[0].to_dict() if not df.empty else None
+
+    @timed_read
+    def fetch_anomalies(self, mmsi: int = None, start: str = None, end: str = None,
+                        anomaly_type: str = None, limit: int = 1000) -> pd.DataFrame:
+        """Stored anomalies filtered by MMSI / time range / type (uses idx_anomalies_mmsi_time)"""
+        clauses, params = [], []
+        if mmsi is not None:
+            clauses.append("MMSI = ?")
+            params.append(int(mmsi))
+        if start is not None:
+            clauses.append("BaseDateTime >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("BaseDateTime <= ?")
+            params.append(end)
+        if anomaly_type is not None:
+            clauses.append("anomaly_type = ?")
+            params.append(anomaly_type)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = f"""
+        SELECT * FROM anomalies
+        {where}
+        ORDER BY MMSI, BaseDateTime ASC
+        LIMIT ?;
+        """
+        params.append(limit)
+        return self._read(query, tuple(params))
+
+    # --- Spatial queries (R*Tree prefilter, see spatial_index.py) ---
+    def ensure_spatial_index(self) -> dict:
+        """Create / incrementally update the vessel_rtree index (idempotent)"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            result = ensure_spatial_index(conn)
+        finally:
+            conn.close()
+        self._spatial_ready = True
+        return result
+
+    def has_spatial_index(self) -> bool:
+        if getattr(self, "_spatial_ready", False):
+            return True
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self._spatial_ready = has_spatial_index(conn)
+        finally:
+            conn.close()
+        return self._spatial_ready
+
+    def _fetch_bboxes(self, bboxes, start: str = None, end: str = None, limit: int = None,
+                      columns: str = "v.rowid AS rowid, v.*", group_by: str = None,
+                      order_by: str = None) -> pd.DataFrame:
+        """Rows inside any of `bboxes` (and the optional time range). Uses the R*Tree when
+        present; otherwise a plain LAT/LON range scan. `order_by` + `limit` apply to each
+        box's query, so callers re-sort and trim the merged frame."""
+        indexed = self.has_spatial_index()
+        frames = []
+        for min_lat, min_lon, max_lat, max_lon in bboxes:
+            clauses = ["v.LAT BETWEEN ? AND ?", "v.LON BETWEEN ? AND ?"]
+            params = [min_lat, max_lat, min_lon, max_lon]
+            if indexed:
+                source = f"{RTREE_TABLE} r JOIN vessel_data v ON v.rowid = r.id"
+                clauses = ["r.max_lat >= ?", "r.min_lat <= ?", "r.max_lon >= ?", "r.min_lon <= ?"] + clauses
+                params = [min_lat, max_lat, min_lon, max_lon] + params
+                if start is not None:
+                    clauses.append("r.max_t >= ?")
+                    params.append(epoch_seconds(start))
+                if end is not None:
+                    clauses.append("r.min_t <= ?")
+                    params.append(epoch_seconds(end))
+            else:
+                source = "vessel_data v"
+            if start is not None:
+                clauses.append("v.BaseDateTime >= ?")
+                params.append(start)
+            if end is not None:
+                clauses.append("v.BaseDateTime <= ?")
+                params.append(end)
+            query = f"SELECT {columns} FROM {source} WHERE {' AND '.join(clauses)}"
+            if group_by:
+                query += f" GROUP BY {group_by}"
+            if order_by:
+                query += f" ORDER BY {order_by}"
+            if limit is not None:
+                query += " LIMIT ?"
+                params.append(int(limit))
+            frames.append(self._read(query, tuple(params)))
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        return df.drop_duplicates(subset="rowid") if len(frames) > 1 and "rowid" in df.columns else df
+
+    @timed_read
+    def fetch_in_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+                      start: str = None, end: str = None, limit: int = 10000) -> pd.DataFrame:
+        """Positions inside a lat/lon box (min_lon > max_lon crosses the antimeridian),
+        optionally within [start, end], ordered by BaseDateTime ASC."""
+        df = self._fetch_bboxes(split_bbox(min_lat, min_lon, max_lat, max_lon), start, end, limit=limit,
+                                order_by="v.BaseDateTime ASC")
+        df = df.sort_values("BaseDateTime", kind="mergesort")
+        return (df.head(limit) if limit is not None else df).reset_index(drop=True)
+
+    @timed_read
+    def fetch_within_radius(self, lat: float, lon: float, radius_nm: float, start: str = None,
+                            end: str = None, limit: int = 10000) -> pd.DataFrame:
+        """Positions within `radius_nm` nautical miles of (lat, lon), nearest first, with a
+        distance_nm column. The index returns the enclosing box; haversine refines it."""
+        df = self._fetch_bboxes(radius_bboxes(lat, lon, radius_nm), start, end)
+        if df.empty:
+            return df.assign(distance_nm=pd.Series(dtype=float))
+        df["distance_nm"] = haversine_nm(lat, lon, df["LAT"].to_numpy(dtype=float), df["LON"].to_numpy(dtype=float))
+        df = df[df["distance_nm"].to_numpy() <= radius_nm]
+        df = df.sort_values(["distance_nm", "BaseDateTime"], kind="mergesort")
+        return (df.head(limit) if limit is not None else df).reset_index(drop=True)
+
+    @timed_read
+    def latest_within_radius(self, lat: float, lon: float, radius_nm: float, start: str = None,
+                             end: str = None) -> pd.DataFrame:
+        """Newest fix of every vessel seen in the enclosing box of the radius (within [start, end]),
+        kept when it lies within `radius_nm`; nearest first, with a distance_nm column.
+        One row per vessel comes back from SQLite, however many fixes the window holds."""
+        df = self._fetch_bboxes(radius_bboxes(lat, lon, radius_nm), start, end,
+                                columns="v.rowid AS rowid, v.*, MAX(v.BaseDateTime) AS latest_at",
+                                group_by="v.MMSI")
+        if df.empty:
+            return df.drop(columns="latest_at", errors="ignore").assign(distance_nm=pd.Series(dtype=float))
+        df = df.drop(columns="latest_at")
+        df = df.sort_values(["MMSI", "BaseDateTime"], kind="mergesort").drop_duplicates("MMSI", keep="last")
+        df["distance_nm"] = haversine_nm(lat, lon, df["LAT"].to_numpy(dtype=float), df["LON"].to_numpy(dtype=float))
+        df = df[df["distance_nm"].to_numpy() <= radius_nm]
+        return df.sort_values(["distance_nm", "MMSI"], kind="mergesort").reset_index(drop=True)
+
+    @timed_read
+    def latest_positions_in_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+                                 start: str = None, end: str = None, limit: int = 10000) -> pd.DataFrame:
+        """Newest fix of every vessel seen inside the box (within [start, end] if given)"""
+        # one row per vessel per box: SQLite fills the bare columns from the MAX(BaseDateTime) row
+        df = self._fetch_bboxes(split_bbox(min_lat, min_lon, max_lat, max_lon), start, end, limit=limit,
+                                columns="v.rowid AS rowid, v.*, MAX(v.BaseDateTime) AS latest_at",
+                                group_by="v.MMSI", order_by="latest_at DESC")
+        if df.empty:
+            return df.drop(columns="latest_at", errors="ignore")
+        df = df.drop(columns="latest_at")
+        df = df.sort_values(["MMSI", "BaseDateTime"], kind="mergesort").drop_duplicates("MMSI", keep="last")
+        df = df.sort_values("BaseDateTime", ascending=False, kind="mergesort")
+        return (df.head(limit) if limit is not None else df).reset_index(drop=True)
+
+    # --- Latest-position snapshot (one row per MMSI, see latest_positions.py) ---
+    def ensure_latest_positions(self, rebuild: bool = False) -> dict:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            result = ensure_latest_positions(conn, rebuild=rebuild)
+        finally:
+            conn.close()
+        self._latest_ready = True
+        return result
+
+    def has_latest_positions(self) -> bool:
+        if getattr(self, "_latest_ready", False):
+            return True
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self._latest_ready = has_latest_positions(conn)
+        finally:
+            conn.close()
+        return self._latest_ready
+
+    @timed_read
+    def fetch_latest_position(self, vessel_name: str = None, mmsi: int = None) -> pd.DataFrame:
+        """Newest fix for a vessel from the snapshot (primary-key / name-index lookup).
+        Empty if the snapshot is not built, so callers can fall back to vessel_data."""
+        if not self.has_latest_positions():
+            metrics.cache_lookup("latest_position", False)
+            return pd.DataFrame()
+        if mmsi is not None:
+            query, params = f"SELECT * FROM {LATEST_TABLE} WHERE MMSI = ?;", (int(mmsi),)
+        elif vessel_name:
+            query, params = f"SELECT * FROM {LATEST_TABLE} WHERE VesselName = ? ORDER BY BaseDateTime DESC;", (vessel_name,)
+        else:
+            return pd.DataFrame()
+        df = self._read(query, params)
+        metrics.cache_lookup("latest_position", not df.empty)
+        return df
+
+    @timed_read
+    def fetch_latest_positions(self, since: str = None, limit: int = None) -> pd.DataFrame:
+        """Every vessel's current position (optionally only vessels seen since `since`), newest first"""
+        if not self.has_latest_positions():
+            # no snapshot yet: derive it from vessel_data in one grouped pass
+            where = "WHERE BaseDateTime >= ?" if since else ""
+            query = f"""
+            SELECT * FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY MMSI ORDER BY BaseDateTime DESC) AS rn
+                FROM vessel_data {where}
+            ) WHERE rn = 1 ORDER BY BaseDateTime DESC
+            """
+        else:
+            where = "WHERE BaseDateTime >= ?" if since else ""
+            query = f"SELECT * FROM {LATEST_TABLE} {where} ORDER BY BaseDateTime DESC"
+        params = [since] if since else []
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        df = self._read(query, tuple(params))
+        return df.drop(columns=["rn"], errors="ignore")
+
+    # --- Downsampled track tiers ---
+    def ensure_track_tiers(self, rebuild: bool = False) -> dict:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            result = ensure_track_tiers(conn, rebuild=rebuild)
+        finally:
+            conn.close()
+        self._tiers_ready = True
+        return result
+
+    def has_track_tiers(self) -> bool:
+        if getattr(self, "_tiers_ready", False):
+            return True
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self._tiers_ready = has_track_tiers(conn)
+        finally:
+            conn.close()
+        return self._tiers_ready
+
+    def _read(self, query: str, params: tuple = ()) -> pd.DataFrame:
+        start = time.perf_counter()
         if self.engine is not None:
-            return pd.read_sql_query(query, con=self.engine, params=(start, end, limit))
-        return pd.read_sql_query(query, self.conn, params=(start, end, limit))
+            df = pd.read_sql_query(query, con=self.engine, params=params)
+        else:
+            df = pd.read_sql_query(query, self.conn, params=params)
+        self.tracer.record(self.db_path, query, params, time.perf_counter() - start, len(df))
+        return df
+
+    @timed_read
+    def fetch_track_tiered(self, vessel_name: str = None, mmsi: int = None, start: str = None, end: str = None,
+                           max_points: int = 2000):
+        """Track for one vessel over [start, end] with at most `max_points` fixes -> (df, info)
+
+        Uses the raw fixes when they fit, otherwise the finest 1 min / 10 min / 1 h tier that
+        does (each tier row carries `n_points`, the raw fixes it stands for). If even the hourly
+        tier is over budget it is thinned evenly, keeping both endpoints.
+        """
+        if mmsi is None and vessel_name:
+            latest = self.fetch_latest_position(vessel_name=vessel_name)
+            if latest.empty:
+                latest = self._read("SELECT MMSI FROM vessel_data WHERE VesselName = ? LIMIT 1;", (vessel_name,))
+            if latest.empty:
+                return pd.DataFrame(), {"tier_seconds": None, "points": 0, "raw_points": 0}
+            mmsi = latest["MMSI"].iloc[0]
+        if mmsi is None:
+            return pd.DataFrame(), {"tier_seconds": None, "points": 0, "raw_points": 0}
+        mmsi = int(mmsi)
+        start = start or "0000"
+        end = end or "9999"
+
+        counts = {0: int(self._read(
+            "SELECT COUNT(*) AS n FROM vessel_data WHERE MMSI = ? AND BaseDateTime BETWEEN ? AND ?;",
+            (mmsi, start, end))["n"].iloc[0])}
+        if counts[0] > max_points and self.has_track_tiers():
+            for tier in TIER_PREFIX:
+                lo, hi = bucket_bounds(start, end, tier)
+                counts[tier] = int(self._read(
+                    f"SELECT COUNT(*) AS n FROM {TIER_TABLE} WHERE tier = ? AND MMSI = ? AND bucket BETWEEN ? AND ?;",
+                    (tier, mmsi, lo, hi))["n"].iloc[0])
+        tier = choose_tier(counts, max_points)
+        if tier is None:
+            tier = max(counts)
+        if counts[0] > max_points:
+            # over budget: a hit is served from a downsampled tier, a miss thins raw fixes
+            metrics.cache_lookup("track_tier", tier != 0)
+
+        if tier == 0:
+            df = self._read(
+                "SELECT * FROM vessel_data WHERE MMSI = ? AND BaseDateTime BETWEEN ? AND ? ORDER BY BaseDateTime ASC;",
+                (mmsi, start, end))
+            df["n_points"] = 1
+        else:
+            lo, hi = bucket_bounds(start, end, tier)
+            df = self._read(
+                f"""
+                SELECT MMSI, BaseDateTime, LAT, LON, SOG, COG, Heading, VesselName, n_points FROM {TIER_TABLE}
+                WHERE tier = ? AND MMSI = ? AND bucket BETWEEN ? AND ? ORDER BY bucket ASC;
+                """,
+                (tier, mmsi, lo, hi))
+        if len(df) > max_points:
+            keep = np.unique(np.linspace(0, len(df) - 1, max_points).round().astype(int))
+            df = df.iloc[keep].reset_index(drop=True)
+        return df, {"tier_seconds": tier, "points": int(len(df)), "raw_points": counts[0]}
+
+    # --- Streaming reads (cursor + fetchmany, one DataFrame per batch) ---
+    def iter_query(self, query: str, params: tuple = (), batch_rows: int = None) -> Iterator[pd.DataFrame]:
+        """Run `query` on a dedicated read-only connection and yield DataFrames of at most
+        `batch_rows` rows, so callers can stream results without materializing them.
+
+        The connection allows use from other threads (StreamingResponse advances sync
+        generators in a threadpool) and is closed when the generator finishes or is closed.
+        The statement is traced once, with the time spent in SQLite (not in the consumer).
+        """
+        batch_rows = batch_rows or STREAM_BATCH_ROWS
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        _configure_connection(conn)
+        seconds, total = 0.0, 0
+        try:
+            start = time.perf_counter()
+            cur = conn.execute(query, params)
+            columns = [c[0] for c in cur.description]
+            while True:
+                rows = cur.fetchmany(batch_rows)
+                seconds += time.perf_counter() - start
+                if not rows:
+                    break
+                total += len(rows)
+                yield pd.DataFrame.from_records(rows, columns=columns)
+                start = time.perf_counter()
+        finally:
+            conn.close()
+            self.tracer.record(self.db_path, query, params, seconds, total)
+
+    def column_types(self, table: str = "vessel_data") -> Dict[str, str]:
+        """Declared SQLite column types (INTEGER / REAL / TEXT) for typing streamed batches"""
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        try:
+            return {row[1]: (row[2] or "").upper() for row in conn.execute(f"PRAGMA table_info({table});")}
+        finally:
+            conn.close()
 
+    def iter_track(self, vessel_name: str = None, mmsi: int = None, start: str = None, end: str = None,
+                   batch_rows: int = None) -> Iterator[pd.DataFrame]:
+        """Full-resolution track for one vessel over [start, end], oldest first"""
+        key, value = ("MMSI", int(mmsi)) if mmsi is not None else ("VesselName", vessel_name)
+        query = f"""
+        SELECT * FROM vessel_data
+        WHERE {key} = ? AND BaseDateTime BETWEEN ? AND ?
+        ORDER BY BaseDateTime ASC;
+        """
+        return self.iter_query(query, (value, start or "0000", end or "9999"), batch_rows)
+
+    def iter_time_range(self, start: str, end: str, batch_rows: int = None) -> Iterator[pd.DataFrame]:
+        """Every fix with start <= BaseDateTime <= end, in time order (unbounded export)"""
+        query = """
+        SELECT * FROM vessel_data
+        WHERE BaseDateTime BETWEEN ? AND ?
+        ORDER BY BaseDateTime ASC;
+        """
+        return self.iter_query(query, (start, end), batch_rows)
 
+    def iter_latest_positions(self, since: str = None, batch_rows: int = None) -> Iterator[pd.DataFrame]:
+        """Every vessel's current position from the snapshot, newest first"""
+        if not self.has_latest_positions():
+            # fall back to the one-shot derivation, split into batches
+            df = self.fetch_latest_positions(since=since)
+            batch_rows = batch_rows or STREAM_BATCH_ROWS
+            return (df.iloc[i:i + batch_rows] for i in range(0, len(df), batch_rows))
+        where = "WHERE BaseDateTime >= ?" if since else ""
+        return self.iter_query(f"SELECT * FROM {LATEST_TABLE} {where} ORDER BY BaseDateTime DESC;",
+                               (since,) if since else (), batch_rows)
@@ -4,9 +4,19 @@ Provides async access to SQLite database using aiosqlite
 """
 import aiosqlite
 import pandas as pd
-from typing import List, Optional, Dict, Any
+import time
+from typing import List, Optional, Dict, Any, Tuple
 import logging
 
+try:
+    from .db_handler import MMAP_BYTES
+    from .pagination import DEFAULT_PAGE_SIZE, next_cursor, page_query
+    from .query_trace import TRACER
+except ImportError:
+    from db_handler import MMAP_BYTES
+    from pagination import DEFAULT_PAGE_SIZE, next_cursor, page_query
+    from query_trace import TRACER
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,11 +26,13 @@ class MaritimeDBAsync:
     def __init__(self, db_path: str):
         self.db_path = db_path
         self.conn = None
+        self.tracer = TRACER
     
     async def connect(self):
         """Establish async connection to database"""
         try:
             self.conn = await aiosqlite.connect(self.db_path)
+            await self.conn.execute(f"PRAGMA mmap_size={MMAP_BYTES};")
             logger.info(f"✅ Async DB connection established: {self.db_path}")
         except Exception as e:
             logger.error(f"❌ Failed to connect to async DB: {e}")
@@ -32,13 +44,21 @@ class MaritimeDBAsync:
             await self.conn.close()
             logger.info("Async DB connection closed")
     
+    async def _fetch(self, query: str, params: tuple = ()) -> Tuple[List[tuple], List[str]]:
+        """Run a read and report it to the query tracer -> (rows, column names)"""
+        start = time.perf_counter()
+        async with self.conn.execute(query, params) as cursor:
+            rows = await cursor.fetchall()
+            cols = [desc[0] for desc in cursor.description]
+        await self.tracer.record_async(self.db_path, query, params, time.perf_counter() - start, len(rows))
+        return rows, cols
+
     async def get_all_vessel_names(self) -> List[str]:
         """Get all unique vessel names"""
         try:
             query = "SELECT DISTINCT VesselName FROM vessel_data WHERE VesselName IS NOT NULL AND VesselName != 'nan' ORDER BY VesselName"
-            async with self.conn.execute(query) as cursor:
-                rows = await cursor.fetchall()
-                return [row[0] for row in rows if row[0]]
+            rows, _ = await self._fetch(query)
+            return [row[0] for row in rows if row[0]]
         except Exception as e:
             logger.error(f"Error fetching vessel names: {e}")
             return []
@@ -55,9 +75,8 @@ class MaritimeDBAsync:
                 ORDER BY VesselName 
                 LIMIT ?
             """
-            async with self.conn.execute(query, (f"{prefix_lower}%", limit)) as cursor:
-                rows = await cursor.fetchall()
-                return [row[0] for row in rows if row[0]]
+            rows, _ = await self._fetch(query, (f"{prefix_lower}%", limit))
+            return [row[0] for row in rows if row[0]]
         except Exception as e:
             logger.error(f"Error searching vessels: {e}")
             return []
@@ -74,13 +93,11 @@ class MaritimeDBAsync:
                 ORDER BY BaseDateTime DESC 
                 LIMIT 1
             """
-            async with self.conn.execute(query, (vessel_name, target_dt)) as cursor:
-                row = await cursor.fetchone()
-                if row:
-                    # Convert to dict
-                    cols = [desc[0] for desc in cursor.description]
-                    return dict(zip(cols, row))
-                return None
+            rows, cols = await self._fetch(query, (vessel_name, target_dt))
+            if rows:
+                # Convert to dict
+                return dict(zip(cols, rows[0]))
+            return None
         except Exception as e:
             logger.error(f"Error fetching vessel: {e}")
             return None
@@ -97,57 +114,90 @@ class MaritimeDBAsync:
                 AND BaseDateTime >= datetime(?, '-' || ? || ' minutes')
                 ORDER BY BaseDateTime ASC
             """
-            async with self.conn.execute(
-                query, (vessel_name, end_dt, end_dt, duration_minutes)
-            ) as cursor:
-                rows = await cursor.fetchall()
-                if rows:
-                    cols = [desc[0] for desc in cursor.description]
-                    return [dict(zip(cols, row)) for row in rows]
-                return []
+            rows, cols = await self._fetch(query, (vessel_name, end_dt, end_dt, duration_minutes))
+            return [dict(zip(cols, row)) for row in rows]
         except Exception as e:
             logger.error(f"Error fetching track: {e}")
             return []
     
     async def fetch_by_time_range(
-        self, start_dt: str, end_dt: str, limit: int = 500
-    ) -> List[Dict[str, Any]]:
-        """Fetch all vessel data in time range (async)"""
+        self, start_dt: str, end_dt: str, limit: int = 500, cursor: str = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Fixes in [start_dt, end_dt], newest first, `limit` at a time -> (rows, next_cursor) (async)"""
         try:
-            query = """
-                SELECT * FROM vessel_data 
-                WHERE BaseDateTime >= ? 
-                AND BaseDateTime <= ? 
-                ORDER BY BaseDateTime DESC 
-                LIMIT ?
-            """
-            async with self.conn.execute(query, (start_dt, end_dt, limit)) as cursor:
-                rows = await cursor.fetchall()
-                if rows:
-                    cols = [desc[0] for desc in cursor.description]
-                    return [dict(zip(cols, row)) for row in rows]
-                return []
+            return await self.fetch_page(start_dt=start_dt, end_dt=end_dt, cursor=cursor, page_size=limit,
+                                         descending=True)
+        except ValueError:
+            raise
         except Exception as e:
             logger.error(f"Error fetching by time range: {e}")
+            return [], None
+
+    async def fetch_page(
+        self, start_dt: str = None, end_dt: str = None, mmsi: int = None, vessel_name: str = None,
+        cursor: str = None, page_size: int = DEFAULT_PAGE_SIZE, descending: bool = False
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One keyset page ordered by (BaseDateTime, MMSI, rowid) -> (rows, next_cursor) (async)
+
+        Cursors are interchangeable with MaritimeDB.fetch_page; ValueError for a bad cursor.
+        """
+        query, params, filters = page_query(start=start_dt, end=end_dt, mmsi=mmsi, vessel_name=vessel_name,
+                                            cursor=cursor, page_size=page_size, descending=descending)
+        rows, cols = await self._fetch(query, params)
+        records = [dict(zip(cols, row)) for row in rows]
+        size = params[-1] - 1
+        token = None
+        if len(records) > size:
+            records = records[:size]
+            token = next_cursor(records[-1], filters)
+        for record in records:
+            record.pop("_rowid", None)
+        return records, token
+
+    async def fetch_latest_position(self, vessel_name: str = None, mmsi: int = None) -> List[Dict[str, Any]]:
+        """Newest fix for a vessel from the latest_position snapshot (async)"""
+        try:
+            if mmsi is not None:
+                query, params = "SELECT * FROM latest_position WHERE MMSI = ?", (int(mmsi),)
+            else:
+                query, params = "SELECT * FROM latest_position WHERE VesselName = ? ORDER BY BaseDateTime DESC", (vessel_name,)
+            rows, cols = await self._fetch(query, params)
+            return [dict(zip(cols, row)) for row in rows]
+        except Exception as e:
+            logger.error(f"Error fetching latest position: {e}")
             return []
-    
+
     async def get_unique_vessels_df(self) -> pd.DataFrame:
         """Get unique vessels as DataFrame (async)"""
         try:
-            query = """
-                SELECT DISTINCT VesselName, COUNT(*) as record_count, 
-                       MIN(BaseDateTime) as first_seen, 
-                       MAX(BaseDateTime) as last_seen
-                FROM vessel_data 
-                WHERE VesselName IS NOT NULL AND VesselName != 'nan'
-                GROUP BY VesselName 
-                ORDER BY record_count DESC
-            """
-            async with self.conn.execute(query) as cursor:
-                rows = await cursor.fetchall()
-                cols = [desc[0] for desc in cursor.description]
-                data = [dict(zip(cols, row)) for row in rows]
-                return pd.DataFrame(data)
+            # the latest_position snapshot carries per-vessel counters; avoid a full vessel_data scan
+            async with self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_latest_position_upsert'"
+            ) as cursor:
+                source = "latest_position" if await cursor.fetchone() else None
+            if source:
+                query = """
+                    SELECT VesselName, SUM(fix_count) as record_count,
+                           MIN(first_seen) as first_seen,
+                           MAX(BaseDateTime) as last_seen
+                    FROM latest_position
+                    WHERE VesselName IS NOT NULL AND VesselName != 'nan'
+                    GROUP BY VesselName
+                    ORDER BY record_count DESC
+                """
+            else:
+                query = """
+                    SELECT DISTINCT VesselName, COUNT(*) as record_count, 
+                           MIN(BaseDateTime) as first_seen, 
+                           MAX(BaseDateTime) as last_seen
+                    FROM vessel_data 
+                    WHERE VesselName IS NOT NULL AND VesselName != 'nan'
+                    GROUP BY VesselName 
+                    ORDER BY record_count DESC
+                """
+            rows, cols = await self._fetch(query)
+            data = [dict(zip(cols, row)) for row in rows]
+            return pd.DataFrame(data)
         except Exception as e:
             logger.error(f"Error getting unique vessels: {e}")
             return pd.DataFrame()
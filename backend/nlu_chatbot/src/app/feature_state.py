@@ -0,0 +1,138 @@
+"""
+Streaming Per-Vessel Feature State for Continuous AIS Monitoring
+Each MMSI keeps a RollingFeatureWindow of its last T fixes; a new AIS point is
+pushed in constant time (independent of track length) and the 483-feature vector
+is cached until the next point, so a prediction only runs scaler -> PCA -> model
+States live in a bounded, thread-safe LRU keyed by MMSI
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .rolling_features import BASE_COLUMNS, RollingFeatureWindow
+except ImportError:
+    from rolling_features import BASE_COLUMNS, RollingFeatureWindow
+
+logger = logging.getLogger(__name__)
+
+
+class VesselFeatureState:
+    """Rolling window + cached features / prediction for one vessel"""
+
+    def __init__(self, mmsi: int, window_size: int = 12):
+        self.mmsi = mmsi
+        self.window_size = window_size
+        self.window: Optional[RollingFeatureWindow] = None
+        self._pending = []  # rows collected until the window is full
+        self.last_timestamp: Optional[pd.Timestamp] = None
+        self.last_row: Dict = {}
+        self.updates = 0
+        self._features: Optional[np.ndarray] = None
+        # last prediction per predictor instance (states may be shared across registry models)
+        self.cached_predictions: Dict[int, Dict] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.window is not None
+
+    def update(self, point: Dict) -> bool:
+        """Push one AIS fix (dict with LAT, LON, SOG, COG, Heading, VesselType, BaseDateTime)
+
+        Out-of-order or duplicate timestamps are ignored; returns True if the state changed.
+        """
+        ts = pd.to_datetime(point.get("BaseDateTime"), errors="coerce")
+        if pd.notna(ts) and self.last_timestamp is not None and ts <= self.last_timestamp:
+            return False
+
+        row = [point.get(col) for col in BASE_COLUMNS]
+        row = [np.nan if v is None else float(v) for v in row]
+        if self.window is not None:
+            self.window.push(row)
+        else:
+            self._pending.append(row)
+            if len(self._pending) >= self.window_size:
+                self.window = RollingFeatureWindow(np.array(self._pending[-self.window_size:]))
+                self._pending = []
+
+        if pd.notna(ts):
+            self.last_timestamp = ts
+        self.last_row = dict(point)
+        self.updates += 1
+        self._features = None
+        self.cached_predictions = {}
+        return True
+
+    def features(self) -> np.ndarray:
+        """(1, 483) feature row, computed once per update"""
+        if self.window is None:
+            raise RuntimeError(f"Feature state for MMSI {self.mmsi} has fewer than {self.window_size} points")
+        if self._features is None:
+            self._features = self.window.features()
+        return self._features
+
+    def window_frame(self) -> pd.DataFrame:
+        """Current window as a DataFrame of base columns (used by DEMO mode)"""
+        rows = self.window.raw if self.window is not None else np.array(self._pending)
+        return pd.DataFrame(rows, columns=BASE_COLUMNS)
+
+
+class FeatureStateCache:
+    """Bounded LRU of VesselFeatureState keyed by MMSI"""
+
+    def __init__(self, max_vessels: int = 10000, window_size: int = 12):
+        self.max_vessels = max_vessels
+        self.window_size = window_size
+        self._states: "OrderedDict[int, VesselFeatureState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, mmsi: int) -> Optional[VesselFeatureState]:
+        with self._lock:
+            state = self._states.get(int(mmsi))
+            if state is None:
+                self.misses += 1
+                return None
+            self._states.move_to_end(int(mmsi))
+            self.hits += 1
+            return state
+
+    def get_or_create(self, mmsi: int) -> VesselFeatureState:
+        mmsi = int(mmsi)
+        with self._lock:
+            state = self._states.get(mmsi)
+            if state is None:
+                state = VesselFeatureState(mmsi, self.window_size)
+                self._states[mmsi] = state
+                if len(self._states) > self.max_vessels:
+                    self._states.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._states.move_to_end(mmsi)
+            return state
+
+    def discard(self, mmsi: int):
+        with self._lock:
+            self._states.pop(int(mmsi), None)
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "vessels": len(self._states),
+                "max_vessels": self.max_vessels,
+                "window_size": self.window_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
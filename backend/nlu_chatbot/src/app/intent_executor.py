@@ -1,22 +1,40 @@
 try:
     from .db_handler import MaritimeDB
+    from .kinematics import fit_motion, project_positions
+    from .track_validation import verify_from_anomalies, verify_track
+    from . import metrics
 except ImportError:
     from db_handler import MaritimeDB
+    from kinematics import fit_motion, project_positions
+    from track_validation import verify_from_anomalies, verify_track
+    import metrics
 
 from typing import Dict, Optional
 import re
 import pandas as pd
-import math
 from datetime import datetime, timedelta
 import difflib
 
 # maximum tolerance when matching a requested datetime (minutes)
 TIME_TOLERANCE_MINUTES = 30
+# history rows fetched for model-based PREDICT rollouts
+PREDICT_HISTORY_POINTS = 12
+# most recent fixes scored by VERIFY
+VERIFY_HISTORY_POINTS = 50
+# NEARBY: positions reported within this window before the reference time count as "current"
+NEARBY_LOOKBACK_MINUTES = 60
+NEARBY_PAGE_SIZE = 20
+LATEST_DT = "2099-12-31 23:59:59"
 
 class IntentExecutor:
-    def __init__(self, db: MaritimeDB, time_tolerance_minutes: int = 30):
+    def __init__(self, db: MaritimeDB, time_tolerance_minutes: int = 30, predictor=None, compute=None):
+        """`predictor` is anything with rollout_trajectory() (XGBoostPredictor or ModelRegistry);
+        without it PREDICT uses dead reckoning only. With a `compute` pool (compute_pool.py) the
+        rollout runs on a worker process, routed through the pool's registry."""
         self.db = db
         self.time_tolerance_minutes = time_tolerance_minutes
+        self.predictor = predictor
+        self.compute = compute
 
     def handle(self, parsed: Dict):
         intent = parsed.get("intent")
@@ -33,7 +51,32 @@ class IntentExecutor:
         if vessel_name and vessel_name.isdigit() and not mmsi:
             mmsi = vessel_name
 
+        if intent == "NEARBY":
+            return self._nearby(parsed)
+
         if intent == "SHOW":
+            # no datetime: answer from the latest_position snapshot (one indexed row)
+            if not requested_dt_str and hasattr(self.db, "fetch_latest_position"):
+                try:
+                    latest = self.db.fetch_latest_position(vessel_name=vessel_name if not mmsi else None,
+                                                           mmsi=int(mmsi) if mmsi else None)
+                except Exception:
+                    latest = pd.DataFrame()
+                if not latest.empty:
+                    last_row = latest.iloc[0]
+                    track_df = self.db.fetch_track_ending_at(mmsi=int(last_row.MMSI), end_dt=last_row.BaseDateTime, limit=10)
+                    track = track_df.to_dict(orient='records') if not track_df.empty else []
+                    return {
+                        "VesselName": last_row.VesselName,
+                        "LAT": float(last_row.LAT),
+                        "LON": float(last_row.LON),
+                        "SOG": float(last_row.SOG),
+                        "COG": float(last_row.COG),
+                        "BaseDateTime": last_row.BaseDateTime,
+                        "track": track[::-1],  # return newest first
+                        "message": f"Last known position for {last_row.VesselName} at {last_row.BaseDateTime}: {last_row.LAT}, {last_row.LON} (MMSI {int(last_row.MMSI)})"
+                    }
+
             if mmsi:
                 df = self.db.fetch_vessel_by_mmsi(int(mmsi), limit=1000)
             elif vessel_name:
@@ -50,7 +93,8 @@ class IntentExecutor:
                     try:
                         from rapidfuzz import process
                         vessel_candidates = self.db.get_all_vessel_names()
-                        best = process.extractOne(vessel_name, vessel_candidates)
+                        with metrics.stage("resolve"):
+                            best = process.extractOne(vessel_name, vessel_candidates)
                         if best and best[1] > 80:
                             df = self.db.fetch_vessel_by_name(best[0], limit=1000)
                             # annotate that we matched a similar name
@@ -62,7 +106,8 @@ class IntentExecutor:
                         try:
                             vessel_candidates = self.db.get_all_vessel_names()
                             # get_close_matches returns list of close matches; cutoff 0.7
-                            cm = difflib.get_close_matches(vessel_name, vessel_candidates, n=1, cutoff=0.7)
+                            with metrics.stage("resolve"):
+                                cm = difflib.get_close_matches(vessel_name, vessel_candidates, n=1, cutoff=0.7)
                             if cm:
                                 candidate = cm[0]
                                 df = self.db.fetch_vessel_by_name(candidate, limit=1000)
@@ -113,10 +158,10 @@ class IntentExecutor:
                             start_window = (target_dt - pd.Timedelta(minutes=self.time_tolerance_minutes)).strftime('%Y-%m-%d %H:%M:%S')
                             end_window = (target_dt + pd.Timedelta(minutes=self.time_tolerance_minutes)).strftime('%Y-%m-%d %H:%M:%S')
                             if mmsi:
-                                window_q = self.db.fetch_by_time_range(start_window, end_window, limit=1000)
+                                window_q, _ = self.db.fetch_by_time_range(start_window, end_window, limit=1000)
                                 window_q = window_q[window_q['MMSI'] == int(mmsi)]
                             else:
-                                window_q = self.db.fetch_by_time_range(start_window, end_window, limit=1000)
+                                window_q, _ = self.db.fetch_by_time_range(start_window, end_window, limit=1000)
                                 window_q = window_q[window_q['VesselName'] == vessel_name]
 
                             if not window_q.empty:
@@ -144,12 +189,18 @@ class IntentExecutor:
                     pass
 
         elif intent == "VERIFY":
-            # Verify consistency across last 3 points
+            # Score the most recent track window ending at the requested time (or now)
+            end_dt = LATEST_DT
+            if requested_dt_str:
+                try:
+                    end_dt = pd.to_datetime(requested_dt_str).strftime("%Y-%m-%d %H:%M:%S")
+                except Exception:
+                    pass
             df = pd.DataFrame()
             if mmsi:
-                df = self.db.fetch_vessel_by_mmsi(int(mmsi), limit=3)
+                df = self.db.fetch_track_ending_at(mmsi=int(mmsi), end_dt=end_dt, limit=VERIFY_HISTORY_POINTS)
             elif vessel_name:
-                df = self.db.fetch_vessel_by_name(vessel_name, limit=3)
+                df = self.db.fetch_track_ending_at(vessel_name=vessel_name, end_dt=end_dt, limit=VERIFY_HISTORY_POINTS)
 
             return self._verify_movement(df)
 
@@ -160,15 +211,21 @@ class IntentExecutor:
             time_horizon = parsed.get("time_horizon")
             minutes = self._parse_minutes(time_horizon) if time_horizon else None
 
+            # most recent history window (not the oldest rows)
             if mmsi:
-                df = self.db.fetch_vessel_by_mmsi(int(mmsi), limit=2)
+                df = self.db.fetch_track_ending_at(mmsi=int(mmsi), end_dt=LATEST_DT, limit=PREDICT_HISTORY_POINTS)
             elif vessel_name:
-                df = self.db.fetch_vessel_by_name(vessel_name, limit=2)
+                df = self.db.fetch_track_ending_at(vessel_name=vessel_name, end_dt=LATEST_DT, limit=PREDICT_HISTORY_POINTS)
 
             if minutes is None:
                 # default 30 minutes
                 minutes = 30
 
+            if self.predictor is not None and len(df) >= 3:
+                result = self._rollout_position(df, minutes)
+                if result is not None:
+                    return result
+
             return self._predict_position(df, minutes)
 
         # Return last known position
@@ -190,6 +247,67 @@ class IntentExecutor:
 
         return {"message": "No data found"}
 
+    def _nearby(self, parsed: Dict) -> Dict:
+        """Vessels within the parsed radius of an anchor (coordinates, port or vessel),
+        newest fix per vessel in the lookback window, nearest first and paged.
+        Uses the spatial index (latest_within_radius); vessel_data is never scanned, so
+        without a built index the question is declined."""
+        spatial = parsed.get("spatial") or {}
+        anchor = dict(spatial.get("anchor") or {})
+        radius_nm = float(spatial.get("radius_nm") or 10.0)
+        page = max(int(parsed.get("page") or 1), 1)
+        page_size = max(int(parsed.get("page_size") or NEARBY_PAGE_SIZE), 1)
+        if not anchor:
+            return {"message": "Please say where to look, e.g. 'vessels within 5 nm of Miami' or 'near 25.77, -80.17'"}
+        if not self.db.has_spatial_index():
+            return {"message": "Nearby searches need the spatial index; build it with POST /admin/spatial_index/build"}
+
+        # reference time: an explicit date in the question, else the newest data in the DB
+        requested = parsed.get("datetime")
+        end_dt = None
+        if requested and re.search(r"\d{4}", str(requested)):
+            try:
+                end_dt = pd.to_datetime(requested).strftime("%Y-%m-%d %H:%M:%S")
+            except Exception:
+                end_dt = None
+        if end_dt is None:
+            end_dt = self.db.get_latest_timestamp()
+        if end_dt is None:
+            return {"message": "No vessel data found"}
+
+        if anchor.get("type") == "vessel":
+            if anchor.get("mmsi"):
+                anchor_df = self.db.fetch_track_ending_at(mmsi=int(anchor["mmsi"]), end_dt=end_dt, limit=1)
+            else:
+                anchor_df = self.db.fetch_track_ending_at(vessel_name=anchor.get("name"), end_dt=end_dt, limit=1)
+            if anchor_df.empty:
+                return {"message": f"No position found for {anchor.get('name') or anchor.get('mmsi')}"}
+            last = anchor_df.iloc[-1]
+            anchor.update({"mmsi": int(last.MMSI), "name": last.VesselName, "lat": float(last.LAT),
+                           "lon": float(last.LON), "BaseDateTime": last.BaseDateTime})
+
+        start_dt = (pd.to_datetime(end_dt) - timedelta(minutes=NEARBY_LOOKBACK_MINUTES)).strftime("%Y-%m-%d %H:%M:%S")
+        hits = self.db.latest_within_radius(anchor["lat"], anchor["lon"], radius_nm, start=start_dt, end=end_dt)
+        if anchor.get("mmsi") is not None:
+            hits = hits[hits.MMSI != anchor["mmsi"]]
+
+        total = int(len(hits))
+        page_df = hits.iloc[(page - 1) * page_size: page * page_size]
+        columns = [c for c in ["MMSI", "VesselName", "LAT", "LON", "SOG", "COG", "BaseDateTime", "distance_nm"] if c in page_df.columns]
+        vessels = page_df[columns].to_dict(orient="records")
+        return {
+            "anchor": anchor,
+            "radius": spatial.get("radius"),
+            "unit": spatial.get("unit"),
+            "radius_nm": radius_nm,
+            "window": {"start": start_dt, "end": end_dt},
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "has_more": page * page_size < total,
+            "vessels": vessels,
+        }
+
     def _parse_minutes(self, time_horizon: Optional[str]) -> Optional[int]:
         if not time_horizon:
             return None
@@ -199,84 +317,88 @@ class IntentExecutor:
             return int(m.group(1))
         return None
 
+    def _rollout_position(self, df: pd.DataFrame, minutes: int) -> Optional[Dict]:
+        """Multi-step model rollout to the requested horizon; None if the model path fails"""
+        routing_key = int(df.iloc[-1].MMSI) if 'MMSI' in df.columns else None
+        if self.compute is not None:
+            result = self.compute.predict_track(df, horizon_minutes=minutes, routing_key=routing_key)
+        else:
+            kwargs = {"routing_key": routing_key} if hasattr(self.predictor, "resolve") else {}
+            result = self.predictor.rollout_trajectory(df, horizon_minutes=minutes, **kwargs)
+        if not result.get("prediction_available"):
+            return None
+
+        last = df.iloc[-1]
+        return {
+            "VesselName": last.VesselName,
+            "LAT": float(last.LAT),
+            "LON": float(last.LON),
+            "SOG": float(last.SOG or 0.0),
+            "COG": float(last.COG or 0.0),
+            "Predicted_LAT": result["predicted_lat"],
+            "Predicted_LON": result["predicted_lon"],
+            "predicted_lat": result["predicted_lat"],
+            "predicted_lon": result["predicted_lon"],
+            "MinutesAhead": minutes,
+            "duration_minutes": minutes,
+            "BaseDateTime": last.BaseDateTime,
+            "predicted_path": result["predicted_path"],
+            "model_mode": result.get("model_mode"),
+            "model_id": result.get("model_id"),
+        }
+
     def _predict_position(self, df: pd.DataFrame, minutes: int):
-        """Simple dead-reckoning using last known SOG (knots) and COG (degrees).
-        SOG is in knots -> convert to nautical miles per minute (1 knot = 1 nm/hr = 1/60 nm/min)
-        1 degree latitude ~= 60 nautical miles. For small distances, 1 nm ~= 1/60 degree lat.
-        This is a simplification suitable for short horizons.
+        """Dead reckoning from the latest fix along the great circle.
+        When the track has several recent fixes, a constant rate-of-turn / SOG-trend
+        model fitted from them is used (see kinematics.project_positions).
         """
         if df.empty or len(df) < 1:
             return {"message": "No data to predict"}
 
         last = df.iloc[-1]
         try:
-            sog = float(last.SOG or 0.0)  # knots
-            cog = float(last.COG or 0.0)  # degrees
-            lat = float(last.LAT)
-            lon = float(last.LON)
+            state = fit_motion(df[df.MMSI == last.MMSI]).iloc[-1]
+            lat = float(state.LAT)
+            lon = float(state.LON)
+            sog = float(state.SOG)  # knots
         except Exception:
             return {"message": "Insufficient numeric data for prediction"}
 
-        # distance in nautical miles = sog * (minutes / 60)
-        distance_nm = sog * (minutes / 60.0)
-
-        # convert nm to degrees (approx): 1 degree lat ~ 60 nm
-        delta_deg = distance_nm / 60.0
-
-        # Convert bearing to delta lat/lon (simplified):
-        rad = math.radians(90 - cog)
-        dlat = delta_deg * math.sin(rad)
-        dlon = delta_deg * math.cos(rad) / max(math.cos(math.radians(lat)), 0.0001)
-
-        pred_lat = lat + dlat
-        pred_lon = lon + dlon
+        proj = project_positions([lat], [lon], [sog], [state.COG], [minutes],
+                                 rate_of_turn=[state.rate_of_turn], sog_rate=[state.sog_rate])
+        pred_lat = float(proj["lat"][0, 0])
+        pred_lon = float(proj["lon"][0, 0])
 
         return {
             "VesselName": last.VesselName,
+            "LAT": lat,
+            "LON": lon,
+            "SOG": sog,
             "Predicted_LAT": pred_lat,
             "Predicted_LON": pred_lon,
+            "predicted_lat": pred_lat,
+            "predicted_lon": pred_lon,
             "MinutesAhead": minutes,
+            "duration_minutes": minutes,
             "BaseDateTime": last.BaseDateTime
         }
 
     def _verify_movement(self, df: pd.DataFrame):
-        """Check last 3 points for sudden jumps or unrealistic turns.
-        Return a short verdict and the last points.
+        """Score the whole track window for jumps, speed mismatches, sharp turns and gaps.
+        Return a short verdict, the anomalies found and the last points.
+
+        When the anomaly batch job has screened data up to the end of the window, the
+        stored anomalies are looked up instead of re-scoring the track.
         """
-        if df.empty or len(df) < 2:
-            return {"message": "Not enough data to verify"}
-
-        # compute pairwise distances and bearing changes
-        def haversine_nm(lat1, lon1, lat2, lon2):
-            # returns distance in nautical miles
-            R_km = 6371.0
-            import math
-            dlat = math.radians(lat2 - lat1)
-            dlon = math.radians(lon2 - lon1)
-            a = math.sin(dlat/2)**2 + math.cos(math.radians(lat1))*math.cos(math.radians(lat2))*math.sin(dlon/2)**2
-            c = 2*math.atan2(math.sqrt(a), math.sqrt(1-a))
-            dist_km = R_km * c
-            return dist_km / 1.852  # km -> nautical miles
-
-        points = []
-        for _, row in df.iterrows():
-            points.append((float(row.LAT), float(row.LON), float(row.SOG or 0.0), float(row.COG or 0.0)))
-
-        # analyze distances and speed consistency
-        verdict = "consistent"
-        reasons = []
-        for i in range(1, len(points)):
-            lat1, lon1, sog1, cog1 = points[i-1]
-            lat2, lon2, sog2, cog2 = points[i]
-            dist = haversine_nm(lat1, lon1, lat2, lon2)
-            # if a large jump (> 5 nm within short time) mark suspicious
-            if dist > 5.0:
-                verdict = "suspicious"
-                reasons.append(f"Large jump of {dist:.1f} nm between points {i-1} and {i}")
-
-            # large change in heading
-            if abs(cog2 - cog1) > 90:
-                verdict = "suspicious"
-                reasons.append(f"Large course change of {abs(cog2-cog1):.1f} degrees between points {i-1} and {i}")
-
-        return {"verdict": verdict, "reasons": reasons, "points": df.to_dict(orient='records')}
+        if len(df) >= 2 and 'MMSI' in df.columns and hasattr(self.db, "get_latest_anomaly_run"):
+            try:
+                run = self.db.get_latest_anomaly_run()
+                first, last = str(df.BaseDateTime.iloc[0]), str(df.BaseDateTime.iloc[-1])
+                if run and run.get("data_end") and str(run["data_end"]) >= last:
+                    mmsi = int(df.MMSI.iloc[-1])
+                    stored = self.db.fetch_anomalies(mmsi=mmsi, start=first, end=last)
+                    return verify_from_anomalies(df[df.MMSI == mmsi], stored, run_id=run.get("run_id"))
+            except Exception:
+                # stored results unavailable; score the window live
+                pass
+        return verify_track(df)
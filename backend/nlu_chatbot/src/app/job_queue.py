@@ -0,0 +1,346 @@
+"""
+Persistent Background Job Queue
+SQLite-backed queue + result store shared by every API process using the same file:
+- jobs are claimed atomically (UPDATE ... RETURNING), so any worker of any process can run them
+- per-job progress and a `version` counter bumped on every change (long-poll / SSE waits on it)
+- cooperative cancellation: handlers call ctx.progress() / ctx.check_cancelled()
+- bounded: submit() raises QueueFull once `max_pending` jobs are waiting (across processes)
+- finished jobs expire after a TTL; RUNNING jobs whose heartbeat went stale (crashed
+  process) are re-queued on start
+- a heartbeat thread keeps every job this process runs fresh, whether or not its handler
+  reports progress; each claim carries a token, and a runner whose job was re-queued
+  meanwhile can no longer write to it
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from .serialization import dumps
+except ImportError:
+    from serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATES = ("DONE", "FAILED", "CANCELLED")
+DEFAULT_WORKERS = 4
+DEFAULT_TTL_SECONDS = 3600
+DEFAULT_MAX_PENDING = 100
+# a RUNNING job without a heartbeat for this long is assumed orphaned
+STALE_SECONDS = 600
+HEARTBEAT_SECONDS = 30
+POLL_SECONDS = 1.0
+EVICT_EVERY_SECONDS = 60
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS jobs (
+        job_id TEXT PRIMARY KEY,
+        kind TEXT,
+        params TEXT,
+        status TEXT,
+        progress TEXT,
+        result TEXT,
+        error TEXT,
+        version INTEGER DEFAULT 0,
+        cancel_requested INTEGER DEFAULT 0,
+        created_at REAL,
+        started_at REAL,
+        finished_at REAL,
+        heartbeat_at REAL,
+        expires_at REAL,
+        claim_token TEXT
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs(status, created_at);",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_expires ON jobs(expires_at);",
+]
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler once cancellation was requested"""
+
+
+class QueueFull(Exception):
+    """Raised by submit() while the queue already holds `max_pending` PENDING jobs"""
+
+
+class JobContext:
+    """Handed to job handlers: progress reporting and cancellation checks"""
+
+    def __init__(self, queue: "JobQueue", job_id: str, token: str = None):
+        self.queue = queue
+        self.job_id = job_id
+        self.token = token
+
+    def progress(self, status: Dict):
+        """Store a progress dict (also a heartbeat); raises JobCancelled if cancel was requested,
+        or if the job was re-queued and is no longer this runner's"""
+        if not self.queue._update(self.job_id, token=self.token, progress=json.dumps(status, default=str),
+                                  heartbeat_at=time.time()):
+            raise JobCancelled()
+        self.check_cancelled()
+
+    def cancelled(self) -> bool:
+        row = self.queue._fetch_one("SELECT cancel_requested FROM jobs WHERE job_id = ?;", (self.job_id,))
+        return bool(row and row[0])
+
+    def check_cancelled(self):
+        if self.cancelled():
+            raise JobCancelled()
+
+
+class JobQueue:
+    def __init__(self, db_path: str, workers: int = DEFAULT_WORKERS, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_pending: int = DEFAULT_MAX_PENDING):
+        self.db_path = db_path
+        self.workers = max(1, int(workers))
+        self.ttl_seconds = ttl_seconds
+        self.max_pending = max(1, int(max_pending))
+        self.handlers: Dict[str, Callable[[Dict, JobContext], Any]] = {}
+        self._local = threading.local()
+        self._wake = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+        # job_id -> claim token of the jobs this process is running (kept fresh by the heartbeat)
+        self._running: Dict[str, str] = {}
+        conn = self._conn()
+        for statement in SCHEMA:
+            conn.execute(statement)
+        if "claim_token" not in {row[1] for row in conn.execute("PRAGMA table_info(jobs);")}:
+            conn.execute("ALTER TABLE jobs ADD COLUMN claim_token TEXT;")  # queues created before tokens
+        conn.commit()
+
+    # --- storage ---
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread (WAL so readers never block the writers)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            self._local.conn = conn
+        return conn
+
+    def after_fork(self):
+        """Call in a forked worker: drop the parent's connection, threads and lock state"""
+        self._local = threading.local()
+        self._wake = threading.Condition()
+        self._threads = []
+        self._stopping = threading.Event()
+        self._running = {}
+
+    def _fetch_one(self, query: str, params: tuple = ()):
+        return self._conn().execute(query, params).fetchone()
+
+    def _update(self, job_id: str, token: str = None, **fields) -> bool:
+        """Update a job -> whether it was updated; with `token` only while that claim holds it"""
+        conn = self._conn()
+        assignments = ", ".join(f"{k} = ?" for k in fields)
+        where, params = ("job_id = ? AND claim_token = ?", (job_id, token)) if token else ("job_id = ?", (job_id,))
+        cur = conn.execute(f"UPDATE jobs SET {assignments}, version = version + 1 WHERE {where};",
+                           (*fields.values(), *params))
+        conn.commit()
+        with self._wake:
+            self._wake.notify_all()
+        return cur.rowcount > 0
+
+    # --- API ---
+    def register(self, kind: str, handler: Callable[[Dict, JobContext], Any]):
+        """handler(params, ctx) -> JSON-serializable result"""
+        self.handlers[kind] = handler
+
+    def submit(self, kind: str, params: Dict) -> str:
+        if kind not in self.handlers:
+            raise ValueError(f"unknown job kind: {kind}")
+        job_id = str(uuid.uuid4())
+        conn = self._conn()
+        # count and insert in one statement, so concurrent submitters cannot overshoot the bound
+        cur = conn.execute(
+            "INSERT INTO jobs (job_id, kind, params, status, created_at, version) "
+            "SELECT ?, ?, ?, 'PENDING', ?, 1 WHERE (SELECT COUNT(*) FROM jobs WHERE status = 'PENDING') < ?;",
+            (job_id, kind, json.dumps(params, default=str), time.time(), self.max_pending),
+        )
+        conn.commit()
+        if cur.rowcount == 0:
+            raise QueueFull(f"job queue full ({self.max_pending} pending); retry later")
+        with self._wake:
+            self._wake.notify_all()
+        return job_id
+
+    def get(self, job_id: str, include_result: bool = True) -> Optional[Dict]:
+        columns = ["job_id", "kind", "status", "progress", "error", "version", "created_at", "started_at",
+                   "finished_at", "expires_at", "cancel_requested"] + (["result"] if include_result else [])
+        row = self._fetch_one(f"SELECT {', '.join(columns)} FROM jobs WHERE job_id = ?;", (job_id,))
+        if row is None:
+            return None
+        job = dict(zip(columns, row))
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        job["progress"] = json.loads(job["progress"]) if job["progress"] else None
+        if include_result:
+            job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def list(self, status: str = None, limit: int = 50) -> List[Dict]:
+        where, params = ("WHERE status = ?", (status,)) if status else ("", ())
+        rows = self._conn().execute(f"SELECT job_id FROM jobs {where} ORDER BY created_at DESC LIMIT ?;",
+                                    (*params, int(limit))).fetchall()
+        return [self.get(r[0], include_result=False) for r in rows]
+
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """PENDING jobs are cancelled immediately; RUNNING ones at their next progress/check"""
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            "UPDATE jobs SET status = 'CANCELLED', finished_at = ?, expires_at = ?, version = version + 1 "
+            "WHERE job_id = ? AND status = 'PENDING';",
+            (now, now + self.ttl_seconds, job_id),
+        )
+        conn.execute(
+            "UPDATE jobs SET cancel_requested = 1, version = version + 1 WHERE job_id = ? AND status = 'RUNNING';",
+            (job_id,),
+        )
+        conn.commit()
+        with self._wake:
+            self._wake.notify_all()
+        return self.get(job_id, include_result=False)
+
+    def wait(self, job_id: str, after_version: int = 0, timeout: float = 25.0) -> Optional[Dict]:
+        """Long-poll: return once the job's version exceeds `after_version`, it is finished,
+        or `timeout` elapses. Updates from this process wake it at once; other processes'
+        updates are seen within POLL_SECONDS."""
+        deadline = time.time() + max(0.0, timeout)
+        while True:
+            job = self.get(job_id, include_result=False)
+            if job is None or job["version"] > after_version or job["status"] in TERMINAL_STATES:
+                return self.get(job_id) if job is not None else None
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return job
+            with self._wake:
+                self._wake.wait(min(POLL_SECONDS, remaining))
+
+    def evict_expired(self) -> int:
+        conn = self._conn()
+        cur = conn.execute("DELETE FROM jobs WHERE expires_at IS NOT NULL AND expires_at < ?;", (time.time(),))
+        conn.commit()
+        return cur.rowcount
+
+    def recover_stale(self) -> int:
+        """Re-queue RUNNING jobs whose process died (no heartbeat for STALE_SECONDS)"""
+        conn = self._conn()
+        cur = conn.execute(
+            "UPDATE jobs SET status = 'PENDING', started_at = NULL, claim_token = NULL, version = version + 1 "
+            "WHERE status = 'RUNNING' AND COALESCE(heartbeat_at, started_at) < ?;",
+            (time.time() - STALE_SECONDS,),
+        )
+        conn.commit()
+        return cur.rowcount
+
+    # --- workers ---
+    def _claim(self) -> Optional[tuple]:
+        if not self.handlers:
+            return None
+        kinds = list(self.handlers)
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute(
+            f"""
+            UPDATE jobs SET status = 'RUNNING', started_at = ?, heartbeat_at = ?, claim_token = ?,
+                version = version + 1
+            WHERE job_id = (
+                SELECT job_id FROM jobs WHERE status = 'PENDING' AND kind IN ({', '.join('?' * len(kinds))})
+                ORDER BY created_at LIMIT 1
+            ) AND status = 'PENDING'
+            RETURNING job_id, kind, params, claim_token;
+            """,
+            (now, now, uuid.uuid4().hex, *kinds),
+        ).fetchone()
+        conn.commit()
+        return row
+
+    def _run(self, job_id: str, kind: str, params: str, token: str = None):
+        ctx = JobContext(self, job_id, token)
+        self._running[job_id] = token
+        try:
+            result = self.handlers[kind](json.loads(params or "{}"), ctx)
+            status = "CANCELLED" if ctx.cancelled() else "DONE"
+            finished = self._update(job_id, token=token, status=status, result=dumps(result).decode("utf-8"),
+                                    error=None, finished_at=time.time(), expires_at=time.time() + self.ttl_seconds)
+        except JobCancelled:
+            finished = self._update(job_id, token=token, status="CANCELLED", finished_at=time.time(),
+                                    expires_at=time.time() + self.ttl_seconds)
+        except Exception as e:
+            logger.error(f"❌ Job {job_id} ({kind}) failed: {e}")
+            finished = self._update(job_id, token=token, status="FAILED", error=str(e), finished_at=time.time(),
+                                    expires_at=time.time() + self.ttl_seconds)
+        finally:
+            self._running.pop(job_id, None)
+        if not finished:
+            logger.warning(f"⚠️ Job {job_id} ({kind}) was re-queued while running here; result discarded")
+
+    def _heartbeat(self):
+        """Refresh heartbeat_at of every job this process runs (no version bump: not a change)"""
+        while not self._stopping.wait(HEARTBEAT_SECONDS):
+            tokens = [t for t in list(self._running.values()) if t]
+            if not tokens:
+                continue
+            try:
+                conn = self._conn()
+                conn.execute(f"UPDATE jobs SET heartbeat_at = ? WHERE status = 'RUNNING' "
+                             f"AND claim_token IN ({', '.join('?' * len(tokens))});", (time.time(), *tokens))
+                conn.commit()
+            except sqlite3.OperationalError as e:
+                logger.warning(f"⚠️ Job heartbeat failed: {e}")
+
+    def _worker(self):
+        last_evict = 0.0
+        while not self._stopping.is_set():
+            try:
+                if time.time() - last_evict > EVICT_EVERY_SECONDS:
+                    last_evict = time.time()
+                    self.evict_expired()
+                claimed = self._claim()
+            except sqlite3.OperationalError as e:
+                logger.warning(f"⚠️ Job queue busy: {e}")
+                claimed = None
+            if claimed:
+                self._run(*claimed)
+                continue
+            with self._wake:
+                self._wake.wait(POLL_SECONDS)
+
+    def start(self):
+        if self._threads:
+            return
+        recovered = self.recover_stale()
+        if recovered:
+            logger.info(f"Re-queued {recovered} orphaned job(s)")
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+        logger.info(f"✅ Job queue started: {self.workers} workers, results kept {self.ttl_seconds:.0f}s ({self.db_path})")
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping.set()
+        with self._wake:
+            self._wake.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+
+def default_queue_path(db_path: str) -> str:
+    """jobs.db next to the vessel database unless JOB_DB_PATH is set"""
+    return os.environ.get("JOB_DB_PATH") or os.path.join(os.path.dirname(os.path.abspath(db_path)), "jobs.db")
@@ -0,0 +1,157 @@
+"""
+Vectorized Fleet Kinematics for Maritime NLU
+Dead-reckoning for arrays of vessels at once:
+- great-circle destination formulas
+- several horizons per call (result shape: n_vessels x n_horizons)
+- constant rate-of-turn / SOG-trend motion model fitted from each vessel's last few fixes
+Backs the NLU PREDICT fallback and the /predict/fleet endpoint
+"""
+
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_NM = 3440.065
+MAX_RATE_OF_TURN = 20.0   # deg/min; fitted turn rates are clipped to this
+MAX_SOG_RATE = 2.0        # knots/min; fitted accelerations are clipped to this
+STRAIGHT_EPS = 1e-4       # rad/min below which a track is treated as straight
+FIT_POINTS = 5
+
+
+def destination_points(lat, lon, bearing_deg, distance_nm):
+    """Great-circle destination for arrays of start points, bearings and distances (broadcasts)"""
+    lat1 = np.radians(lat)
+    lon1 = np.radians(lon)
+    brg = np.radians(bearing_deg)
+    delta = np.asarray(distance_nm, dtype=float) / EARTH_RADIUS_NM
+    sin_lat1, cos_lat1 = np.sin(lat1), np.cos(lat1)
+    sin_d, cos_d = np.sin(delta), np.cos(delta)
+    sin_lat2 = sin_lat1 * cos_d + cos_lat1 * sin_d * np.cos(brg)
+    lat2 = np.arcsin(np.clip(sin_lat2, -1.0, 1.0))
+    lon2 = lon1 + np.arctan2(np.sin(brg) * sin_d * cos_lat1, cos_d - sin_lat1 * sin_lat2)
+    return np.degrees(lat2), (np.degrees(lon2) + 540.0) % 360.0 - 180.0
+
+
+def haversine_nm(lat1, lon1, lat2, lon2):
+    """Great-circle distance in nautical miles (broadcasts)"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def project_positions(lat, lon, sog, cog, horizons_minutes: Sequence[float],
+                      rate_of_turn=None, sog_rate=None) -> Dict[str, np.ndarray]:
+    """Project vessels forward for every horizon
+
+    lat/lon/sog(knots)/cog(deg) are arrays of shape (n,); rate_of_turn (deg/min) and
+    sog_rate (knots/min) are optional arrays of the same shape. The displacement of a
+    constant-turn, constant-acceleration track is integrated in closed form in the local
+    tangent plane and then applied along the great circle.
+
+    Returns arrays of shape (n, n_horizons): lat, lon, sog, cog, distance_nm.
+    """
+    lat = np.asarray(lat, dtype=float)[:, None]
+    lon = np.asarray(lon, dtype=float)[:, None]
+    v0 = np.nan_to_num(np.asarray(sog, dtype=float), nan=0.0)[:, None] / 60.0  # nm/min
+    theta0 = np.radians(np.nan_to_num(np.asarray(cog, dtype=float), nan=0.0) % 360.0)[:, None]
+    t = np.asarray(horizons_minutes, dtype=float)[None, :]
+
+    n = lat.shape[0]
+    omega = np.zeros((n, 1)) if rate_of_turn is None else np.radians(
+        np.clip(np.nan_to_num(np.asarray(rate_of_turn, dtype=float)), -MAX_RATE_OF_TURN, MAX_RATE_OF_TURN))[:, None]
+    accel = np.zeros((n, 1)) if sog_rate is None else np.clip(
+        np.nan_to_num(np.asarray(sog_rate, dtype=float)), -MAX_SOG_RATE, MAX_SOG_RATE)[:, None] / 60.0
+    # never let the speed trend reverse the vessel within the longest horizon
+    t_max = max(float(t.max()), 1e-9) if t.size else 1.0
+    accel = np.maximum(accel, -v0 / t_max)
+
+    theta_t = theta0 + omega * t
+    straight = np.abs(omega) < STRAIGHT_EPS
+    with np.errstate(divide="ignore", invalid="ignore"):
+        w = np.where(straight, 1.0, omega)
+        east_turn = (v0 * (np.cos(theta0) - np.cos(theta_t)) / w
+                     + accel * (-t * np.cos(theta_t) / w + (np.sin(theta_t) - np.sin(theta0)) / w ** 2))
+        north_turn = (v0 * (np.sin(theta_t) - np.sin(theta0)) / w
+                      + accel * (t * np.sin(theta_t) / w + (np.cos(theta_t) - np.cos(theta0)) / w ** 2))
+    travelled = v0 * t + 0.5 * accel * t ** 2
+    east = np.where(straight, travelled * np.sin(theta0), east_turn)
+    north = np.where(straight, travelled * np.cos(theta0), north_turn)
+
+    distance = np.hypot(east, north)
+    bearing = np.degrees(np.arctan2(east, north))
+    pred_lat, pred_lon = destination_points(lat, lon, bearing, distance)
+    return {
+        "lat": pred_lat,
+        "lon": pred_lon,
+        "sog": (v0 + accel * t) * 60.0,
+        "cog": np.degrees(theta_t) % 360.0,
+        "distance_nm": distance,
+    }
+
+
+def fit_motion(tracks: pd.DataFrame, n_points: int = FIT_POINTS) -> pd.DataFrame:
+    """Fit per-vessel current state, rate of turn and SOG trend from the last `n_points` fixes
+
+    `tracks` is a long DataFrame with MMSI, BaseDateTime, LAT, LON, SOG, COG (any order,
+    any number of vessels). Returns one row per MMSI with LAT, LON, SOG, COG of the latest
+    fix, rate_of_turn (deg/min), sog_rate (knots/min), BaseDateTime and fit_points.
+    Slopes are least-squares fits computed with grouped sums (no per-vessel Python loop).
+    """
+    cols = ["MMSI", "BaseDateTime", "LAT", "LON", "SOG", "COG"]
+    df = tracks[[c for c in tracks.columns if c in cols + ["VesselName"]]].copy()
+    df["_ts"] = pd.to_datetime(df["BaseDateTime"], errors="coerce")
+    df = df.dropna(subset=["_ts", "LAT", "LON"]).sort_values(["MMSI", "_ts"], kind="mergesort")
+    df = df.groupby("MMSI", sort=False).tail(n_points)
+
+    last_ts = df.groupby("MMSI", sort=False)["_ts"].transform("max")
+    t = (df["_ts"] - last_ts).dt.total_seconds().to_numpy() / 60.0
+    sog = pd.to_numeric(df["SOG"], errors="coerce").fillna(0.0).to_numpy()
+    cog = pd.to_numeric(df["COG"], errors="coerce").fillna(0.0).to_numpy() % 360.0
+
+    # unwrap COG within each vessel so 359 -> 1 is a +2 degree turn
+    same_vessel = df["MMSI"].to_numpy()[1:] == df["MMSI"].to_numpy()[:-1]
+    step = np.diff(cog)
+    step = np.where(same_vessel, (step + 180.0) % 360.0 - 180.0, 0.0)
+    new_vessel = np.concatenate([[True], ~same_vessel])
+    cumulative = np.concatenate([[0.0], np.cumsum(step)])
+    group_start = np.maximum.accumulate(np.where(new_vessel, np.arange(len(cog)), 0))
+    cog_unwrapped = cog[group_start] + cumulative - cumulative[group_start]
+
+    fit = pd.DataFrame({
+        "MMSI": df["MMSI"].to_numpy(),
+        "n": 1.0,
+        "t": t,
+        "tt": t * t,
+        "c": cog_unwrapped,
+        "tc": t * cog_unwrapped,
+        "s": sog,
+        "ts": t * sog,
+    })
+    sums = fit.groupby("MMSI", sort=False).sum()
+    denom = sums["n"] * sums["tt"] - sums["t"] ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rot = np.where(denom > 1e-9, (sums["n"] * sums["tc"] - sums["t"] * sums["c"]) / denom, 0.0)
+        sog_rate = np.where(denom > 1e-9, (sums["n"] * sums["ts"] - sums["t"] * sums["s"]) / denom, 0.0)
+
+    latest = df.groupby("MMSI", sort=False).tail(1).set_index("MMSI")
+    out = latest.drop(columns=["_ts"]).copy()
+    out["SOG"] = pd.to_numeric(out["SOG"], errors="coerce").fillna(0.0)
+    out["COG"] = pd.to_numeric(out["COG"], errors="coerce").fillna(0.0) % 360.0
+    out["rate_of_turn"] = pd.Series(rot, index=sums.index).reindex(out.index).to_numpy()
+    out["sog_rate"] = pd.Series(sog_rate, index=sums.index).reindex(out.index).to_numpy()
+    out["fit_points"] = sums["n"].reindex(out.index).astype(int).to_numpy()
+    return out.reset_index()
+
+
+def project_fleet(tracks: pd.DataFrame, horizons_minutes: Sequence[float],
+                  n_points: int = FIT_POINTS, use_turn_model: bool = True) -> Dict:
+    """Fit motion for every vessel in `tracks` and project all of them for all horizons"""
+    state = fit_motion(tracks, n_points=n_points)
+    proj = project_positions(
+        state["LAT"].to_numpy(), state["LON"].to_numpy(),
+        state["SOG"].to_numpy(), state["COG"].to_numpy(), horizons_minutes,
+        rate_of_turn=state["rate_of_turn"].to_numpy() if use_turn_model else None,
+        sog_rate=state["sog_rate"].to_numpy() if use_turn_model else None,
+    )
+    return {"state": state, "horizons": list(horizons_minutes), **proj}
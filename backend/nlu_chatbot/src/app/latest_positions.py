@@ -0,0 +1,101 @@
+"""
+Latest-Position Snapshot for AIS Data
+`latest_position` holds one row per MMSI: the vessel's newest fix plus first_seen and
+fix_count. An insert trigger on vessel_data upserts it on every ingest (out-of-order
+fixes only bump the counters), so "where is X now" and fleet maps are a single
+indexed read instead of a scan of the vessel's history
+"""
+
+import logging
+import sqlite3
+import time
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+LATEST_TABLE = "latest_position"
+POSITION_COLUMNS = ["MMSI", "BaseDateTime", "LAT", "LON", "SOG", "COG", "Heading", "VesselName", "CallSign", "VesselType"]
+
+_UPDATE_NEWER = ", ".join(
+    f"{col} = CASE WHEN excluded.BaseDateTime > {LATEST_TABLE}.BaseDateTime THEN excluded.{col} ELSE {LATEST_TABLE}.{col} END"
+    for col in POSITION_COLUMNS[1:]
+)
+UPSERT_CLAUSE = f"""
+    ON CONFLICT(MMSI) DO UPDATE SET
+        first_seen = MIN({LATEST_TABLE}.first_seen, excluded.first_seen),
+        fix_count = {LATEST_TABLE}.fix_count + excluded.fix_count,
+        {_UPDATE_NEWER}
+"""
+
+SCHEMA = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {LATEST_TABLE} (
+        MMSI INTEGER PRIMARY KEY,
+        BaseDateTime TEXT,
+        LAT REAL,
+        LON REAL,
+        SOG REAL,
+        COG REAL,
+        Heading REAL,
+        VesselName TEXT,
+        CallSign TEXT,
+        VesselType REAL,
+        first_seen TEXT,
+        fix_count INTEGER
+    );
+    """,
+    f"CREATE INDEX IF NOT EXISTS idx_{LATEST_TABLE}_name ON {LATEST_TABLE}(VesselName);",
+    f"CREATE INDEX IF NOT EXISTS idx_{LATEST_TABLE}_time ON {LATEST_TABLE}(BaseDateTime);",
+]
+
+TRIGGER = f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{LATEST_TABLE}_upsert AFTER INSERT ON vessel_data
+    WHEN NEW.MMSI IS NOT NULL AND NEW.BaseDateTime IS NOT NULL
+    BEGIN
+        INSERT INTO {LATEST_TABLE} ({', '.join(POSITION_COLUMNS)}, first_seen, fix_count)
+        VALUES ({', '.join('NEW.' + c for c in POSITION_COLUMNS)}, NEW.BaseDateTime, 1)
+        {UPSERT_CLAUSE};
+    END;
+"""
+
+
+def has_latest_positions(conn: sqlite3.Connection) -> bool:
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?;",
+                       (f"trg_{LATEST_TABLE}_upsert",)).fetchone()
+    return row is not None
+
+
+def ensure_latest_positions(conn: sqlite3.Connection, rebuild: bool = False) -> Dict:
+    """Create and backfill the snapshot (one grouped pass) and install the upsert trigger
+
+    Once the trigger exists the table is maintained by ingest, so this is a no-op on later
+    starts unless `rebuild` is set.
+    """
+    if has_latest_positions(conn) and not rebuild:
+        return {"rebuilt": False, "vessels": conn.execute(f"SELECT COUNT(*) FROM {LATEST_TABLE};").fetchone()[0]}
+
+    start = time.time()
+    with conn:
+        conn.execute(f"DROP TRIGGER IF EXISTS trg_{LATEST_TABLE}_upsert;")
+        conn.execute(f"DROP TABLE IF EXISTS {LATEST_TABLE};")
+        for statement in SCHEMA:
+            conn.execute(statement)
+        conn.execute(
+            f"""
+            INSERT INTO {LATEST_TABLE} ({', '.join(POSITION_COLUMNS)}, first_seen, fix_count)
+            SELECT {', '.join(POSITION_COLUMNS)}, first_seen, fix_count FROM (
+                SELECT *,
+                       ROW_NUMBER() OVER (PARTITION BY MMSI ORDER BY BaseDateTime DESC) AS rn,
+                       MIN(BaseDateTime) OVER (PARTITION BY MMSI) AS first_seen,
+                       COUNT(*) OVER (PARTITION BY MMSI) AS fix_count
+                FROM vessel_data
+                WHERE MMSI IS NOT NULL AND BaseDateTime IS NOT NULL
+            )
+            WHERE rn = 1;
+            """
+        )
+        conn.execute(TRIGGER)
+    vessels = conn.execute(f"SELECT COUNT(*) FROM {LATEST_TABLE};").fetchone()[0]
+    elapsed = time.time() - start
+    logger.info(f"✅ Latest positions: {vessels} vessels indexed in {elapsed:.1f}s")
+    return {"rebuilt": True, "vessels": vessels, "seconds": elapsed}
@@ -1,14 +1,16 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
 from pydantic import BaseModel
 import os
 import sys
-from concurrent.futures import ThreadPoolExecutor
-import uuid
+import sqlite3
+from contextlib import asynccontextmanager
 import pandas as pd
 from fastapi.middleware.cors import CORSMiddleware
+import inspect
 import json
-import math
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 # Ensure the current `app` directory is importable when uvicorn executes the module
 # This avoids "attempted relative import with no known parent package" when running
@@ -18,10 +20,25 @@ if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
 from db_handler import MaritimeDB
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from nlp_interpreter import MaritimeNLPInterpreter
 from intent_executor import IntentExecutor
 from response_formatter import ResponseFormatter
 from xgboost_predictor import get_predictor
+from model_registry import allowed_model_dir, get_registry
+from kinematics import project_fleet
+from track_validation import score_tracks, summarize_tracks
+from anomaly_job import api_job_workers, run_anomaly_job
+from track_simplify import simplify_track
+from serialization import (FastJSONResponse, dumps, frame_records, negotiate_format, sanitize_value,
+                           streaming_response, tabular_response)
+from latest_positions import LATEST_TABLE
+from job_queue import TERMINAL_STATES, JobQueue, QueueFull, default_queue_path
+from compute_pool import ComputePool
+from worker_sync import WorkerSync
+from startup import ComponentNotReady, Startup
+import metrics
+import profiling
 import time
 import logging
 
@@ -33,17 +50,20 @@ base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 default_db = os.path.join(base_dir, "maritime_data.db")
 db_path = os.environ.get("BACKEND_DB_PATH", default_db)
 
-# If main DB is empty or doesn't exist, try sample DB
+# If main DB is empty or doesn't exist, try sample DB (one-row probe; the vessel list
+# itself loads in the background, see the startup components below)
 try:
     if not os.path.exists(db_path):
         raise FileNotFoundError(f"DB not found: {db_path}")
 
-    # Check if DB has data by trying to connect and query
-    temp_db = MaritimeDB(db_path)
-    vessel_count = len(temp_db.get_all_vessel_names())
+    probe = sqlite3.connect(db_path)
+    try:
+        has_rows = probe.execute("SELECT 1 FROM vessel_data LIMIT 1;").fetchone() is not None
+    finally:
+        probe.close()
 
-    if vessel_count == 0:
-        logging.warning(f"Main DB is empty ({vessel_count} vessels)")
+    if not has_rows:
+        logging.warning("Main DB is empty")
         sample_db = os.path.join(base_dir, "maritime_sample_0104.db")
         if os.path.exists(sample_db):
             logging.info(f"Switching to sample DB: {sample_db}")
@@ -56,28 +76,118 @@ except Exception as e:
         db_path = sample_db
 
 db = MaritimeDB(db_path)
-db.create_tables()  # ensure table exists
-vessel_list = db.get_all_vessel_names()
-logging.info(f"✅ Loaded {len(vessel_list)} vessels from {db_path}")
 
-nlp_engine = MaritimeNLPInterpreter(vessel_list=vessel_list)
-executor = IntentExecutor(db)
+# ============================================================================
+# Startup Components - loaded concurrently in the background (see startup.py)
+# ============================================================================
+
+startup = Startup()
+
+
+def _load_schema():
+    db.create_tables()  # ensure table exists
+    ensure_search_log_table()
+
+
+def _load_vessel_list():
+    vessel_list = db.get_all_vessel_names()
+    logging.info(f"✅ Loaded {len(vessel_list)} vessels from {db_path}")
+    return vessel_list
+
+
+def _load_models():
+    # Model registry: versioned model directories from XGBOOST_MODEL_REGISTRY, if set
+    registry = get_registry()
+
+    if registry.active_id is None:
+        # Initialize XGBoost predictor with model path from environment or auto-detection
+        xgboost_model_path = os.environ.get("XGBOOST_MODEL_PATH")
+        if xgboost_model_path:
+            logging.info(f"Using XGBoost model path from environment: {xgboost_model_path}")
+            predictor = get_predictor(xgboost_model_path)
+        else:
+            logging.info("XGBoost model path not set. Auto-detecting model location...")
+            predictor = get_predictor()
+        registry.register("default", predictor=predictor)
+    else:
+        predictor = registry.resolve()[1]
+
+    if predictor.is_loaded:
+        logging.info("✅ XGBoost model loaded successfully - REAL predictions enabled")
+    else:
+        logging.warning("⚠️  XGBoost model not loaded - DEMO predictions will be used")
+    return registry
+
+
+def _start_compute():
+    # CPU-bound parsing / prediction runs in pre-initialized worker processes (COMPUTE_WORKERS)
+    pool = ComputePool(startup.get("vessel_list"), startup.get("models"), nlp_engine=startup.get("nlp"))
+    pool.start()
+    return pool
+
+
+def _start_job_queue():
+    job_queue.start()
+    return job_queue
 
-# Initialize XGBoost predictor with model path from environment or auto-detection
-xgboost_model_path = os.environ.get("XGBOOST_MODEL_PATH")
-if xgboost_model_path:
-    logging.info(f"Using XGBoost model path from environment: {xgboost_model_path}")
-    predictor = get_predictor(xgboost_model_path)
-else:
-    logging.info("XGBoost model path not set. Auto-detecting model location...")
-    predictor = get_predictor()
 
-if predictor.is_loaded:
-    logging.info("✅ XGBoost model loaded successfully - REAL predictions enabled")
-else:
-    logging.warning("⚠️  XGBoost model not loaded - DEMO predictions will be used")
+def _start_worker_sync():
+    sync.start()
+    return sync
 
-app = FastAPI(title="Maritime Vessel Monitoring API")
+
+startup.add("schema", _load_schema)
+startup.add("vessel_list", _load_vessel_list, depends_on=["schema"])
+startup.add("nlp", lambda: MaritimeNLPInterpreter(vessel_list=startup.get("vessel_list")), depends_on=["vessel_list"])
+startup.add("models", _load_models)
+# threads / worker processes: started in every serving process, never in a pre-fork parent
+startup.add("compute", _start_compute, depends_on=["nlp", "models"], per_process=True)
+startup.add("job_queue", _start_job_queue, depends_on=["schema"], per_process=True)
+# replays registry changes, so it needs the registry first
+startup.add("worker_sync", _start_worker_sync, depends_on=["models"], per_process=True)
+
+# one-off DB maintenance: optional, one writer at a time (`after`), skipped with <ENV>=0.
+# Track tiers / latest positions are only read once their trigger exists and spatial queries
+# wait for spatial_index, so partially built structures are never used.
+_maintenance = ["schema"]
+
+
+def add_maintenance(name: str, env: str, loader):
+    if os.environ.get(env, "1") == "0":
+        return
+    startup.add(name, loader, depends_on=["schema"], after=[_maintenance[-1]], required=False)
+    _maintenance.append(name)
+
+
+# used by the endpoints; raise ComponentNotReady (-> 503) until loaded
+registry = startup.lazy("models")
+compute = startup.lazy("compute")
+
+# PREDICT intent rolls the routed model forward on a compute worker
+executor = IntentExecutor(db, predictor=registry, compute=compute)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # load in the background: the server accepts requests at once, and the ones that do not
+    # need a component still loading are served (prefork.py preloads the shared ones)
+    startup.start()
+    yield
+    if startup.components["compute"].state == "ready":
+        startup.get("compute").stop()
+    job_queue.stop()
+    sync.stop()
+
+
+class ProfiledRoute(APIRoute):
+    """Route whose endpoint registers the thread / task serving a profiled request (profiling.py)"""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, profiling.profiled(endpoint), **kwargs)
+
+
+app = FastAPI(title="Maritime Vessel Monitoring API", default_response_class=FastJSONResponse, lifespan=lifespan)
+app.router.route_class = ProfiledRoute
 
 # allow origins for development frontends (adjust in production)
 app.add_middleware(
@@ -94,12 +204,25 @@ react_build = os.path.join(base_dir, 'frontend-react', 'build')
 if os.path.isdir(react_build):
     app.mount('/', StaticFiles(directory=react_build, html=True), name='react')
 
-# job executor and registry
-executor_pool = ThreadPoolExecutor(max_workers=4)
-jobs = {}
+# persistent job queue (SQLite; shared by every API process pointing at the same file)
+job_queue = JobQueue(default_queue_path(db_path), workers=int(os.environ.get("JOB_WORKERS", "4")),
+                     ttl_seconds=float(os.environ.get("JOB_TTL_SECONDS", "3600")),
+                     max_pending=int(os.environ.get("JOB_MAX_PENDING", "100")))
+# an SSE stream re-checks its job at least this often (and sends a keep-alive comment)
+SSE_WAIT_SECONDS = 10.0
+# registry / feature-state changes made through one worker process are replayed by the others
+sync = WorkerSync(default_queue_path(db_path))
+# each worker's metrics ride along with its heartbeat, so /metrics covers all of them
+sync.metrics_source = metrics.REGISTRY.snapshot
 
 class QueryRequest(BaseModel):
     text: str
+    # paging for list answers (NEARBY)
+    page: int = 1
+    page_size: int = 20
+    # track simplification (RDP): point budget and/or tolerance in metres
+    max_points: int | None = None
+    tolerance_m: float | None = None
 
 
 class JobRequest(BaseModel):
@@ -109,43 +232,70 @@ class JobRequest(BaseModel):
     end_dt: str | None = None
 
 
-def clean_nan_values(obj):
-    """Recursively replace NaN and Inf values with None for JSON serialization"""
-    if isinstance(obj, dict):
-        return {k: clean_nan_values(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [clean_nan_values(item) for item in obj]
-    elif isinstance(obj, float):
-        if math.isnan(obj) or math.isinf(obj):
-            return None
-        return obj
-    else:
-        return obj
+@profiling.profiled
+def _answer_query(parsed: dict, request: QueryRequest):
+    """Execute a parsed query and format the answer -> (response, formatted text).
+    Blocking (SQLite reads, the model rollout on a compute worker, RDP): run it in the threadpool."""
+    with metrics.stage("execute"), profiling.tags(intent=parsed.get("intent") or "UNKNOWN"):
+        response = executor.handle(parsed)
+    with metrics.stage("format"):
+        if (request.max_points or request.tolerance_m) and isinstance(response, dict) and response.get("track"):
+            track, simplification = simplify_track(pd.DataFrame(response["track"]), tolerance_m=request.tolerance_m,
+                                                   max_points=request.max_points)
+            response["track"] = frame_records(track)
+            response["track_simplification"] = simplification
+
+        # Clean NaN values from response before formatting
+        response = sanitize_value(response)
+
+        # Format response into human-friendly text
+        formatted_text = ResponseFormatter.format_response(parsed.get("intent", ""), response)
+    return response, formatted_text
 
 
 @app.post("/query")
 async def nlp_query(request: QueryRequest):
-    # Keep parsing synchronous (spaCy) but the endpoint is async-friendly to allow DB async calls
-    parsed = nlp_engine.parse_query(request.text)
-    # executor may call DB; allow it to run (it will use sync DB unless refactored)
-    response = executor.handle(parsed)
-
-    # Clean NaN values from response before formatting
-    response = clean_nan_values(response)
+    # spaCy parsing is CPU-bound: run it on a compute worker so the event loop stays free
+    with metrics.stage("parse"):
+        parsed = await compute.parse_query(request.text)
+    metrics.QUERY_INTENTS.inc(intent=parsed.get("intent") or "UNKNOWN")
+    if parsed.get("intent") == "NEARBY":
+        startup.require("spatial_index")  # a partially built R*Tree would drop vessels
+        parsed.update(page=request.page, page_size=request.page_size)
+    # DB reads, the PREDICT rollout and formatting block: keep them off the event loop
+    response, formatted_text = await run_in_threadpool(_answer_query, parsed, request)
+
+    with metrics.stage("serialize"):
+        return FastJSONResponse({
+            "parsed": parsed,
+            "response": response,
+            "formatted_response": formatted_text
+        })
 
-    # Format response into human-friendly text
-    formatted_text = ResponseFormatter.format_response(parsed.get("intent", ""), response)
 
-    return {
-        "parsed": parsed,
-        "response": response,
-        "formatted_response": formatted_text
-    }
+@app.exception_handler(ComponentNotReady)
+async def component_not_ready(request: Request, exc: ComponentNotReady):
+    retry = "30" if exc.state == "failed" else "2"
+    return JSONResponse(status_code=503, headers={"Retry-After": retry},
+                        content={"error": str(exc), "component": exc.name, "state": exc.state})
 
 
 @app.get("/health")
 def health_check():
-    return {"ok": True}
+    return {"ok": True, "ready": startup.ready()}
+
+
+@app.get("/health/live")
+def health_live():
+    """The process serves requests (components may still be loading)"""
+    return {"alive": True, "pid": os.getpid(), "uptime_seconds": time.time() - startup.created_at}
+
+
+@app.get("/health/ready")
+def health_ready():
+    """200 once every required component is loaded, else 503; per-component state and load time"""
+    status = startup.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
 
 
 @app.get("/vessels")
@@ -164,7 +314,6 @@ async def search_vessels(q: str, limit: int = 50):
     return {"vessels": names}
 
 
-@app.on_event("startup")
 def ensure_search_log_table():
     # create a small table to log user searches (non-critical)
     try:
@@ -204,8 +353,7 @@ def admin_recent_searches(limit: int = 50):
             df = pd.read_sql_query(query, con=db.engine)
         else:
             df = pd.read_sql_query(query, con=db.conn)
-        records = df.to_dict(orient="records")
-        return {"records": records}
+        return FastJSONResponse({"records": frame_records(df)})
     except Exception as e:
         return {"error": str(e)}
 
@@ -216,37 +364,47 @@ def admin_unique_vessels_df():
     This is intentionally a read-only diagnostics endpoint used by the Streamlit 'pages' view.
     """
     df = db.get_unique_vessels_df()
-    return {"columns": df.columns.tolist(), "records": df.to_dict(orient="records")}
+    return FastJSONResponse({"columns": df.columns.tolist(), "records": frame_records(df)})
 
 
 @app.get("/admin/query_df")
-def admin_query_df(name: str = ""):
+def admin_query_df(name: str = "", cursor: str = None):
     """Run a small set of pre-defined dataframe queries by name and return results.
-    executor_pool = ThreadPoolExecutor(max_workers=4)
-    jobs = {}
 
     Supported names:
       - unique_vessels
-      - all_vessels_sample
+      - all_vessels_sample (first keyset page; pass next_cursor back as `cursor` for more)
     """
     if name == "unique_vessels":
         df = db.get_unique_vessels_df()
     elif name == "all_vessels_sample":
-        # return a small sample of all vessel rows
-        df = db.fetch_by_time_range("1970-01-01 00:00:00", "2099-12-31 23:59:59", limit=500)
+        # a page of vessel rows in time order (no open-ended date range scan)
+        try:
+            df, next_cursor = db.fetch_page(cursor=cursor, page_size=500)
+        except ValueError as e:
+            return {"error": str(e)}
+        return FastJSONResponse({"columns": df.columns.tolist(), "records": frame_records(df), "next_cursor": next_cursor})
     else:
         return {"error": "unsupported query name"}
 
-    return {"columns": df.columns.tolist(), "records": df.to_dict(orient="records")}
+    return FastJSONResponse({"columns": df.columns.tolist(), "records": frame_records(df)})
 
 
 @app.get("/admin/describe_vessel")
-def admin_describe_vessel(vessel: str = None, mmsi: int = None, limit: int = 10, end_dt: str = None):
+def admin_describe_vessel(http_request: Request, vessel: str = None, mmsi: int = None, limit: int = 10, end_dt: str = None,
+                          max_points: int = None, tolerance_m: float = None, format: str = None, cursor: str = None):
     """Return identifiers and a short recent track for a vessel given a name or MMSI.
 
+    The track is the newest `limit` fixes at or before end_dt, oldest first; `next_cursor`
+    (sent back as `cursor` with the same vessel / end_dt) pages further back in time.
+    max_points / tolerance_m simplify the returned track (RDP); `simplification` then
+    reports the original point count and the max error in metres.
+    format=columns|arrow (or the Accept header) returns the track column-oriented.
+
     Example: /admin/describe_vessel?vessel=+BRAVA
              /admin/describe_vessel?mmsi=123456789
               /admin/describe_vessel?vessel=BRAVA&end_dt=2023-01-01T00:00:00
+             /admin/describe_vessel?mmsi=123456789&limit=50000&max_points=500&tolerance_m=25
     """
     start = time.time()
     target_dt = end_dt if end_dt else "2099-12-31 23:59:59"
@@ -254,13 +412,16 @@ def admin_describe_vessel(vessel: str = None, mmsi: int = None, limit: int = 10,
         # try to fetch last known row
         logging.info(f"describe_vessel: fetching by name={vessel} limit={limit}")
         df = db.fetch_vessel_by_name_at_or_before(vessel, target_dt)
-        track = db.fetch_track_ending_at(vessel_name=vessel, end_dt=target_dt, limit=limit)
     elif mmsi:
         logging.info(f"describe_vessel: fetching by mmsi={mmsi} limit={limit}")
         df = db.fetch_vessel_by_mmsi_at_or_before(int(mmsi), target_dt)
-        track = db.fetch_track_ending_at(mmsi=int(mmsi), end_dt=target_dt, limit=limit)
     else:
         return {"error": "provide vessel name or mmsi"}
+    try:
+        track, next_cursor = _track_before(target_dt, limit, vessel_name=None if mmsi else vessel,
+                                           mmsi=int(mmsi) if mmsi else None, cursor=cursor)
+    except ValueError as e:
+        return {"error": str(e)}
 
     info = {}
     if not df.empty:
@@ -270,38 +431,188 @@ def admin_describe_vessel(vessel: str = None, mmsi: int = None, limit: int = 10,
             "call_sign": row.get("CallSign"),
             "vessel_name": row.get("VesselName"),
         })
+    # current position from the latest_position snapshot (frontend plots it on the map)
+    last_seen = None
+    if not end_dt and info.get("mmsi") is not None:
+        latest = db.fetch_latest_position(mmsi=info["mmsi"])
+        if not latest.empty:
+            last = latest.iloc[0]
+            last_seen = {"lat": float(last.LAT), "lon": float(last.LON), "BaseDateTime": last.BaseDateTime}
+    track, simplification = simplify_track(track, tolerance_m=tolerance_m, max_points=max_points)
     dur = time.time() - start
     logging.info(f"describe_vessel completed in {dur:.3f}s")
+    fmt = negotiate_format(http_request, format)
+    if fmt != "records":
+        return tabular_response(track, fmt, {"identifiers": info, "last_seen": last_seen, "next_cursor": next_cursor,
+                                             "simplification": simplification, "took_seconds": dur}, key="track")
     # return track as list of records
-    return {"identifiers": info, "track": track.to_dict(orient="records"), "took_seconds": dur}
+    return FastJSONResponse({"identifiers": info, "last_seen": last_seen, "track": frame_records(track),
+                             "next_cursor": next_cursor, "simplification": simplification, "took_seconds": dur})
+
+
+def _track_before(end_dt: str, limit: int, vessel_name: str = None, mmsi: int = None, cursor: str = None):
+    """Newest `limit` fixes at or before end_dt, oldest first -> (df, next_cursor for the
+    fixes before them). Walks keyset pages, so any limit is served MAX_PAGE_SIZE at a time."""
+    frames, remaining = [], max(1, int(limit))
+    while True:
+        page, cursor = db.fetch_page(end=end_dt, mmsi=mmsi, vessel_name=vessel_name, cursor=cursor,
+                                     page_size=min(remaining, MAX_PAGE_SIZE), descending=True)
+        frames.append(page)
+        remaining -= len(page)
+        if cursor is None or remaining <= 0:
+            break
+    track = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    return track.iloc[::-1].reset_index(drop=True), cursor
+
+def _run_long_describe(params, ctx=None):
+    vessel = params.get("vessel")
+    mmsi = params.get("mmsi")
+    limit = params.get("limit", 1000)
+    end_dt = params.get("end_dt") or "2099-12-31 23:59:59"
+    if vessel:
+        df = db.fetch_vessel_by_name_at_or_before(vessel, end_dt)
+        if ctx:
+            ctx.progress({"stage": "track"})
+        track = db.fetch_track_ending_at(vessel_name=vessel, end_dt=end_dt, limit=limit)
+    elif mmsi:
+        df = db.fetch_vessel_by_mmsi_at_or_before(int(mmsi), end_dt)
+        if ctx:
+            ctx.progress({"stage": "track"})
+        track = db.fetch_track_ending_at(mmsi=int(mmsi), end_dt=end_dt, limit=limit)
+    else:
+        raise ValueError("provide vessel or mmsi")
+
+    info = {}
+    if not df.empty:
+        row = df.iloc[0].to_dict()
+        info.update({
+            "mmsi": int(row.get("MMSI")) if row.get("MMSI") is not None else None,
+            "call_sign": row.get("CallSign"),
+            "vessel_name": row.get("VesselName"),
+        })
+
+    return {"identifiers": info, "track": frame_records(track)}
+
+
+job_queue.register("describe", _run_long_describe)
+
+
+@app.middleware("http")
+async def count_requests(request: Request, call_next):
+    sync.requests += 1
+    return await call_next(request)
 
-def _run_long_describe(params):
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    """Per-stage timings of the request as a Server-Timing header and in maritime_stage_seconds"""
+    timing = metrics.begin()
+    response = await call_next(request)
+    response.headers["Server-Timing"] = timing.server_timing()
+    route = request.scope.get("route")
+    metrics.observe_request(timing, request.method, getattr(route, "path", "unmatched"), response.status_code)
+    return response
+
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    """Count requests towards an armed profiling session (see /admin/profile/start)"""
+    if not profiling.PROFILER.active:
+        return await call_next(request)
+    session = profiling.PROFILER.admit(request.url.path)
+    if session is None:
+        return await call_next(request)
     try:
-        vessel = params.get("vessel")
-        mmsi = params.get("mmsi")
-        limit = params.get("limit", 1000)
-        end_dt = params.get("end_dt") or "2099-12-31 23:59:59"
-        if vessel:
-            df = db.fetch_vessel_by_name_at_or_before(vessel, end_dt)
-            track = db.fetch_track_ending_at(vessel_name=vessel, end_dt=end_dt, limit=limit)
-        elif mmsi:
-            df = db.fetch_vessel_by_mmsi_at_or_before(int(mmsi), end_dt)
-            track = db.fetch_track_ending_at(mmsi=int(mmsi), end_dt=end_dt, limit=limit)
-        else:
-            return {"error": "provide vessel or mmsi"}
-
-        info = {}
-        if not df.empty:
-            row = df.iloc[0].to_dict()
-            info.update({
-                "mmsi": int(row.get("MMSI")) if row.get("MMSI") is not None else None,
-                "call_sign": row.get("CallSign"),
-                "vessel_name": row.get("VesselName"),
-            })
+        return await call_next(request)
+    finally:
+        profiling.PROFILER.release(session)
 
-        return {"identifiers": info, "track": track.to_dict(orient="records")}
-    except Exception as e:
-        return {"error": str(e)}
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus scrape endpoint: counters / histograms summed over every API worker"""
+    snapshots = [metrics.REGISTRY.snapshot()]
+    try:
+        snapshots += sync.metric_snapshots()
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Other workers' metrics not available: {e}")
+    return Response(metrics.REGISTRY.render(snapshots), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/admin/slow_queries")
+def slow_queries(limit: int = 50, explain: bool = False):
+    """This worker's slow SQL statements (with query plan + scan flags) and per-statement
+    aggregates; explain=true plans every statement seen, not only the slow ones"""
+    return FastJSONResponse(db.tracer.report(limit=limit, explain_all=explain))
+
+
+@app.post("/admin/slow_queries/reset")
+def reset_slow_queries():
+    db.tracer.reset()
+    return {"ok": True}
+
+
+class ProfileRequest(BaseModel):
+    requests: int | None = None
+    seconds: float | None = None
+    interval_ms: float = profiling.DEFAULT_INTERVAL_MS
+    path_prefix: str | None = None
+
+
+@app.post("/admin/profile/start")
+def start_profile(request: ProfileRequest):
+    """Sample this worker's request stacks for the next `requests` requests (optionally only
+    paths under path_prefix, e.g. /query) or for `seconds`; needs PROFILING_ENABLED=1.
+
+    Example: {"requests": 50, "path_prefix": "/query"}   {"seconds": 30, "interval_ms": 5}
+    """
+    endpoints = {inspect.unwrap(route.endpoint).__code__: f"{','.join(sorted(route.methods))} {route.path}"
+                 for route in app.routes if isinstance(route, APIRoute) and not route.path.startswith("/admin/profile")}
+    try:
+        return profiling.PROFILER.start(endpoints, requests=request.requests, seconds=request.seconds,
+                                        interval_ms=request.interval_ms, path_prefix=request.path_prefix)
+    except profiling.ProfilingDisabled as e:
+        return JSONResponse(status_code=403, content={"error": str(e)})
+    except profiling.ProfilerBusy as e:
+        return JSONResponse(status_code=409, content={"error": str(e)})
+
+
+@app.post("/admin/profile/stop")
+def stop_profile():
+    return {"session": profiling.PROFILER.stop()}
+
+
+@app.get("/admin/profile")
+def profile_report(limit: int = 50, endpoint: str = None, intent: str = None):
+    """Session status + sampled time per endpoint / intent and per function (self and total)"""
+    return FastJSONResponse(profiling.PROFILER.report(limit=limit, endpoint=endpoint, intent=intent))
+
+
+@app.get("/admin/profile/flamegraph")
+def profile_flamegraph(endpoint: str = None, intent: str = None):
+    """Collapsed stacks for flamegraph.pl / speedscope / inferno (one "a;b;c count" line per stack)"""
+    return Response(profiling.PROFILER.collapsed(endpoint=endpoint, intent=intent), media_type="text/plain")
+
+
+def after_fork():
+    """Reset per-process resources in a worker forked from a preloaded parent (see prefork.py)"""
+    db.after_fork()
+    job_queue.after_fork()
+    sync.after_fork()
+
+
+@app.get("/admin/workers")
+def list_workers():
+    """Every live API worker with its memory footprint (PSS sums to the real total)"""
+    return {"pid": os.getpid(), "workers": sync.workers()}
+
+
+def _submit_job(kind: str, params: dict):
+    """Queue a job -> {"job_id"}, or 429 while JOB_MAX_PENDING jobs are already waiting"""
+    try:
+        return {"job_id": job_queue.submit(kind, params)}
+    except QueueFull as e:
+        return JSONResponse(status_code=429, headers={"Retry-After": "30"}, content={"error": str(e)})
 
 
 @app.post("/admin/submit_query_job")
@@ -311,33 +622,59 @@ def submit_query_job(job: JobRequest):
     Accepts a JSON body with fields: vessel, mmsi, limit, end_dt.
     Returns a job_id which can be polled via /admin/job_status/{job_id}.
     """
-    vessel = job.vessel
-    mmsi = job.mmsi
-    limit = int(job.limit or 1000)
-    end_dt = job.end_dt
+    params = {"vessel": job.vessel, "mmsi": job.mmsi, "limit": int(job.limit or 1000), "end_dt": job.end_dt}
+    return _submit_job("describe", params)
 
-    job_id = str(uuid.uuid4())
-    jobs[job_id] = {"status": "PENDING", "result": None, "error": None}
 
-    def _task():
-        jobs[job_id]["status"] = "RUNNING"
-        try:
-            res = _run_long_describe({"vessel": vessel, "mmsi": mmsi, "limit": limit, "end_dt": end_dt})
-            jobs[job_id]["result"] = res
-            jobs[job_id]["status"] = "DONE"
-        except Exception as e:
-            jobs[job_id]["error"] = str(e)
-            jobs[job_id]["status"] = "FAILED"
+@app.get("/admin/job_status/{job_id}")
+def job_status(job_id: str, wait: float = 0, after_version: int = 0):
+    """Job state, progress and (once DONE) result.
 
-    executor_pool.submit(_task)
-    return {"job_id": job_id}
+    With `wait` > 0 this long-polls: it returns as soon as the job's `version` moves past
+    `after_version` or the job finishes, or after `wait` seconds (capped at 30).
+    """
+    # sync endpoint: the long-poll blocks a threadpool thread, never the event loop
+    job = job_queue.wait(job_id, after_version=after_version, timeout=min(max(wait, 0), 30))
+    if job is None:
+        return {"error": "unknown job id"}
+    return FastJSONResponse(job)
+
+
+@app.get("/admin/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent events: one `data:` line per job change (progress, status), ending with
+    the finished job including its result."""
+    async def _events():
+        version = 0
+        while True:
+            job = await run_in_threadpool(job_queue.wait, job_id, version, SSE_WAIT_SECONDS)
+            if job is None:
+                yield b'event: error\ndata: {"error": "unknown job id"}\n\n'
+                return
+            if job["version"] <= version:
+                yield b": keep-alive\n\n"
+                continue
+            version = job["version"]
+            yield b"data: " + dumps(job) + b"\n\n"
+            if job["status"] in TERMINAL_STATES:
+                return
+
+    return StreamingResponse(_events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.post("/admin/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """Cancel a PENDING job at once; a RUNNING one stops at its next progress report"""
+    job = job_queue.cancel(job_id)
+    if job is None:
+        return {"error": "unknown job id"}
+    return FastJSONResponse(job)
 
 
-@app.get("/admin/job_status/{job_id}")
-def job_status(job_id: str):
-    if job_id not in jobs:
-        return {"error": "unknown job id"}
-    return jobs[job_id]
+@app.get("/admin/jobs")
+def list_jobs(status: str = None, limit: int = 50):
+    """Recent jobs (without results), newest first"""
+    return FastJSONResponse({"jobs": job_queue.list(status=status, limit=limit)})
 
 
 # ============================================================================
@@ -350,6 +687,24 @@ class PredictionRequest(BaseModel):
     mmsi: int | None = None
     sequence_length: int = 12
     end_dt: str | None = None
+    model_id: str | None = None
+    steps: int | None = None
+    horizon_minutes: float | None = None
+
+
+class ModelRegisterRequest(BaseModel):
+    model_id: str
+    model_dir: str
+    activate: bool = False
+
+
+class TrafficSplitRequest(BaseModel):
+    weights: dict[str, float] = {}
+
+
+class AISUpdateRequest(BaseModel):
+    """Batch of AIS fixes: dicts with MMSI, BaseDateTime, LAT, LON, SOG, COG, Heading, VesselType"""
+    points: list[dict]
 
 
 @app.post("/predict/trajectory")
@@ -363,16 +718,19 @@ def predict_trajectory(request: PredictionRequest):
         mmsi: MMSI number
         sequence_length: Number of historical points to use (default 12)
         end_dt: End datetime for fetching data
+        model_id: Registered model to use (default: active model / traffic split)
+        steps / horizon_minutes: Roll the model forward to return a multi-step predicted path
 
     Returns:
         Prediction results with current and predicted positions
     """
     try:
-        predictor = get_predictor()
+        routing_key = request.mmsi or request.vessel
+        model_id, predictor = registry.resolve(request.model_id, routing_key)
 
         # Note: predictor can still make predictions in DEMO mode even if model not loaded
         if not predictor.is_loaded:
-            logging.info("XGBoost model not loaded - using DEMO prediction mode")
+            logging.info(f"XGBoost model '{model_id}' not loaded - using DEMO prediction mode")
 
         # Fetch vessel data from database
         target_dt = request.end_dt or "2099-12-31 23:59:59"
@@ -400,10 +758,15 @@ def predict_trajectory(request: PredictionRequest):
                 "prediction_available": False
             }
 
-        # Make prediction
-        prediction_result = predictor.predict_single_vessel(
+        # Make prediction on a compute worker (pinned to the model resolved above, even if the
+        # active model is swapped meanwhile); multi-step rollout when steps / horizon is given
+        prediction_result = compute.predict_track(
             track_df,
-            sequence_length=request.sequence_length
+            sequence_length=request.sequence_length,
+            model_id=model_id,
+            predictor=predictor,
+            steps=request.steps,
+            horizon_minutes=request.horizon_minutes
         )
 
         # Add map data for visualization
@@ -419,11 +782,18 @@ def predict_trajectory(request: PredictionRequest):
                     "lon": prediction_result["predicted_lon"],
                     "type": "predicted"
                 },
-                "track": track_df[["LAT", "LON", "BaseDateTime"]].tail(20).to_dict(orient="records")
+                "track": frame_records(track_df[["LAT", "LON", "BaseDateTime"]].tail(20))
             }
+            if "predicted_path" in prediction_result:
+                prediction_result["map_data"]["predicted_path"] = [
+                    {"lat": p["LAT"], "lon": p["LON"], "BaseDateTime": p["BaseDateTime"]}
+                    for p in prediction_result["predicted_path"]
+                ]
 
         return prediction_result
 
+    except ComponentNotReady:
+        raise
     except Exception as e:
         logging.error(f"Prediction error: {e}")
         return {
@@ -433,18 +803,567 @@ def predict_trajectory(request: PredictionRequest):
 
 
 @app.get("/predict/vessel/{vessel_name}")
-def predict_vessel_by_name(vessel_name: str, sequence_length: int = 12):
+def predict_vessel_by_name(vessel_name: str, sequence_length: int = 12, model_id: str = None):
     """Quick prediction endpoint for a vessel by name"""
     return predict_trajectory(PredictionRequest(
         vessel=vessel_name,
-        sequence_length=sequence_length
+        sequence_length=sequence_length,
+        model_id=model_id
     ))
 
 
 @app.get("/predict/mmsi/{mmsi}")
-def predict_vessel_by_mmsi(mmsi: int, sequence_length: int = 12):
+def predict_vessel_by_mmsi(mmsi: int, sequence_length: int = 12, model_id: str = None):
     """Quick prediction endpoint for a vessel by MMSI"""
     return predict_trajectory(PredictionRequest(
         mmsi=mmsi,
-        sequence_length=sequence_length
+        sequence_length=sequence_length,
+        model_id=model_id
     ))
+
+
+@app.get("/predict/fleet")
+def predict_fleet(http_request: Request, horizons: str = "10,30,60", end_dt: str = None, lookback_minutes: int = 60,
+                  fit_points: int = 5, limit: int = 5000, format: str = None):
+    """Dead-reckon every vessel seen in the lookback window for several horizons at once
+
+    format=columns|arrow returns one row per vessel with lat_<h>/lon_<h> columns per horizon.
+
+    Example: /predict/fleet?horizons=15,30&end_dt=2020-01-03 12:00:00
+    """
+    try:
+        horizon_list = [float(h) for h in horizons.split(",") if h.strip()]
+        if not horizon_list:
+            return {"error": "provide at least one horizon"}
+        end = end_dt or db.get_latest_timestamp()
+        if end is None:
+            return {"error": "No vessel data found"}
+        start = (pd.to_datetime(end) - pd.Timedelta(minutes=lookback_minutes)).strftime("%Y-%m-%d %H:%M:%S")
+
+        t0 = time.time()
+        tracks = db.fetch_recent_points_per_vessel(end, start, points_per_vessel=fit_points)
+        t1 = time.time()
+        if tracks.empty:
+            return {"end_dt": end, "horizons": horizon_list, "vessels": []}
+        fleet = project_fleet(tracks, horizon_list, n_points=fit_points)
+        t2 = time.time()
+
+        state = fleet["state"].head(limit)
+        fmt = negotiate_format(http_request, format)
+        if fmt != "records":
+            table = state[[c for c in ["MMSI", "VesselName", "BaseDateTime", "LAT", "LON", "SOG", "COG", "rate_of_turn"]
+                           if c in state.columns]].reset_index(drop=True)
+            for j, h in enumerate(horizon_list):
+                table[f"lat_{h:g}"] = fleet["lat"][:len(table), j]
+                table[f"lon_{h:g}"] = fleet["lon"][:len(table), j]
+            return tabular_response(table, fmt, {
+                "end_dt": end, "horizons": horizon_list, "vessel_count": len(fleet["state"]),
+                "timing": {"fetch_seconds": t1 - t0, "project_seconds": t2 - t1},
+            }, key="vessels")
+        vessels = []
+        for i, row in enumerate(state.itertuples(index=False)):
+            vessels.append({
+                "mmsi": int(row.MMSI),
+                "vessel_name": getattr(row, "VesselName", None),
+                "BaseDateTime": row.BaseDateTime,
+                "LAT": float(row.LAT),
+                "LON": float(row.LON),
+                "SOG": float(row.SOG),
+                "COG": float(row.COG),
+                "rate_of_turn": float(row.rate_of_turn),
+                "projections": [
+                    {"minutes": h, "lat": float(fleet["lat"][i, j]), "lon": float(fleet["lon"][i, j])}
+                    for j, h in enumerate(horizon_list)
+                ],
+            })
+        return FastJSONResponse({
+            "end_dt": end,
+            "horizons": horizon_list,
+            "vessel_count": len(fleet["state"]),
+            "vessels": vessels,
+            "timing": {"fetch_seconds": t1 - t0, "project_seconds": t2 - t1},
+        })
+    except Exception as e:
+        logging.error(f"Fleet prediction error: {e}")
+        return {"error": str(e)}
+
+
+class BatchPredictionRequest(BaseModel):
+    """Vessels to predict; without mmsis, every vessel seen in the lookback window before end_dt"""
+    mmsis: list[int] | None = None
+    end_dt: str | None = None
+    lookback_minutes: int = 60
+    sequence_length: int = 12
+    model_id: str | None = None
+
+
+def _run_predict_batch(params, ctx):
+    end = params.get("end_dt") or db.get_latest_timestamp()
+    mmsis = params.get("mmsis")
+    if not mmsis:
+        start = (pd.to_datetime(end) - pd.Timedelta(minutes=params.get("lookback_minutes", 60))).strftime(
+            "%Y-%m-%d %H:%M:%S")
+        mmsis = db.fetch_recent_points_per_vessel(end, start, points_per_vessel=1)["MMSI"].astype(int).tolist()
+    sequence_length = params.get("sequence_length", 12)
+    chunk = max(compute.workers, 1) * 16
+    results = []
+    for i in range(0, len(mmsis), chunk):
+        batch = mmsis[i:i + chunk]
+        # DB reads stay in this job thread; the feature extraction / inference fans out over the workers
+        tracks = [db.fetch_track_ending_at(mmsi=int(m), end_dt=end, limit=sequence_length + 10) for m in batch]
+        predictions = compute.predict_many(tracks, sequence_length=sequence_length, model_id=params.get("model_id"))
+        results.extend({"mmsi": int(m), **p} for m, p in zip(batch, predictions))
+        ctx.progress({"vessels_done": len(results), "vessels": len(mmsis)})
+    return {"end_dt": end, "count": len(results),
+            "available": sum(1 for r in results if r.get("prediction_available")), "predictions": results}
+
+
+job_queue.register("predict_batch", _run_predict_batch)
+
+
+@app.post("/admin/predict_batch_job")
+def submit_predict_batch_job(request: BatchPredictionRequest):
+    """Predict many vessels in the background on the compute pool.
+    Poll /admin/job_status/{job_id} for progress."""
+    return _submit_job("predict_batch", request.model_dump())
+
+
+# ============================================================================
+# Track Validation - movement consistency across the fleet
+# ============================================================================
+
+@app.get("/verify/tracks")
+def verify_tracks(http_request: Request, start: str, end: str, min_score: float = 0.0, limit: int = 500,
+                  gap_minutes: float = 30.0, max_points: int = 1000000, format: str = None):
+    """Score every vessel's track between `start` and `end` and return per-vessel summaries,
+    most suspicious first
+
+    Example: /verify/tracks?start=2020-01-03 00:00:00&end=2020-01-03 06:00:00&min_score=0.3
+    """
+    try:
+        t0 = time.time()
+        tracks = db.fetch_tracks_in_range(start, end, max_points=max_points)
+        t1 = time.time()
+        if tracks.empty:
+            return {"start": start, "end": end, "vessel_count": 0, "vessels": []}
+        summary = summarize_tracks(score_tracks(tracks, gap_minutes=gap_minutes))
+        t2 = time.time()
+
+        flagged = summary[summary["max_score"] >= min_score] if min_score > 0 else summary
+        flagged = flagged.sort_values(["max_score", "mean_score"], ascending=False).head(limit)
+        fmt = negotiate_format(http_request, format)
+        if fmt != "records":
+            return tabular_response(flagged, fmt, {
+                "start": start, "end": end, "points_checked": int(len(tracks)),
+                "vessel_count": int(len(summary)),
+                "suspicious_count": int((summary["verdict"] == "suspicious").sum()),
+            }, key="vessels")
+        return FastJSONResponse({
+            "start": start,
+            "end": end,
+            "points_checked": int(len(tracks)),
+            "truncated": len(tracks) >= max_points,
+            "vessel_count": int(len(summary)),
+            "suspicious_count": int((summary["verdict"] == "suspicious").sum()),
+            "vessels": frame_records(flagged),
+            "timing": {
+                "fetch_seconds": t1 - t0,
+                "score_seconds": t2 - t1,
+                "points_per_second": len(tracks) / (t2 - t1) if t2 > t1 else None,
+            },
+        })
+    except Exception as e:
+        logging.error(f"Track verification error: {e}")
+        return {"error": str(e)}
+
+
+class AnomalyJobRequest(BaseModel):
+    workers: int | None = None
+    chunk_rows: int = 200000
+    gap_minutes: float = 30.0
+
+
+@app.post("/admin/anomaly_job")
+def submit_anomaly_job(request: AnomalyJobRequest):
+    """Screen the whole vessel_data table in the background and rebuild the anomalies table.
+    Poll /admin/job_status/{job_id} for progress."""
+    return _submit_job("anomaly", request.model_dump())
+
+
+def _run_anomaly(params, ctx):
+    # share the machine with the compute pool and the other API workers
+    workers = min(params.get("workers") or api_job_workers(), api_job_workers())
+    return run_anomaly_job(db_path, workers=workers, chunk_rows=params.get("chunk_rows", 200000),
+                           gap_minutes=params.get("gap_minutes", 30.0), progress=ctx.progress)
+
+
+job_queue.register("anomaly", _run_anomaly)
+
+
+@app.get("/anomalies")
+def list_anomalies(mmsi: int = None, start: str = None, end: str = None, type: str = None, limit: int = 1000):
+    """Stored results of the last anomaly job, filtered by MMSI / time range / anomaly type"""
+    try:
+        run = db.get_latest_anomaly_run()
+        if run is None:
+            return {"error": "No anomaly job has completed yet; POST /admin/anomaly_job first"}
+        df = db.fetch_anomalies(mmsi=mmsi, start=start, end=end, anomaly_type=type, limit=limit)
+        return FastJSONResponse({"run": run, "count": len(df), "anomalies": frame_records(df)})
+    except Exception as e:
+        logging.error(f"Anomaly lookup error: {e}")
+        return {"error": str(e)}
+
+
+# ============================================================================
+# Fleet Snapshot - latest position per vessel
+# ============================================================================
+
+def ensure_latest_positions():
+    """Build the latest_position snapshot once; ingest keeps it current afterwards
+    (set LATEST_POSITIONS_ON_STARTUP=0 to skip)"""
+    return db.ensure_latest_positions()
+
+
+add_maintenance("latest_positions", "LATEST_POSITIONS_ON_STARTUP", ensure_latest_positions)
+
+
+@app.post("/admin/latest_positions/rebuild")
+def rebuild_latest_positions():
+    try:
+        return db.ensure_latest_positions(rebuild=True)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@app.get("/fleet/positions")
+def fleet_positions(http_request: Request, since: str = None, limit: int = None, format: str = None):
+    """Current position of every vessel (one indexed read of latest_position), newest first
+    (format=columns|arrow for a column-oriented table)
+
+    Example: /fleet/positions?since=2020-01-03 12:00:00
+    """
+    try:
+        df = db.fetch_latest_positions(since=since, limit=limit)
+        fmt = negotiate_format(http_request, format)
+        if fmt != "records":
+            return tabular_response(df, fmt, {"count": len(df)}, key="vessels")
+        return FastJSONResponse({"count": len(df), "vessels": frame_records(df)})
+    except Exception as e:
+        logging.error(f"Fleet positions error: {e}")
+        return {"error": str(e)}
+
+
+# ============================================================================
+# Track Tiers - downsampled 1 min / 10 min / 1 h tracks for long spans
+# ============================================================================
+
+def ensure_track_tiers():
+    """Build the downsampled track tiers once; ingest keeps them current afterwards
+    (set TRACK_TIERS_ON_STARTUP=0 to skip)"""
+    return db.ensure_track_tiers()
+
+
+add_maintenance("track_tiers", "TRACK_TIERS_ON_STARTUP", ensure_track_tiers)
+
+
+@app.post("/admin/track_tiers/rebuild")
+def rebuild_track_tiers():
+    try:
+        return db.ensure_track_tiers(rebuild=True)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@app.get("/tracks")
+def vessel_track(http_request: Request, vessel_name: str = None, mmsi: int = None, start: str = None, end: str = None,
+                 max_points: int = 2000, format: str = None, cursor: str = None, page_size: int = None):
+    """Track over [start, end] at the finest resolution that fits `max_points`
+
+    tier_seconds is 0 for raw fixes, else 60 / 600 / 3600 (newest fix per bucket,
+    `n_points` = raw fixes it represents).
+    With page_size (or a cursor) the raw fixes are paged instead, oldest first, with a
+    `next_cursor` to send back (with the same filters) until the last page.
+    format=columns|arrow (or the Accept header) returns the track column-oriented.
+    Example: /tracks?mmsi=367000000&start=2020-01-01 00:00:00&end=2020-01-31 23:59:59&max_points=1500
+             /tracks?mmsi=367000000&start=2020-01-01 00:00:00&page_size=5000&cursor=<next_cursor>
+    """
+    if not vessel_name and mmsi is None:
+        return {"error": "vessel_name or mmsi is required"}
+    try:
+        if page_size is not None or cursor is not None:
+            df, next_cursor = db.fetch_page(start=start, end=end, mmsi=mmsi,
+                                            vessel_name=vessel_name if mmsi is None else None, cursor=cursor,
+                                            page_size=page_size or DEFAULT_PAGE_SIZE)
+            info = {"tier_seconds": 0, "points": len(df), "next_cursor": next_cursor}
+        else:
+            df, info = db.fetch_track_tiered(vessel_name=vessel_name, mmsi=mmsi, start=start, end=end,
+                                             max_points=max(2, max_points))
+        fmt = negotiate_format(http_request, format)
+        if fmt != "records":
+            return tabular_response(df, fmt, info, key="track")
+        return FastJSONResponse({**info, "track": frame_records(df)})
+    except Exception as e:
+        logging.error(f"Track query error: {e}")
+        return {"error": str(e)}
+
+
+# ============================================================================
+# Streaming Exports - NDJSON / Arrow record batches straight from a SQLite cursor
+# ============================================================================
+
+def _stream_format(http_request: Request, format: str = None) -> str:
+    return "arrow" if negotiate_format(http_request, format) == "arrow" else "ndjson"
+
+
+@app.get("/tracks/stream")
+def stream_track(http_request: Request, vessel_name: str = None, mmsi: int = None, start: str = None,
+                 end: str = None, format: str = None, batch_rows: int = None):
+    """Full-resolution track, streamed in fetchmany() batches (NDJSON, or Arrow with format=arrow)
+
+    Example: /tracks/stream?mmsi=367000000&start=2020-01-01 00:00:00&end=2020-12-31 23:59:59
+    """
+    if not vessel_name and mmsi is None:
+        return {"error": "vessel_name or mmsi is required"}
+    batches = db.iter_track(vessel_name=vessel_name, mmsi=mmsi, start=start, end=end, batch_rows=batch_rows)
+    return streaming_response(batches, _stream_format(http_request, format), db.column_types(),
+                              filename=f"track_{mmsi or vessel_name}")
+
+
+@app.get("/range/stream")
+def stream_time_range(http_request: Request, start: str, end: str, format: str = None, batch_rows: int = None):
+    """Every fix between start and end in time order, streamed (no row limit)
+
+    Example: /range/stream?start=2020-01-03 00:00:00&end=2020-01-03 23:59:59&format=arrow
+    """
+    batches = db.iter_time_range(start, end, batch_rows=batch_rows)
+    return streaming_response(batches, _stream_format(http_request, format), db.column_types(),
+                              filename="vessel_data_range")
+
+
+@app.get("/fleet/positions/stream")
+def stream_fleet_positions(http_request: Request, since: str = None, format: str = None, batch_rows: int = None):
+    """Current position of every vessel, streamed newest first"""
+    batches = db.iter_latest_positions(since=since, batch_rows=batch_rows)
+    return streaming_response(batches, _stream_format(http_request, format), db.column_types(LATEST_TABLE),
+                              filename="fleet_positions")
+
+
+# ============================================================================
+# Keyset Paging - constant-cost pages over (BaseDateTime, MMSI, rowid)
+# ============================================================================
+
+def ensure_keyset_index():
+    """(BaseDateTime, MMSI) index used by /range paging (set KEYSET_INDEX_ON_STARTUP=0 to skip)"""
+    return db.ensure_keyset_index()
+
+
+add_maintenance("keyset_index", "KEYSET_INDEX_ON_STARTUP", ensure_keyset_index)
+
+
+@app.get("/range")
+def paged_range(http_request: Request, start: str = None, end: str = None, mmsi: int = None, vessel_name: str = None,
+                cursor: str = None, page_size: int = 500, order: str = "asc", format: str = None):
+    """Page through fixes in a time window (optionally one vessel) in (BaseDateTime, MMSI) order
+
+    Returns `next_cursor` until the last page; send it back with the same filters.
+    Example: /range?start=2020-01-03 00:00:00&end=2020-01-03 23:59:59&page_size=1000
+             /range?start=2020-01-03 00:00:00&end=2020-01-03 23:59:59&page_size=1000&cursor=<next_cursor>
+    """
+    try:
+        df, next_cursor = db.fetch_page(start=start, end=end, mmsi=mmsi, vessel_name=vessel_name, cursor=cursor,
+                                        page_size=page_size, descending=order.lower() == "desc")
+    except ValueError as e:
+        return {"error": str(e)}
+    except Exception as e:
+        logging.error(f"Range page error: {e}")
+        return {"error": str(e)}
+    meta = {"count": len(df), "next_cursor": next_cursor, "has_more": next_cursor is not None}
+    fmt = negotiate_format(http_request, format)
+    if fmt != "records":
+        return tabular_response(df, fmt, meta, key="records")
+    return FastJSONResponse({**meta, "records": frame_records(df)})
+
+
+# ============================================================================
+# Spatial Queries - R*Tree-indexed bounding box / radius lookups
+# ============================================================================
+
+def ensure_spatial_index():
+    """Index positions added since the last start (set SPATIAL_INDEX_ON_STARTUP=0 to skip)"""
+    return db.ensure_spatial_index()
+
+
+add_maintenance("spatial_index", "SPATIAL_INDEX_ON_STARTUP", ensure_spatial_index)
+
+
+@app.post("/admin/spatial_index/build")
+def build_spatial_index():
+    try:
+        return db.ensure_spatial_index()
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@app.get("/spatial/bbox")
+def spatial_bbox(min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+                 start: str = None, end: str = None, limit: int = 10000):
+    """Positions inside a box, optionally within [start, end]. min_lon > max_lon crosses the antimeridian.
+
+    Example: /spatial/bbox?min_lat=29&min_lon=-81&max_lat=31&max_lon=-79&start=2020-01-03 00:00:00
+    """
+    startup.require("spatial_index")  # a partially built R*Tree would drop rows
+    try:
+        df = db.fetch_in_bbox(min_lat, min_lon, max_lat, max_lon, start=start, end=end, limit=limit)
+        return FastJSONResponse({"count": len(df), "positions": frame_records(df.drop(columns=["rowid"], errors="ignore"))})
+    except Exception as e:
+        logging.error(f"Bounding box query error: {e}")
+        return {"error": str(e)}
+
+
+@app.get("/spatial/radius")
+def spatial_radius(lat: float, lon: float, radius_nm: float, start: str = None, end: str = None, limit: int = 10000):
+    """Positions within `radius_nm` nautical miles of a point, nearest first
+
+    Example: /spatial/radius?lat=30.0&lon=-80.0&radius_nm=5
+    """
+    startup.require("spatial_index")  # a partially built R*Tree would drop rows
+    try:
+        df = db.fetch_within_radius(lat, lon, radius_nm, start=start, end=end, limit=limit)
+        return FastJSONResponse({"count": len(df), "positions": frame_records(df.drop(columns=["rowid"], errors="ignore"))})
+    except Exception as e:
+        logging.error(f"Radius query error: {e}")
+        return {"error": str(e)}
+
+
+@app.get("/spatial/latest")
+def spatial_latest(min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+                   start: str = None, end: str = None, limit: int = 10000):
+    """Newest fix of every vessel seen inside a box"""
+    startup.require("spatial_index")  # a partially built R*Tree would drop rows
+    try:
+        df = db.latest_positions_in_bbox(min_lat, min_lon, max_lat, max_lon, start=start, end=end, limit=limit)
+        return FastJSONResponse({"count": len(df), "vessels": frame_records(df.drop(columns=["rowid"], errors="ignore"))})
+    except Exception as e:
+        logging.error(f"Latest-in-bbox query error: {e}")
+        return {"error": str(e)}
+
+
+# ============================================================================
+# Streaming Feature State - constant-time predictions for monitored vessels
+# ============================================================================
+
+@app.post("/predict/state/update")
+def update_vessel_states(request: AISUpdateRequest):
+    """Push new AIS fixes into the per-MMSI rolling feature state"""
+    updated, skipped = 0, 0
+    for point in request.points:
+        if point.get("MMSI") is None:
+            skipped += 1
+            continue
+        registry.update_vessel_state(int(point["MMSI"]), point)
+        updated += 1
+    if updated:
+        sync.publish("feature_state", {"points": [p for p in request.points if p.get("MMSI") is not None]})
+    return {"updated": updated, "skipped": skipped, "states": registry.feature_states.stats()}
+
+
+@app.get("/predict/state/{mmsi}")
+def predict_from_state(mmsi: int, model_id: str = None):
+    """Predict from the cached feature state, priming it from the DB on first use"""
+    try:
+        state = registry.feature_states.get(mmsi)
+        if state is None or not state.ready:
+            track_df = db.fetch_track_ending_at(mmsi=int(mmsi), end_dt="2099-12-31 23:59:59",
+                                                limit=registry.feature_states.window_size)
+            if track_df.empty:
+                return {"error": "No vessel data found", "prediction_available": False}
+            registry.prime_vessel_state(int(mmsi), track_df)
+        return registry.predict_from_state(int(mmsi), model_id=model_id)
+    except ComponentNotReady:
+        raise
+    except Exception as e:
+        logging.error(f"State prediction error: {e}")
+        return {"error": str(e), "prediction_available": False}
+
+
+@app.get("/admin/feature_state/stats")
+def feature_state_stats():
+    return registry.feature_states.stats()
+
+
+# ============================================================================
+# Model Registry Endpoints - versioned models, hot-swap and A/B traffic split
+# ============================================================================
+
+@app.get("/admin/models")
+def list_models():
+    return {"active": registry.active_id, "models": registry.list_models()}
+
+
+@app.post("/admin/models/register")
+def register_model(request: ModelRegisterRequest):
+    """Load a model directory under a version id (optionally activating it). model_dir is
+    taken relative to XGBOOST_MODEL_REGISTRY and must stay inside it."""
+    try:
+        model_dir = str(allowed_model_dir(request.model_dir))
+    except PermissionError as e:
+        return JSONResponse(status_code=403, content={"error": str(e)})
+    if not os.path.isdir(model_dir):
+        return {"error": f"model directory not found: {request.model_dir}"}
+    loaded = registry.register(request.model_id, model_dir, activate=request.activate)
+    sync.publish("model_register", {"model_id": request.model_id, "model_dir": model_dir,
+                                    "activate": request.activate})
+    return {"ok": True, "model_id": request.model_id, "is_loaded": loaded.is_loaded, "active": registry.active_id}
+
+
+@app.post("/admin/models/{model_id}/activate")
+def activate_model(model_id: str):
+    try:
+        registry.activate(model_id)
+    except KeyError as e:
+        return {"error": str(e)}
+    sync.publish("model_activate", {"model_id": model_id})
+    return {"ok": True, "active": registry.active_id}
+
+
+@app.delete("/admin/models/{model_id}")
+def unregister_model(model_id: str):
+    try:
+        registry.unregister(model_id)
+    except (KeyError, ValueError) as e:
+        return {"error": str(e)}
+    sync.publish("model_unregister", {"model_id": model_id})
+    return {"ok": True}
+
+
+@app.post("/admin/models/traffic_split")
+def set_traffic_split(request: TrafficSplitRequest):
+    """Split /predict traffic across models, e.g. {"weights": {"v1": 0.9, "v2": 0.1}}; {} disables"""
+    try:
+        registry.set_traffic_split(request.weights)
+    except (KeyError, ValueError) as e:
+        return {"error": str(e)}
+    sync.publish("traffic_split", {"weights": request.weights})
+    return {"ok": True, "models": registry.list_models()}
+
+
+def _apply_feature_state(payload):
+    for point in payload["points"]:
+        registry.update_vessel_state(int(point["MMSI"]), point)
+
+
+sync.subscribe("feature_state", _apply_feature_state)
+sync.subscribe("model_register", lambda p: registry.register(p["model_id"], p["model_dir"], activate=p["activate"]))
+sync.subscribe("model_activate", lambda p: registry.activate(p["model_id"]))
+sync.subscribe("model_unregister", lambda p: registry.unregister(p["model_id"]))
+sync.subscribe("traffic_split", lambda p: registry.set_traffic_split(p["weights"]))
+
+
+@app.get("/admin/models/metrics")
+def model_metrics():
+    return {"metrics": registry.metrics()}
+
+
+@app.get("/admin/compute_pool")
+def compute_pool_stats():
+    return compute.stats()
@@ -21,9 +21,14 @@ class MapGenerator:
         track_data: List[Dict[str, Any]],
         vessel_name: str,
         center: Optional[Tuple[float, float]] = None,
-        zoom_start: int = 10
+        zoom_start: int = 10,
+        max_markers: int = 200
     ) -> folium.Map:
-        """Create a folium map with vessel track"""
+        """Create a folium map with vessel track
+
+        The line uses every point; long (e.g. tiered) tracks only get a marker on the
+        endpoints and every k-th point so at most `max_markers` markers are drawn.
+        """
         
         if not track_data:
             logger.warning("No track data provided")
@@ -31,11 +36,13 @@ class MapGenerator:
         
         # Extract coordinates
         coords = []
+        points = []
         for point in track_data:
             lat = point.get('LAT')
             lon = point.get('LON')
             if lat is not None and lon is not None:
                 coords.append((lat, lon))
+                points.append(point)
         
         if not coords:
             logger.warning("No valid coordinates in track data")
@@ -61,9 +68,12 @@ class MapGenerator:
             popup=f'{vessel_name} Track'
         ).add_to(m)
         
-        # Add markers for each point
+        # Add markers for each point (thinned for long tracks)
+        step = max(1, math.ceil(len(coords) / max(max_markers, 2)))
         for i, (lat, lon) in enumerate(coords):
-            point = track_data[i]
+            if i % step and i != len(coords) - 1:
+                continue
+            point = points[i]
             timestamp = point.get('BaseDateTime', 'Unknown')
             sog = point.get('SOG', 'N/A')
             cog = point.get('COG', 'N/A')
@@ -0,0 +1,231 @@
+"""
+Request Latency Metrics (Prometheus text format + Server-Timing)
+- stage("parse") / stage("db") / ...: time a block into the current request's timing;
+  nested stages are exclusive (a db call inside "execute" is not counted twice), so the
+  stages of a request add up to its handler time
+- collect(): fresh timing for work done elsewhere (compute workers return their stages
+  with the result; the API process adds them to the request with add_stages)
+- the HTTP middleware in main.py sends the stages as a Server-Timing header and observes
+  them in maritime_stage_seconds{route, stage} once per request
+- counters / histograms keep plain dicts, so a snapshot is JSON: every worker publishes
+  its snapshot with its worker_sync heartbeat and /metrics renders the sum over workers,
+  including the last snapshot of workers that exited (counters never go backwards)
+No prometheus_client dependency: only the counter / histogram subset of the text format
+(version 0.0.4) is implemented.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# seconds; stages range from sub-millisecond lookups to multi-second scans
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def snapshot(self) -> List:
+        with self._lock:
+            return [[list(key), value] for key, value in self.values.items()]
+
+
+class Histogram(Counter):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self.values.get(key)
+            if series is None:
+                # per-bucket (non-cumulative) counts + the +Inf bucket, sum
+                series = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def snapshot(self) -> List:
+        with self._lock:
+            return [[list(key), [list(counts), total]] for key, (counts, total) in self.values.items()]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, Counter] = {}
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.metrics.setdefault(name, Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.metrics.setdefault(name, Histogram(name, help, labelnames, buckets))
+
+    def snapshot(self) -> Dict:
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def render(self, snapshots: List[Dict] = None) -> str:
+        """Prometheus text exposition of the sum of `snapshots` (default: this process)"""
+        summed = merge_snapshots(snapshots if snapshots is not None else [self.snapshot()])
+        lines = []
+        for name, metric in self.metrics.items():
+            merged = {tuple(key): value for key, value in summed.get(name, [])}
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key in sorted(merged):
+                labels = [f'{label}="{_escape(v)}"' for label, v in zip(metric.labelnames, key)]
+                if metric.kind == "counter":
+                    lines.append(f"{name}{_labels(labels)} {_number(merged[key])}")
+                    continue
+                counts, total = merged[key]
+                cumulative = 0
+                for bound, count in zip(list(metric.buckets) + ["+Inf"], counts):
+                    cumulative += count
+                    le = 'le="%s"' % (bound if bound == "+Inf" else _number(bound))
+                    lines.append(f"{name}_bucket{_labels(labels + [le])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def merge_snapshots(snapshots: List[Dict]) -> Dict:
+    """Sum of registry snapshots, in snapshot form: counters add, histogram series add
+    bucket by bucket"""
+    merged: Dict[str, Dict[Tuple, object]] = {}
+    for snapshot in snapshots:
+        for name, series in snapshot.items():
+            target = merged.setdefault(name, {})
+            for key, value in series:
+                key = tuple(key)
+                current = target.get(key)
+                if isinstance(value, list):
+                    target[key] = ([list(value[0]), value[1]] if current is None else
+                                   [[a + b for a, b in zip(current[0], value[0])], current[1] + value[1]])
+                else:
+                    target[key] = (current or 0.0) + value
+    return {name: [[list(key), value] for key, value in series.items()] for name, series in merged.items()}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: List[str]) -> str:
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+REGISTRY = MetricsRegistry()
+REQUEST_SECONDS = REGISTRY.histogram("maritime_request_seconds", "HTTP request latency",
+                                     ["method", "route", "status"])
+STAGE_SECONDS = REGISTRY.histogram("maritime_stage_seconds",
+                                   "Time per request spent in each stage (parse, resolve, db, execute, "
+                                   "format, serialize; fetch, adapt, features, scale, pca, predict)",
+                                   ["route", "stage"])
+QUERY_INTENTS = REGISTRY.counter("maritime_query_intents_total", "Parsed /query intents", ["intent"])
+DB_CALLS = REGISTRY.counter("maritime_db_calls_total", "MaritimeDB read calls", ["method"])
+DB_SECONDS = REGISTRY.histogram("maritime_db_call_seconds", "MaritimeDB read call latency", ["method"])
+CACHE_REQUESTS = REGISTRY.counter("maritime_cache_requests_total",
+                                  "Cache lookups by result (hit / miss); hit rate = hit / (hit + miss)",
+                                  ["cache", "result"])
+
+
+# --- per-request stage timing ---
+class RequestTiming:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self._stack: List[List] = []  # [stage, start, time spent in nested stages]
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        if self._stack:
+            self._stack[-1][2] += seconds
+
+    def server_timing(self) -> str:
+        parts = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in self.stages.items()]
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.2f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+def begin() -> RequestTiming:
+    timing = RequestTiming()
+    _current.set(timing)
+    return timing
+
+
+def current() -> Optional[RequestTiming]:
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str):
+    """Time the block as `name` in the current request (no-op outside a request)"""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    frame = [name, time.perf_counter(), 0.0]
+    timing._stack.append(frame)
+    try:
+        yield
+    finally:
+        timing._stack.pop()
+        elapsed = time.perf_counter() - frame[1]
+        timing.stages[name] = timing.stages.get(name, 0.0) + elapsed - frame[2]
+        if timing._stack:
+            timing._stack[-1][2] += elapsed
+
+
+def add_stages(stages: Dict[str, float]):
+    """Add stages measured elsewhere (e.g. in a compute worker) to the current request"""
+    timing = _current.get()
+    if timing is not None:
+        for name, seconds in stages.items():
+            timing.add(name, seconds)
+
+
+@contextmanager
+def collect():
+    """Fresh timing for the block, independent of any enclosing request"""
+    timing = RequestTiming()
+    token = _current.set(timing)
+    try:
+        yield timing
+    finally:
+        _current.reset(token)
+
+
+def cache_lookup(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def observe_request(timing: RequestTiming, method: str, route: str, status: int):
+    REQUEST_SECONDS.observe(time.perf_counter() - timing.started, method=method, route=route, status=status)
+    for name, seconds in timing.stages.items():
+        STAGE_SECONDS.observe(seconds, route=route, stage=name)
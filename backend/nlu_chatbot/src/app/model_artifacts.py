@@ -0,0 +1,235 @@
+"""
+Native Model Artifact Format for the XGBoost Predictor
+Replaces the three pickles (model, scaler, PCA) with:
+- XGBoost native UBJ booster file(s)
+- a small .npz holding the StandardScaler / PCA matrices
+- a manifest.json with SHA-256 checksums and the 483-feature schema
+Artifacts are loaded concurrently; no arbitrary code is executed on load
+"""
+
+import hashlib
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+PREPROCESSING_FILE = "preprocessing.npz"
+MODEL_FILE_TEMPLATE = "xgboost_model_{index}.ubj"
+
+# Order must match XGBoostPredictor.extract_features_from_3d_array / add_haversine_features_3d
+PER_DIMENSION_FEATURES = [
+    "mean", "std", "min", "max", "median", "p25", "p75", "range", "skew", "kurtosis",
+    "trend_mean", "trend_std", "trend_max", "trend_min",
+    "first_last_diff", "first_last_ratio", "volatility",
+]
+HAVERSINE_FEATURES = [
+    "dist_to_first_mean", "dist_to_first_max", "dist_to_first_std",
+    "step_sum", "step_mean", "step_max", "step_std",
+]
+N_DIMENSIONS = 28
+
+
+def feature_schema(n_dimensions: int = N_DIMENSIONS) -> Dict:
+    """Describe the feature vector fed to the scaler (17 x 28 statistics + 7 haversine = 483)"""
+    names = [f"dim{dim}_{name}" for dim in range(n_dimensions) for name in PER_DIMENSION_FEATURES]
+    names += [f"haversine_{name}" for name in HAVERSINE_FEATURES]
+    return {
+        "n_dimensions": n_dimensions,
+        "per_dimension_features": PER_DIMENSION_FEATURES,
+        "haversine_features": HAVERSINE_FEATURES,
+        "n_features": len(names),
+        "feature_names": names,
+    }
+
+
+def sha256_file(path: Path, chunk_size: int = 1 << 20) -> str:
+    """Return the hex SHA-256 digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArrayScaler:
+    """Drop-in replacement for a fitted sklearn StandardScaler (transform only)"""
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean_ = mean
+        self.scale_ = scale
+        self.n_features_in_ = int(mean.shape[0])
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return (np.asarray(X, dtype=float) - self.mean_) / self.scale_
+
+
+class ArrayPCA:
+    """Drop-in replacement for a fitted sklearn PCA (transform only)"""
+
+    def __init__(self, mean: np.ndarray, components: np.ndarray,
+                 explained_variance: np.ndarray = None, whiten: bool = False):
+        self.mean_ = mean
+        self.components_ = components
+        self.explained_variance_ = explained_variance
+        self.whiten = whiten
+        self.n_components_ = int(components.shape[0])
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        X_t = (np.asarray(X, dtype=float) - self.mean_) @ self.components_.T
+        if self.whiten:
+            X_t /= np.sqrt(self.explained_variance_)
+        return X_t
+
+
+class BoosterModel:
+    """Predict with one multi-output booster or one booster per output (MultiOutputRegressor)"""
+
+    def __init__(self, boosters: List):
+        self.boosters = boosters
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if len(self.boosters) == 1:
+            preds = np.asarray(self.boosters[0].inplace_predict(X))
+            return preds.reshape(X.shape[0], -1)
+        return np.column_stack([np.asarray(b.inplace_predict(X)).reshape(-1) for b in self.boosters])
+
+
+def _extract_boosters(model) -> List:
+    """Pull the raw xgboost.Booster objects out of a pickled model"""
+    if hasattr(model, "estimators_"):
+        return [est.get_booster() for est in model.estimators_]
+    if hasattr(model, "get_booster"):
+        return [model.get_booster()]
+    if hasattr(model, "save_model") and hasattr(model, "inplace_predict"):
+        return [model]
+    if isinstance(model, BoosterModel):
+        return list(model.boosters)
+    raise TypeError(f"Unsupported model type for native export: {type(model).__name__}")
+
+
+def export_artifacts(model, scaler, pca, out_dir) -> Dict:
+    """Write native artifacts for an already-loaded model/scaler/PCA and return the manifest"""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    model_files = []
+    for index, booster in enumerate(_extract_boosters(model)):
+        name = MODEL_FILE_TEMPLATE.format(index=index)
+        booster.save_model(str(out_dir / name))
+        model_files.append(name)
+
+    arrays = {
+        "scaler_mean": np.asarray(scaler.mean_, dtype=float),
+        "scaler_scale": np.asarray(scaler.scale_, dtype=float),
+        "pca_mean": np.asarray(pca.mean_, dtype=float),
+        "pca_components": np.asarray(pca.components_, dtype=float),
+        "pca_explained_variance": np.asarray(pca.explained_variance_, dtype=float),
+        "pca_whiten": np.asarray(bool(getattr(pca, "whiten", False))),
+    }
+    # Uncompressed so np.load does not have to inflate anything at startup
+    np.savez(out_dir / PREPROCESSING_FILE, **arrays)
+
+    schema = feature_schema()
+    if schema["n_features"] != arrays["scaler_mean"].shape[0]:
+        logger.warning(
+            f"⚠️  Scaler expects {arrays['scaler_mean'].shape[0]} features, schema describes {schema['n_features']}"
+        )
+        schema = {"n_features": int(arrays["scaler_mean"].shape[0])}
+
+    files = {}
+    for name in model_files + [PREPROCESSING_FILE]:
+        path = out_dir / name
+        files[name] = {"sha256": sha256_file(path), "bytes": path.stat().st_size}
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "created_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+        "model_files": model_files,
+        "preprocessing_file": PREPROCESSING_FILE,
+        "pca_components": int(arrays["pca_components"].shape[0]),
+        "files": files,
+        "feature_schema": schema,
+    }
+    with open(out_dir / MANIFEST_FILE, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    logger.info(f"✅ Exported native artifacts to {out_dir}")
+    return manifest
+
+
+def has_native_artifacts(model_dir) -> bool:
+    return (Path(model_dir) / MANIFEST_FILE).exists()
+
+
+def _load_booster(path: Path):
+    import xgboost as xgb
+    booster = xgb.Booster()
+    booster.load_model(str(path))
+    return booster
+
+
+def _load_preprocessing(path: Path) -> Tuple[ArrayScaler, ArrayPCA]:
+    with np.load(path, allow_pickle=False) as data:
+        scaler = ArrayScaler(data["scaler_mean"], data["scaler_scale"])
+        pca = ArrayPCA(
+            data["pca_mean"],
+            data["pca_components"],
+            data["pca_explained_variance"],
+            bool(data["pca_whiten"]),
+        )
+    return scaler, pca
+
+
+def _verify_checksums(model_dir: Path, files: Dict) -> None:
+    for name, meta in files.items():
+        actual = sha256_file(model_dir / name)
+        if actual != meta["sha256"]:
+            raise ValueError(f"Checksum mismatch for {name}")
+
+
+def load_artifacts(model_dir, verify: bool = True) -> Tuple[BoosterModel, ArrayScaler, ArrayPCA, Dict]:
+    """Load native artifacts concurrently (booster files, preprocessing arrays, checksums)
+
+    Raises FileNotFoundError if the manifest or a referenced file is missing and
+    ValueError on checksum or schema mismatch.
+    """
+    model_dir = Path(model_dir)
+    manifest_path = model_dir / MANIFEST_FILE
+    if not manifest_path.exists():
+        raise FileNotFoundError(f"Manifest not found: {manifest_path}")
+
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format version: {manifest.get('format_version')}")
+
+    for name in manifest["files"]:
+        if not (model_dir / name).exists():
+            raise FileNotFoundError(f"Artifact file not found: {model_dir / name}")
+
+    # Booster parsing, npz reads and hashing all release the GIL
+    with ThreadPoolExecutor(max_workers=len(manifest["model_files"]) + 2) as pool:
+        booster_futures = [pool.submit(_load_booster, model_dir / name) for name in manifest["model_files"]]
+        preprocessing_future = pool.submit(_load_preprocessing, model_dir / manifest["preprocessing_file"])
+        verify_future = pool.submit(_verify_checksums, model_dir, manifest["files"]) if verify else None
+
+        boosters = [fut.result() for fut in booster_futures]
+        scaler, pca = preprocessing_future.result()
+        if verify_future is not None:
+            verify_future.result()
+
+    expected = manifest.get("feature_schema", {}).get("n_features")
+    if expected is not None and expected != scaler.n_features_in_:
+        raise ValueError(f"Feature schema mismatch: manifest {expected}, scaler {scaler.n_features_in_}")
+
+    return BoosterModel(boosters), scaler, pca, manifest
@@ -0,0 +1,278 @@
+"""
+Model Registry for XGBoost Trajectory Prediction
+Loads several versioned model directories side by side, hot-swaps the active model
+and routes requests by explicit model id or a weighted traffic split (A/B evaluation)
+Records per-model prediction counts and latency
+"""
+
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .xgboost_predictor import XGBoostPredictor
+    from .model_artifacts import has_native_artifacts
+    from .feature_state import FeatureStateCache
+except ImportError:
+    from xgboost_predictor import XGBoostPredictor
+    from model_artifacts import has_native_artifacts
+    from feature_state import FeatureStateCache
+
+logger = logging.getLogger(__name__)
+
+LATENCY_WINDOW = 1000  # recent latencies kept per model for percentiles
+
+
+class ModelMetrics:
+    """Prediction count / error count / latency tracking for one model"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.predictions = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.recent = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, seconds: float, ok: bool):
+        with self._lock:
+            self.predictions += 1
+            if not ok:
+                self.errors += 1
+            self.total_seconds += seconds
+            self.recent.append(seconds)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            recent = np.array(self.recent) if self.recent else None
+            return {
+                "predictions": self.predictions,
+                "errors": self.errors,
+                "mean_ms": (self.total_seconds / self.predictions * 1000.0) if self.predictions else None,
+                "p50_ms": float(np.percentile(recent, 50) * 1000.0) if recent is not None else None,
+                "p95_ms": float(np.percentile(recent, 95) * 1000.0) if recent is not None else None,
+                "max_ms": float(recent.max() * 1000.0) if recent is not None else None,
+            }
+
+
+class ModelRegistry:
+    """Thread-safe registry of loaded predictors
+
+    Requests resolve a predictor reference once and keep using it, so swapping the
+    active model or unregistering one never interrupts a prediction already running.
+    """
+
+    def __init__(self, loader: Callable[[str], XGBoostPredictor] = XGBoostPredictor.load):
+        self._loader = loader
+        self._lock = threading.RLock()
+        self._models: Dict[str, XGBoostPredictor] = {}
+        self._model_dirs: Dict[str, str] = {}
+        self._loaded_at: Dict[str, float] = {}
+        self._metrics: Dict[str, ModelMetrics] = {}
+        self._active: Optional[str] = None
+        self._traffic_split: Dict[str, float] = {}
+        # one streaming feature-state cache shared by every registered model
+        self.feature_states: Optional[FeatureStateCache] = None
+
+    # --- Registration ---
+    def register(self, model_id: str, model_dir: str = None, predictor: XGBoostPredictor = None,
+                 activate: bool = False) -> XGBoostPredictor:
+        """Load (or adopt) a predictor under `model_id`. Re-registering an id replaces it atomically."""
+        if predictor is None:
+            # load outside the lock so serving continues while a new version warms up
+            predictor = self._loader(model_dir)
+        with self._lock:
+            if self.feature_states is None:
+                self.feature_states = getattr(predictor, "feature_states", None)
+            elif hasattr(predictor, "feature_states"):
+                predictor.feature_states = self.feature_states
+            self._models[model_id] = predictor
+            self._model_dirs[model_id] = str(getattr(predictor, "model_dir", model_dir))
+            self._loaded_at[model_id] = time.time()
+            self._metrics.setdefault(model_id, ModelMetrics())
+            if activate or self._active is None:
+                self._active = model_id
+        logger.info(f"✅ Registered model '{model_id}' from {self._model_dirs[model_id]}"
+                    f"{' (active)' if self._active == model_id else ''}")
+        return predictor
+
+    def unregister(self, model_id: str):
+        with self._lock:
+            if model_id not in self._models:
+                raise KeyError(f"Unknown model id: {model_id}")
+            if model_id == self._active:
+                raise ValueError("Cannot unregister the active model; activate another one first")
+            del self._models[model_id]
+            if self._traffic_split.pop(model_id, None) is not None:
+                # the remaining shares must still sum to 1; a one-model split is no split
+                total = sum(self._traffic_split.values())
+                if len(self._traffic_split) > 1 and total > 0:
+                    self._traffic_split = {m: w / total for m, w in self._traffic_split.items()}
+                else:
+                    self._traffic_split = {}
+        logger.info(f"Unregistered model '{model_id}'")
+
+    def register_directory(self, root: str) -> List[str]:
+        """Register every versioned sub-directory of `root` that holds model artifacts"""
+        registered = []
+        for sub in sorted(Path(root).iterdir()):
+            if sub.is_dir() and ((sub / "xgboost_model.pkl").exists() or has_native_artifacts(sub)):
+                self.register(sub.name, str(sub))
+                registered.append(sub.name)
+        return registered
+
+    def activate(self, model_id: str):
+        with self._lock:
+            if model_id not in self._models:
+                raise KeyError(f"Unknown model id: {model_id}")
+            previous, self._active = self._active, model_id
+        logger.info(f"Active model switched: {previous} -> {model_id}")
+
+    def set_traffic_split(self, weights: Dict[str, float]):
+        """Route a share of requests to each model, e.g. {"v1": 0.9, "v2": 0.1}. Empty dict disables."""
+        with self._lock:
+            unknown = [m for m in weights if m not in self._models]
+            if unknown:
+                raise KeyError(f"Unknown model id(s): {unknown}")
+            if any(w < 0 for w in weights.values()) or (weights and sum(weights.values()) <= 0):
+                raise ValueError("Traffic weights must be non-negative and sum to a positive value")
+            total = float(sum(weights.values()))
+            self._traffic_split = {m: w / total for m, w in weights.items() if w > 0}
+
+    # --- Routing ---
+    def resolve(self, model_id: str = None, routing_key=None):
+        """Return (model_id, predictor) for a request
+
+        Explicit model_id wins; otherwise the traffic split is applied (sticky per
+        routing_key, e.g. MMSI, when given); otherwise the active model is used.
+        """
+        with self._lock:
+            if model_id is not None:
+                if model_id not in self._models:
+                    raise KeyError(f"Unknown model id: {model_id}")
+                return model_id, self._models[model_id]
+            if self._traffic_split:
+                if routing_key is not None:
+                    digest = hashlib.md5(str(routing_key).encode()).digest()
+                    point = int.from_bytes(digest[:8], "big") / 2.0 ** 64
+                else:
+                    point = random.random()
+                cumulative = 0.0
+                for candidate, weight in self._traffic_split.items():
+                    cumulative += weight
+                    if point < cumulative:
+                        return candidate, self._models[candidate]
+                candidate = next(reversed(self._traffic_split))
+                return candidate, self._models[candidate]
+            if self._active is None:
+                raise KeyError("No model registered")
+            return self._active, self._models[self._active]
+
+    def record_prediction(self, model_id: str, seconds: float, ok: bool):
+        """Count a prediction served for `model_id` elsewhere (e.g. by a compute-pool worker)"""
+        with self._lock:
+            metrics = self._metrics.setdefault(model_id, ModelMetrics())
+        metrics.record(seconds, ok=ok)
+
+    def _timed_call(self, method: str, model_id: str, routing_key, *args, **kwargs) -> Dict:
+        resolved_id, predictor = self.resolve(model_id, routing_key)
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = getattr(predictor, method)(*args, **kwargs)
+            ok = bool(result.get("prediction_available"))
+        finally:
+            # a raising predictor counts as an error, not as a missing sample
+            self.record_prediction(resolved_id, time.perf_counter() - start, ok=ok)
+        result["model_id"] = resolved_id
+        return result
+
+    def predict_single_vessel(self, vessel_df: pd.DataFrame, sequence_length: int = 12,
+                              model_id: str = None, routing_key=None) -> Dict:
+        return self._timed_call("predict_single_vessel", model_id, routing_key,
+                                vessel_df, sequence_length=sequence_length)
+
+    def rollout_trajectory(self, vessel_df: pd.DataFrame, steps: int = None, horizon_minutes: float = None,
+                           sequence_length: int = 12, model_id: str = None, routing_key=None) -> Dict:
+        return self._timed_call("rollout_trajectory", model_id, routing_key, vessel_df, steps=steps,
+                                horizon_minutes=horizon_minutes, sequence_length=sequence_length)
+
+    def update_vessel_state(self, mmsi: int, point: Dict):
+        """Feature state is model-independent; any registered predictor updates the shared cache"""
+        return self.resolve()[1].update_vessel_state(mmsi, point)
+
+    def prime_vessel_state(self, mmsi: int, vessel_df: pd.DataFrame):
+        return self.resolve()[1].prime_vessel_state(mmsi, vessel_df)
+
+    def predict_from_state(self, mmsi: int, model_id: str = None) -> Dict:
+        return self._timed_call("predict_from_state", model_id, mmsi, mmsi)
+
+    # --- Introspection ---
+    def list_models(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {
+                    "model_id": model_id,
+                    "model_dir": self._model_dirs.get(model_id),
+                    "is_loaded": bool(getattr(predictor, "is_loaded", False)),
+                    "artifact_format": getattr(predictor, "artifact_format", None),
+                    "active": model_id == self._active,
+                    "traffic_share": self._traffic_split.get(model_id),
+                    "loaded_at": self._loaded_at.get(model_id),
+                }
+                for model_id, predictor in self._models.items()
+            ]
+
+    def metrics(self) -> Dict[str, Dict]:
+        with self._lock:
+            items = list(self._metrics.items())
+        return {model_id: m.snapshot() for model_id, m in items}
+
+    @property
+    def active_id(self) -> Optional[str]:
+        return self._active
+
+
+def models_root() -> Optional[Path]:
+    """XGBOOST_MODEL_REGISTRY: the only directory models may be loaded from at runtime"""
+    root = os.environ.get("XGBOOST_MODEL_REGISTRY")
+    return Path(root).resolve() if root else None
+
+
+def allowed_model_dir(model_dir: str) -> Path:
+    """Resolve `model_dir` (relative to the models root, or absolute) and refuse anything
+    outside the root, so the admin API cannot unpickle files from arbitrary paths"""
+    root = models_root()
+    if root is None:
+        raise PermissionError("model registration is disabled (set XGBOOST_MODEL_REGISTRY)")
+    path = (root / model_dir).resolve()
+    if path != root and root not in path.parents:
+        raise PermissionError(f"model directory must be inside {root}")
+    return path
+
+
+# Global registry instance
+_registry = None
+
+
+def get_registry() -> ModelRegistry:
+    """Get or create the global model registry
+
+    XGBOOST_MODEL_REGISTRY may point at a directory of versioned model directories,
+    which are all registered on first use.
+    """
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry()
+        root = models_root()
+        if root is not None and root.is_dir():
+            _registry.register_directory(str(root))
+    return _registry
@@ -15,6 +15,33 @@ except Exception:
 # Production: enforce spaCy-only NER. Remove optional transformer fallbacks for predictable behavior.
 hf_ner = None
 
+try:
+    from .ports import find_port
+    from . import metrics
+except ImportError:
+    from ports import find_port
+    import metrics
+
+# NEARBY / AREA phrasing: "near X", "around X", "within 10 nm of X"
+DISTANCE_UNITS = r"(nm|nmi|nautical miles?|miles?|mi|km|kilometers?|kilometres?|m|meters?|metres?)"
+SPATIAL_INTENT_RE = re.compile(r"\b(near|nearby|close to|in the vicinity of|vicinity of|in the area of|around)\b")
+WITHIN_RE = re.compile(r"\bwithin\s+\d+(?:\.\d+)?\s*" + DISTANCE_UNITS + r"\s+(?:of|from|around)\b")
+# "around 5pm", "near 10am", "around 2020-01-03 10:00", "around noon", "in the near future" are times, not areas
+TIME_AFTER_RE = re.compile(
+    r"\s*(?:the\s+)?(?:\d{1,2}(:\d{2})?\s*(am|pm|o'clock)?(?![\d.,:])|\d{1,2}:\d{2}|\d{4}-\d{2}-\d{2}"
+    r"|\d{1,2}/\d{1,2}/\d{2,4}|noon|midnight|midday|future|today|tonight|yesterday|tomorrow|then|that time"
+    r"|(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\b)"
+)
+# after near / around: something with a position (a vessel name is checked against the known list)
+ANCHOR_AFTER_RE = re.compile(r"\s*(?:the\s+)?(?:port\b|harbou?r\b|mmsi\b|vessel\b|ship\b|\d{9}\b)")
+RADIUS_RE = re.compile(r"(?:within|inside|in)?\s*(\d+(?:\.\d+)?)\s*" + DISTANCE_UNITS + r"\s+(?:of|from|around|radius)\b")
+COORDS_RE = re.compile(
+    r"(-?\d{1,2}(?:\.\d+)?)\s*°?\s*([ns])?\s*(,|\s)\s*(-?\d{1,3}(?:\.\d+)?)\s*°?\s*([ew])?(?![\d.])"
+)
+# unit -> nautical miles
+UNIT_TO_NM = {"nm": 1.0, "km": 1.0 / 1.852, "mi": 0.868976, "m": 1.0 / 1852.0}
+DEFAULT_RADIUS_NM = 10.0
+
 
 
 class MaritimeNLPInterpreter:
@@ -54,13 +81,15 @@ class MaritimeNLPInterpreter:
         doc = self.nlp(text_lower)
 
         intent = self._extract_intent(text_lower)
-        vessel_name = self._extract_vessel_name(text_lower)
+        with metrics.stage("resolve"):
+            vessel_name = self._extract_vessel_name(text_lower)
         time_horizon = self._extract_time_horizon(doc)
         # existing 'datetime' kept for backward compatibility
         datetime_extracted = self._extract_datetime(text_lower, doc)
         # new richer parsing which attempts to compute an absolute end_dt when possible
         end_dt, duration_minutes = self._compute_end_dt(text_lower, doc, datetime_extracted, time_horizon)
         identifiers = self._extract_identifiers(text_lower)
+        spatial = self._extract_spatial(text_lower, vessel_name, identifiers) if intent == "NEARBY" else None
 
         # Build a structured JSON-friendly result
         parsed = {
@@ -74,6 +103,8 @@ class MaritimeNLPInterpreter:
             # duration_minutes indicates a relative horizon (e.g., in 30 minutes -> 30)
             "duration_minutes": duration_minutes,
             "identifiers": identifiers,
+            # NEARBY only: radius (+unit) and the anchor the radius is measured from
+            "spatial": spatial,
         }
 
         return parsed
@@ -279,7 +310,28 @@ class MaritimeNLPInterpreter:
 
         return None, None
 
+    def _is_spatial_anchor(self, rest: str) -> bool:
+        """Does the text after near / around name a place (coordinates, port, vessel) rather than a time?"""
+        if TIME_AFTER_RE.match(rest):
+            return False
+        if ANCHOR_AFTER_RE.match(rest) or COORDS_RE.match(rest.lstrip()):
+            return True
+        rest = rest.lstrip()
+        if rest.startswith("the "):
+            rest = rest[4:]
+        port = find_port(rest)
+        if port and re.match(r"(?:port of\s+)?" + re.escape(port[0].lower()) + r"\b", rest):
+            return True
+        return any(rest.startswith(v) for v in getattr(self, "vessel_list", ()) if v)
+
     def _extract_intent(self, text_lower: str) -> Optional[str]:
+        # area questions first: "show vessels near miami" is NEARBY, not SHOW
+        if WITHIN_RE.search(text_lower):
+            return "NEARBY"
+        for m in SPATIAL_INTENT_RE.finditer(text_lower):
+            if self._is_spatial_anchor(text_lower[m.end():]):
+                return "NEARBY"
+
         # simple keyword mapping first
         for intent, words in self.intent_keywords.items():
             if any(word in text_lower for word in words):
@@ -342,6 +394,58 @@ class MaritimeNLPInterpreter:
 
         return None
 
+    @staticmethod
+    def _normalise_unit(unit: str) -> str:
+        unit = unit.lower()
+        if unit.startswith("n"):
+            return "nm"
+        if unit.startswith("k"):
+            return "km"
+        if unit.startswith("mi"):
+            return "mi"
+        return "m"
+
+    @staticmethod
+    def _extract_spatial(text_lower: str, vessel_name: Optional[str] = None,
+                         identifiers: Optional[Dict] = None) -> Dict:
+        """Radius, unit and anchor for NEARBY questions.
+
+        Anchor precedence: coordinates, MMSI, named port, vessel name. A port name that is
+        only part of the extracted vessel name (e.g. 'NEW YORK EXPRESS') stays a vessel.
+        """
+        radius_match = RADIUS_RE.search(text_lower)
+        if radius_match:
+            radius = float(radius_match.group(1))
+            unit = MaritimeNLPInterpreter._normalise_unit(radius_match.group(2))
+        else:
+            radius, unit = DEFAULT_RADIUS_NM, "nm"
+        spatial = {"radius": radius, "unit": unit, "radius_nm": radius * UNIT_TO_NM[unit], "anchor": None}
+
+        # strip the radius phrase so '10 nm of 25.7, -80.1' does not read '10' as a latitude
+        remainder = text_lower[:radius_match.start()] + " " + text_lower[radius_match.end():] if radius_match else text_lower
+        for m in COORDS_RE.finditer(remainder):
+            lat_s, ns, sep, lon_s, ew = m.groups()
+            explicit = sep == "," or ns or ew or ("." in lat_s and "." in lon_s)
+            lat, lon = float(lat_s), float(lon_s)
+            lat = -abs(lat) if ns == "s" else lat
+            lon = -abs(lon) if ew == "w" else lon
+            if explicit and -90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0:
+                spatial["anchor"] = {"type": "coords", "name": f"{lat:.4f}, {lon:.4f}", "lat": lat, "lon": lon}
+                return spatial
+
+        mmsi = (identifiers or {}).get("mmsi")
+        if mmsi:
+            spatial["anchor"] = {"type": "vessel", "mmsi": int(mmsi), "name": None}
+            return spatial
+
+        port = find_port(text_lower)
+        vessel = (vessel_name or "").lower()
+        if port and not (vessel and vessel != port[0].lower() and port[0].lower() in vessel):
+            spatial["anchor"] = {"type": "port", "name": port[0], "lat": port[1], "lon": port[2]}
+        elif vessel_name:
+            spatial["anchor"] = {"type": "vessel", "name": vessel_name, "mmsi": None}
+        return spatial
+
     def _extract_time_horizon(self, doc) -> Optional[str]:
         matches = self.matcher(doc)
         for _, start, end in matches:
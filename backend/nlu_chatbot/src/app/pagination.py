@@ -0,0 +1,81 @@
+"""
+Keyset (Cursor) Pagination over vessel_data
+Pages are ordered by (BaseDateTime, MMSI, rowid) and continue strictly after the last
+row of the previous page, so page N costs the same index seek as page 1 (no OFFSET)
+- the cursor is an opaque url-safe token holding that key plus a fingerprint of the
+  filters / direction it was issued for
+- idx_vessel_time_mmsi(BaseDateTime, MMSI) carries rowid, so the scan needs no sort
+Shared by MaritimeDB and MaritimeDBAsync
+"""
+
+import base64
+import hashlib
+import json
+from typing import Dict, Optional, Tuple
+
+KEYSET_INDEX = "CREATE INDEX IF NOT EXISTS idx_vessel_time_mmsi ON vessel_data(BaseDateTime, MMSI);"
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 10000
+
+
+def _fingerprint(filters: Dict) -> str:
+    canonical = json.dumps(filters, sort_keys=True, default=str)
+    return hashlib.sha1(canonical.encode()).hexdigest()[:12]
+
+
+def encode_cursor(key: Tuple[str, int, int], filters: Dict) -> str:
+    payload = json.dumps({"k": list(key), "f": _fingerprint(filters)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, filters: Dict) -> Tuple[str, int, int]:
+    """Key of the last row served; ValueError if the token is malformed or was issued
+    for different filters"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        ts, mmsi, rowid = payload["k"]
+        fingerprint = payload["f"]
+    except Exception:
+        raise ValueError("invalid cursor")
+    if fingerprint != _fingerprint(filters):
+        raise ValueError("cursor does not match this query")
+    return str(ts), int(mmsi), int(rowid)
+
+
+def page_query(start: str = None, end: str = None, mmsi: int = None, vessel_name: str = None,
+               cursor: Optional[str] = None, page_size: int = DEFAULT_PAGE_SIZE,
+               descending: bool = False) -> Tuple[str, tuple, Dict]:
+    """SQL + params for one page (fetches page_size + 1 rows to detect a next page)
+    and the filters dict the cursor is bound to. Rows without MMSI are not paged."""
+    filters = {"start": start, "end": end, "mmsi": mmsi, "vessel_name": vessel_name, "desc": bool(descending)}
+    where, params = ["BaseDateTime IS NOT NULL", "MMSI IS NOT NULL"], []
+    if start:
+        where.append("BaseDateTime >= ?")
+        params.append(start)
+    if end:
+        where.append("BaseDateTime <= ?")
+        params.append(end)
+    if mmsi is not None:
+        where.append("MMSI = ?")
+        params.append(int(mmsi))
+    if vessel_name:
+        where.append("VesselName = ?")
+        params.append(vessel_name)
+    if cursor:
+        where.append(f"(BaseDateTime, MMSI, rowid) {'<' if descending else '>'} (?, ?, ?)")
+        params.extend(decode_cursor(cursor, filters))
+    direction = "DESC" if descending else "ASC"
+    size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+    query = f"""
+    SELECT rowid AS _rowid, * FROM vessel_data
+    WHERE {' AND '.join(where)}
+    ORDER BY BaseDateTime {direction}, MMSI {direction}, rowid {direction}
+    LIMIT ?;
+    """
+    params.append(size + 1)
+    return query, tuple(params), filters
+
+
+def next_cursor(last_row: Dict, filters: Dict) -> str:
+    return encode_cursor((last_row["BaseDateTime"], int(last_row["MMSI"]), int(last_row["_rowid"])), filters)
@@ -0,0 +1,81 @@
+"""
+Named Port Gazetteer for Spatial Queries
+Approximate harbour coordinates used as anchors for NEARBY queries ("vessels near Miami")
+Focused on US waters covered by the MarineCadastre AIS data, plus major world ports
+"""
+
+import re
+from typing import Dict, Optional, Tuple
+
+# name (lower case) -> (lat, lon)
+PORTS: Dict[str, Tuple[float, float]] = {
+    # US East Coast
+    "boston": (42.3550, -71.0450),
+    "new york": (40.6840, -74.0440),
+    "newark": (40.6840, -74.1390),
+    "philadelphia": (39.9130, -75.1390),
+    "baltimore": (39.2640, -76.5790),
+    "norfolk": (36.9070, -76.3290),
+    "wilmington": (34.2170, -77.9560),
+    "charleston": (32.7800, -79.9230),
+    "savannah": (32.0810, -81.0910),
+    "jacksonville": (30.3960, -81.5320),
+    "port canaveral": (28.4100, -80.6200),
+    "port everglades": (26.0920, -80.1180),
+    "fort lauderdale": (26.0920, -80.1180),
+    "miami": (25.7780, -80.1750),
+    "key west": (24.5560, -81.8070),
+    # Gulf of Mexico
+    "tampa": (27.9420, -82.4450),
+    "mobile": (30.6950, -88.0390),
+    "new orleans": (29.9350, -90.0580),
+    "port fourchon": (29.1100, -90.1950),
+    "lake charles": (30.2170, -93.2300),
+    "port arthur": (29.8660, -93.9300),
+    "beaumont": (30.0800, -94.0860),
+    "galveston": (29.3100, -94.7930),
+    "houston": (29.7300, -95.2650),
+    "freeport": (28.9420, -95.3080),
+    "corpus christi": (27.8130, -97.3960),
+    # US West Coast / Pacific
+    "san diego": (32.7050, -117.1730),
+    "long beach": (33.7540, -118.2160),
+    "los angeles": (33.7370, -118.2640),
+    "oakland": (37.7950, -122.2800),
+    "san francisco": (37.8080, -122.4000),
+    "portland": (45.5750, -122.7290),
+    "seattle": (47.5830, -122.3470),
+    "tacoma": (47.2670, -122.4130),
+    "anchorage": (61.2380, -149.8890),
+    "honolulu": (21.3070, -157.8690),
+    # Great Lakes
+    "chicago": (41.8800, -87.6100),
+    "detroit": (42.3180, -83.0530),
+    "duluth": (46.7730, -92.0960),
+    # Caribbean
+    "san juan": (18.4590, -66.1090),
+    # World
+    "rotterdam": (51.9490, 4.1450),
+    "antwerp": (51.2640, 4.3940),
+    "hamburg": (53.5410, 9.9550),
+    "singapore": (1.2640, 103.8400),
+    "shanghai": (31.3600, 121.6100),
+    "hong kong": (22.3080, 114.1660),
+    "busan": (35.0980, 129.0400),
+    "dubai": (25.0110, 55.0610),
+    "jebel ali": (25.0110, 55.0610),
+}
+
+_PORT_PATTERN = re.compile(
+    r"\b(?:port of\s+)?(" + "|".join(re.escape(name) for name in sorted(PORTS, key=len, reverse=True)) + r")\b"
+)
+
+
+def find_port(text_lower: str) -> Optional[Tuple[str, float, float]]:
+    """Longest port name mentioned in the text -> (name, lat, lon)"""
+    match = _PORT_PATTERN.search(text_lower)
+    if not match:
+        return None
+    name = match.group(1)
+    lat, lon = PORTS[name]
+    return name.title(), lat, lon
@@ -0,0 +1,133 @@
+"""
+Pre-fork Multi-Worker Server (production entry point, POSIX only)
+`uvicorn --workers N` spawns fresh interpreters, so every worker reloads spaCy, scans the
+vessel list and unpickles the model on its own. This instead:
+- imports main once in the parent and loads its shared startup components there (spaCy,
+  PhraseMatcher, vessel list, model registry, one-off DB maintenance: latest positions,
+  tiers, indexes)
+- gc.freeze()s the preloaded heap so refcount / GC passes in the workers do not dirty
+  (and so un-share) its copy-on-write pages
+- forks N workers serving one shared listening socket; each resets its SQLite
+  connections (main.after_fork) and its lifespan starts only the per-process components
+  (compute pool, job queue, worker sync)
+- restarts workers that die, from the same preloaded image
+The vessel DB is read through SQLite mmap (SQLITE_MMAP_BYTES), so its pages are shared
+through the OS page cache; registry / feature-state changes are replayed across workers
+by worker_sync, and GET /admin/workers reports each worker's RSS / PSS.
+
+Usage:
+    python prefork.py --workers 4 --host 0.0.0.0 --port 8000
+"""
+
+import argparse
+import gc
+import importlib
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def preload():
+    """Import the app and load every shared startup component in this (parent) process"""
+    # each worker already is a process per core; a compute pool per worker would oversubscribe
+    os.environ.setdefault("COMPUTE_WORKERS", "0")
+    started = time.time()
+    app_module = importlib.import_module("main")
+    # everything but the per-process threads / pools; the workers' lifespan starts only those
+    names = app_module.startup.preloadable()
+    app_module.startup.start(names)
+    app_module.startup.wait(names)
+    logger.info(f"✅ Preloaded app in {time.time() - started:.1f}s")
+    return app_module
+
+
+def bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def serve_worker(app_module, sock: socket.socket, args):
+    """Body of a forked worker; never returns"""
+    import uvicorn
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    app_module.after_fork()
+    config = uvicorn.Config(app_module.app, log_level=args.log_level, timeout_keep_alive=args.keep_alive)
+    server = uvicorn.Server(config)
+    try:
+        server.run(sockets=[sock])
+    finally:
+        os._exit(0)
+
+
+def fork_worker(app_module, sock, args) -> int:
+    pid = os.fork()
+    if pid == 0:
+        serve_worker(app_module, sock, args)
+    return pid
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--keep-alive", type=int, default=5)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if not hasattr(os, "fork"):
+        sys.exit("prefork.py needs os.fork(); use `uvicorn main:app --workers N` on this platform")
+
+    app_module = preload()
+    sock = bind(args.host, args.port)
+    # move everything allocated so far into the permanent generation: the collector never
+    # touches those objects again, so their pages stay shared with the workers
+    gc.collect()
+    gc.freeze()
+
+    workers = {fork_worker(app_module, sock, args) for _ in range(args.workers)}
+    logger.info(f"✅ Serving on {args.host}:{args.port} with {len(workers)} pre-forked workers")
+
+    stopping = False
+
+    def _stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.discard(pid)
+        if not stopping:
+            logger.warning(f"⚠️ Worker {pid} exited ({status}); starting a replacement")
+            time.sleep(1.0)  # do not spin if workers die at startup
+            workers.add(fork_worker(app_module, sock, args))
+    logger.info("All workers stopped")
+
+
+if __name__ == "__main__":
+    main()
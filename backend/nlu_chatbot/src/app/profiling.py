@@ -0,0 +1,306 @@
+"""
+Opt-in Sampling Profiler for API Requests
+An admin arms a profiling session for the next N requests or a time window (PROFILING_ENABLED=1
+is required; otherwise the admin endpoints refuse and the per-request cost is one flag check):
+- admit() marks the request's context; endpoints wrapped with profiled() then register the
+  thread (sync endpoints, in the threadpool) or asyncio task (async ones) serving it while
+  they run. Other requests running at the same time are never sampled.
+- a background thread samples those threads' Python stacks (sys._current_frames) each
+  interval_ms; an event-loop thread only while an admitted task is the one running. This
+  covers the threadpool threads, which cProfile would miss, at a fixed cost independent of
+  how many calls the code makes. Samples are wall-clock: a thread waiting on SQLite or a
+  lock counts like one computing.
+- the stack is cut at the route's endpoint function and tagged with the endpoint
+  ("GET /query") and with tags the handler set for its thread (intent=SHOW, see tags())
+- output: collapsed stacks ("endpoint;intent=..;fn (file:line);... count", the format of
+  flamegraph.pl / speedscope / py-spy --format raw) and per-function self / total aggregates
+  grouped by endpoint and intent
+- sessions are bounded: PROFILE_MAX_SECONDS, PROFILE_MAX_REQUESTS, MAX_STACKS distinct stacks
+"""
+
+import asyncio
+import functools
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+PROFILE_MAX_SECONDS = float(os.environ.get("PROFILE_MAX_SECONDS", "300"))
+PROFILE_MAX_REQUESTS = int(os.environ.get("PROFILE_MAX_REQUESTS", "1000"))
+DEFAULT_INTERVAL_MS = 10.0  # 100 Hz, like py-spy
+MIN_INTERVAL_MS = 1.0
+MAX_DEPTH = 128
+MAX_STACKS = 20000
+TRUNCATED = ("[other stacks]",)
+
+# tags set by the code a thread is running (handlers call tags(intent=...)), read by the sampler
+_thread_tags: Dict[int, Dict[str, str]] = {}
+# the session a request was admitted to; set by admit() in the request's context, which
+# the endpoint's task / threadpool thread inherits
+_admitted: ContextVar[Optional["Session"]] = ContextVar("profiled_request", default=None)
+
+
+class ProfilingDisabled(Exception):
+    pass
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+@contextmanager
+def tags(**values):
+    """Tag samples taken in this thread during the block (no-op unless a session is active)"""
+    if not PROFILER.active:
+        yield
+        return
+    ident = threading.get_ident()
+    previous = _thread_tags.get(ident)
+    _thread_tags[ident] = {**(previous or {}), **{k: str(v) for k, v in values.items()}}
+    try:
+        yield
+    finally:
+        if previous is None:
+            _thread_tags.pop(ident, None)
+        else:
+            _thread_tags[ident] = previous
+
+
+def profiled(endpoint):
+    """Wrap a route endpoint so the thread (sync) or task (async) running an admitted
+    request is registered with its session; one flag check otherwise"""
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def run_async(*args, **kwargs):
+            session = _admitted.get() if PROFILER.active else None
+            if session is None:
+                return await endpoint(*args, **kwargs)
+            task, ident = asyncio.current_task(), threading.get_ident()
+            session.loops[ident] = asyncio.get_running_loop()
+            session.tasks.add(task)
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                session.tasks.discard(task)
+        return run_async
+
+    @functools.wraps(endpoint)
+    def run(*args, **kwargs):
+        session = _admitted.get() if PROFILER.active else None
+        if session is None:
+            return endpoint(*args, **kwargs)
+        ident = threading.get_ident()
+        session.threads[ident] = session.threads.get(ident, 0) + 1
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            remaining = session.threads.get(ident, 1) - 1
+            if remaining > 0:
+                session.threads[ident] = remaining
+            else:
+                session.threads.pop(ident, None)
+    return run
+
+
+@lru_cache(maxsize=65536)
+def _label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Session:
+    def __init__(self, endpoints: Dict, requests: Optional[int], seconds: Optional[float], interval_ms: float,
+                 path_prefix: Optional[str]):
+        self.endpoints = endpoints  # code object -> "METHOD /path"
+        self.max_requests = requests
+        self.seconds = seconds
+        self.interval = interval_ms / 1000.0
+        self.path_prefix = path_prefix
+        self.started_at = time.time()
+        self.deadline = self.started_at + seconds
+        self.finished_at: Optional[float] = None
+        self.admitted = 0
+        self.in_flight = 0
+        self.samples = 0
+        self.stacks: Dict[Tuple, int] = {}
+        self.reason: Optional[str] = None
+        # what to sample: threadpool threads running an admitted sync endpoint (ident -> depth),
+        # admitted asyncio tasks and the loops (by thread ident) they run on
+        self.threads: Dict[int, int] = {}
+        self.tasks = set()
+        self.loops: Dict[int, asyncio.AbstractEventLoop] = {}
+
+    def status(self) -> Dict:
+        end = self.finished_at or time.time()
+        return {
+            "active": self.finished_at is None, "started_at": self.started_at, "seconds": round(end - self.started_at, 3),
+            "max_requests": self.max_requests, "max_seconds": self.seconds, "requests": self.admitted,
+            "interval_ms": self.interval * 1000.0, "path_prefix": self.path_prefix, "samples": self.samples,
+            "stopped": self.reason,
+        }
+
+
+class Profiler:
+    def __init__(self, enabled: bool = None):
+        self.enabled = os.environ.get("PROFILING_ENABLED", "0") == "1" if enabled is None else enabled
+        # plain attribute: the only thing the request path reads while idle
+        self.active = False
+        self.session: Optional[Session] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- control ---
+    def start(self, endpoints: Dict, requests: int = None, seconds: float = None,
+              interval_ms: float = DEFAULT_INTERVAL_MS, path_prefix: str = None) -> Dict:
+        """Profile the next `requests` requests (matching path_prefix) or `seconds` seconds,
+        whichever ends first; capped at PROFILE_MAX_REQUESTS / PROFILE_MAX_SECONDS."""
+        if not self.enabled:
+            raise ProfilingDisabled("profiling is disabled (set PROFILING_ENABLED=1)")
+        with self._lock:
+            if self.active:
+                raise ProfilerBusy("a profiling session is already running")
+            if requests is not None:
+                requests = max(1, min(int(requests), PROFILE_MAX_REQUESTS))
+            seconds = min(float(seconds), PROFILE_MAX_SECONDS) if seconds else PROFILE_MAX_SECONDS
+            self.session = Session(endpoints, requests, seconds, max(float(interval_ms), MIN_INTERVAL_MS),
+                                   path_prefix)
+            self.active = True
+            self._thread = threading.Thread(target=self._sample_loop, args=(self.session,),
+                                            name="profiler-sampler", daemon=True)
+            self._thread.start()
+        return self.session.status()
+
+    def stop(self, reason: str = "stopped") -> Optional[Dict]:
+        with self._lock:
+            session = self.session
+            if session is not None and session.finished_at is None:
+                session.finished_at = time.time()
+                session.reason = reason
+            self.active = False
+            thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2)
+        return session.status() if session else None
+
+    # --- request accounting (HTTP middleware) ---
+    def admit(self, path: str) -> Optional[Session]:
+        """Count a request towards the session -> the session, or None when it is not profiled.
+        Call it in the request's context (the HTTP middleware): the endpoint inherits the mark."""
+        session = self.session
+        if not self.active or session is None:
+            return None
+        if session.path_prefix and not path.startswith(session.path_prefix):
+            return None
+        with self._lock:
+            if session.finished_at is not None or (session.max_requests is not None
+                                                   and session.admitted >= session.max_requests):
+                return None
+            session.admitted += 1
+            session.in_flight += 1
+        _admitted.set(session)
+        return session
+
+    def release(self, session: Session):
+        _admitted.set(None)
+        with self._lock:
+            session.in_flight -= 1
+            done = (session.max_requests is not None and session.admitted >= session.max_requests
+                    and session.in_flight <= 0 and session is self.session)
+        if done:
+            self.stop(f"{session.max_requests} requests profiled")
+
+    # --- sampling ---
+    def _sample_loop(self, session: Session):
+        me = threading.get_ident()
+        while self.active and self.session is session:
+            if time.time() >= session.deadline:
+                self.stop(f"{session.seconds:g}s window elapsed")
+                return
+            if session.threads or session.tasks:
+                frames = sys._current_frames()
+                for ident in self._admitted_threads(session):
+                    if ident != me and ident in frames:
+                        self._sample(session, ident, frames[ident])
+            time.sleep(session.interval)
+
+    @staticmethod
+    def _admitted_threads(session: Session) -> List[int]:
+        """Threads running an admitted request right now"""
+        idents = list(session.threads)
+        for ident, loop in list(session.loops.items()):
+            # an event loop interleaves requests: only while an admitted task is the running one
+            if asyncio.current_task(loop) in session.tasks and ident not in idents:
+                idents.append(ident)
+        return idents
+
+    def _sample(self, session: Session, ident: int, frame):
+        codes = []
+        while frame is not None and len(codes) < MAX_DEPTH * 4:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        # outermost endpoint: /predict/vessel/{name} calls the /predict/trajectory handler
+        root = next((i for i in range(len(codes) - 1, -1, -1) if codes[i] in session.endpoints), None)
+        if root is None:
+            return
+        endpoint = session.endpoints[codes[root]]
+        tagged = tuple(f"{k}={v}" for k, v in sorted((_thread_tags.get(ident) or {}).items()))
+        frames = tuple(_label(code) for code in reversed(codes[max(0, root - MAX_DEPTH + 1):root + 1]))
+        key = (endpoint, tagged, frames)
+        if key not in session.stacks and len(session.stacks) >= MAX_STACKS:
+            key = (endpoint, tagged, TRUNCATED)
+        session.stacks[key] = session.stacks.get(key, 0) + 1
+        session.samples += 1
+
+    # --- output ---
+    def collapsed(self, endpoint: str = None, intent: str = None) -> str:
+        """Folded stacks, one "endpoint;tag;frame;... count" line per distinct stack"""
+        session = self.session
+        if session is None:
+            return ""
+        lines = [f"{';'.join((e,) + tagged + frames)} {count}"
+                 for (e, tagged, frames), count in sorted(dict(session.stacks).items())
+                 if _matches(e, tagged, endpoint, intent)]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def report(self, limit: int = 50, endpoint: str = None, intent: str = None) -> Dict:
+        """Per (endpoint, intent, function): self samples (on top of the stack) and total
+        samples (anywhere on it), with the time they stand for, most total time first"""
+        session = self.session
+        if session is None:
+            return {"pid": os.getpid(), "enabled": self.enabled, "session": None, "endpoints": [], "functions": []}
+        interval_ms = session.interval * 1000.0
+        functions: Dict[Tuple, List[int]] = {}
+        per_endpoint: Dict[Tuple, int] = {}
+        for (e, tagged, frames), count in dict(session.stacks).items():
+            if not _matches(e, tagged, endpoint, intent):
+                continue
+            group = (e, _intent(tagged))
+            per_endpoint[group] = per_endpoint.get(group, 0) + count
+            for label in set(frames):
+                functions.setdefault(group + (label,), [0, 0])[1] += count
+            functions.setdefault(group + (frames[-1],), [0, 0])[0] += count
+        rows = sorted(functions.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return {
+            "pid": os.getpid(),
+            "enabled": self.enabled,
+            "session": session.status(),
+            "endpoints": [{"endpoint": e, "intent": i, "samples": n, "ms": round(n * interval_ms, 1)}
+                          for (e, i), n in sorted(per_endpoint.items(), key=lambda item: -item[1])],
+            "functions": [{"endpoint": e, "intent": i, "function": fn, "self_samples": s, "total_samples": t,
+                           "self_ms": round(s * interval_ms, 1), "total_ms": round(t * interval_ms, 1)}
+                          for (e, i, fn), (s, t) in rows],
+        }
+
+
+def _intent(tagged: Tuple) -> Optional[str]:
+    return next((t[len("intent="):] for t in tagged if t.startswith("intent=")), None)
+
+
+def _matches(stack_endpoint: str, tagged: Tuple, endpoint: str = None, intent: str = None) -> bool:
+    return (endpoint is None or stack_endpoint == endpoint) and (intent is None or _intent(tagged) == intent)
+
+
+PROFILER = Profiler()
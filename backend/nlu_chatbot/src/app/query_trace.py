@@ -0,0 +1,189 @@
+"""
+SQL Statement Tracing and Slow-Query Log
+MaritimeDB / MaritimeDBAsync report every statement they run (text, parameters, duration,
+row count) to a QueryTracer:
+- per-statement aggregates (calls, total / max seconds, rows), keyed by the normalized text
+- statements slower than SLOW_QUERY_MS get an EXPLAIN QUERY PLAN (cached per statement) and
+  are kept in memory and appended as JSON lines to a rotating log (SLOW_QUERY_LOG, default
+  slow_queries.log next to the DB)
+- plans are flagged: full_scan:<table> (SCAN without an index), index_scan:<table> (walks a
+  whole index), temp_btree:<DISTINCT|ORDER BY|GROUP BY>, lower_like (LOWER(col) LIKE cannot
+  use an index), leading_wildcard (LIKE '%...')
+- hooks: callables receiving every traced statement (e.g. for tests or ad-hoc tracing)
+QUERY_TRACE=0 disables tracing.
+"""
+
+import asyncio
+import json
+import logging
+import logging.handlers
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "250"))
+SLOW_LOG_BYTES = 10 * 1024 * 1024
+SLOW_LOG_BACKUPS = 5
+RECENT_SLOW = 200
+MAX_PARAM_CHARS = 200
+
+LOWER_LIKE = re.compile(r"LOWER\s*\([^)]*\)\s+LIKE", re.IGNORECASE)
+PLAN_SCAN = re.compile(r"^SCAN (\w+)( USING (?:COVERING )?INDEX)?")
+PLAN_TEMP = re.compile(r"^USE TEMP B-TREE FOR (.+)$")
+
+
+def normalize(statement: str) -> str:
+    return " ".join(statement.split())
+
+
+def _short(params) -> List:
+    """Parameters for logs: long values truncated"""
+    return [p if not isinstance(p, str) or len(p) <= MAX_PARAM_CHARS else p[:MAX_PARAM_CHARS] + "..."
+            for p in (params or ())]
+
+
+def explain(db_path: str, statement: str, params: Sequence = ()) -> List[str]:
+    """EXPLAIN QUERY PLAN details, on a separate read-only connection"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + statement, tuple(params or ()))]
+    finally:
+        conn.close()
+
+
+def plan_flags(statement: str, params: Sequence, plan: List[str]) -> List[str]:
+    flags = []
+    for detail in plan:
+        scan = PLAN_SCAN.match(detail)
+        if scan and scan.group(1) not in ("CONSTANT", "SUBQUERY"):
+            flags.append(f"{'index_scan' if scan.group(2) else 'full_scan'}:{scan.group(1)}")
+        temp = PLAN_TEMP.match(detail)
+        if temp:
+            flags.append(f"temp_btree:{temp.group(1)}")
+    if LOWER_LIKE.search(statement):
+        flags.append("lower_like")
+    if any(isinstance(p, str) and p.startswith("%") for p in (params or ())):
+        flags.append("leading_wildcard")
+    return flags
+
+
+def default_log_path(db_path: str) -> str:
+    return os.environ.get("SLOW_QUERY_LOG") or os.path.join(os.path.dirname(os.path.abspath(db_path)),
+                                                            "slow_queries.log")
+
+
+class QueryTracer:
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS, log_path: str = None):
+        self.enabled = os.environ.get("QUERY_TRACE", "1") != "0"
+        self.slow_ms = slow_ms
+        self.log_path = log_path
+        self.hooks: List[Callable[[Dict], None]] = []
+        self.stats: Dict[str, Dict] = {}
+        self.slow = deque(maxlen=RECENT_SLOW)
+        self._plans: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._handler: Optional[logging.Handler] = None
+
+    def add_hook(self, hook: Callable[[Dict], None]):
+        self.hooks.append(hook)
+
+    def record(self, db_path: str, statement: str, params, seconds: float, rows: Optional[int]):
+        if not self.enabled:
+            return
+        text = normalize(statement)
+        with self._lock:
+            stat = self.stats.get(text)
+            if stat is None:
+                stat = self.stats[text] = {"statement": text, "calls": 0, "total_seconds": 0.0, "max_seconds": 0.0,
+                                           "rows": 0, "db_path": db_path}
+            stat["calls"] += 1
+            stat["total_seconds"] += seconds
+            stat["max_seconds"] = max(stat["max_seconds"], seconds)
+            stat["rows"] += rows or 0
+            stat["last_params"] = tuple(params or ())
+        slow = seconds * 1000.0 >= self.slow_ms
+        if not slow and not self.hooks:
+            return
+        entry = {"ts": time.strftime("%Y-%m-%d %H:%M:%S"), "pid": os.getpid(), "statement": text,
+                 "params": _short(params), "ms": round(seconds * 1000.0, 2), "rows": rows}
+        if slow:
+            entry.update(self.plan(db_path, text, params))
+            self.slow.append(entry)
+            self._write(db_path, entry)
+        for hook in self.hooks:
+            try:
+                hook(entry)
+            except Exception as e:
+                logger.warning(f"⚠️ Query trace hook failed: {e}")
+
+    async def record_async(self, db_path: str, statement: str, params, seconds: float, rows: Optional[int]):
+        """record() for coroutines: a slow statement is explained (a separate connection) and
+        written to the log, so that part runs in the default executor, off the event loop"""
+        if self.enabled and seconds * 1000.0 >= self.slow_ms:
+            await asyncio.get_running_loop().run_in_executor(None, self.record, db_path, statement, params,
+                                                             seconds, rows)
+        else:
+            self.record(db_path, statement, params, seconds, rows)
+
+    def plan(self, db_path: str, statement: str, params) -> Dict:
+        """Query plan + flags, explained once per statement text"""
+        with self._lock:
+            cached = self._plans.get(statement)
+        if cached is None:
+            # explained outside the lock; two threads racing on a new statement both explain it
+            try:
+                plan = explain(db_path, statement, params)
+                cached = {"plan": plan, "flags": plan_flags(statement, params, plan)}
+            except sqlite3.Error as e:
+                cached = {"plan": [], "flags": plan_flags(statement, params, []), "plan_error": str(e)}
+            with self._lock:
+                cached = self._plans.setdefault(statement, cached)
+        return cached
+
+    def _write(self, db_path: str, entry: Dict):
+        if self._handler is None:
+            try:
+                self._handler = logging.handlers.RotatingFileHandler(
+                    self.log_path or default_log_path(db_path), maxBytes=SLOW_LOG_BYTES,
+                    backupCount=SLOW_LOG_BACKUPS, delay=True)
+            except OSError as e:
+                logger.warning(f"⚠️ Slow-query log not writable ({e}); keeping slow queries in memory only")
+                self._handler = logging.NullHandler()
+        self._handler.handle(logging.makeLogRecord({"msg": json.dumps(entry, default=str), "levelno": logging.INFO}))
+
+    def report(self, limit: int = 50, explain_all: bool = False) -> Dict:
+        """Recent slow statements and the per-statement aggregates, slowest total first.
+        explain_all attaches a plan + flags to every statement seen, not just the slow ones."""
+        with self._lock:
+            stats = sorted((dict(s) for s in self.stats.values()), key=lambda s: s["total_seconds"], reverse=True)
+            planned = set(self._plans)
+        log_path = self.log_path or (default_log_path(stats[0]["db_path"]) if stats else None)
+        for stat in stats[:limit]:
+            params = stat.pop("last_params", ())
+            db_path = stat.pop("db_path")
+            stat["avg_ms"] = round(stat["total_seconds"] * 1000.0 / stat["calls"], 3)
+            if explain_all or stat["statement"] in planned:
+                stat.update(self.plan(db_path, stat["statement"], params))
+        return {
+            "pid": os.getpid(),
+            "threshold_ms": self.slow_ms,
+            "log_path": log_path,
+            "slow": list(reversed(self.slow))[:limit],
+            "statements": stats[:limit],
+        }
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+            self.slow.clear()
+            self._plans.clear()
+
+
+# shared by every MaritimeDB / MaritimeDBAsync in the process (override per instance via .tracer)
+TRACER = QueryTracer()
@@ -141,6 +141,41 @@ class ResponseFormatter:
         
         return response_text.strip()
     
+    @staticmethod
+    def format_nearby_response(response: Dict[str, Any]) -> str:
+        """Format NEARBY intent response"""
+        if 'message' in response and response['message']:
+            return response['message']
+
+        if 'error' in response:
+            return f"I couldn't search that area. {response['error']}"
+
+        anchor = response.get('anchor') or {}
+        anchor_name = anchor.get('name') or f"{anchor.get('lat')}, {anchor.get('lon')}"
+        radius = response.get('radius')
+        unit = response.get('unit', 'nm')
+        total = response.get('total', 0)
+        vessels = response.get('vessels', [])
+
+        area = f"within {radius:g} {unit} of **{anchor_name}**" if radius is not None else f"near **{anchor_name}**"
+        if total == 0:
+            return f"No vessels reported {area} in the last hour of data."
+
+        response_text = f"Found {total} vessel{'s' if total != 1 else ''} {area}"
+        window = response.get('window') or {}
+        if window.get('end'):
+            response_text += f" as of {window['end']}"
+        response_text += ":\n"
+        for v in vessels:
+            name = v.get('VesselName') or 'Unknown'
+            response_text += f"  • **{name}** (MMSI {v.get('MMSI')}) - {v.get('distance_nm', 0):.1f} nm away"
+            if v.get('SOG') is not None:
+                response_text += f", {v['SOG']:.1f} knots"
+            response_text += "\n"
+        if response.get('has_more'):
+            response_text += f"Showing page {response.get('page')} ({len(vessels)} of {total})."
+        return response_text.strip()
+
     @staticmethod
     def format_response(intent: str, response: Dict[str, Any]) -> str:
         """Format response based on intent type"""
@@ -150,6 +185,8 @@ class ResponseFormatter:
             return ResponseFormatter.format_predict_response(response)
         elif intent == "VERIFY":
             return ResponseFormatter.format_verify_response(response)
+        elif intent == "NEARBY":
+            return ResponseFormatter.format_nearby_response(response)
         else:
             # Generic response
             if 'message' in response:
@@ -0,0 +1,213 @@
+"""
+Rolling Feature Window for Multi-Step Trajectory Rollout
+Keeps the 28-dimensional adapted window of a vessel up to date one AIS row at a time
+and computes the 483-feature vector with vectorized NumPy instead of per-dimension loops
+
+Matches XGBoostPredictor._adapt_6_to_28_dimensions, extract_features_from_3d_array
+and add_haversine_features_3d (see tests/test_rolling_features.py)
+"""
+
+import warnings
+
+import numpy as np
+
+BASE_COLUMNS = ["LAT", "LON", "SOG", "COG", "Heading", "VesselType"]
+N_ADAPTED = 28
+
+# 28-d columns that are window-normalized copies of a base column: (target column, base index)
+_NORM_COLUMNS = [(0, 0), (3, 1), (9, 2), (15, 3), (19, 4), (23, 5)]
+
+
+def _zero_fperr(x: np.ndarray, tol: np.ndarray) -> np.ndarray:
+    return np.where(np.abs(x) < tol, 0.0, x)
+
+
+def _skew_kurtosis(X: np.ndarray):
+    """Unbiased skew and excess kurtosis along axis 1, NaN-aware (pandas Series.skew/.kurtosis semantics,
+    including its max-abs based tolerance for treating a window as constant)"""
+    mask = ~np.isnan(X)
+    count = mask.sum(axis=1).astype(float)
+    values = np.where(mask, X, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = values.sum(axis=1) / count
+        adjusted = np.where(mask, X - mean[:, None, ...], 0.0)
+        adjusted2 = adjusted ** 2
+        m2 = adjusted2.sum(axis=1)
+        m3 = (adjusted2 * adjusted).sum(axis=1)
+        m4 = (adjusted2 ** 2).sum(axis=1)
+
+        scaled_eps = np.finfo(float).eps * np.abs(values).max(axis=1)
+        m2 = _zero_fperr(m2, scaled_eps ** 2 * count)
+        m3 = _zero_fperr(m3, scaled_eps ** 3 * count)
+        m4 = _zero_fperr(m4, scaled_eps ** 4 * count)
+
+        skew = (count * (count - 1) ** 0.5 / (count - 2)) * (m3 / m2 ** 1.5)
+        skew = np.where(m2 == 0, 0.0, skew)
+        skew = np.where(count < 3, np.nan, skew)
+
+        adj = 3 * (count - 1) ** 2 / ((count - 2) * (count - 3))
+        numerator = count * (count + 1) * (count - 1) * m4
+        denominator = (count - 2) * (count - 3) * m2 ** 2
+        kurt = np.where(denominator == 0, 0.0, numerator / denominator - adj)
+        kurt = np.where(count < 4, np.nan, kurt)
+    return skew, kurt
+
+
+def window_statistics(X: np.ndarray) -> np.ndarray:
+    """17 statistics per dimension for (n_samples, n_timesteps, n_features) -> (n_samples, 17 * n_features)
+
+    Same values and column order as XGBoostPredictor.extract_features_from_3d_array.
+    """
+    X = np.asarray(X, dtype=float)
+    n_samples, _, n_features = X.shape
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        # all-NaN slices are expected and end up as 0 like in the reference implementation
+        warnings.simplefilter("ignore", RuntimeWarning)
+        diff = np.diff(X, axis=1)
+        minimum = np.nanmin(X, axis=1)
+        maximum = np.nanmax(X, axis=1)
+        p25, median, p75 = np.nanpercentile(X, [25, 50, 75], axis=1)
+        skew, kurt = _skew_kurtosis(X)
+        diff_std = np.nanstd(diff, axis=1)
+        stats = np.stack([
+            np.nanmean(X, axis=1),
+            np.nanstd(X, axis=1),
+            minimum,
+            maximum,
+            median,
+            p25,
+            p75,
+            maximum - minimum,
+            skew,
+            kurt,
+            np.nanmean(diff, axis=1),
+            diff_std,
+            np.nanmax(diff, axis=1),
+            np.nanmin(diff, axis=1),
+            X[:, -1] - X[:, 0],
+            np.divide(X[:, -1], X[:, 0] + 1e-6),
+            diff_std,
+        ], axis=2)  # (n_samples, n_features, 17)
+    features = stats.reshape(n_samples, n_features * stats.shape[2])
+    return np.nan_to_num(features, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371 * np.arcsin(np.sqrt(a))
+
+
+def window_haversine(X: np.ndarray) -> np.ndarray:
+    """7 Haversine features from features 0/1 of (n_samples, n_timesteps, n_features) -> (n_samples, 7)
+
+    Same values as XGBoostPredictor.add_haversine_features_3d.
+    """
+    lats = np.nan_to_num(np.asarray(X[:, :, 0], dtype=float), nan=0.0)
+    lons = np.nan_to_num(np.asarray(X[:, :, 1], dtype=float), nan=0.0)
+    dist_to_first = _haversine_km(lats[:, :1], lons[:, :1], lats, lons)
+    steps = np.zeros_like(lats)
+    steps[:, 1:] = _haversine_km(lats[:, :-1], lons[:, :-1], lats[:, 1:], lons[:, 1:])
+    step_mean = steps[:, 1:].mean(axis=1) if steps.shape[1] > 1 else np.zeros(len(steps))
+    features = np.column_stack([
+        dist_to_first.mean(axis=1),
+        dist_to_first.max(axis=1),
+        dist_to_first.std(axis=1),
+        steps.sum(axis=1),
+        step_mean,
+        steps.max(axis=1),
+        steps.std(axis=1),
+    ])
+    return np.nan_to_num(features, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def _row_columns(prev: np.ndarray, row: np.ndarray, prev_sog_diff: float) -> np.ndarray:
+    """Per-row 28-d columns that depend only on a row and its predecessor (normalized slots left 0)"""
+    lat, lon, sog, cog, heading, vessel_type = row
+    lat_diff = lat - prev[0]
+    lon_diff = lon - prev[1]
+    cog_diff = cog - prev[3]
+    sog_diff = sog - prev[2]
+    u = sog * np.cos(np.radians(cog))
+    v = sog * np.sin(np.radians(cog))
+    out = np.zeros(N_ADAPTED)
+    out[2] = lat
+    out[5] = np.sin(np.radians(lon_diff))
+    out[6] = np.cos(np.radians(lon_diff))
+    out[7] = lon_diff
+    out[8] = lon
+    out[10] = sog
+    out[11] = u
+    out[12] = v
+    out[13] = np.sqrt(u ** 2 + v ** 2)
+    out[14] = cog
+    out[16] = np.sin(np.radians(cog_diff))
+    out[17] = np.cos(np.radians(cog_diff))
+    out[18] = cog_diff
+    out[20] = heading
+    out[21] = sog_diff
+    out[22] = sog_diff - prev_sog_diff
+    out[24] = vessel_type
+    out[25] = lat_diff
+    out[26] = np.sqrt(lat_diff ** 2 + lon_diff ** 2)
+    out[27] = np.arctan2(lat_diff, lon_diff)
+    return out
+
+
+class RollingFeatureWindow:
+    """Fixed-length window of base AIS rows with the adapted 28-d columns maintained incrementally
+
+    push() touches only the new row, the new first row and the running sums; the
+    window-normalized columns are rebuilt from those sums when the window is read.
+    """
+
+    def __init__(self, X_6d: np.ndarray):
+        raw = np.nan_to_num(np.asarray(X_6d, dtype=float), nan=0.0, posinf=0.0, neginf=0.0)
+        if raw.ndim != 2 or raw.shape[1] != len(BASE_COLUMNS):
+            raise ValueError(f"Expected (n_timesteps, {len(BASE_COLUMNS)}) window, got {raw.shape}")
+        self.length = raw.shape[0]
+        self.raw = raw.copy()
+        # sums are kept relative to a fixed reference to avoid cancellation in the variance
+        self._ref = raw.mean(axis=0)
+        shifted = raw - self._ref
+        self._sum = shifted.sum(axis=0)
+        self._sumsq = (shifted ** 2).sum(axis=0)
+
+        self.rows = np.zeros((self.length, N_ADAPTED))
+        self.rows[0] = _row_columns(raw[0], raw[0], 0.0)
+        for i in range(1, self.length):
+            self.rows[i] = _row_columns(raw[i - 1], raw[i], self.rows[i - 1, 21])
+
+    def push(self, row) -> None:
+        """Append one base row [LAT, LON, SOG, COG, Heading, VesselType] and drop the oldest"""
+        row = np.nan_to_num(np.asarray(row, dtype=float), nan=0.0, posinf=0.0, neginf=0.0)
+        old = self.raw[0] - self._ref
+        new = row - self._ref
+        self._sum += new - old
+        self._sumsq += new ** 2 - old ** 2
+
+        self.raw[:-1] = self.raw[1:]
+        self.raw[-1] = row
+        self.rows[:-1] = self.rows[1:]
+        self.rows[-1] = _row_columns(self.raw[-2], row, self.rows[-2, 21])
+        # the new first row has no predecessor inside the window (diff prepend semantics)
+        self.rows[0] = _row_columns(self.raw[0], self.raw[0], 0.0)
+        if self.length > 1:
+            self.rows[1, 22] = self.rows[1, 21]
+
+    def adapted(self) -> np.ndarray:
+        """Current (n_timesteps, 28) window, equal to _adapt_6_to_28_dimensions on the raw rows"""
+        X = self.rows.copy()
+        mean_shift = self._sum / self.length
+        std = np.sqrt(np.maximum(self._sumsq / self.length - mean_shift ** 2, 0.0)) + 1e-6
+        mean = self._ref + mean_shift
+        for col, base in _NORM_COLUMNS:
+            X[:, col] = (self.raw[:, base] - mean[base]) / std[base]
+        X[:, 1] = X[:, 0] / (np.max(np.abs(X[:, 0])) + 1e-6)
+        X[:, 4] = X[:, 3] / (np.max(np.abs(X[:, 3])) + 1e-6)
+        return np.nan_to_num(X, nan=0.0, posinf=0.0, neginf=0.0)
+
+    def features(self) -> np.ndarray:
+        """(1, 483) feature row for the current window"""
+        X = self.adapted()[None, :, :]
+        return np.hstack([window_statistics(X), window_haversine(X)])
@@ -0,0 +1,135 @@
+"""
+Spatial Index for AIS Positions
+SQLite R*Tree `vessel_rtree` over (LAT, LON, epoch seconds) keyed by vessel_data rowid:
+- built incrementally (only rows newer than the indexed max rowid are added)
+- kept current by insert/delete triggers on vessel_data
+- bounding-box helpers for radius queries, split at the antimeridian
+Queries prefilter with the R*Tree and refine with an exact (vectorized) test
+"""
+
+import logging
+import sqlite3
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+try:
+    from .kinematics import EARTH_RADIUS_NM
+except ImportError:
+    from kinematics import EARTH_RADIUS_NM
+
+logger = logging.getLogger(__name__)
+
+RTREE_TABLE = "vessel_rtree"
+BBox = Tuple[float, float, float, float]  # (min_lat, min_lon, max_lat, max_lon)
+
+EPOCH_SQL = "CAST(strftime('%s', {col}) AS INTEGER)"
+
+SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {RTREE_TABLE} USING rtree(
+        id,
+        min_lat, max_lat,
+        min_lon, max_lon,
+        min_t, max_t
+    );
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{RTREE_TABLE}_insert AFTER INSERT ON vessel_data
+    WHEN NEW.LAT IS NOT NULL AND NEW.LON IS NOT NULL AND NEW.BaseDateTime IS NOT NULL
+    BEGIN
+        INSERT OR REPLACE INTO {RTREE_TABLE} VALUES (
+            NEW.rowid, NEW.LAT, NEW.LAT, NEW.LON, NEW.LON,
+            {EPOCH_SQL.format(col='NEW.BaseDateTime')}, {EPOCH_SQL.format(col='NEW.BaseDateTime')}
+        );
+    END;
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{RTREE_TABLE}_delete AFTER DELETE ON vessel_data
+    BEGIN
+        DELETE FROM {RTREE_TABLE} WHERE id = OLD.rowid;
+    END;
+    """,
+]
+
+
+def has_spatial_index(conn: sqlite3.Connection) -> bool:
+    """True once the backfill has finished: the insert trigger is only created after it"""
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?;",
+                       (f"trg_{RTREE_TABLE}_insert",)).fetchone()
+    return row is not None
+
+
+def _has_rtree(conn: sqlite3.Connection) -> bool:
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?;", (RTREE_TABLE,)).fetchone()
+    return row is not None
+
+
+def ensure_spatial_index(conn: sqlite3.Connection, batch_rows: int = 500000) -> Dict:
+    """Create the R*Tree + triggers and index every vessel_data row not indexed yet
+
+    Safe to call on every startup: only rowids above the indexed maximum are scanned, so an
+    interrupted backfill resumes where it stopped.
+    """
+    start = time.time()
+    indexed_before = 0
+    if _has_rtree(conn):
+        indexed_before = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {RTREE_TABLE};").fetchone()[0]
+    # triggers are created after the backfill so no row is inserted twice
+    conn.execute(SCHEMA[0])
+    added = 0
+    last_id = indexed_before
+    while True:
+        cur = conn.execute(
+            f"""
+            INSERT OR REPLACE INTO {RTREE_TABLE}
+            SELECT rowid, LAT, LAT, LON, LON, {EPOCH_SQL.format(col='BaseDateTime')}, {EPOCH_SQL.format(col='BaseDateTime')}
+            FROM vessel_data
+            WHERE rowid > ? AND rowid <= ? AND LAT IS NOT NULL AND LON IS NOT NULL AND BaseDateTime IS NOT NULL;
+            """,
+            (last_id, last_id + batch_rows),
+        )
+        added += max(cur.rowcount, 0)
+        last_id += batch_rows
+        conn.commit()
+        max_rowid = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM vessel_data;").fetchone()[0]
+        if last_id >= max_rowid:
+            break
+    for statement in SCHEMA[1:]:
+        conn.execute(statement)
+    conn.commit()
+    elapsed = time.time() - start
+    if added:
+        logger.info(f"✅ Spatial index: added {added} positions in {elapsed:.1f}s")
+    return {"added": added, "seconds": elapsed}
+
+
+def split_bbox(min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[BBox]:
+    """Normalise a box; min_lon > max_lon means it crosses the antimeridian -> two boxes"""
+    min_lat, max_lat = max(min(min_lat, max_lat), -90.0), min(max(min_lat, max_lat), 90.0)
+    if min_lon <= max_lon:
+        return [(min_lat, max(min_lon, -180.0), max_lat, min(max_lon, 180.0))]
+    return [(min_lat, min_lon, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon)]
+
+
+def radius_bboxes(lat: float, lon: float, radius_nm: float) -> List[BBox]:
+    """Boxes that fully contain the great-circle disc of `radius_nm` around (lat, lon)"""
+    dlat = float(np.degrees(radius_nm / EARTH_RADIUS_NM))
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        # disc covers a pole: every longitude
+        return [(max(min_lat, -90.0), -180.0, min(max_lat, 90.0), 180.0)]
+    # widest longitude span of the disc (at the tangent latitude)
+    dlon = float(np.degrees(np.arcsin(min(1.0, np.sin(radius_nm / EARTH_RADIUS_NM) / np.cos(np.radians(lat))))))
+    min_lon, max_lon = lon - dlon, lon + dlon
+    if min_lon < -180.0:
+        return split_bbox(min_lat, min_lon + 360.0, max_lat, max_lon)
+    if max_lon > 180.0:
+        return split_bbox(min_lat, min_lon, max_lat, max_lon - 360.0)
+    return [(min_lat, min_lon, max_lat, max_lon)]
+
+
+def epoch_seconds(ts: str) -> int:
+    """'YYYY-MM-DD HH:MM:SS' (or ISO) -> epoch seconds, matching strftime('%s') in the index"""
+    return int(np.datetime64(str(ts).replace(" ", "T"), "s").astype("int64"))
@@ -0,0 +1,178 @@
+"""
+Startup Orchestration for Heavy Application Components
+Components (vessel list, spaCy interpreter, models, indexes, worker pools) load in
+background threads started from the app's lifespan hook instead of at import time, so
+the server accepts connections at once:
+- a component starts when everything it `depends_on` is READY (FAILED propagates);
+  `after` only orders it (e.g. serializes SQLite writers) without requiring success
+- independent components load concurrently
+- each records its state (pending / loading / ready / failed) and load time for /health/ready
+- Lazy(name) stands in for a component's value: using it before it is READY raises
+  ComponentNotReady (the API answers 503 + Retry-After), so requests that do not touch
+  a loading component are served normally
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING, LOADING, READY, FAILED = "pending", "loading", "ready", "failed"
+
+
+class ComponentNotReady(Exception):
+    def __init__(self, name: str, state: str, error: str = None):
+        self.name = name
+        self.state = state
+        self.error = error
+        detail = f": {error}" if error else ""
+        super().__init__(f"component '{name}' is {state}{detail}")
+
+
+class Component:
+    def __init__(self, name: str, loader: Callable[[], Any], depends_on: Iterable[str] = (),
+                 after: Iterable[str] = (), required: bool = True, per_process: bool = False):
+        self.name = name
+        self.loader = loader
+        self.depends_on = list(depends_on)
+        self.after = list(after)
+        # required components gate /health/ready; per-process ones (threads, pools) are
+        # never preloaded in a parent that forks
+        self.required = required
+        self.per_process = per_process
+        self.state = PENDING
+        self.value = None
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.seconds: Optional[float] = None
+        self.done = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def status(self) -> Dict:
+        elapsed = self.seconds
+        if self.state == LOADING and self.started_at is not None:
+            elapsed = time.time() - self.started_at
+        return {"state": self.state, "seconds": elapsed, "error": self.error, "required": self.required,
+                "depends_on": self.depends_on}
+
+
+class Startup:
+    def __init__(self):
+        self.components: Dict[str, Component] = {}
+        self.created_at = time.time()
+        self._lock = threading.Lock()
+
+    def add(self, name: str, loader: Callable[[], Any], depends_on: Iterable[str] = (), after: Iterable[str] = (),
+            required: bool = True, per_process: bool = False) -> Component:
+        component = Component(name, loader, depends_on, after, required, per_process)
+        self.components[name] = component
+        return component
+
+    # --- loading ---
+    def _closure(self, names: Iterable[str]) -> List[str]:
+        """`names` plus everything they depend on / run after"""
+        seen, stack = [], list(names)
+        while stack:
+            name = stack.pop()
+            if name in seen or name not in self.components:
+                continue
+            seen.append(name)
+            component = self.components[name]
+            stack.extend(component.depends_on + component.after)
+        return seen
+
+    def _run(self, component: Component):
+        for dep in component.depends_on + component.after:
+            if dep in self.components:
+                self.components[dep].done.wait()
+        failed = [d for d in component.depends_on if d in self.components and self.components[d].state != READY]
+        component.started_at = time.time()
+        if failed:
+            component.state, component.error = FAILED, f"dependency failed: {', '.join(failed)}"
+        else:
+            component.state = LOADING
+            try:
+                component.value = component.loader()
+                component.state = READY
+            except Exception as e:
+                component.state, component.error = FAILED, str(e)
+                logger.error(f"❌ Startup component '{component.name}' failed: {e}")
+        component.seconds = time.time() - component.started_at
+        if component.state == READY:
+            logger.info(f"✅ {component.name} ready in {component.seconds:.2f}s")
+        component.done.set()
+
+    def start(self, names: Iterable[str] = None):
+        """Start loading `names` (default: all) and their dependencies in background threads;
+        components already started are left alone. Returns immediately."""
+        with self._lock:
+            for name in self._closure(names if names is not None else list(self.components)):
+                component = self.components[name]
+                if component.thread is not None:
+                    continue
+                component.thread = threading.Thread(target=self._run, args=(component,),
+                                                    name=f"startup-{name}", daemon=True)
+                component.thread.start()
+
+    def wait(self, names: Iterable[str] = None, timeout: float = None) -> bool:
+        """Block until `names` (default: all started) finished loading; True if all are READY"""
+        deadline = None if timeout is None else time.time() + timeout
+        names = self._closure(names) if names is not None else [n for n, c in self.components.items() if c.thread]
+        for name in names:
+            component = self.components[name]
+            remaining = None if deadline is None else max(0.0, deadline - time.time())
+            if not component.done.wait(remaining):
+                return False
+            component.thread.join(remaining)
+        return all(self.components[n].state == READY for n in names)
+
+    def preloadable(self) -> List[str]:
+        return [n for n, c in self.components.items() if not c.per_process]
+
+    # --- access ---
+    def get(self, name: str) -> Any:
+        component = self.components[name]
+        if component.state != READY:
+            raise ComponentNotReady(name, component.state, component.error)
+        return component.value
+
+    def require(self, *names: str):
+        """Raise ComponentNotReady while a registered component in `names` has not finished
+        loading, or has failed and is required (callers fall back for optional ones)"""
+        for name in names:
+            component = self.components.get(name)
+            if component is None or component.state == READY or (component.state == FAILED and not component.required):
+                continue
+            raise ComponentNotReady(name, component.state, component.error)
+
+    def lazy(self, name: str) -> "Lazy":
+        return Lazy(self, name)
+
+    # --- health ---
+    def ready(self) -> bool:
+        return all(c.state == READY for c in self.components.values() if c.required)
+
+    def status(self) -> Dict:
+        return {
+            "ready": self.ready(),
+            "uptime_seconds": time.time() - self.created_at,
+            "components": {name: c.status() for name, c in self.components.items()},
+        }
+
+
+class Lazy:
+    """Attribute access is forwarded to the component's value once it is READY"""
+
+    __slots__ = ("_startup", "_name")
+
+    def __init__(self, startup: Startup, name: str):
+        object.__setattr__(self, "_startup", startup)
+        object.__setattr__(self, "_name", name)
+
+    def __getattr__(self, attr):
+        return getattr(self._startup.get(self._name), attr)
+
+    def __repr__(self):
+        return f"<Lazy {self._name}: {self._startup.components[self._name].state}>"
@@ -0,0 +1,94 @@
+"""
+Server-side Track Simplification
+Ramer-Douglas-Peucker on NumPy arrays with a tolerance (metres) and/or a point budget:
+- positions are projected to local equirectangular metres (longitudes unwrapped)
+- segments are split farthest-deviation first (heap), each deviation pass is vectorized
+- the result reports the original point count and the max error of any dropped point
+"""
+
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .kinematics import EARTH_RADIUS_NM
+except ImportError:
+    from kinematics import EARTH_RADIUS_NM
+
+EARTH_RADIUS_M = EARTH_RADIUS_NM * 1852.0
+
+
+def project_m(lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+    """Local equirectangular (x, y) in metres around the mean latitude"""
+    lat_r = np.radians(np.asarray(lat, dtype=float))
+    lon_r = np.unwrap(np.radians(np.asarray(lon, dtype=float)))
+    x = EARTH_RADIUS_M * lon_r * np.cos(np.mean(lat_r))
+    y = EARTH_RADIUS_M * lat_r
+    return x, y
+
+
+def segment_deviation(x: np.ndarray, y: np.ndarray, i: int, j: int) -> Tuple[int, float]:
+    """Farthest interior point of (i, j) from the segment i-j -> (index, distance in metres)"""
+    if j - i < 2:
+        return i, 0.0
+    px, py = x[i + 1:j] - x[i], y[i + 1:j] - y[i]
+    dx, dy = x[j] - x[i], y[j] - y[i]
+    length2 = dx * dx + dy * dy
+    if length2 == 0.0:
+        dist = np.hypot(px, py)
+    else:
+        # distance to the segment (projection clamped to the endpoints)
+        t = np.clip((px * dx + py * dy) / length2, 0.0, 1.0)
+        dist = np.hypot(px - t * dx, py - t * dy)
+    k = int(np.argmax(dist))
+    return i + 1 + k, float(dist[k])
+
+
+def rdp_indices(x: np.ndarray, y: np.ndarray, tolerance_m: float = 0.0,
+                max_points: Optional[int] = None) -> Tuple[np.ndarray, float]:
+    """Indices kept by RDP and the max deviation of the dropped points
+
+    Splits the worst segment first, so stopping at `max_points` keeps the most
+    significant vertices; stops early once every segment is within `tolerance_m`.
+    """
+    n = len(x)
+    if n <= 2:
+        return np.arange(n), 0.0
+    budget = n if max_points is None else max(2, int(max_points))
+    keep: List[int] = [0, n - 1]
+    heap = []
+    k, d = segment_deviation(x, y, 0, n - 1)
+    heapq.heappush(heap, (-d, 0, n - 1, k))
+    while heap and len(keep) < budget:
+        neg_d, i, j, k = heap[0]
+        if -neg_d <= tolerance_m:
+            break
+        heapq.heappop(heap)
+        keep.append(k)
+        for a, b in ((i, k), (k, j)):
+            if b - a >= 2:
+                kk, dd = segment_deviation(x, y, a, b)
+                heapq.heappush(heap, (-dd, a, b, kk))
+    error = -heap[0][0] if heap else 0.0
+    return np.sort(np.asarray(keep)), max(error, 0.0)
+
+
+def simplify_track(df: pd.DataFrame, tolerance_m: float = None, max_points: int = None) -> Tuple[pd.DataFrame, Dict]:
+    """Simplify a track DataFrame (LAT/LON, in track order) -> (subset of rows, info)
+
+    info: original_points, points, tolerance_m, max_error_m (upper bound of the distance
+    from any dropped fix to the returned polyline). Rows without coordinates are dropped
+    when simplifying.
+    """
+    original = 0 if df is None else int(len(df))
+    info = {"original_points": original, "points": original, "tolerance_m": tolerance_m, "max_error_m": 0.0}
+    if original == 0 or (tolerance_m is None and max_points is None):
+        return df, info
+    valid = df.dropna(subset=["LAT", "LON"])
+    x, y = project_m(valid["LAT"].to_numpy(), valid["LON"].to_numpy())
+    idx, error = rdp_indices(x, y, tolerance_m=tolerance_m or 0.0, max_points=max_points)
+    out = valid.iloc[idx]
+    info.update(points=int(len(out)), max_error_m=round(error, 2))
+    return out, info
@@ -0,0 +1,121 @@
+"""
+Downsampled Track Tiers for Long-Range Track Queries
+`track_tier` keeps, per vessel, the newest fix of every 1 minute / 10 minute / 1 hour
+bucket (with the number of raw fixes it stands for). An insert trigger on vessel_data
+upserts all tiers on ingest; track queries pick the finest tier that fits the point
+budget for the requested span
+Buckets are prefixes of the canonical 'YYYY-MM-DD HH:MM:SS' timestamp, so no date math
+is needed in SQL
+"""
+
+import logging
+import sqlite3
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+TIER_TABLE = "track_tier"
+# tier seconds -> length of the BaseDateTime prefix that identifies its bucket
+TIER_PREFIX = {60: 16, 600: 15, 3600: 13}
+TIER_COLUMNS = ["BaseDateTime", "LAT", "LON", "SOG", "COG", "Heading", "VesselName"]
+
+SCHEMA = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {TIER_TABLE} (
+        tier INTEGER,
+        MMSI INTEGER,
+        bucket TEXT,
+        BaseDateTime TEXT,
+        LAT REAL,
+        LON REAL,
+        SOG REAL,
+        COG REAL,
+        Heading REAL,
+        VesselName TEXT,
+        n_points INTEGER,
+        PRIMARY KEY (tier, MMSI, bucket)
+    ) WITHOUT ROWID;
+    """,
+    # raw-count estimates and raw track reads
+    "CREATE INDEX IF NOT EXISTS idx_vessel_mmsi_time ON vessel_data(MMSI, BaseDateTime);",
+]
+
+
+def _bucket_sql(col: str, tier: int) -> str:
+    return f"substr(replace({col}, 'T', ' '), 1, {TIER_PREFIX[tier]})"
+
+
+def _upsert_sql(tier: int) -> str:
+    newer = ", ".join(
+        f"{c} = CASE WHEN excluded.BaseDateTime > {TIER_TABLE}.BaseDateTime THEN excluded.{c} ELSE {TIER_TABLE}.{c} END"
+        for c in TIER_COLUMNS
+    )
+    return f"""
+        INSERT INTO {TIER_TABLE} (tier, MMSI, bucket, {', '.join(TIER_COLUMNS)}, n_points)
+        VALUES ({tier}, NEW.MMSI, {_bucket_sql('NEW.BaseDateTime', tier)}, {', '.join('NEW.' + c for c in TIER_COLUMNS)}, 1)
+        ON CONFLICT(tier, MMSI, bucket) DO UPDATE SET n_points = {TIER_TABLE}.n_points + 1, {newer};
+    """
+
+
+TRIGGER = f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{TIER_TABLE}_upsert AFTER INSERT ON vessel_data
+    WHEN NEW.MMSI IS NOT NULL AND NEW.BaseDateTime IS NOT NULL
+    BEGIN
+        {''.join(_upsert_sql(tier) for tier in TIER_PREFIX)}
+    END;
+"""
+
+
+def has_track_tiers(conn: sqlite3.Connection) -> bool:
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?;",
+                       (f"trg_{TIER_TABLE}_upsert",)).fetchone()
+    return row is not None
+
+
+def ensure_track_tiers(conn: sqlite3.Connection, rebuild: bool = False) -> Dict:
+    """Create and backfill every tier (one grouped pass per tier), then install the trigger"""
+    if has_track_tiers(conn) and not rebuild:
+        return {"rebuilt": False}
+
+    start = time.time()
+    with conn:
+        conn.execute(f"DROP TRIGGER IF EXISTS trg_{TIER_TABLE}_upsert;")
+        conn.execute(f"DROP TABLE IF EXISTS {TIER_TABLE};")
+        for statement in SCHEMA:
+            conn.execute(statement)
+        for tier in TIER_PREFIX:
+            conn.execute(
+                f"""
+                INSERT INTO {TIER_TABLE} (tier, MMSI, bucket, {', '.join(TIER_COLUMNS)}, n_points)
+                SELECT {tier}, MMSI, bucket, {', '.join(TIER_COLUMNS)}, n_points FROM (
+                    SELECT *, {_bucket_sql('BaseDateTime', tier)} AS bucket,
+                           ROW_NUMBER() OVER (PARTITION BY MMSI, {_bucket_sql('BaseDateTime', tier)} ORDER BY BaseDateTime DESC) AS rn,
+                           COUNT(*) OVER (PARTITION BY MMSI, {_bucket_sql('BaseDateTime', tier)}) AS n_points
+                    FROM vessel_data
+                    WHERE MMSI IS NOT NULL AND BaseDateTime IS NOT NULL
+                )
+                WHERE rn = 1;
+                """
+            )
+        conn.execute(TRIGGER)
+    rows = conn.execute(f"SELECT tier, COUNT(*) FROM {TIER_TABLE} GROUP BY tier;").fetchall()
+    elapsed = time.time() - start
+    logger.info(f"✅ Track tiers built in {elapsed:.1f}s: {dict(rows)}")
+    return {"rebuilt": True, "rows": {int(t): n for t, n in rows}, "seconds": elapsed}
+
+
+def choose_tier(counts: Dict[int, int], max_points: int) -> Optional[int]:
+    """Finest resolution whose point count fits the budget: 0 (raw) or a tier in seconds.
+    `counts` maps 0 and each tier to its row count over the requested span. None if even
+    the coarsest tier exceeds the budget (caller thins it further)."""
+    for tier in [0] + sorted(TIER_PREFIX):
+        if tier in counts and counts[tier] <= max_points:
+            return tier
+    return None
+
+
+def bucket_bounds(start: str, end: str, tier: int):
+    """Bucket keys covering [start, end] for a tier (prefix comparison)"""
+    n = TIER_PREFIX[tier]
+    return str(start).replace("T", " ")[:n], str(end).replace("T", " ")[:n]
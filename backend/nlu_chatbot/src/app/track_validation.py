@@ -0,0 +1,238 @@
+"""
+Vectorized Track Validation for Maritime NLU
+Scores every fix of one or many AIS tracks in a single pass (no per-row Python loop):
+- implied speed between fixes vs reported SOG
+- teleport jumps (large distance at implausible speed)
+- turn rate (wrapped COG change per minute)
+- timestamp gaps, duplicates and out-of-order fixes
+- duplicate MMSI (positions alternating between two places, or a changing VesselName)
+Backs the VERIFY intent, the /verify/tracks endpoint and the anomaly batch job
+"""
+
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .kinematics import haversine_nm
+except ImportError:
+    from kinematics import haversine_nm
+
+JUMP_NM = 5.0                 # distance that is suspicious when covered at implausible speed
+MAX_PLAUSIBLE_SPEED_KN = 50.0
+SPEED_TOLERANCE_KN = 5.0      # implied vs reported SOG tolerance (absolute floor)
+SPEED_TOLERANCE_RATIO = 0.5   # ... and relative to the reported SOG
+MAX_TURN_RATE = 30.0          # deg/min
+MIN_TURN_SOG = 1.0            # COG of a (near) stationary vessel is noise
+MAX_COURSE_CHANGE = 90.0      # deg between consecutive fixes
+GAP_MINUTES = 30.0
+
+# per-check weights; a fix's anomaly_score is their clipped sum
+CHECK_WEIGHTS = {
+    "duplicate_mmsi": 1.0,
+    "teleport": 1.0,
+    "speed_mismatch": 0.4,
+    "sharp_turn": 0.3,
+    "time_error": 0.5,
+    "gap": 0.2,
+}
+# formatter anomaly types (see ResponseFormatter.format_verify_response)
+CHECK_TYPES = {
+    "duplicate_mmsi": "duplicate_mmsi",
+    "teleport": "large_jump",
+    "speed_mismatch": "speed_mismatch",
+    "sharp_turn": "course_change",
+    "time_error": "timestamp_error",
+    "gap": "timestamp_gap",
+}
+
+
+def score_tracks(tracks: pd.DataFrame, gap_minutes: float = GAP_MINUTES) -> pd.DataFrame:
+    """Score every fix against the previous fix of the same vessel
+
+    `tracks` is a long DataFrame with MMSI, BaseDateTime, LAT, LON, SOG, COG (any number of
+    vessels, any order). Returns it sorted by (MMSI, BaseDateTime) with per-fix columns:
+    dt_seconds, distance_nm, implied_speed_kn, speed_error_kn, course_change, turn_rate,
+    one boolean column per check in CHECK_WEIGHTS and anomaly_score in [0, 1].
+    The first fix of each vessel has no predecessor and is never flagged.
+    """
+    df = tracks.copy()
+    if "MMSI" not in df.columns:
+        df["MMSI"] = 0
+    df["_ts"] = pd.to_datetime(df["BaseDateTime"], errors="coerce")
+    df = df.sort_values(["MMSI", "_ts"], kind="mergesort").reset_index(drop=True)
+
+    mmsi = df["MMSI"].to_numpy()
+    lat = pd.to_numeric(df["LAT"], errors="coerce").to_numpy(dtype=float)
+    lon = pd.to_numeric(df["LON"], errors="coerce").to_numpy(dtype=float)
+    sog = pd.to_numeric(df["SOG"], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+    cog = pd.to_numeric(df["COG"], errors="coerce").fillna(0.0).to_numpy(dtype=float) % 360.0
+    # unparseable timestamps stay NaN (NaT as int64 is a huge negative number of seconds)
+    ts = np.full(len(df), np.nan)
+    parsed = df["_ts"].notna().to_numpy()
+    ts[parsed] = df["_ts"][parsed].to_numpy(dtype="datetime64[ns]").astype("int64") / 1e9
+
+    n = len(df)
+    has_prev = np.zeros(n, dtype=bool)
+    if n > 1:
+        has_prev[1:] = mmsi[1:] == mmsi[:-1]
+
+    def prev(a, k=1):
+        out = np.empty_like(a)
+        out[:k] = a[:k]
+        out[k:] = a[:-k] if k < n else a[:0]
+        return out
+
+    def prev_flag(mask, k=1):
+        out = np.zeros(n, dtype=bool)
+        out[k:] = mask[:-k] if k < n else mask[:0]
+        return out
+
+    dt = np.where(has_prev, ts - prev(ts), np.nan)
+    dist = np.where(has_prev, haversine_nm(prev(lat), prev(lon), lat, lon), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        implied = np.where(dt > 0, dist / (dt / 3600.0), np.where(dist > 0, np.inf, 0.0))
+    implied = np.where(has_prev & ~np.isnan(dt), implied, np.nan)
+    reported = (sog + prev(sog)) / 2.0
+    speed_error = implied - reported
+    course_change = np.abs((cog - prev(cog) + 180.0) % 360.0 - 180.0)
+    course_change = np.where(has_prev, course_change, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        turn_rate = np.where(dt > 0, course_change / (dt / 60.0), np.nan)
+
+    in_window = has_prev & (dt > 0) & (dt <= gap_minutes * 60.0)
+    moving = np.minimum(sog, prev(sog)) >= MIN_TURN_SOG
+    flags = {
+        "teleport": has_prev & (dist > JUMP_NM) & (implied > MAX_PLAUSIBLE_SPEED_KN),
+        "speed_mismatch": in_window & (np.abs(speed_error) > np.maximum(SPEED_TOLERANCE_KN, SPEED_TOLERANCE_RATIO * reported)),
+        "sharp_turn": in_window & moving & (course_change > MAX_COURSE_CHANGE) & (turn_rate > MAX_TURN_RATE),
+        "time_error": has_prev & ~(dt > 0),
+        "gap": has_prev & (dt > gap_minutes * 60.0),
+    }
+    # a teleport already explains its speed mismatch
+    flags["speed_mismatch"] &= ~flags["teleport"]
+
+    # two transmitters sharing an MMSI: every fix jumps away from its predecessor but
+    # lands back next to the fix before that (A, B, A, B ...)
+    has_prev2 = has_prev & prev_flag(has_prev)
+    back_near = has_prev2 & (haversine_nm(prev(lat, 2), prev(lon, 2), lat, lon) <= JUMP_NM)
+    alternating = flags["teleport"] & prev_flag(flags["teleport"]) & back_near & prev_flag(back_near)
+    if "VesselName" in df.columns:
+        names = df["VesselName"].astype("string").str.strip().replace({"": pd.NA, "nan": pd.NA})
+        prev_names = names.shift()
+        renamed = has_prev & (names.notna() & prev_names.notna() & (names != prev_names)).fillna(False).to_numpy(dtype=bool)
+    else:
+        renamed = np.zeros(n, dtype=bool)
+    flags["duplicate_mmsi"] = alternating | renamed
+
+    df = df.drop(columns=["_ts"])
+    df["dt_seconds"] = dt
+    df["distance_nm"] = dist
+    df["implied_speed_kn"] = implied
+    df["speed_error_kn"] = np.where(in_window, speed_error, np.nan)
+    df["course_change"] = course_change
+    df["turn_rate"] = turn_rate
+    score = np.zeros(n)
+    for name, mask in flags.items():
+        df[name] = mask
+        score += CHECK_WEIGHTS[name] * mask
+    df["anomaly_score"] = np.minimum(score, 1.0)
+    return df
+
+
+def summarize_tracks(scored: pd.DataFrame) -> pd.DataFrame:
+    """One row per MMSI: fix count, per-check counts, max/mean score and verdict"""
+    checks = list(CHECK_WEIGHTS)
+    agg = scored.groupby("MMSI", sort=True).agg(
+        points=("anomaly_score", "size"),
+        max_score=("anomaly_score", "max"),
+        mean_score=("anomaly_score", "mean"),
+        first_seen=("BaseDateTime", "min"),
+        last_seen=("BaseDateTime", "max"),
+        **{check: (check, "sum") for check in checks},
+    )
+    agg[checks] = agg[checks].astype(int)
+    agg["verdict"] = np.where(agg["max_score"] > 0, "suspicious", "consistent")
+    return agg.reset_index()
+
+
+def _describe(anomaly_type: str, row) -> str:
+    """Human-readable detail for one flagged fix (scored row or stored anomalies row)"""
+    if anomaly_type == "duplicate_mmsi":
+        if row.distance_nm > JUMP_NM:
+            return f"position alternates between two places {row.distance_nm:.1f} nm apart"
+        return f"VesselName changed to {getattr(row, 'VesselName', None)}"
+    if anomaly_type in ("large_jump", "speed_mismatch"):
+        return (f"{row.distance_nm:.1f} nm in {row.dt_seconds / 60.0:.1f} min "
+                f"(implied {row.implied_speed_kn:.1f} kn vs reported {row.SOG:.1f} kn)")
+    if anomaly_type == "course_change":
+        return f"{row.course_change:.0f} degrees at {row.turn_rate:.0f} deg/min"
+    if anomaly_type == "timestamp_gap":
+        return f"no position for {row.dt_seconds / 60.0:.0f} minutes"
+    return "duplicate or out-of-order timestamp"
+
+
+def _track_summary(df: pd.DataFrame) -> Dict:
+    vessel_name = df["VesselName"].dropna().iloc[-1] if "VesselName" in df and df["VesselName"].notna().any() else None
+    return {"VesselName": vessel_name, "points_checked": int(len(df))}
+
+
+def verify_track(df: pd.DataFrame, gap_minutes: float = GAP_MINUTES, max_reasons: int = 10) -> Dict:
+    """Validate one vessel's track window (VERIFY intent response)"""
+    if df.empty or len(df) < 2:
+        return {"message": "Not enough data to verify"}
+
+    scored = score_tracks(df, gap_minutes=gap_minutes)
+    checks = list(CHECK_WEIGHTS)
+    flagged = scored[scored["anomaly_score"] > 0]
+    anomalies: List[Dict] = []
+    reasons: List[str] = []
+    for idx, row in zip(flagged.index, flagged.itertuples(index=False)):
+        for check in checks:
+            if getattr(row, check):
+                details = f"{_describe(CHECK_TYPES[check], row)} between points {idx - 1} and {idx} ({row.BaseDateTime})"
+                anomalies.append({"type": CHECK_TYPES[check], "details": details, "BaseDateTime": row.BaseDateTime})
+                reasons.append(f"{CHECK_TYPES[check]}: {details}")
+                break
+
+    verdict = "suspicious" if anomalies else "consistent"
+    points = scored.drop(columns=checks).tail(max(max_reasons, 10)).to_dict(orient="records")
+    return {
+        **_track_summary(scored),
+        "verdict": verdict,
+        "is_consistent": not anomalies,
+        "anomalies": anomalies[:max_reasons],
+        "reasons": reasons[:max_reasons],
+        "checks": {check: int(scored[check].sum()) for check in checks},
+        "max_score": float(scored["anomaly_score"].max()),
+        "points": points,
+        "source": "live",
+    }
+
+
+def verify_from_anomalies(df: pd.DataFrame, stored: pd.DataFrame, run_id: str = None, max_reasons: int = 10) -> Dict:
+    """VERIFY response built from precomputed `anomalies` rows (see anomaly_job) for a track window"""
+    if df.empty:
+        return {"message": "Not enough data to verify"}
+
+    anomalies: List[Dict] = []
+    reasons: List[str] = []
+    for row in stored.sort_values("BaseDateTime").itertuples(index=False):
+        details = f"{_describe(row.anomaly_type, row)} ({row.BaseDateTime})"
+        anomalies.append({"type": row.anomaly_type, "details": details, "BaseDateTime": row.BaseDateTime})
+        reasons.append(f"{row.anomaly_type}: {details}")
+
+    by_type = stored["anomaly_type"].value_counts() if not stored.empty else pd.Series(dtype=int)
+    return {
+        **_track_summary(df),
+        "verdict": "suspicious" if anomalies else "consistent",
+        "is_consistent": not anomalies,
+        "anomalies": anomalies[-max_reasons:],
+        "reasons": reasons[-max_reasons:],
+        "checks": {check: int(by_type.get(CHECK_TYPES[check], 0)) for check in CHECK_WEIGHTS},
+        "max_score": float(stored["score"].max()) if not stored.empty else 0.0,
+        "points": df.tail(max(max_reasons, 10)).to_dict(orient="records"),
+        "source": "anomalies",
+        "run_id": run_id,
+    }
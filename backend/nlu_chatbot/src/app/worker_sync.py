@@ -0,0 +1,253 @@
+"""
+Cross-Worker Coordination for Multi-Process Deployments
+Every API worker process keeps its own in-memory state (model registry, streaming feature
+states). A change made through one worker is published to a shared SQLite event log and
+replayed by the others:
+- control_events: append-only (seq, op, payload, origin pid); each worker applies events
+  newer than the last one it saw, skipping its own
+- worker_heartbeats: one row per worker with its memory footprint (RSS / PSS / shared)
+  and request count, refreshed every poll, so any worker can report the whole fleet
+- worker_metrics: each worker's latest metrics snapshot (metrics_source), so /metrics
+  can sum counters / histograms over all workers. A worker's row outlives it; after
+  EVENT_TTL_SECONDS (or when its pid is reused) it is folded into the RETIRED_PID row
+High-volume ops (feature-state fixes) are pruned after EVENT_TTL_SECONDS; registry
+changes are kept so a respawned worker can replay them
+"""
+
+import json
+import logging
+import os
+import resource
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+try:
+    from .metrics import merge_snapshots
+except ImportError:
+    from metrics import merge_snapshots
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = 1.0
+EVENT_TTL_SECONDS = 3600
+# ops whose events are only needed by workers that are already running
+TRANSIENT_OPS = ("feature_state",)
+# worker_metrics row holding the summed snapshots of long-gone workers
+RETIRED_PID = 0
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS control_events (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        op TEXT,
+        payload TEXT,
+        origin_pid INTEGER,
+        created_at REAL
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS worker_heartbeats (
+        pid INTEGER PRIMARY KEY,
+        started_at REAL,
+        updated_at REAL,
+        requests INTEGER,
+        memory TEXT
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS worker_metrics (
+        pid INTEGER PRIMARY KEY,
+        updated_at REAL,
+        snapshot TEXT
+    );
+    """,
+]
+
+
+def memory_stats() -> Dict:
+    """Memory of this process in MB. PSS splits shared pages between the processes mapping
+    them, so the sum of PSS over all workers is the real footprint (Linux only)."""
+    stats = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"):
+                    stats[key.lower() + "_mb"] = round(int(rest.split()[0]) / 1024.0, 1)
+    except OSError:
+        pass
+    if "rss_mb" not in stats:
+        # no /proc: peak RSS is the best portable figure (KB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        stats["max_rss_mb"] = round(peak / (1024.0 * 1024.0 if os.uname().sysname == "Darwin" else 1024.0), 1)
+    return stats
+
+
+class WorkerSync:
+    def __init__(self, db_path: str, poll_seconds: float = POLL_SECONDS):
+        self.db_path = db_path
+        self.poll_seconds = poll_seconds
+        self.handlers: Dict[str, Callable[[Dict], None]] = {}
+        # returns this process's metrics snapshot, published with every heartbeat
+        self.metrics_source: Optional[Callable[[], Dict]] = None
+        self.requests = 0
+        self.last_seq = 0
+        self.started_at = time.time()
+        self._local = threading.local()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        conn = self._conn()
+        for statement in SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+        self.last_seq = self.current_seq()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            self._local.conn = conn
+        return conn
+
+    def after_fork(self):
+        """Call in a freshly forked worker: drop the parent's connection, keep its last_seq
+        so the worker replays everything published since the preload"""
+        self._local = threading.local()
+        self._thread = None
+        self._stopping = threading.Event()
+        self.started_at = time.time()
+        self.requests = 0
+
+    def current_seq(self) -> int:
+        return self._conn().execute("SELECT COALESCE(MAX(seq), 0) FROM control_events;").fetchone()[0]
+
+    # --- events ---
+    def subscribe(self, op: str, handler: Callable[[Dict], None]):
+        self.handlers[op] = handler
+
+    def publish(self, op: str, payload: Dict) -> int:
+        """Record a change this worker already applied locally, for the other workers"""
+        conn = self._conn()
+        cur = conn.execute("INSERT INTO control_events (op, payload, origin_pid, created_at) VALUES (?, ?, ?, ?);",
+                           (op, json.dumps(payload, default=str), os.getpid(), time.time()))
+        conn.commit()
+        return cur.lastrowid
+
+    def poll(self) -> int:
+        """Apply events published by other workers since the last poll"""
+        rows = self._conn().execute(
+            "SELECT seq, op, payload, origin_pid FROM control_events WHERE seq > ? ORDER BY seq;", (self.last_seq,)
+        ).fetchall()
+        applied = 0
+        for seq, op, payload, origin_pid in rows:
+            self.last_seq = seq
+            handler = self.handlers.get(op)
+            if origin_pid == os.getpid() or handler is None:
+                continue
+            try:
+                handler(json.loads(payload))
+                applied += 1
+            except Exception as e:
+                logger.warning(f"⚠️ Could not apply {op} event {seq}: {e}")
+        return applied
+
+    def prune(self) -> int:
+        conn = self._conn()
+        cur = conn.execute(
+            f"DELETE FROM control_events WHERE op IN ({', '.join('?' * len(TRANSIENT_OPS))}) AND created_at < ?;",
+            (*TRANSIENT_OPS, time.time() - EVENT_TTL_SECONDS),
+        )
+        conn.execute("DELETE FROM worker_heartbeats WHERE updated_at < ?;", (time.time() - EVENT_TTL_SECONDS,))
+        conn.commit()
+        self.retire_metrics("updated_at < ?", (time.time() - EVENT_TTL_SECONDS,))
+        return cur.rowcount
+
+    def retire_metrics(self, where: str, params: tuple = ()) -> int:
+        """Fold the matching workers' last snapshots into the RETIRED_PID row, so their
+        counts stay in /metrics without a row per dead pid"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE;")  # one worker folds a row; the next sees it gone
+        try:
+            rows = conn.execute(f"SELECT pid, snapshot FROM worker_metrics WHERE pid != ? AND ({where});",
+                                (RETIRED_PID, *params)).fetchall()
+            if rows:
+                retired = conn.execute("SELECT snapshot FROM worker_metrics WHERE pid = ?;", (RETIRED_PID,)).fetchone()
+                snapshots = [json.loads(snapshot) for _, snapshot in rows] + ([json.loads(retired[0])] if retired else [])
+                conn.execute("INSERT OR REPLACE INTO worker_metrics (pid, updated_at, snapshot) VALUES (?, ?, ?);",
+                             (RETIRED_PID, time.time(), json.dumps(merge_snapshots(snapshots))))
+                conn.executemany("DELETE FROM worker_metrics WHERE pid = ?;", [(pid,) for pid, _ in rows])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return len(rows)
+
+    # --- heartbeats ---
+    def heartbeat(self):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO worker_heartbeats (pid, started_at, updated_at, requests, memory) VALUES (?, ?, ?, ?, ?);",
+            (os.getpid(), self.started_at, time.time(), self.requests, json.dumps(memory_stats())),
+        )
+        if self.metrics_source is not None:
+            conn.execute("INSERT OR REPLACE INTO worker_metrics (pid, updated_at, snapshot) VALUES (?, ?, ?);",
+                         (os.getpid(), time.time(), json.dumps(self.metrics_source())))
+        conn.commit()
+
+    def workers(self, max_age: float = None) -> List[Dict]:
+        """Heartbeats of the workers seen within `max_age` seconds (default: 5 polls)"""
+        max_age = max_age if max_age is not None else self.poll_seconds * 5
+        rows = self._conn().execute(
+            "SELECT pid, started_at, updated_at, requests, memory FROM worker_heartbeats WHERE updated_at >= ? "
+            "ORDER BY pid;", (time.time() - max_age,)
+        ).fetchall()
+        return [{"pid": pid, "started_at": started, "updated_at": updated, "requests": requests,
+                 "memory": json.loads(memory)} for pid, started, updated, requests, memory in rows]
+
+    def metric_snapshots(self) -> List[Dict]:
+        """Latest metrics snapshots of the other workers, live or exited (a dead worker's
+        counts must not vanish from the totals)"""
+        rows = self._conn().execute("SELECT snapshot FROM worker_metrics WHERE pid != ?;", (os.getpid(),)).fetchall()
+        return [json.loads(snapshot) for (snapshot,) in rows]
+
+    def remove_heartbeat(self):
+        # the metrics row stays: its counts belong in the totals after this worker exits
+        conn = self._conn()
+        conn.execute("DELETE FROM worker_heartbeats WHERE pid = ?;", (os.getpid(),))
+        conn.commit()
+
+    # --- background loop ---
+    def _loop(self):
+        last_prune = 0.0
+        while not self._stopping.wait(self.poll_seconds):
+            try:
+                self.poll()
+                self.heartbeat()
+                if time.time() - last_prune > 60:
+                    last_prune = time.time()
+                    self.prune()
+            except sqlite3.OperationalError as e:
+                logger.warning(f"⚠️ Worker sync busy: {e}")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        # a row under this pid is from an earlier process that had it: keep its counts
+        self.retire_metrics("pid = ?", (os.getpid(),))
+        self.poll()
+        self.heartbeat()
+        self._thread = threading.Thread(target=self._loop, name="worker-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(self.poll_seconds * 2)
+            self._thread = None
+        try:
+            self.remove_heartbeat()
+        except sqlite3.Error:
+            pass
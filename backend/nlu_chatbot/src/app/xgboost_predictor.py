@@ -4,19 +4,39 @@ Loads pre-trained XGBoost model and preprocessing objects for real-time predicti
 Keeps model weights and pipeline on the backend
 """
 
+import os
 import pickle
+import time
 import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import logging
 from typing import Tuple, Dict, Optional, List
 import warnings
 
+try:
+    from .model_artifacts import has_native_artifacts, load_artifacts
+    from .rolling_features import BASE_COLUMNS, RollingFeatureWindow
+    from .feature_state import FeatureStateCache, VesselFeatureState
+    from .kinematics import destination_points
+    from . import metrics
+except ImportError:
+    from model_artifacts import has_native_artifacts, load_artifacts
+    from rolling_features import BASE_COLUMNS, RollingFeatureWindow
+    from feature_state import FeatureStateCache, VesselFeatureState
+    from kinematics import destination_points
+    import metrics
+
 warnings.filterwarnings('ignore')
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEFAULT_STEP_SECONDS = 60.0  # AIS cadence assumed when the window has no usable timestamps
+MAX_ROLLOUT_STEPS = 240
+STATE_WINDOW_SIZE = 12  # matches the default sequence_length of predict_single_vessel
+
 
 class XGBoostPredictor:
     """
@@ -47,11 +67,27 @@ class XGBoostPredictor:
         self.model = None
         self.scaler = None
         self.pca = None
+        self.manifest = None
+        self.artifact_format = None
+        self.load_seconds = None
         self.is_loaded = False
+        # Streaming per-MMSI feature windows for continuously monitored vessels
+        self.feature_states = FeatureStateCache(
+            max_vessels=int(os.environ.get("XGBOOST_STATE_CACHE_SIZE", 10000)),
+            window_size=STATE_WINDOW_SIZE,
+        )
 
         self._load_model_artifacts()
         self._initialized = True
 
+    @classmethod
+    def load(cls, model_dir: str = None) -> "XGBoostPredictor":
+        """Create an independent (non-singleton) predictor, e.g. for the model registry"""
+        instance = super().__new__(cls)
+        instance._initialized = False
+        instance.__init__(model_dir)
+        return instance
+
     def _find_model_directory(self) -> str:
         """Search for XGBoost model directory in common locations"""
         possible_paths = [
@@ -64,7 +100,7 @@ class XGBoostPredictor:
 
         for path in possible_paths:
             model_path = Path(path) / "xgboost_model.pkl"
-            if model_path.exists():
+            if model_path.exists() or has_native_artifacts(path):
                 logger.info(f"✅ Found model directory at: {path}")
                 return path
 
@@ -72,44 +108,41 @@ class XGBoostPredictor:
         return "results/xgboost_advanced_50_vessels"
     
     def _load_model_artifacts(self):
-        """Load model, scaler, and PCA transformer from disk"""
+        """Load model, scaler, and PCA transformer from disk
+
+        Prefers the native format written by tools/export_model_artifacts.py
+        (manifest.json + UBJ booster + preprocessing.npz) and falls back to the
+        legacy pickles. XGBOOST_ARTIFACT_FORMAT=auto|native|pickle overrides the choice.
+        """
+        start = time.perf_counter()
+        artifact_format = os.environ.get("XGBOOST_ARTIFACT_FORMAT", "auto").lower()
         try:
             # Check if model directory exists
             if not self.model_dir.exists():
                 raise FileNotFoundError(f"Model directory not found: {self.model_dir}")
 
-            # Load model
-            model_path = self.model_dir / "xgboost_model.pkl"
-            if not model_path.exists():
-                raise FileNotFoundError(f"Model file not found: {model_path}")
-
-            logger.info(f"Loading XGBoost model from: {model_path}")
-            with open(model_path, 'rb') as f:
-                self.model = pickle.load(f)
-            logger.info(f"✅ Loaded XGBoost model")
-
-            # Load scaler
-            scaler_path = self.model_dir / "scaler.pkl"
-            if not scaler_path.exists():
-                raise FileNotFoundError(f"Scaler file not found: {scaler_path}")
-
-            logger.info(f"Loading StandardScaler from: {scaler_path}")
-            with open(scaler_path, 'rb') as f:
-                self.scaler = pickle.load(f)
-            logger.info(f"✅ Loaded StandardScaler")
-
-            # Load PCA
-            pca_path = self.model_dir / "pca.pkl"
-            if not pca_path.exists():
-                raise FileNotFoundError(f"PCA file not found: {pca_path}")
-
-            logger.info(f"Loading PCA transformer from: {pca_path}")
-            with open(pca_path, 'rb') as f:
-                self.pca = pickle.load(f)
-            logger.info(f"✅ Loaded PCA transformer")
-
+            if artifact_format != "pickle" and has_native_artifacts(self.model_dir):
+                try:
+                    logger.info(f"Loading native model artifacts from: {self.model_dir}")
+                    self.model, self.scaler, self.pca, self.manifest = load_artifacts(self.model_dir)
+                    self.artifact_format = "native"
+                except (FileNotFoundError, ValueError) as e:
+                    if artifact_format == "native":
+                        raise
+                    logger.warning(f"⚠️  Native artifacts unusable ({e}), falling back to pickle")
+
+            if self.artifact_format is None:
+                if artifact_format == "native":
+                    raise FileNotFoundError(f"Native artifacts not found in {self.model_dir}")
+                self._load_pickle_artifacts()
+                self.artifact_format = "pickle"
+
+            self.load_seconds = time.perf_counter() - start
             self.is_loaded = True
-            logger.info(f"✅ All model artifacts loaded successfully from {self.model_dir}")
+            logger.info(
+                f"✅ All model artifacts loaded successfully from {self.model_dir} "
+                f"({self.artifact_format}, {self.load_seconds:.3f}s)"
+            )
 
         except FileNotFoundError as e:
             logger.warning(f"⚠️  Model files not found: {e}")
@@ -121,7 +154,30 @@ class XGBoostPredictor:
             import traceback
             logger.error(traceback.format_exc())
             self.is_loaded = False
-    
+
+    def _load_pickle_artifacts(self):
+        """Legacy path: unpickle xgboost_model.pkl, scaler.pkl and pca.pkl concurrently"""
+        paths = {
+            "model": self.model_dir / "xgboost_model.pkl",
+            "scaler": self.model_dir / "scaler.pkl",
+            "pca": self.model_dir / "pca.pkl",
+        }
+        for name, path in paths.items():
+            if not path.exists():
+                raise FileNotFoundError(f"{name.capitalize()} file not found: {path}")
+
+        def _unpickle(path):
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+
+        logger.info(f"Loading pickled model artifacts from: {self.model_dir}")
+        with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+            futures = {name: pool.submit(_unpickle, path) for name, path in paths.items()}
+            self.model = futures["model"].result()
+            self.scaler = futures["scaler"].result()
+            self.pca = futures["pca"].result()
+        logger.info(f"✅ Loaded XGBoost model, StandardScaler and PCA transformer")
+
     def extract_features_from_3d_array(self, X: np.ndarray) -> np.ndarray:
         """Extract 483 advanced time-series features from 3D sequences
 
@@ -462,7 +518,8 @@ class XGBoostPredictor:
                 # Adapt 6 dimensions to 28 dimensions
                 if X_seq.shape[2] == 6:
                     logger.info("Adapting 6 dimensions to 28 dimensions...")
-                    X_seq = self._adapt_6_to_28_dimensions(X_seq)
+                    with metrics.stage("adapt"):
+                        X_seq = self._adapt_6_to_28_dimensions(X_seq)
                     logger.info(f"Adapted sequence shape: {X_seq.shape}")
                 elif X_seq.shape[2] != 28:
                     logger.warning(f"⚠️  Unexpected number of dimensions: {X_seq.shape[2]}")
@@ -485,35 +542,40 @@ class XGBoostPredictor:
                         "model_mode": model_mode
                     }
 
-                # Extract advanced features
-                X_features = self.extract_features_from_3d_array(X_seq)
+                with metrics.stage("features"):
+                    # Extract advanced features
+                    X_features = self.extract_features_from_3d_array(X_seq)
 
-                # Add Haversine features
-                X_haversine = self.add_haversine_features_3d(X_seq)
+                    # Add Haversine features
+                    X_haversine = self.add_haversine_features_3d(X_seq)
 
-                # Combine features
-                X_combined = np.hstack([X_features, X_haversine])
+                    # Combine features
+                    X_combined = np.hstack([X_features, X_haversine])
                 logger.info(f"Combined feature shape: {X_combined.shape}")
 
                 # Scale features
-                X_scaled = self.scaler.transform(X_combined)
-                X_scaled = np.nan_to_num(X_scaled, nan=0.0, posinf=0.0, neginf=0.0)
+                with metrics.stage("scale"):
+                    X_scaled = self.scaler.transform(X_combined)
+                    X_scaled = np.nan_to_num(X_scaled, nan=0.0, posinf=0.0, neginf=0.0)
                 logger.info(f"Scaled feature shape: {X_scaled.shape}")
 
                 # Apply PCA
-                X_pca = self.pca.transform(X_scaled)
-                X_pca = np.nan_to_num(X_pca, nan=0.0, posinf=0.0, neginf=0.0)
+                with metrics.stage("pca"):
+                    X_pca = self.pca.transform(X_scaled)
+                    X_pca = np.nan_to_num(X_pca, nan=0.0, posinf=0.0, neginf=0.0)
                 logger.info(f"PCA feature shape: {X_pca.shape}")
 
                 # Make prediction
-                predictions = self.model.predict(X_pca)
+                with metrics.stage("predict"):
+                    predictions = self.model.predict(X_pca)
                 pred = predictions[0]
                 model_mode = "REAL"
                 logger.info(f"✅ REAL prediction successful: LAT={pred[0]:.4f}, LON={pred[1]:.4f}")
             else:
                 # Use demo prediction
                 logger.info("Using DEMO prediction mode (model not loaded)")
-                pred = self._generate_demo_prediction(vessel_df)
+                with metrics.stage("predict"):
+                    pred = self._generate_demo_prediction(vessel_df)
                 model_mode = "DEMO"
 
             return {
@@ -537,6 +599,185 @@ class XGBoostPredictor:
             logger.error(traceback.format_exc())
             return {"error": str(e), "prediction_available": False}
 
+    @staticmethod
+    def _infer_step_seconds(timestamps: pd.Series) -> float:
+        """Median positive interval between consecutive fixes in the window"""
+        ts = pd.to_datetime(timestamps, errors='coerce').dropna()
+        deltas = ts.diff().dt.total_seconds().to_numpy()[1:]
+        deltas = deltas[deltas > 0]
+        return float(np.median(deltas)) if len(deltas) else DEFAULT_STEP_SECONDS
+
+    def _predict_window(self, window: RollingFeatureWindow) -> np.ndarray:
+        """Scale -> PCA -> model for the current rolling window"""
+        with metrics.stage("features"):
+            features = window.features()
+        with metrics.stage("scale"):
+            X_scaled = np.nan_to_num(self.scaler.transform(features), nan=0.0, posinf=0.0, neginf=0.0)
+        with metrics.stage("pca"):
+            X_pca = np.nan_to_num(self.pca.transform(X_scaled), nan=0.0, posinf=0.0, neginf=0.0)
+        with metrics.stage("predict"):
+            return np.asarray(self.model.predict(X_pca))[0]
+
+    def rollout_trajectory(self, vessel_df: pd.DataFrame, steps: int = None, horizon_minutes: float = None,
+                           sequence_length: int = 12, step_seconds: float = None) -> Dict:
+        """Predict a multi-step path by feeding each prediction back into the rolling window
+
+        Either `steps` or `horizon_minutes` selects the horizon; the step interval is the
+        window's median AIS cadence unless `step_seconds` is given. Each step updates the
+        28-dimensional window incrementally (RollingFeatureWindow) instead of re-adapting
+        and re-extracting all 483 features from a DataFrame.
+        """
+        available_points = len(vessel_df)
+        sequence_length = min(sequence_length, available_points)
+        min_required = 3
+        if sequence_length < min_required:
+            return {
+                "error": f"Insufficient data. Need at least {min_required} points, got {available_points}",
+                "prediction_available": False,
+                "available_points": available_points,
+                "required_points": min_required
+            }
+        missing = [col for col in BASE_COLUMNS if col not in vessel_df.columns]
+        if missing:
+            return {"error": f"Missing columns for rollout: {missing}", "prediction_available": False}
+
+        try:
+            last_seq = vessel_df.tail(sequence_length)
+            if step_seconds is None:
+                step_seconds = self._infer_step_seconds(last_seq['BaseDateTime'])
+
+            horizon_truncated = False
+            if steps is None:
+                minutes = horizon_minutes if horizon_minutes is not None else 30
+                steps = max(1, int(np.ceil(minutes * 60.0 / step_seconds)))
+            if steps > MAX_ROLLOUT_STEPS:
+                logger.warning(f"Rollout capped at {MAX_ROLLOUT_STEPS} steps (requested {steps})")
+                steps = MAX_ROLLOUT_STEPS
+                horizon_truncated = True
+
+            window = RollingFeatureWindow(last_seq[BASE_COLUMNS].to_numpy(dtype=float))
+            last_ts = pd.to_datetime(last_seq.iloc[-1]['BaseDateTime'], errors='coerce')
+            model_mode = "REAL" if self.is_loaded else "DEMO"
+
+            path = []
+            for step in range(1, steps + 1):
+                prev = window.raw[-1]
+                if self.is_loaded:
+                    pred = self._predict_window(window)
+                    lat, lon, sog, cog = (float(v) for v in pred[:4])
+                else:
+                    sog, cog = float(prev[2]), float(prev[3])
+                    lat, lon = (float(v) for v in destination_points(
+                        prev[0], prev[1], cog, sog * step_seconds / 3600.0))
+                window.push([lat, lon, sog, cog, cog, prev[5]])
+                ts = last_ts + pd.Timedelta(seconds=step_seconds * step) if pd.notna(last_ts) else None
+                path.append({
+                    "step": step,
+                    "BaseDateTime": ts.strftime("%Y-%m-%d %H:%M:%S") if ts is not None else None,
+                    "LAT": lat,
+                    "LON": lon,
+                    "SOG": sog,
+                    "COG": cog,
+                })
+
+            final = path[-1]
+            logger.info(f"✅ {model_mode} rollout: {steps} steps of {step_seconds:.0f}s")
+            return {
+                "prediction_available": True,
+                "predicted_lat": final["LAT"],
+                "predicted_lon": final["LON"],
+                "predicted_sog": final["SOG"],
+                "predicted_cog": final["COG"],
+                "predicted_timestamp": final["BaseDateTime"],
+                "predicted_path": path,
+                "steps": steps,
+                "step_seconds": step_seconds,
+                "horizon_minutes": steps * step_seconds / 60.0,
+                "horizon_truncated": horizon_truncated,
+                "last_known_lat": float(last_seq.iloc[-1]['LAT']),
+                "last_known_lon": float(last_seq.iloc[-1]['LON']),
+                "last_known_sog": float(last_seq.iloc[-1]['SOG']),
+                "last_known_cog": float(last_seq.iloc[-1]['COG']),
+                "last_timestamp": str(last_seq.iloc[-1]['BaseDateTime']),
+                "vessel_name": vessel_df.iloc[-1].get('VesselName', 'Unknown'),
+                "mmsi": int(vessel_df.iloc[-1].get('MMSI', 0)) if 'MMSI' in vessel_df.columns else None,
+                "model_mode": model_mode
+            }
+        except Exception as e:
+            logger.error(f"Rollout error: {e}")
+            import traceback
+            logger.error(traceback.format_exc())
+            return {"error": str(e), "prediction_available": False}
+
+    # --- Streaming feature state ---
+    def update_vessel_state(self, mmsi: int, point: Dict) -> VesselFeatureState:
+        """Push one AIS fix into the vessel's rolling feature state (constant time)"""
+        state = self.feature_states.get_or_create(mmsi)
+        with state.lock:
+            state.update(point)
+        return state
+
+    def prime_vessel_state(self, mmsi: int, vessel_df: pd.DataFrame) -> VesselFeatureState:
+        """(Re)build a vessel's state from its most recent history rows"""
+        self.feature_states.discard(mmsi)
+        state = self.feature_states.get_or_create(mmsi)
+        with state.lock:
+            for point in vessel_df.tail(state.window_size).to_dict(orient='records'):
+                state.update(point)
+        return state
+
+    def predict_from_state(self, mmsi: int) -> Dict:
+        """Predict the next position from the cached feature state: scaler -> PCA -> model only"""
+        state = self.feature_states.get(mmsi)
+        if state is None or not state.ready:
+            return {
+                "error": f"No ready feature state for MMSI {mmsi}",
+                "prediction_available": False,
+                "available_points": 0 if state is None else len(state._pending),
+                "required_points": STATE_WINDOW_SIZE
+            }
+
+        with state.lock:
+            cached = state.cached_predictions.get(id(self))
+            metrics.cache_lookup("feature_state_prediction", cached is not None)
+            if cached is not None:
+                return dict(cached)
+            try:
+                if self.is_loaded:
+                    with metrics.stage("scale"):
+                        X_scaled = np.nan_to_num(self.scaler.transform(state.features()), nan=0.0, posinf=0.0, neginf=0.0)
+                    with metrics.stage("pca"):
+                        X_pca = np.nan_to_num(self.pca.transform(X_scaled), nan=0.0, posinf=0.0, neginf=0.0)
+                    with metrics.stage("predict"):
+                        pred = np.asarray(self.model.predict(X_pca))[0]
+                    model_mode = "REAL"
+                else:
+                    pred = self._generate_demo_prediction(state.window_frame())
+                    model_mode = "DEMO"
+            except Exception as e:
+                logger.error(f"State prediction error for MMSI {mmsi}: {e}")
+                return {"error": str(e), "prediction_available": False}
+
+            last = state.last_row
+            result = {
+                "prediction_available": True,
+                "predicted_lat": float(pred[0]),
+                "predicted_lon": float(pred[1]),
+                "predicted_sog": float(pred[2]),
+                "predicted_cog": float(pred[3]),
+                "last_known_lat": float(last.get('LAT')),
+                "last_known_lon": float(last.get('LON')),
+                "last_known_sog": float(last.get('SOG') or 0.0),
+                "last_known_cog": float(last.get('COG') or 0.0),
+                "last_timestamp": str(last.get('BaseDateTime')),
+                "vessel_name": last.get('VesselName', 'Unknown'),
+                "mmsi": int(mmsi),
+                "model_mode": model_mode,
+                "state_updates": state.updates
+            }
+            state.cached_predictions[id(self)] = result
+            return dict(result)
+
 
 # Global predictor instance
 _predictor = None
@@ -0,0 +1,92 @@
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# ensure we can import modules from src/app
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+sys.path.insert(0, ROOT)
+
+from anomaly_job import api_job_workers, plan_shards, run_anomaly_job
+from db_handler import MaritimeDB
+from intent_executor import IntentExecutor
+from track_validation import score_tracks
+
+
+def make_track(mmsi, n=40, name="SCREEN TEST"):
+    # ~10 kn due north, one fix per minute
+    return pd.DataFrame({
+        "MMSI": mmsi,
+        "BaseDateTime": pd.date_range("2020-01-03", periods=n, freq="1min").strftime("%Y-%m-%d %H:%M:%S"),
+        "LAT": 30.0 + np.arange(n) * (10.0 / 60.0) / 60.0,
+        "LON": -80.0,
+        "SOG": 10.0,
+        "COG": 0.0,
+        "Heading": 0.0,
+        "VesselName": name,
+        "CallSign": "X",
+        "VesselType": 70.0,
+    })
+
+
+@pytest.fixture()
+def screened_db(tmp_path):
+    clean = make_track(1)
+    gap = make_track(2)
+    gap.loc[20:, "BaseDateTime"] = (pd.to_datetime(gap.loc[20:, "BaseDateTime"]) + pd.Timedelta(hours=2)).dt.strftime("%Y-%m-%d %H:%M:%S")
+    shared = make_track(3)
+    shared.loc[10::2, "LAT"] += 1.0  # a second transmitter 60 nm away on the same MMSI
+    path = str(tmp_path / "screen.db")
+    conn = sqlite3.connect(path)
+    pd.concat([clean, gap, shared]).sample(frac=1, random_state=0).to_sql("vessel_data", conn, index=False)
+    conn.close()
+    return path
+
+
+def test_chunked_sharded_job_matches_single_pass(screened_db):
+    summary = run_anomaly_job(screened_db, workers=1, chunk_rows=7)
+    assert summary["rows_scanned"] == 120
+    assert summary["by_type"]["timestamp_gap"] == 1
+
+    conn = sqlite3.connect(screened_db)
+    stored = pd.read_sql_query("SELECT * FROM anomalies", conn)
+    tracks = pd.read_sql_query("SELECT * FROM vessel_data", conn)
+    conn.close()
+    assert set(stored.MMSI) == {2, 3}
+    assert (stored.anomaly_type == "duplicate_mmsi").sum() > 10
+    # chunk boundaries do not add or lose findings
+    expected = score_tracks(tracks)
+    assert int((expected["anomaly_score"] > 0).sum()) == stored.drop_duplicates(["MMSI", "BaseDateTime"]).shape[0]
+
+
+def test_parallel_shards_cover_every_vessel(screened_db):
+    conn = sqlite3.connect(screened_db)
+    assert plan_shards(conn, 2) == [(1, 1), (2, 3)]
+    conn.close()
+    parallel = run_anomaly_job(screened_db, workers=2)
+    serial = run_anomaly_job(screened_db, workers=1)
+    assert parallel["anomalies"] == serial["anomalies"] and parallel["shards"] == 3
+
+
+def test_api_job_workers_env(monkeypatch):
+    monkeypatch.setenv("ANOMALY_JOB_WORKERS", "3")
+    assert api_job_workers() == 3
+    monkeypatch.delenv("ANOMALY_JOB_WORKERS")
+    assert 1 <= api_job_workers() <= 4
+
+
+def test_verify_reads_stored_anomalies(screened_db):
+    db = MaritimeDB(screened_db)
+    assert db.get_latest_anomaly_run() is None
+    live = IntentExecutor(db).handle({"intent": "VERIFY", "identifiers": {"mmsi": 3}})
+    assert live["source"] == "live"
+
+    run = run_anomaly_job(screened_db, workers=1)
+    result = IntentExecutor(db).handle({"intent": "VERIFY", "identifiers": {"mmsi": 3}})
+    assert result["source"] == "anomalies" and result["run_id"] == run["run_id"]
+    assert result["verdict"] == "suspicious"
+    assert result["checks"]["duplicate_mmsi"] == live["checks"]["duplicate_mmsi"]
+    assert IntentExecutor(db).handle({"intent": "VERIFY", "identifiers": {"mmsi": 1}})["is_consistent"]
@@ -0,0 +1,164 @@
+import asyncio
+import os
+import sys
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# ensure we can import modules from src/app
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+sys.path.insert(0, ROOT)
+
+import compute_pool
+from compute_pool import ComputePool
+from intent_executor import IntentExecutor
+from model_registry import ModelRegistry
+from xgboost_predictor import XGBoostPredictor
+
+
+class FakeNLP:
+    def parse_query(self, text):
+        return {"intent": "SHOW", "vessel_name": text.upper(), "pid": os.getpid()}
+
+
+class FakePredictor:
+    def __init__(self, model_dir):
+        self.model_dir = model_dir
+        self.is_loaded = True
+
+    def predict_single_vessel(self, vessel_df, sequence_length=12):
+        return {"prediction_available": True, "n": len(vessel_df), "source": self.model_dir}
+
+    def rollout_trajectory(self, vessel_df, steps=None, horizon_minutes=None, sequence_length=12):
+        return {"prediction_available": True, "steps": steps, "horizon_minutes": horizon_minutes,
+                "predicted_lat": 25.2, "predicted_lon": -79.8, "predicted_path": [], "source": self.model_dir}
+
+
+def track(n=20, mmsi=1):
+    return pd.DataFrame({
+        "MMSI": mmsi,
+        "BaseDateTime": pd.date_range("2020-01-03", periods=n, freq="min").strftime("%Y-%m-%d %H:%M:%S"),
+        "LAT": np.linspace(25, 25.1, n), "LON": np.linspace(-80, -79.9, n),
+        "SOG": 10.0, "COG": 45.0, "Heading": 45.0, "VesselName": "ALPHA",
+    })
+
+
+@pytest.fixture()
+def inline_pool(monkeypatch):
+    monkeypatch.setattr(compute_pool, "_state", {})
+    registry = ModelRegistry(loader=FakePredictor)
+    registry.register("v1", "dir-v1")
+    registry.register("v2", "dir-v2")
+    pool = ComputePool(["ALPHA"], registry, nlp_engine=FakeNLP(), workers=0)
+    pool.start()
+    return pool
+
+
+def test_inline_mode_runs_tasks_on_the_callers_objects(inline_pool):
+    parsed = asyncio.run(inline_pool.parse_query("alpha"))
+    assert parsed["vessel_name"] == "ALPHA" and parsed["pid"] == os.getpid()
+
+    result = inline_pool.predict_track(track(), model_id="v2")
+    assert result["source"] == "dir-v2" and result["model_id"] == "v2"
+    assert inline_pool.predict_track(track(), steps=3)["steps"] == 3
+    # metrics stay in the parent registry
+    assert inline_pool.registry.metrics()["v2"]["predictions"] == 1
+    assert inline_pool.registry.metrics()["v1"]["predictions"] == 1
+    # a predictor pinned before an unregister still serves the request, without re-registering it
+    _, pinned = inline_pool.registry.resolve("v2")
+    inline_pool.registry.unregister("v2")
+    assert inline_pool.predict_track(track(), model_id="v2", predictor=pinned)["source"] == "dir-v2"
+    assert [m["model_id"] for m in inline_pool.registry.list_models()] == ["v1"]
+
+
+def test_predict_many_keeps_input_order(inline_pool):
+    results = inline_pool.predict_many([track(n) for n in range(5, 45)], chunk_size=7)
+    assert [r["n"] for r in results] == list(range(5, 45))
+    assert {r["model_id"] for r in results} == {"v1"}
+    assert inline_pool.registry.metrics()["v1"]["predictions"] == 40
+
+
+def test_worker_reloads_reregistered_id_and_drops_unregistered(monkeypatch):
+    worker = ModelRegistry(loader=FakePredictor)
+    worker.register("v1", "dir-a")
+    worker.register("v2", "dir-v2")
+    monkeypatch.setattr(compute_pool, "_state", {"registry": worker})
+    # the parent re-registered v1 from a new directory and unregistered v2
+    result = compute_pool.predict_track(track(), "v1", "dir-b", live_ids=["v1"])
+    assert result["source"] == "dir-b" and result["model_id"] == "v1"
+    assert [(m["model_id"], m["model_dir"]) for m in worker.list_models()] == [("v1", "dir-b")]
+    # unchanged directory: the loaded predictor is reused
+    _, loaded = worker.resolve("v1")
+    compute_pool.predict_many([track()], "v1", "dir-b", live_ids=["v1"])
+    assert worker.resolve("v1")[1] is loaded
+
+
+class TrackDB:
+    def fetch_track_ending_at(self, vessel_name=None, mmsi=None, end_dt=None, limit=10):
+        return track(limit, mmsi=mmsi or 1)
+
+
+def test_predict_intent_rolls_out_through_the_pool(inline_pool, monkeypatch):
+    calls = []
+    monkeypatch.setattr(inline_pool, "call", lambda fn, *args, **kwargs: calls.append(fn) or fn(*args, **kwargs))
+    executor = IntentExecutor(TrackDB(), predictor=inline_pool.registry, compute=inline_pool)
+    result = executor.handle({"intent": "PREDICT", "identifiers": {"mmsi": "7"}, "time_horizon": "45 minutes"})
+    assert calls == [compute_pool.predict_track]
+    assert result["model_id"] == "v1" and result["MinutesAhead"] == 45 and result["predicted_lat"] == 25.2
+    assert inline_pool.registry.metrics()["v1"]["predictions"] == 1
+
+
+class BrokenPool:
+    def __init__(self):
+        self.shutdowns = 0
+
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("worker died")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdowns += 1
+
+
+def test_broken_pool_is_shut_down_and_replaced_once(inline_pool):
+    broken = BrokenPool()
+    inline_pool._pool = broken
+    starts = []
+    inline_pool.start = lambda: starts.append(1)
+
+    assert inline_pool.call(compute_pool.parse_query, "alpha")["vessel_name"] == "ALPHA"
+    assert broken.shutdowns == 1 and starts == [1] and inline_pool._pool is None
+    # a second caller that saw the same broken pool does not rebuild it again
+    inline_pool._pool = object()
+    assert inline_pool._recover(broken, compute_pool.parse_query, "beta")[0]["vessel_name"] == "BETA"
+    assert broken.shutdowns == 1 and starts == [1]
+
+    inline_pool._pool = broken = BrokenPool()
+    parsed = asyncio.run(inline_pool.run(compute_pool.parse_query, "gamma"))
+    assert parsed["vessel_name"] == "GAMMA" and broken.shutdowns == 1 and starts == [1, 1]
+
+
+def test_default_workers_env(monkeypatch):
+    monkeypatch.setenv("COMPUTE_WORKERS", "0")
+    assert compute_pool.default_workers() == 0
+    monkeypatch.delenv("COMPUTE_WORKERS")
+    assert 1 <= compute_pool.default_workers() <= 4
+
+
+def test_process_workers_are_preinitialized(tmp_path):
+    spacy = pytest.importorskip("spacy")
+    if not spacy.util.is_package("en_core_web_sm"):
+        pytest.skip("spaCy model en_core_web_sm not installed")
+    registry = ModelRegistry()
+    registry.register("demo", predictor=XGBoostPredictor.load(str(tmp_path)))
+    pool = ComputePool(["ALPHA"], registry, workers=2)
+    pool.start()
+    try:
+        parsed = asyncio.run(pool.parse_query("Where is ALPHA?"))
+        assert parsed["vessel_name"] == "ALPHA"
+        results = pool.predict_many([track(), track(mmsi=2)], chunk_size=1)
+        assert [r["model_id"] for r in results] == ["demo", "demo"]
+        assert registry.metrics()["demo"]["predictions"] == 2
+    finally:
+        pool.stop()
@@ -0,0 +1,89 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# ensure we can import modules from src/app
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+sys.path.insert(0, ROOT)
+
+from feature_state import FeatureStateCache
+from model_artifacts import ArrayPCA, ArrayScaler
+from xgboost_predictor import XGBoostPredictor
+
+
+class LinearModel:
+    """Deterministic stand-in for the booster: 4 fixed projections of the PCA features"""
+
+    def __init__(self, n_in):
+        self.weights = np.random.default_rng(3).normal(size=(n_in, 4))
+
+    def predict(self, X):
+        return X @ self.weights
+
+
+def make_track(n=20, mmsi=367000001):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "MMSI": mmsi,
+        "BaseDateTime": pd.date_range("2020-01-03", periods=n, freq="1min").strftime("%Y-%m-%d %H:%M:%S"),
+        "LAT": 30.0 + np.cumsum(rng.normal(0, 0.001, n)),
+        "LON": -80.0 + np.cumsum(rng.normal(0, 0.001, n)),
+        "SOG": 10 + rng.normal(0, 0.5, n),
+        "COG": 90 + rng.normal(0, 5, n),
+        "Heading": 90 + rng.normal(0, 5, n),
+        "VesselName": "STATE TEST",
+        "CallSign": "ST001",
+        "VesselType": 70.0,
+    })
+
+
+@pytest.fixture()
+def predictor(tmp_path):
+    p = XGBoostPredictor.load(str(tmp_path / "missing"))
+    rng = np.random.default_rng(2)
+    p.scaler = ArrayScaler(rng.normal(size=483), np.abs(rng.normal(size=483)) + 0.5)
+    p.pca = ArrayPCA(np.zeros(483), rng.normal(size=(10, 483)) / 483)
+    p.model = LinearModel(10)
+    p.is_loaded = True
+    return p
+
+
+def test_state_prediction_matches_full_pipeline(predictor):
+    track = make_track()
+    for point in track.head(12).to_dict(orient="records"):
+        predictor.update_vessel_state(367000001, point)
+    for i in range(12, 20):
+        predictor.update_vessel_state(367000001, track.iloc[i].to_dict())
+        streamed = predictor.predict_from_state(367000001)
+        full = predictor.predict_single_vessel(track.iloc[: i + 1], sequence_length=12)
+        for key in ("predicted_lat", "predicted_lon", "predicted_sog", "predicted_cog"):
+            assert streamed[key] == pytest.approx(full[key], rel=1e-6, abs=1e-6)
+        assert streamed["last_timestamp"] == full["last_timestamp"]
+
+
+def test_state_needs_full_window_and_ignores_stale_points(predictor):
+    track = make_track(13)
+    for point in track.head(11).to_dict(orient="records"):
+        predictor.update_vessel_state(367000001, point)
+    assert not predictor.predict_from_state(367000001)["prediction_available"]
+
+    state = predictor.update_vessel_state(367000001, track.iloc[11].to_dict())
+    assert state.ready
+    first = predictor.predict_from_state(367000001)
+    # a replayed (older) fix does not change the state or invalidate the cached prediction
+    assert state.update(track.iloc[5].to_dict()) is False
+    assert predictor.predict_from_state(367000001) == first
+
+
+def test_cache_is_bounded_lru():
+    cache = FeatureStateCache(max_vessels=2, window_size=12)
+    cache.get_or_create(1)
+    cache.get_or_create(2)
+    cache.get(1)
+    cache.get_or_create(3)
+    assert cache.get(2) is None
+    assert cache.get(1) is not None and cache.get(3) is not None
+    assert cache.stats()["evictions"] == 1
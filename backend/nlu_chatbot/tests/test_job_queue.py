@@ -0,0 +1,178 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# ensure we can import modules from src/app
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+sys.path.insert(0, ROOT)
+
+import job_queue
+from job_queue import JobQueue, QueueFull
+
+
+@pytest.fixture()
+def queue(tmp_path):
+    q = JobQueue(str(tmp_path / "jobs.db"), workers=2, ttl_seconds=60)
+    yield q
+    q.stop()
+
+
+def wait_for(q, job_id, timeout=5.0):
+    version = 0
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = q.wait(job_id, after_version=version, timeout=deadline - time.time())
+        version = job["version"]
+        if job["status"] in job_queue.TERMINAL_STATES:
+            return job
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_runs_with_progress_and_result(queue):
+    def handler(params, ctx):
+        for i in range(3):
+            ctx.progress({"step": i + 1, "of": 3})
+        return {"total": params["n"] * 2}
+
+    queue.register("double", handler)
+    queue.start()
+    job_id = queue.submit("double", {"n": 21})
+    job = wait_for(queue, job_id)
+    assert job["status"] == "DONE" and job["result"] == {"total": 42}
+    assert job["progress"] == {"step": 3, "of": 3}
+    assert job["expires_at"] > job["finished_at"]
+    with pytest.raises(ValueError):
+        queue.submit("nope", {})
+
+
+def test_failures_are_recorded(queue):
+    def boom(params, ctx):
+        raise RuntimeError("bad input")
+
+    queue.register("boom", boom)
+    queue.start()
+    job = wait_for(queue, queue.submit("boom", {}))
+    assert job["status"] == "FAILED" and job["error"] == "bad input"
+
+
+def test_cancel_pending_and_running(queue):
+    started = threading.Event()
+
+    def slow(params, ctx):
+        started.set()
+        while True:
+            ctx.progress({"tick": time.time()})
+            time.sleep(0.01)
+
+    queue.register("slow", slow)
+    pending = queue.submit("slow", {})
+    assert queue.cancel(pending)["status"] == "CANCELLED"
+
+    queue.start()
+    running = queue.submit("slow", {})
+    assert started.wait(5)
+    assert queue.cancel(running)["cancel_requested"] is True
+    assert wait_for(queue, running)["status"] == "CANCELLED"
+    assert queue.cancel("missing") is None
+
+
+def test_long_poll_returns_on_change_or_timeout(queue):
+    release = threading.Event()
+    queue.register("gate", lambda params, ctx: release.wait(5) and {"ok": True})
+    job_id = queue.submit("gate", {})
+    version = queue.get(job_id)["version"]
+
+    t0 = time.time()
+    assert queue.wait(job_id, after_version=version, timeout=0.3)["status"] == "PENDING"
+    assert time.time() - t0 >= 0.25
+
+    queue.start()
+    job = queue.wait(job_id, after_version=version, timeout=5)
+    assert job["status"] == "RUNNING"
+    release.set()
+    assert wait_for(queue, job_id)["result"] == {"ok": True}
+
+
+def test_results_persist_and_expire(tmp_path, monkeypatch):
+    path = str(tmp_path / "jobs.db")
+    first = JobQueue(path, workers=1, ttl_seconds=60)
+    first.register("echo", lambda params, ctx: params)
+    first.start()
+    job_id = wait_for(first, first.submit("echo", {"x": 1}))["job_id"]
+    first.stop()
+
+    # another process / a restart sees the stored result
+    second = JobQueue(path, workers=1, ttl_seconds=60)
+    assert second.get(job_id)["result"] == {"x": 1}
+    assert [j["job_id"] for j in second.list(status="DONE")] == [job_id]
+
+    monkeypatch.setattr(job_queue.time, "time", lambda: time.monotonic() + 1e10)
+    assert second.evict_expired() == 1
+    assert second.get(job_id) is None
+
+
+def test_orphaned_running_job_is_requeued(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    crashed = JobQueue(path, workers=1)
+    crashed.register("echo", lambda params, ctx: params)
+    job_id = crashed.submit("echo", {"x": 2})
+    assert crashed._claim()[0] == job_id
+    crashed._update(job_id, heartbeat_at=time.time() - job_queue.STALE_SECONDS - 1)
+
+    restarted = JobQueue(path, workers=1)
+    restarted.register("echo", lambda params, ctx: params)
+    restarted.start()
+    try:
+        assert wait_for(restarted, job_id)["result"] == {"x": 2}
+    finally:
+        restarted.stop()
+
+
+def test_superseded_runner_cannot_overwrite_the_result(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    slow = JobQueue(path, workers=1)
+    slow.register("who", lambda params, ctx: {"by": "slow"})
+    job_id = slow.submit("who", {})
+    claim = slow._claim()
+    slow._update(job_id, heartbeat_at=time.time() - job_queue.STALE_SECONDS - 1)
+
+    # a sibling (re)starting meanwhile re-queues and finishes the job under a new claim
+    sibling = JobQueue(path, workers=1)
+    sibling.register("who", lambda params, ctx: {"by": "sibling"})
+    sibling.start()
+    try:
+        assert wait_for(sibling, job_id)["result"] == {"by": "sibling"}
+    finally:
+        sibling.stop()
+    slow._run(*claim)
+    assert slow.get(job_id)["result"] == {"by": "sibling"}
+
+
+def test_heartbeat_runs_without_progress_reports(queue, monkeypatch):
+    monkeypatch.setattr(job_queue, "HEARTBEAT_SECONDS", 0.05)
+    release = threading.Event()
+    queue.register("silent", lambda params, ctx: release.wait(5) and {"ok": True})
+    queue.start()
+    job_id = queue.submit("silent", {})
+    assert queue.wait(job_id, after_version=1, timeout=5)["status"] == "RUNNING"
+    claimed_at = queue._fetch_one("SELECT heartbeat_at FROM jobs WHERE job_id = ?;", (job_id,))[0]
+    time.sleep(0.3)
+    assert queue._fetch_one("SELECT heartbeat_at FROM jobs WHERE job_id = ?;", (job_id,))[0] > claimed_at
+    assert queue.recover_stale() == 0
+    release.set()
+    assert wait_for(queue, job_id)["status"] == "DONE"
+
+
+def test_pending_jobs_are_bounded(tmp_path):
+    q = JobQueue(str(tmp_path / "jobs.db"), workers=1, max_pending=2)
+    q.register("echo", lambda params, ctx: params)
+    first = q.submit("echo", {"n": 1})
+    q.submit("echo", {"n": 2})
+    with pytest.raises(QueueFull):
+        q.submit("echo", {"n": 3})
+    # a cancelled (no longer waiting) job frees its slot
+    q.cancel(first)
+    q.submit("echo", {"n": 3})
@@ -0,0 +1,63 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# ensure we can import modules from src/app
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+sys.path.insert(0, ROOT)
+
+from kinematics import EARTH_RADIUS_NM, destination_points, fit_motion, haversine_nm, project_positions
+from intent_executor import IntentExecutor
+
+
+def test_destination_roundtrips_with_haversine():
+    rng = np.random.default_rng(0)
+    lat, lon = rng.uniform(-60, 60, 1000), rng.uniform(-180, 180, 1000)
+    brg, dist = rng.uniform(0, 360, 1000), rng.uniform(0, 200, 1000)
+    lat2, lon2 = destination_points(lat, lon, brg, dist)
+    np.testing.assert_allclose(haversine_nm(lat, lon, lat2, lon2), dist, atol=1e-6)
+
+
+def test_straight_and_turning_projection():
+    # 10 kn due east on the equator moves along the equator by 10 nm per hour
+    proj = project_positions([0.0], [0.0], [10.0], [90.0], [30, 60])
+    np.testing.assert_allclose(proj["lon"][0], np.degrees(np.array([5.0, 10.0]) / EARTH_RADIUS_NM))
+    np.testing.assert_allclose(proj["lat"][0], [0.0, 0.0], atol=1e-9)
+
+    # a full circle (6 deg/min for 60 min) ends where it started, heading unchanged
+    proj = project_positions([30.0], [-80.0], [12.0], [0.0], [30, 60], rate_of_turn=[6.0])
+    assert proj["distance_nm"][0, 1] == pytest.approx(0.0, abs=1e-6)
+    assert proj["distance_nm"][0, 0] == pytest.approx(2 * 12 / (2 * np.pi), rel=1e-6)  # circle diameter
+    assert proj["cog"][0, 1] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_fit_motion_recovers_turn_and_acceleration_across_north():
+    minutes = np.arange(5)
+    rows = []
+    for mmsi, cog0, rot, sog0, acc in ((1, 355.0, 2.0, 10.0, 0.5), (2, 90.0, -1.0, 8.0, 0.0)):
+        for m in minutes:
+            rows.append({
+                "MMSI": mmsi,
+                "BaseDateTime": f"2020-01-03 00:0{m}:00",
+                "LAT": 30.0 + m * 0.001, "LON": -80.0,
+                "SOG": sog0 + acc * m, "COG": (cog0 + rot * m) % 360.0,
+            })
+    fit = fit_motion(pd.DataFrame(rows).sample(frac=1, random_state=0)).set_index("MMSI")
+    assert fit.loc[1, "rate_of_turn"] == pytest.approx(2.0)
+    assert fit.loc[1, "sog_rate"] == pytest.approx(0.5)
+    assert fit.loc[1, "COG"] == pytest.approx(3.0)
+    assert fit.loc[2, "rate_of_turn"] == pytest.approx(-1.0)
+    assert fit.loc[2, "fit_points"] == 5
+
+
+def test_executor_dead_reckoning_uses_great_circle():
+    df = pd.DataFrame([{
+        "MMSI": 1, "BaseDateTime": "2020-01-03 00:00:00", "LAT": 0.0, "LON": 0.0,
+        "SOG": 10.0, "COG": 90.0, "VesselName": "DR TEST",
+    }])
+    resp = IntentExecutor(db=None)._predict_position(df, 60)
+    assert resp["predicted_lon"] == pytest.approx(np.degrees(10.0 / EARTH_RADIUS_NM))
+    assert resp["Predicted_LAT"] == pytest.approx(0.0, abs=1e-9)
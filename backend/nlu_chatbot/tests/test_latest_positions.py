@@ -0,0 +1,70 @@
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+# ensure we can import modules from src/app
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+sys.path.insert(0, ROOT)
+
+from db_handler import MaritimeDB
+from intent_executor import IntentExecutor
+
+
+def fix(mmsi, ts, lat, name):
+    return {"MMSI": mmsi, "BaseDateTime": ts, "LAT": lat, "LON": -80.0, "SOG": 5.0, "COG": 10.0,
+            "Heading": 10.0, "VesselName": name, "CallSign": "C", "VesselType": 70.0}
+
+
+@pytest.fixture()
+def snapshot_db(tmp_path):
+    rows = [fix(1, f"2020-01-03 0{h}:00:00", 30.0 + h, "ALPHA") for h in range(5)]
+    rows += [fix(2, f"2020-01-03 0{h}:30:00", 20.0 + h, "BRAVO") for h in range(3)]
+    path = str(tmp_path / "latest.db")
+    conn = sqlite3.connect(path)
+    pd.DataFrame(rows).sample(frac=1, random_state=0).to_sql("vessel_data", conn, index=False)
+    conn.close()
+    db = MaritimeDB(path)
+    assert db.ensure_latest_positions()["vessels"] == 2
+    return db
+
+
+def test_backfill_and_ingest_upsert(snapshot_db):
+    db = snapshot_db
+    latest = db.fetch_latest_positions().set_index("MMSI")
+    assert latest.loc[1, "BaseDateTime"] == "2020-01-03 04:00:00" and latest.loc[1, "LAT"] == 34.0
+    assert latest.loc[2, "fix_count"] == 3 and latest.loc[2, "first_seen"] == "2020-01-03 00:30:00"
+
+    conn = sqlite3.connect(db.db_path)
+    new = pd.DataFrame([fix(1, "2020-01-03 06:00:00", 40.0, "ALPHA"),
+                        fix(2, "2020-01-02 23:00:00", 10.0, "BRAVO"),  # late, older fix
+                        fix(3, "2020-01-03 05:00:00", 50.0, "CHARLIE")])
+    new.to_sql("vessel_data", conn, index=False, if_exists="append")
+    conn.close()
+
+    latest = db.fetch_latest_positions().set_index("MMSI")
+    assert latest.loc[1, "LAT"] == 40.0
+    assert latest.loc[2, "BaseDateTime"] == "2020-01-03 02:30:00"  # older fix does not replace
+    assert latest.loc[2, "first_seen"] == "2020-01-02 23:00:00" and latest.loc[2, "fix_count"] == 4
+    assert list(db.fetch_latest_positions(since="2020-01-03 05:00:00").MMSI) == [1, 3]
+
+    names = db.get_unique_vessels_df().set_index("VesselName")
+    assert names.loc["CHARLIE", "last_seen"] == "2020-01-03 05:00:00"
+
+
+def test_show_without_datetime_uses_snapshot(snapshot_db):
+    resp = IntentExecutor(snapshot_db).handle({"intent": "SHOW", "vessel_name": "ALPHA", "identifiers": {}})
+    assert resp["BaseDateTime"] == "2020-01-03 04:00:00"
+    assert [p["BaseDateTime"] for p in resp["track"]][:2] == ["2020-01-03 04:00:00", "2020-01-03 03:00:00"]
+
+
+def test_fleet_positions_without_snapshot_falls_back(tmp_path):
+    path = str(tmp_path / "plain.db")
+    conn = sqlite3.connect(path)
+    pd.DataFrame([fix(1, "2020-01-03 00:00:00", 1.0, "A"), fix(1, "2020-01-03 01:00:00", 2.0, "A")]).to_sql("vessel_data", conn, index=False)
+    conn.close()
+    db = MaritimeDB(path)
+    assert db.fetch_latest_position(mmsi=1).empty
+    assert db.fetch_latest_positions()["LAT"].tolist() == [2.0]
@@ -0,0 +1,105 @@
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import pandas as pd
+
+# ensure we can import modules from src/app
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+sys.path.insert(0, ROOT)
+
+import metrics
+import worker_sync
+from db_handler import MaritimeDB
+from metrics import MetricsRegistry
+from worker_sync import RETIRED_PID, WorkerSync
+
+
+def test_render_sums_worker_snapshots():
+    registry = MetricsRegistry()
+    hist = registry.histogram("t_seconds", "test", ["stage"], buckets=(0.1, 1.0))
+    calls = registry.counter("t_total", "test", ["method"])
+    hist.observe(0.05, stage="db")
+    hist.observe(0.5, stage="db")
+    calls.inc(method="fetch")
+    other = registry.snapshot()  # as published by a second worker
+    hist.observe(5.0, stage="db")
+
+    text = registry.render([registry.snapshot(), other])
+    assert 't_seconds_bucket{stage="db",le="0.1"} 2' in text
+    assert 't_seconds_bucket{stage="db",le="1"} 4' in text
+    assert 't_seconds_bucket{stage="db",le="+Inf"} 5' in text
+    assert 't_seconds_count{stage="db"} 5' in text
+    assert 't_total{method="fetch"} 2' in text
+    assert "# TYPE t_seconds histogram" in text
+
+
+def test_nested_stages_are_exclusive_and_worker_stages_are_added():
+    timing = metrics.begin()
+    with metrics.stage("execute"):
+        time.sleep(0.05)
+        with metrics.stage("db"):
+            time.sleep(0.03)
+        # measured in a compute worker and returned with its result
+        with metrics.collect() as remote:
+            with metrics.stage("predict"):
+                pass
+        metrics.add_stages(dict(remote.stages, features=0.01))
+    assert set(timing.stages) == {"execute", "db", "predict", "features"}
+    assert timing.stages["db"] >= 0.03
+    # 50 ms of its own work, minus the 10 ms the worker reported inside it
+    assert 0.035 <= timing.stages["execute"] < 0.05
+    header = [part.split(";dur=")[0] for part in timing.server_timing().split(", ")]
+    assert sorted(header[:-1]) == ["db", "execute", "features", "predict"] and header[-1] == "total"
+
+
+def test_stage_is_a_noop_outside_requests():
+    token = metrics._current.set(None)
+    try:
+        with metrics.stage("db"):
+            pass
+        metrics.add_stages({"db": 1.0})
+        assert metrics.current() is None
+    finally:
+        metrics._current.reset(token)
+
+
+def test_db_reads_are_counted_and_timed(tmp_path):
+    path = str(tmp_path / "v.db")
+    conn = sqlite3.connect(path)
+    pd.DataFrame({"MMSI": [1, 1], "BaseDateTime": ["2020-01-03 00:00:00", "2020-01-03 00:01:00"],
+                  "VesselName": ["ALPHA", "ALPHA"]}).to_sql("vessel_data", conn, index=False)
+    conn.close()
+    db = MaritimeDB(path)
+
+    before = metrics.DB_CALLS.values.get(("fetch_vessel_by_mmsi",), 0)
+    timing = metrics.begin()
+    assert len(db.fetch_vessel_by_mmsi(1)) == 2
+    assert metrics.DB_CALLS.values[("fetch_vessel_by_mmsi",)] == before + 1
+    assert timing.stages["db"] > 0
+    assert db.fetch_vessel_by_mmsi.__name__ == "fetch_vessel_by_mmsi"
+
+
+def test_exited_workers_stay_in_the_totals(tmp_path, monkeypatch):
+    registry = MetricsRegistry()
+    calls = registry.counter("t_total", "test", ["method"])
+    calls.inc(3, method="fetch")
+    path = str(tmp_path / "jobs.db")
+    conn = sqlite3.connect(path)
+    WorkerSync(path)  # schema
+    for pid in (101, 102):  # two workers' last heartbeats; neither is running any more
+        conn.execute("INSERT INTO worker_metrics (pid, updated_at, snapshot) VALUES (?, ?, ?);",
+                     (pid, time.time(), json.dumps(registry.snapshot())))
+    conn.commit()
+    me = WorkerSync(path)
+    assert 't_total{method="fetch"} 6' in registry.render(me.metric_snapshots())
+
+    # past the TTL their rows fold into one retired row, and the total is unchanged
+    now = time.time()
+    monkeypatch.setattr(worker_sync.time, "time", lambda: now + worker_sync.EVENT_TTL_SECONDS + 1)
+    me.prune()
+    pids = [r[0] for r in conn.execute("SELECT pid FROM worker_metrics ORDER BY pid;")]
+    assert pids == [RETIRED_PID]
+    assert 't_total{method="fetch"} 6' in registry.render(me.metric_snapshots())
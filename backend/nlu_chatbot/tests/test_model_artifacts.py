@@ -0,0 +1,76 @@
+import os
+import sys
+import json
+import pickle
+
+import numpy as np
+import pytest
+
+# ensure we can import modules from src/app
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+sys.path.insert(0, ROOT)
+
+xgb = pytest.importorskip("xgboost")
+pytest.importorskip("sklearn")
+from sklearn.decomposition import PCA
+from sklearn.multioutput import MultiOutputRegressor
+from sklearn.preprocessing import StandardScaler
+
+from model_artifacts import MANIFEST_FILE, export_artifacts, load_artifacts
+from xgboost_predictor import XGBoostPredictor
+
+
+def fit_artifacts(multi_output: bool):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(60, 483))
+    y = rng.normal(size=(60, 4))
+    scaler = StandardScaler().fit(X)
+    pca = PCA(n_components=8).fit(scaler.transform(X))
+    X_pca = pca.transform(scaler.transform(X))
+    if multi_output:
+        model = MultiOutputRegressor(xgb.XGBRegressor(n_estimators=5, max_depth=2)).fit(X_pca, y)
+    else:
+        model = xgb.XGBRegressor(n_estimators=5, max_depth=2).fit(X_pca, y)
+    return X, model, scaler, pca
+
+
+@pytest.mark.parametrize("multi_output", [False, True])
+def test_native_roundtrip_matches_pickled_pipeline(tmp_path, multi_output):
+    X, model, scaler, pca = fit_artifacts(multi_output)
+    manifest = export_artifacts(model, scaler, pca, tmp_path)
+    assert manifest["feature_schema"]["n_features"] == 483
+
+    n_model, n_scaler, n_pca, _ = load_artifacts(tmp_path)
+    np.testing.assert_allclose(n_scaler.transform(X), scaler.transform(X), rtol=1e-6)
+    X_pca = pca.transform(scaler.transform(X))
+    np.testing.assert_allclose(n_pca.transform(n_scaler.transform(X)), X_pca, rtol=1e-6, atol=1e-8)
+    np.testing.assert_allclose(n_model.predict(X_pca), model.predict(X_pca), rtol=1e-5, atol=1e-6)
+
+
+def test_checksum_mismatch_is_rejected(tmp_path):
+    _, model, scaler, pca = fit_artifacts(False)
+    export_artifacts(model, scaler, pca, tmp_path)
+    manifest_path = tmp_path / MANIFEST_FILE
+    manifest = json.loads(manifest_path.read_text())
+    manifest["files"]["preprocessing.npz"]["sha256"] = "0" * 64
+    manifest_path.write_text(json.dumps(manifest))
+    with pytest.raises(ValueError):
+        load_artifacts(tmp_path)
+
+
+def test_predictor_prefers_native_and_falls_back_to_pickle(tmp_path, monkeypatch):
+    _, model, scaler, pca = fit_artifacts(False)
+    for name, obj in (("xgboost_model.pkl", model), ("scaler.pkl", scaler), ("pca.pkl", pca)):
+        with open(tmp_path / name, "wb") as f:
+            pickle.dump(obj, f)
+
+    monkeypatch.setattr(XGBoostPredictor, "_instance", None)
+    predictor = XGBoostPredictor(str(tmp_path))
+    assert predictor.is_loaded and predictor.artifact_format == "pickle"
+
+    export_artifacts(model, scaler, pca, tmp_path)
+    monkeypatch.setattr(XGBoostPredictor, "_instance", None)
+    predictor = XGBoostPredictor(str(tmp_path))
+    assert predictor.is_loaded and predictor.artifact_format == "native"
+    assert predictor.load_seconds is not None
+    monkeypatch.setattr(XGBoostPredictor, "_instance", None)
@@ -0,0 +1,96 @@
+import os
+import sys
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+# ensure we can import modules from src/app
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+sys.path.insert(0, ROOT)
+
+from model_registry import ModelRegistry, allowed_model_dir
+
+
+class FakePredictor:
+    def __init__(self, model_dir):
+        self.model_dir = model_dir
+        self.is_loaded = True
+        self.artifact_format = "native"
+
+    def predict_single_vessel(self, vessel_df, sequence_length=12):
+        if vessel_df.empty:
+            raise ValueError("empty track")
+        return {"prediction_available": True, "predicted_lat": 1.0, "source": self.model_dir}
+
+
+@pytest.fixture()
+def registry():
+    reg = ModelRegistry(loader=FakePredictor)
+    reg.register("v1", "dir-v1")
+    reg.register("v2", "dir-v2")
+    return reg
+
+
+def test_first_registered_model_is_active_and_swap_is_atomic(registry):
+    assert registry.active_id == "v1"
+    _, pinned = registry.resolve()
+    registry.activate("v2")
+    # a request that already resolved keeps its predictor
+    assert pinned.model_dir == "dir-v1"
+    assert registry.resolve()[0] == "v2"
+    with pytest.raises(ValueError):
+        registry.unregister("v2")
+    registry.unregister("v1")
+    with pytest.raises(KeyError):
+        registry.resolve("v1")
+
+
+def test_traffic_split_is_weighted_and_sticky(registry):
+    registry.set_traffic_split({"v1": 3, "v2": 1})
+    counts = Counter(registry.resolve(routing_key=mmsi)[0] for mmsi in range(200000000, 200004000))
+    assert 0.7 < counts["v1"] / 4000 < 0.8
+    assert registry.resolve(routing_key=123)[0] == registry.resolve(routing_key=123)[0]
+    # explicit model id overrides the split
+    assert registry.resolve("v2", routing_key=123)[0] == "v2"
+    with pytest.raises(KeyError):
+        registry.set_traffic_split({"missing": 1})
+
+
+def test_unregister_renormalizes_or_clears_the_split(registry):
+    registry.register("v3", "dir-v3")
+    registry.set_traffic_split({"v1": 2, "v2": 1, "v3": 1})
+    registry.unregister("v3")
+    shares = {m["model_id"]: m["traffic_share"] for m in registry.list_models()}
+    assert shares == {"v1": pytest.approx(2 / 3), "v2": pytest.approx(1 / 3)}
+    registry.unregister("v2")
+    # one model left: the split is dropped and routing falls back to the active model
+    assert registry.list_models()[0]["traffic_share"] is None
+    assert registry.resolve(routing_key=123)[0] == "v1"
+
+
+def test_metrics_are_recorded_per_model(registry):
+    df = pd.DataFrame({"LAT": [1.0]})
+    result = registry.predict_single_vessel(df, model_id="v2")
+    assert result["model_id"] == "v2" and result["source"] == "dir-v2"
+    registry.predict_single_vessel(df)
+    metrics = registry.metrics()
+    assert metrics["v1"]["predictions"] == 1
+    assert metrics["v2"]["predictions"] == 1
+    assert metrics["v2"]["p95_ms"] is not None
+    # a predictor that raises is still counted, as an error
+    with pytest.raises(ValueError):
+        registry.predict_single_vessel(pd.DataFrame(), model_id="v2")
+    assert registry.metrics()["v2"]["predictions"] == 2 and registry.metrics()["v2"]["errors"] == 1
+
+
+def test_model_dirs_must_stay_inside_the_registry_root(tmp_path, monkeypatch):
+    monkeypatch.delenv("XGBOOST_MODEL_REGISTRY", raising=False)
+    with pytest.raises(PermissionError):
+        allowed_model_dir("v1")
+    monkeypatch.setenv("XGBOOST_MODEL_REGISTRY", str(tmp_path))
+    assert allowed_model_dir("v1") == tmp_path.resolve() / "v1"
+    assert allowed_model_dir(str(tmp_path / "v2")) == tmp_path.resolve() / "v2"
+    for outside in ("../elsewhere", "/etc", str(tmp_path) + "-other"):
+        with pytest.raises(PermissionError):
+            allowed_model_dir(outside)
@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+# ensure we can import modules from src/app
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+sys.path.insert(0, ROOT)
+
+from db_handler import MaritimeDB
+from intent_executor import IntentExecutor
+from nlp_interpreter import MaritimeNLPInterpreter
+from response_formatter import ResponseFormatter
+
+
+@pytest.fixture()
+def keyword_interpreter():
+    # intent / spatial extraction is regex based; skip loading the spaCy model
+    nlp = MaritimeNLPInterpreter.__new__(MaritimeNLPInterpreter)
+    nlp.intent_keywords = {"show": ["show", "where"], "predict": ["predict"], "verify": ["verify"]}
+    return nlp
+
+
+def test_nearby_intent_and_anchor_extraction(keyword_interpreter):
+    assert keyword_interpreter._extract_intent("show vessels near miami") == "NEARBY"
+    assert keyword_interpreter._extract_intent("where was +brava around 5pm") == "SHOW"
+    assert keyword_interpreter._extract_intent("vessels around 25.5, -80") == "NEARBY"
+    assert keyword_interpreter._extract_intent("ships within 3 nm of 367000001") == "NEARBY"
+    assert keyword_interpreter._extract_intent("which vessels are close to the port of houston") == "NEARBY"
+
+
+def test_time_phrases_are_not_nearby(keyword_interpreter):
+    # near / around followed by a time keeps the query's own intent
+    keyword_interpreter.vessel_list = ["champagne cher"]
+    assert keyword_interpreter._extract_intent("show champagne cher around 2020-01-03 10:00") == "SHOW"
+    assert keyword_interpreter._extract_intent("show mmsi 367000000 around noon") == "SHOW"
+    assert keyword_interpreter._extract_intent("predict champagne cher in the near future") == "PREDICT"
+    assert keyword_interpreter._extract_intent("where will champagne cher be in the near future") != "NEARBY"
+    assert keyword_interpreter._extract_intent("verify the track near 10am") == "VERIFY"
+    assert keyword_interpreter._extract_intent("verify the course around jan 5") == "VERIFY"
+    # ...while a known vessel after near is an anchor
+    assert keyword_interpreter._extract_intent("show ships near champagne cher") == "NEARBY"
+
+    spatial = MaritimeNLPInterpreter._extract_spatial("ships within 5 km of 25.77, -80.17")
+    assert spatial["anchor"]["type"] == "coords" and spatial["anchor"]["lon"] == -80.17
+    assert spatial["radius_nm"] == pytest.approx(5 / 1.852)
+
+    spatial = MaritimeNLPInterpreter._extract_spatial("vessels near 29.7 n 95.2 w")
+    assert (spatial["anchor"]["lat"], spatial["anchor"]["lon"]) == (29.7, -95.2)
+    assert spatial["radius_nm"] == 10.0
+
+    assert MaritimeNLPInterpreter._extract_spatial("within 3 nautical miles of port of houston")["anchor"]["name"] == "Houston"
+    vessel = MaritimeNLPInterpreter._extract_spatial("near new york express", vessel_name="New York Express")
+    assert vessel["anchor"] == {"type": "vessel", "name": "New York Express", "mmsi": None}
+    mmsi = MaritimeNLPInterpreter._extract_spatial("within 2 nm of 367000001", identifiers={"mmsi": "367000001"})
+    assert mmsi["anchor"]["mmsi"] == 367000001
+
+
+@pytest.fixture()
+def harbour_db(tmp_path):
+    rows = []
+    for i in range(30):
+        # vessel i sits i * 0.5 nm north of the anchor, reporting every 10 minutes
+        for minute in (0, 10, 20):
+            rows.append({"MMSI": 100 + i, "BaseDateTime": f"2020-01-03 11:{minute + 30:02d}:00",
+                         "LAT": 25.0 + i * 0.5 / 60.0, "LON": -80.0, "SOG": 0.0, "COG": 0.0,
+                         "VesselName": f"SHIP {i}"})
+    rows.append({"MMSI": 999, "BaseDateTime": "2020-01-03 08:00:00", "LAT": 25.0, "LON": -80.0,
+                 "SOG": 0.0, "COG": 0.0, "VesselName": "STALE"})
+    path = str(tmp_path / "harbour.db")
+    conn = sqlite3.connect(path)
+    pd.DataFrame(rows).to_sql("vessel_data", conn, index=False)
+    conn.close()
+    db = MaritimeDB(path)
+    db.ensure_spatial_index()
+    return db
+
+
+def test_nearby_executor_pages_by_distance(harbour_db):
+    executor = IntentExecutor(harbour_db)
+    parsed = {"intent": "NEARBY", "identifiers": {}, "page": 2, "page_size": 5,
+              "spatial": {"radius": 10.0, "unit": "nm", "radius_nm": 10.0, "anchor": {"type": "vessel", "name": "SHIP 0", "mmsi": None}}}
+    result = executor.handle(parsed)
+    assert result["anchor"]["mmsi"] == 100
+    assert result["total"] == 19  # ships 1..19 are within 10 nm; the anchor and the stale fix are excluded
+    assert [v["MMSI"] for v in result["vessels"]] == [106, 107, 108, 109, 110]
+    assert result["vessels"][0]["BaseDateTime"] == "2020-01-03 11:50:00"
+    assert result["has_more"]
+    assert "Found 19 vessels within 10 nm of **SHIP 0**" in ResponseFormatter.format_response("NEARBY", result)
+
+
+def test_nearby_without_anchor_asks_for_place(harbour_db):
+    result = IntentExecutor(harbour_db).handle({"intent": "NEARBY", "spatial": {"radius_nm": 5.0, "anchor": None}})
+    assert "message" in result
+
+
+def test_nearby_needs_a_finished_spatial_index(harbour_db):
+    parsed = {"intent": "NEARBY", "spatial": {"radius_nm": 4.9, "anchor": {"type": "coords", "lat": 25.0, "lon": -80.0}}}
+    # an R*Tree whose backfill has not finished (no trigger yet) is not used
+    conn = sqlite3.connect(harbour_db.db_path)
+    conn.execute("DROP TRIGGER trg_vessel_rtree_insert;")
+    conn.commit()
+    conn.close()
+    pending = MaritimeDB(harbour_db.db_path)
+    assert not pending.has_spatial_index()
+    assert "spatial index" in IntentExecutor(pending).handle(parsed)["message"]
+    pending.ensure_spatial_index()
+    assert IntentExecutor(pending).handle(parsed)["total"] == 10
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+# ensure we can import modules from src/app
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+sys.path.insert(0, ROOT)
+
+from db_handler import MaritimeDB
+from db_handler_async import MaritimeDBAsync
+from pagination import KEYSET_INDEX, page_query
+
+
+@pytest.fixture()
+def paged_db(tmp_path):
+    # 3 vessels reporting at the same timestamps -> ties on BaseDateTime broken by MMSI
+    times = pd.date_range("2020-01-03", periods=40, freq="min").strftime("%Y-%m-%d %H:%M:%S")
+    df = pd.DataFrame([{"MMSI": m, "BaseDateTime": t, "LAT": 25.0, "LON": -80.0, "VesselName": f"V{m}"}
+                       for t in times for m in (3, 1, 2)])
+    # an exact duplicate fix (same time and MMSI) is told apart by rowid
+    df = pd.concat([df, df.iloc[[5]]], ignore_index=True)
+    path = str(tmp_path / "paged.db")
+    conn = sqlite3.connect(path)
+    df.to_sql("vessel_data", conn, index=False)
+    conn.execute(KEYSET_INDEX)
+    conn.close()
+    return MaritimeDB(path)
+
+
+def walk(db, **kwargs):
+    pages, cursor = [], None
+    while True:
+        df, cursor = db.fetch_page(cursor=cursor, **kwargs)
+        pages.append(df)
+        if cursor is None:
+            return pages
+
+
+def test_pages_cover_every_row_once_in_order(paged_db):
+    pages = walk(paged_db, page_size=7)
+    assert [len(p) for p in pages] == [7] * 17 + [2]
+    rows = pd.concat(pages, ignore_index=True)
+    assert len(rows) == 121
+    assert list(zip(rows.BaseDateTime, rows.MMSI)) == sorted(zip(rows.BaseDateTime, rows.MMSI))
+    assert rows.iloc[:3].MMSI.tolist() == [1, 2, 3]
+
+
+def test_filtered_and_descending_pages(paged_db):
+    pages = walk(paged_db, mmsi=2, start="2020-01-03 00:10:00", end="2020-01-03 00:19:00", page_size=4,
+                 descending=True)
+    rows = pd.concat(pages)
+    assert len(rows) == 10 and (rows.MMSI == 2).all()
+    assert rows.BaseDateTime.iloc[0] == "2020-01-03 00:19:00" and rows.BaseDateTime.is_monotonic_decreasing
+
+
+def test_cursor_is_bound_to_its_query(paged_db):
+    _, cursor = paged_db.fetch_page(mmsi=1, page_size=5)
+    with pytest.raises(ValueError):
+        paged_db.fetch_page(mmsi=2, page_size=5, cursor=cursor)
+    with pytest.raises(ValueError):
+        paged_db.fetch_page(cursor="not-a-cursor")
+
+
+def test_deep_page_seeks_the_index(paged_db):
+    _, cursor = paged_db.fetch_page(page_size=100)
+    query, params, _ = page_query(cursor=cursor, page_size=10)
+    conn = sqlite3.connect(paged_db.db_path)
+    plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params))
+    conn.close()
+    assert "idx_vessel_time_mmsi" in plan and "TEMP B-TREE" not in plan
+
+
+def test_async_pages_share_cursors(paged_db):
+    async def run():
+        adb = MaritimeDBAsync(paged_db.db_path)
+        await adb.connect()
+        try:
+            first, cursor = await adb.fetch_page(page_size=50)
+            second, _ = await adb.fetch_page(page_size=50, cursor=cursor)
+        finally:
+            await adb.close()
+        return first, second
+
+    first, second = asyncio.run(run())
+    _, sync_cursor = paged_db.fetch_page(page_size=50)
+    expected, _ = paged_db.fetch_page(page_size=50, cursor=sync_cursor)
+    assert "_rowid" not in first[0]
+    assert [(r["BaseDateTime"], r["MMSI"]) for r in second] == list(zip(expected.BaseDateTime, expected.MMSI))
+
+
+def test_time_range_reads_page_with_cursors(paged_db):
+    start, end = "2020-01-03 00:05:00", "2020-01-03 00:14:00"
+    rows, cursor = [], None
+    while True:
+        page, cursor = paged_db.fetch_by_time_range(start, end, limit=8, cursor=cursor)
+        rows.append(page)
+        if cursor is None:
+            break
+    rows = pd.concat(rows, ignore_index=True)
+    assert len(rows) == 30 and rows.BaseDateTime.is_monotonic_increasing
+
+    async def run():
+        adb = MaritimeDBAsync(paged_db.db_path)
+        await adb.connect()
+        try:
+            first, token = await adb.fetch_by_time_range(start, end, limit=25)
+            rest, last = await adb.fetch_by_time_range(start, end, limit=25, cursor=token)
+        finally:
+            await adb.close()
+        return first, rest, last
+
+    first, rest, last = asyncio.run(run())
+    # newest first, and the second page picks up where the first stopped
+    assert first[0]["BaseDateTime"] == end and len(first) + len(rest) == 30 and last is None
@@ -0,0 +1,117 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# ensure we can import modules from src/app
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+sys.path.insert(0, ROOT)
+
+import profiling
+from profiling import Profiler, ProfilerBusy, ProfilingDisabled
+
+
+def hot_loop(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def fake_endpoint(seconds, intent):
+    with profiling.tags(intent=intent):
+        hot_loop(seconds)
+
+
+route_endpoint = profiling.profiled(fake_endpoint)  # as ProfiledRoute wraps it in main.py
+
+
+def _serve(profiler, path, seconds, intent):
+    session = profiler.admit(path)
+    try:
+        route_endpoint(seconds, intent)
+    finally:
+        if session is not None:
+            profiler.release(session)
+
+
+@pytest.fixture
+def profiler(monkeypatch):
+    profiler = Profiler(enabled=True)
+    monkeypatch.setattr(profiling, "PROFILER", profiler)  # tags() checks the module's profiler
+    yield profiler
+    profiler.stop()
+
+
+def test_disabled_profiler_refuses_to_start():
+    with pytest.raises(ProfilingDisabled):
+        Profiler(enabled=False).start({})
+
+
+def test_samples_are_tagged_by_endpoint_and_intent(profiler):
+    endpoints = {fake_endpoint.__code__: "POST /query"}
+    profiler.start(endpoints, requests=2, interval_ms=1, path_prefix="/query")
+    with pytest.raises(ProfilerBusy):
+        profiler.start(endpoints)
+
+    # a request on another path runs the same endpoint at the same time: not admitted, not sampled
+    threads = [threading.Thread(target=_serve, args=(profiler, path, 0.2, intent))
+               for path, intent in (("/vessels/search", "OTHER"), ("/query", "SHOW"), ("/query", "PREDICT"))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    report = profiler.report()
+    assert report["session"]["stopped"] == "2 requests profiled" and not profiler.active
+    assert report["session"]["requests"] == 2
+    assert {(e["endpoint"], e["intent"]) for e in report["endpoints"]} == {("POST /query", "SHOW"),
+                                                                           ("POST /query", "PREDICT")}
+    hot = [f for f in report["functions"] if f["function"].startswith("hot_loop (test_profiling.py")]
+    assert {f["intent"] for f in hot} == {"SHOW", "PREDICT"}
+    assert all(f["self_samples"] > 0 for f in hot)
+
+    lines = profiler.collapsed(intent="PREDICT").splitlines()
+    assert lines and all(line.startswith("POST /query;intent=PREDICT;fake_endpoint (test_profiling.py:") for line in lines)
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0 and "hot_loop" in stack
+
+
+def test_async_endpoints_are_sampled_only_while_their_task_runs(profiler):
+    async def query_endpoint(seconds):
+        hot_loop(seconds)
+        return "query"
+
+    async def other_endpoint(seconds):
+        hot_loop(seconds)
+        return "other"
+
+    async def serve(path, endpoint):
+        session = profiler.admit(path)
+        try:
+            return await profiling.profiled(endpoint)(0.15)
+        finally:
+            if session is not None:
+                profiler.release(session)
+
+    async def requests():
+        # one loop runs both; only the admitted request's task is sampled
+        return await asyncio.gather(serve("/other", other_endpoint), serve("/query", query_endpoint))
+
+    assert asyncio.iscoroutinefunction(profiling.profiled(query_endpoint))
+    profiler.start({query_endpoint.__code__: "POST /query", other_endpoint.__code__: "GET /other"},
+                   requests=1, interval_ms=1, path_prefix="/query")
+    assert asyncio.run(requests()) == ["other", "query"]
+    report = profiler.report()
+    assert report["session"]["requests"] == 1
+    assert [e["endpoint"] for e in report["endpoints"]] == ["POST /query"]
+
+
+def test_time_window_ends_the_session(profiler):
+    profiler.start({fake_endpoint.__code__: "GET /x"}, seconds=0.2, interval_ms=1)
+    _serve(profiler, "/x", 0.1, "SHOW")
+    time.sleep(0.4)
+    status = profiler.report()["session"]
+    assert not profiler.active and status["stopped"] == "0.2s window elapsed" and status["samples"] > 0
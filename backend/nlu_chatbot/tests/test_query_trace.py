@@ -0,0 +1,126 @@
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+import pandas as pd
+import pytest
+
+# ensure we can import modules from src/app
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+sys.path.insert(0, ROOT)
+
+from db_handler import MaritimeDB
+from query_trace import QueryTracer
+
+
+def _make_db(tmp_path):
+    path = str(tmp_path / "v.db")
+    conn = sqlite3.connect(path)
+    pd.DataFrame({
+        "MMSI": [1, 1, 2],
+        "BaseDateTime": ["2020-01-03 00:00:00", "2020-01-03 00:01:00", "2020-01-03 00:00:30"],
+        "LAT": [10.0, 10.1, 20.0], "LON": [50.0, 50.1, 60.0],
+        "VesselName": ["ALPHA", "ALPHA", "BRAVO"],
+    }).to_sql("vessel_data", conn, index=False)
+    conn.execute("CREATE INDEX idx_vessel_mmsi ON vessel_data(MMSI);")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_hook_sees_statement_params_and_rows(tmp_path):
+    db = MaritimeDB(_make_db(tmp_path))
+    db.tracer = QueryTracer(slow_ms=1e9, log_path=str(tmp_path / "slow.log"))
+    seen = []
+    db.tracer.add_hook(seen.append)
+
+    assert len(db.fetch_vessel_by_mmsi(1, limit=5)) == 2
+    assert len(seen) == 1
+    assert seen[0]["statement"].startswith("SELECT * FROM vessel_data WHERE MMSI = ?")
+    assert seen[0]["params"] == [1, 5] and seen[0]["rows"] == 2
+    assert "plan" not in seen[0]  # under the threshold: not explained
+    assert not os.path.exists(tmp_path / "slow.log")
+
+    # streamed reads are traced once, with the total row count
+    assert sum(len(b) for b in db.iter_time_range("2020-01-01", "2020-12-31", batch_rows=1)) == 3
+    assert seen[-1]["rows"] == 3
+    stats = db.tracer.report()["statements"]
+    assert {s["calls"] for s in stats} == {1}
+
+
+def test_slow_statements_are_explained_flagged_and_logged(tmp_path):
+    db = MaritimeDB(_make_db(tmp_path))
+    log_path = tmp_path / "slow.log"
+    db.tracer = QueryTracer(slow_ms=0, log_path=str(log_path))
+
+    db.search_vessels_prefix("al")
+    db.get_all_vessel_names()
+    db.fetch_vessel_by_mmsi(2)
+
+    report = db.tracer.report()
+    assert report["threshold_ms"] == 0 and len(report["slow"]) == 3
+    by_text = {entry["statement"]: entry for entry in report["slow"]}
+    prefix = next(e for t, e in by_text.items() if "LOWER(VesselName) LIKE" in t)
+    assert "lower_like" in prefix["flags"] and "full_scan:vessel_data" in prefix["flags"]
+    distinct = next(e for t, e in by_text.items() if t.startswith("SELECT DISTINCT VesselName FROM vessel_data WHERE"
+                                                                 " VesselName IS NOT NULL"))
+    assert "full_scan:vessel_data" in distinct["flags"] and "temp_btree:DISTINCT" in distinct["flags"]
+    by_mmsi = next(e for t, e in by_text.items() if "MMSI = ?" in t)
+    assert not any(f.startswith("full_scan") for f in by_mmsi["flags"])
+    assert any("idx_vessel_mmsi" in detail for detail in by_mmsi["plan"])
+
+    lines = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert len(lines) == 3 and lines[0]["params"] == ["al%", 50]
+
+    db.tracer.reset()
+    assert db.tracer.report()["statements"] == []
+
+
+def test_async_reads_are_traced(tmp_path):
+    aiosqlite = pytest.importorskip("aiosqlite")
+    from db_handler_async import MaritimeDBAsync
+
+    async def run():
+        adb = MaritimeDBAsync(_make_db(tmp_path))
+        adb.tracer = QueryTracer(slow_ms=1e9)
+        await adb.connect()
+        try:
+            names = await adb.search_vessels_prefix("br")
+            row = await adb.fetch_vessel_by_name_at_or_before("ALPHA", "2020-01-03 00:00:45")
+        finally:
+            await adb.close()
+        return adb.tracer, names, row
+
+    tracer, names, row = asyncio.run(run())
+    assert names == ["BRAVO"] and row["BaseDateTime"] == "2020-01-03 00:00:00"
+    stats = tracer.report(explain_all=True)["statements"]
+    assert [s["rows"] for s in stats if "LIKE" in s["statement"]] == [1]
+    assert "lower_like" in next(s for s in stats if "LIKE" in s["statement"])["flags"]
+
+
+def test_async_slow_reads_are_explained_off_the_event_loop(tmp_path, monkeypatch):
+    pytest.importorskip("aiosqlite")
+    import query_trace
+    from db_handler_async import MaritimeDBAsync
+
+    explained_in = []
+    real_explain = query_trace.explain
+    monkeypatch.setattr(query_trace, "explain",
+                        lambda *args: explained_in.append(threading.get_ident()) or real_explain(*args))
+
+    async def run():
+        adb = MaritimeDBAsync(_make_db(tmp_path))
+        adb.tracer = QueryTracer(slow_ms=0, log_path=str(tmp_path / "slow.log"))
+        await adb.connect()
+        try:
+            await adb.search_vessels_prefix("al")
+        finally:
+            await adb.close()
+        return adb.tracer, threading.get_ident()
+
+    tracer, loop_thread = asyncio.run(run())
+    assert explained_in and loop_thread not in explained_in
+    assert tracer.report()["slow"][0]["plan"]
@@ -0,0 +1,68 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# ensure we can import modules from src/app
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+sys.path.insert(0, ROOT)
+
+from rolling_features import RollingFeatureWindow, window_haversine, window_statistics
+from xgboost_predictor import XGBoostPredictor
+
+
+@pytest.fixture(scope="module")
+def predictor(tmp_path_factory):
+    # missing model directory -> DEMO mode, but the feature pipeline is still usable
+    return XGBoostPredictor.load(str(tmp_path_factory.mktemp("no_model") / "missing"))
+
+
+def make_base_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    lat = 30.0 + np.cumsum(rng.normal(0, 0.001, n))
+    lon = -80.0 + np.cumsum(rng.normal(0, 0.001, n))
+    sog = 10 + rng.normal(0, 0.5, n)
+    cog = 90 + rng.normal(0, 5, n)
+    heading = cog + rng.normal(0, 1, n)
+    vessel_type = np.full(n, 70.0)
+    return np.column_stack([lat, lon, sog, cog, heading, vessel_type])
+
+
+def test_vectorized_statistics_match_reference(predictor):
+    X = np.random.default_rng(1).normal(size=(3, 12, 28))
+    X[0, 3, 5] = np.nan
+    X[1, :, 7] = 4.0  # constant column: zero variance
+    np.testing.assert_allclose(window_statistics(X), predictor.extract_features_from_3d_array(X), rtol=1e-8, atol=1e-8)
+    np.testing.assert_allclose(window_haversine(X), predictor.add_haversine_features_3d(X), rtol=1e-8, atol=1e-8)
+
+
+def test_rolling_window_matches_full_recompute(predictor):
+    rows = make_base_rows(20)
+    window = RollingFeatureWindow(rows[:12])
+    for i in range(12, 20):
+        window.push(rows[i])
+        expected = predictor._adapt_6_to_28_dimensions(rows[i - 11:i + 1][None, :, :])
+        np.testing.assert_allclose(window.adapted(), expected[0], rtol=1e-6, atol=1e-6)
+
+    expected = predictor._adapt_6_to_28_dimensions(rows[8:20][None, :, :])
+    full = np.hstack([predictor.extract_features_from_3d_array(expected), predictor.add_haversine_features_3d(expected)])
+    np.testing.assert_allclose(window.features(), full, rtol=1e-5, atol=1e-5)
+
+
+def test_rollout_returns_timestamped_path(predictor):
+    rows = make_base_rows(12)
+    df = pd.DataFrame(rows, columns=["LAT", "LON", "SOG", "COG", "Heading", "VesselType"])
+    df["BaseDateTime"] = pd.date_range("2020-01-03 00:00:00", periods=12, freq="2min").strftime("%Y-%m-%d %H:%M:%S")
+    df["MMSI"] = 123456789
+    df["VesselName"] = "ROLLOUT TEST"
+
+    result = predictor.rollout_trajectory(df, horizon_minutes=30)
+    assert result["prediction_available"]
+    assert result["step_seconds"] == 120
+    assert result["steps"] == 15 and len(result["predicted_path"]) == 15
+    assert result["predicted_path"][0]["BaseDateTime"] == "2020-01-03 00:24:00"
+    assert result["predicted_timestamp"] == "2020-01-03 00:52:00"
+    # dead reckoning at ~10 kn due east for 30 minutes moves ~5 nm east
+    assert result["predicted_lon"] > result["last_known_lon"]
@@ -0,0 +1,88 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# ensure we can import modules from src/app
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+sys.path.insert(0, ROOT)
+
+import serialization
+from serialization import (ARROW_MEDIA_TYPE, COLUMNS_MEDIA_TYPE, FastJSONResponse, dumps, frame_records,
+                           frame_to_columns, negotiate_format, sanitize_frame, tabular_response)
+
+
+class FakeRequest:
+    def __init__(self, accept=""):
+        self.headers = {"accept": accept}
+
+
+def frame():
+    return pd.DataFrame({
+        "MMSI": [1, 2, 3],
+        "LAT": [25.0, np.nan, np.inf],
+        "SOG": [1.5, 2.5, 3.5],
+        "VesselName": ["A", None, np.nan],
+    })
+
+
+def test_negotiate_format():
+    assert negotiate_format(None) == "records"
+    assert negotiate_format(FakeRequest(ARROW_MEDIA_TYPE)) == "arrow"
+    assert negotiate_format(FakeRequest(f"{COLUMNS_MEDIA_TYPE}, */*")) == "columns"
+    assert negotiate_format(FakeRequest(ARROW_MEDIA_TYPE), "columns") == "columns"
+    assert negotiate_format(None, "bogus") == "records"
+
+
+def test_columns_null_out_nan_and_inf():
+    cols = frame_to_columns(frame())
+    assert cols == {"MMSI": [1, 2, 3], "LAT": [25.0, None, None], "SOG": [1.5, 2.5, 3.5],
+                    "VesselName": ["A", None, None]}
+    # finite float columns keep their dtype
+    assert sanitize_frame(frame())["SOG"].dtype == np.float64
+
+
+def test_columns_response_round_trips_to_dataframe():
+    resp = tabular_response(frame(), "columns", {"count": 3}, key="track")
+    payload = json.loads(resp.body)
+    assert resp.media_type == COLUMNS_MEDIA_TYPE
+    assert payload["count"] == 3 and payload["length"] == 3
+    df = pd.DataFrame(payload["track"])
+    assert df["MMSI"].tolist() == [1, 2, 3] and df["LAT"].isna().sum() == 2
+
+
+def test_arrow_response_carries_metadata():
+    pa = pytest.importorskip("pyarrow")
+    resp = tabular_response(frame(), "arrow", {"tier_seconds": 600})
+    table = pa.ipc.open_stream(resp.body).read_all()
+    assert json.loads(table.schema.metadata[b"meta"]) == {"tier_seconds": 600}
+    df = table.to_pandas()
+    assert df["LAT"].isna().sum() == 2 and df["MMSI"].tolist() == [1, 2, 3]
+
+
+def test_frame_records_match_to_dict_with_nulls():
+    df = frame()
+    assert frame_records(df) == [
+        {"MMSI": 1, "LAT": 25.0, "SOG": 1.5, "VesselName": "A"},
+        {"MMSI": 2, "LAT": None, "SOG": 2.5, "VesselName": None},
+        {"MMSI": 3, "LAT": None, "SOG": 3.5, "VesselName": None},
+    ]
+    clean = df.dropna()
+    assert frame_records(clean) == clean.to_dict(orient="records")
+    assert frame_records(df.iloc[:0]) == []
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_handles_numpy_and_stray_nan(monkeypatch, use_orjson):
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serialization, "orjson", None)
+    payload = {"n": np.int64(3), "x": np.float64("nan"), "arr": np.array([1.5, 2.5]), "inf": float("inf"),
+               "ts": pd.Timestamp("2020-01-03 00:00:00"), "nested": [{"v": float("nan")}]}
+    assert json.loads(dumps(payload)) == {"n": 3, "x": None, "arr": [1.5, 2.5], "inf": None,
+                                          "ts": "2020-01-03 00:00:00", "nested": [{"v": None}]}
+    assert json.loads(FastJSONResponse({"track": frame_records(frame())}).body)["track"][1]["LAT"] is None
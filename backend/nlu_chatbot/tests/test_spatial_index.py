@@ -0,0 +1,85 @@
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# ensure we can import modules from src/app
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+sys.path.insert(0, ROOT)
+
+from db_handler import MaritimeDB
+from kinematics import haversine_nm
+from spatial_index import radius_bboxes
+
+
+@pytest.fixture()
+def positions_db(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 5000
+    df = pd.DataFrame({
+        "MMSI": rng.integers(1, 200, n),
+        "BaseDateTime": (pd.Timestamp("2020-01-03") + pd.to_timedelta(rng.integers(0, 86400, n), unit="s")).strftime("%Y-%m-%d %H:%M:%S"),
+        "LAT": rng.uniform(-10, 10, n),
+        "LON": np.concatenate([rng.uniform(-10, 10, n - 500), rng.uniform(175, 180, 250), rng.uniform(-180, -175, 250)]),
+        "SOG": 10.0, "COG": 0.0, "Heading": 0.0, "VesselName": "GEO", "CallSign": "G", "VesselType": 70.0,
+    })
+    path = str(tmp_path / "geo.db")
+    conn = sqlite3.connect(path)
+    df.to_sql("vessel_data", conn, index=False)
+    conn.close()
+    db = MaritimeDB(path)
+    assert db.ensure_spatial_index()["added"] == n
+    return db, df
+
+
+def test_radius_matches_brute_force(positions_db):
+    db, df = positions_db
+    got = db.fetch_within_radius(1.0, 2.0, 120.0, start="2020-01-03 06:00:00", end="2020-01-03 18:00:00")
+    dist = haversine_nm(1.0, 2.0, df.LAT.to_numpy(), df.LON.to_numpy())
+    mask = (dist <= 120.0) & df.BaseDateTime.between("2020-01-03 06:00:00", "2020-01-03 18:00:00")
+    assert len(got) == mask.sum() > 0
+    assert got.distance_nm.is_monotonic_increasing
+
+
+def test_bbox_across_antimeridian_and_latest(positions_db):
+    db, df = positions_db
+    got = db.fetch_in_bbox(-5, 178, 5, -178)
+    expected = df[df.LAT.between(-5, 5) & ((df.LON >= 178) | (df.LON <= -178))]
+    assert len(got) == len(expected) > 0
+    assert got.BaseDateTime.is_monotonic_increasing
+
+    latest = db.latest_positions_in_bbox(-10, -10, 10, 10)
+    inside = df[df.LON.between(-10, 10)]
+    assert len(latest) == inside.MMSI.nunique()
+    newest = inside.sort_values("BaseDateTime").groupby("MMSI").BaseDateTime.last()
+    assert (latest.set_index("MMSI").BaseDateTime.sort_index() == newest.sort_index()).all()
+
+
+def test_bbox_limits_apply_per_box_and_after_merge(positions_db):
+    db, df = positions_db
+    # two boxes across the antimeridian, each LIMITed in SQL; the merge keeps the earliest rows overall
+    got = db.fetch_in_bbox(-5, 178, 5, -178, limit=7)
+    expected = df[df.LAT.between(-5, 5) & ((df.LON >= 178) | (df.LON <= -178))].sort_values("BaseDateTime")
+    assert list(got.BaseDateTime) == list(expected.BaseDateTime.head(7))
+
+    latest = db.latest_positions_in_bbox(-10, 170, 10, -170, limit=5)
+    inside = df[df.LAT.between(-10, 10) & ((df.LON >= 170) | (df.LON <= -170))]
+    newest = inside.groupby("MMSI").BaseDateTime.max().sort_values(ascending=False)
+    assert list(latest.BaseDateTime) == list(newest.head(5)) and latest.MMSI.is_unique
+    assert "latest_at" not in latest.columns
+
+def test_trigger_indexes_new_rows_and_radius_box_wraps(positions_db):
+    db, _ = positions_db
+    conn = sqlite3.connect(db.db_path)
+    conn.execute("INSERT INTO vessel_data (MMSI, BaseDateTime, LAT, LON) VALUES (999, '2020-01-04 00:00:00', 45.0, 179.99)")
+    conn.commit()
+    conn.close()
+    assert db.ensure_spatial_index()["added"] == 0
+    near = db.fetch_within_radius(45.0, -179.99, 2.0)
+    assert list(near.MMSI) == [999]
+
+    boxes = radius_bboxes(45.0, -179.99, 2.0)
+    assert len(boxes) == 2
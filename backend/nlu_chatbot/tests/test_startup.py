@@ -0,0 +1,88 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# ensure we can import modules from src/app
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+sys.path.insert(0, ROOT)
+
+from startup import ComponentNotReady, Startup
+
+
+def test_dependencies_load_first_and_independent_components_overlap():
+    startup = Startup()
+    order, barrier = [], threading.Barrier(2, timeout=5)
+
+    def slow(name):
+        def load():
+            barrier.wait()  # both only pass if they run at the same time
+            order.append(name)
+            return name
+        return load
+
+    startup.add("a", slow("a"))
+    startup.add("b", slow("b"))
+    startup.add("c", lambda: order.append("c") or startup.get("a") + startup.get("b"), depends_on=["a", "b"])
+    startup.start()
+    assert startup.wait(timeout=10)
+    assert order[-1] == "c" and startup.get("c") == "ab"
+    assert startup.ready()
+
+
+def test_failure_propagates_and_optional_failures_keep_app_ready():
+    startup = Startup()
+
+    def broken():
+        raise RuntimeError("no model")
+
+    startup.add("models", broken)
+    startup.add("compute", lambda: 1, depends_on=["models"])
+    startup.add("index", broken, required=False)
+    startup.add("tiers", lambda: 1, after=["index"], required=False)
+    startup.start()
+    assert not startup.wait(timeout=10)
+    status = startup.status()["components"]
+    assert status["models"] == {**status["models"], "state": "failed", "error": "no model"}
+    assert status["compute"]["state"] == "failed" and "models" in status["compute"]["error"]
+    # `after` only orders: tiers still loads once the index attempt is over
+    assert status["tiers"]["state"] == "ready"
+    startup.require("index")  # optional + failed: callers fall back
+    with pytest.raises(ComponentNotReady):
+        startup.require("compute")
+    assert not startup.ready()
+
+
+def test_lazy_proxy_raises_until_loaded():
+    startup = Startup()
+    gate = threading.Event()
+    startup.add("models", lambda: gate.wait(5) and {"active": "v1"})
+    startup.add("warm", lambda: None, per_process=True)
+    registry = startup.lazy("models")
+    startup.start(startup.preloadable())
+
+    with pytest.raises(ComponentNotReady) as err:
+        registry.get("active")
+    assert err.value.name == "models" and err.value.state in ("pending", "loading")
+    gate.set()
+    assert startup.wait(["models"], timeout=5)
+    assert registry.get("active") == "v1"
+    # per-process components are not started by a preload
+    assert startup.components["warm"].state == "pending"
+    startup.start()
+    assert startup.wait(timeout=5) and startup.ready()
+
+
+def test_wait_times_out_while_loading():
+    startup = Startup()
+    gate = threading.Event()
+    startup.add("slow", lambda: gate.wait(5))
+    startup.start()
+    t0 = time.time()
+    assert not startup.wait(timeout=0.1)
+    assert time.time() - t0 < 2
+    assert startup.status()["components"]["slow"]["state"] == "loading"
+    gate.set()
+    assert startup.wait(timeout=5)
@@ -0,0 +1,71 @@
+import json
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# ensure we can import modules from src/app
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+sys.path.insert(0, ROOT)
+
+from db_handler import MaritimeDB
+from serialization import arrow_chunks, ndjson_chunks
+
+
+@pytest.fixture()
+def stream_db(tmp_path):
+    n = 1200
+    df = pd.DataFrame({
+        "MMSI": np.repeat([1, 2], n // 2),
+        "BaseDateTime": list(pd.date_range("2020-01-03", periods=n // 2, freq="min").strftime("%Y-%m-%d %H:%M:%S")) * 2,
+        "LAT": np.linspace(20, 30, n),
+        "LON": -80.0,
+        "SOG": 5.0,
+        "Heading": np.nan,
+        "VesselName": np.repeat(["ALPHA", "BRAVO"], n // 2),
+    })
+    path = str(tmp_path / "stream.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE vessel_data (MMSI INTEGER, BaseDateTime TEXT, LAT REAL, LON REAL, SOG REAL, "
+                 "Heading REAL, VesselName TEXT);")
+    df.to_sql("vessel_data", conn, index=False, if_exists="append")
+    conn.close()
+    return MaritimeDB(path)
+
+
+def test_iter_track_batches(stream_db):
+    batches = list(stream_db.iter_track(mmsi=2, start="2020-01-03 01:00:00", batch_rows=100))
+    assert [len(b) for b in batches] == [100] * 5 + [40]
+    track = pd.concat(batches)
+    assert (track["MMSI"] == 2).all() and track["BaseDateTime"].is_monotonic_increasing
+    assert list(stream_db.iter_track(vessel_name="NOPE")) == []
+
+
+def test_ndjson_chunks_one_row_per_line(stream_db):
+    chunks = list(ndjson_chunks(stream_db.iter_time_range("2020-01-03 00:00:00", "2020-01-03 00:09:00", batch_rows=7)))
+    assert len(chunks) == 3
+    rows = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    assert len(rows) == 20 and rows[0]["Heading"] is None
+    assert [r["BaseDateTime"] for r in rows] == sorted(r["BaseDateTime"] for r in rows)
+
+
+def test_arrow_chunks_round_trip_with_null_first_batch(stream_db):
+    pa = pytest.importorskip("pyarrow")
+    types = stream_db.column_types()
+    assert types["Heading"] == "REAL"
+    chunks = list(arrow_chunks(stream_db.iter_track(vessel_name="ALPHA", batch_rows=250), types))
+    assert len(chunks) == 5  # schema + 3 record batches + end-of-stream
+    table = pa.ipc.open_stream(b"".join(chunks)).read_all()
+    assert table.num_rows == 600 and table.schema.field("Heading").type == pa.float64()
+    assert table.to_pandas()["LAT"].iloc[-1] == pytest.approx(pd.Series(np.linspace(20, 30, 1200))[599])
+
+
+def test_arrow_chunks_empty_result_still_carries_schema(stream_db):
+    pa = pytest.importorskip("pyarrow")
+    types = stream_db.column_types()
+    table = pa.ipc.open_stream(b"".join(arrow_chunks(stream_db.iter_track(vessel_name="NOPE"), types))).read_all()
+    assert table.num_rows == 0
+    assert table.schema.names == list(types) and table.schema.field("MMSI").type == pa.int64()
@@ -0,0 +1,69 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# ensure we can import modules from src/app
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+sys.path.insert(0, ROOT)
+
+from track_simplify import project_m, rdp_indices, simplify_track
+
+
+def zigzag(n=1001, amplitude_deg=0.001):
+    lon = np.linspace(-80.0, -79.0, n)
+    lat = 25.0 + amplitude_deg * np.sin(np.linspace(0, 6 * np.pi, n))
+    return pd.DataFrame({"LAT": lat, "LON": lon, "BaseDateTime": [f"t{i}" for i in range(n)]})
+
+
+def brute_error(df, kept):
+    """Max distance of every original point to the simplified polyline (by segment)"""
+    x, y = project_m(df["LAT"].to_numpy(), df["LON"].to_numpy())
+    worst = 0.0
+    idx = kept.index.to_numpy()
+    for a, b in zip(idx[:-1], idx[1:]):
+        for k in range(a + 1, b):
+            dx, dy = x[b] - x[a], y[b] - y[a]
+            t = np.clip(((x[k] - x[a]) * dx + (y[k] - y[a]) * dy) / (dx * dx + dy * dy), 0, 1)
+            worst = max(worst, np.hypot(x[k] - x[a] - t * dx, y[k] - y[a] - t * dy))
+    return worst
+
+
+def test_collinear_track_collapses_to_endpoints():
+    df = pd.DataFrame({"LAT": np.linspace(25, 26, 500), "LON": -80.0})
+    out, info = simplify_track(df, tolerance_m=1.0)
+    assert len(out) == 2 and info["original_points"] == 500 and info["max_error_m"] < 1.0
+
+
+def test_tolerance_bounds_error():
+    df = zigzag()
+    out, info = simplify_track(df, tolerance_m=5.0)
+    assert 2 < info["points"] < 200
+    assert info["max_error_m"] <= 5.0
+    assert brute_error(df, out) <= 5.0 + 1e-6
+    assert out["BaseDateTime"].iloc[0] == "t0" and out["BaseDateTime"].iloc[-1] == "t1000"
+
+
+def test_point_budget_reports_error():
+    df = zigzag()
+    out, info = simplify_track(df, max_points=8)
+    assert info["points"] == 8 and info["original_points"] == 1001
+    assert abs(brute_error(df, out) - info["max_error_m"]) < 0.01
+
+
+def test_no_options_or_short_track_is_unchanged():
+    df = zigzag(10)
+    out, info = simplify_track(df)
+    assert out is df and info["points"] == 10
+    idx, err = rdp_indices(np.array([0.0, 1.0]), np.array([0.0, 0.0]), max_points=2)
+    assert idx.tolist() == [0, 1] and err == 0.0
+    for empty in (None, df.iloc[:0]):
+        out, info = simplify_track(empty, tolerance_m=10.0)
+        assert out is empty and info["original_points"] == info["points"] == 0
+
+
+def test_antimeridian_track_is_not_a_spike():
+    df = pd.DataFrame({"LAT": [10.0, 10.0, 10.0], "LON": [179.9, -179.99, -179.9]})
+    out, _ = simplify_track(df, tolerance_m=1000.0)
+    assert len(out) == 2
@@ -0,0 +1,82 @@
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+# ensure we can import modules from src/app
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+sys.path.insert(0, ROOT)
+
+from db_handler import MaritimeDB
+from track_tiers import choose_tier
+
+
+def track(mmsi, start, minutes, step_seconds=30):
+    times = pd.date_range(start, periods=minutes * 60 // step_seconds, freq=f"{step_seconds}s")
+    return pd.DataFrame({
+        "MMSI": mmsi, "BaseDateTime": times.strftime("%Y-%m-%d %H:%M:%S"),
+        "LAT": 25.0 + pd.RangeIndex(len(times)) * 1e-4, "LON": -80.0, "SOG": 10.0, "COG": 0.0,
+        "Heading": 0.0, "VesselName": f"V{mmsi}",
+    })
+
+
+@pytest.fixture()
+def tier_db(tmp_path):
+    # 6 hours at 30 s -> 720 raw fixes
+    path = str(tmp_path / "tiers.db")
+    conn = sqlite3.connect(path)
+    pd.concat([track(1, "2020-01-03 00:00:00", 360), track(2, "2020-01-03 00:00:00", 60)]).to_sql(
+        "vessel_data", conn, index=False)
+    conn.close()
+    db = MaritimeDB(path)
+    assert db.ensure_track_tiers()["rows"] == {60: 420, 600: 42, 3600: 7}
+    return db
+
+
+def test_choose_tier_prefers_finest_fit():
+    counts = {0: 720, 60: 360, 600: 36, 3600: 6}
+    assert choose_tier(counts, 1000) == 0
+    assert choose_tier(counts, 400) == 60
+    assert choose_tier(counts, 36) == 600
+    assert choose_tier(counts, 3) is None
+
+
+def test_fetch_picks_tier_by_budget(tier_db):
+    df, info = tier_db.fetch_track_tiered(mmsi=1, max_points=1000)
+    assert info == {"tier_seconds": 0, "points": 720, "raw_points": 720}
+
+    df, info = tier_db.fetch_track_tiered(vessel_name="V1", max_points=100)
+    assert info["tier_seconds"] == 600 and len(df) == 36
+    # newest fix of each bucket, standing for 20 raw fixes
+    assert df["BaseDateTime"].iloc[0] == "2020-01-03 00:09:30"
+    assert df["n_points"].sum() == 720
+
+    df, info = tier_db.fetch_track_tiered(mmsi=1, start="2020-01-03 01:00:00", end="2020-01-03 01:59:59", max_points=100)
+    assert info["tier_seconds"] == 60 and len(df) == 60
+
+
+def test_thins_coarsest_tier_and_keeps_endpoints(tier_db):
+    df, info = tier_db.fetch_track_tiered(mmsi=1, max_points=4)
+    assert info["tier_seconds"] == 3600 and len(df) == 4
+    assert df["BaseDateTime"].iloc[0] == "2020-01-03 00:59:30"
+    assert df["BaseDateTime"].iloc[-1] == "2020-01-03 05:59:30"
+
+
+def test_ingest_trigger_updates_tiers(tier_db):
+    conn = sqlite3.connect(tier_db.db_path)
+    track(1, "2020-01-03 06:00:00", 60).to_sql("vessel_data", conn, index=False, if_exists="append")
+    conn.close()
+    df, info = tier_db.fetch_track_tiered(mmsi=1, max_points=10)
+    assert info["raw_points"] == 840 and info["tier_seconds"] == 3600
+    assert df["BaseDateTime"].iloc[-1] == "2020-01-03 06:59:30" and df["n_points"].iloc[-1] == 120
+
+
+def test_track_map_thins_markers():
+    pytest.importorskip("geopandas")
+    from map_generator import MapGenerator
+    points = track(1, "2020-01-03 00:00:00", 300).to_dict(orient="records")
+    m = MapGenerator.create_vessel_track_map(points, "V1", max_markers=50)
+    markers = [c for c in m._children.values() if type(c).__name__ == "CircleMarker"]
+    assert 2 <= len(markers) <= 51
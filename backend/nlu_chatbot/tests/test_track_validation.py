@@ -0,0 +1,90 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# ensure we can import modules from src/app
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+sys.path.insert(0, ROOT)
+
+from track_validation import score_tracks, summarize_tracks, verify_track
+from intent_executor import IntentExecutor
+
+
+def make_track(n=10, mmsi=367000001, start="2020-01-03 00:00:00"):
+    # ~10 kn due north, one fix per minute
+    return pd.DataFrame({
+        "MMSI": mmsi,
+        "BaseDateTime": pd.date_range(start, periods=n, freq="1min").strftime("%Y-%m-%d %H:%M:%S"),
+        "LAT": 30.0 + np.arange(n) * (10.0 / 60.0) / 60.0,
+        "LON": -80.0,
+        "SOG": 10.0,
+        "COG": 0.0,
+        "VesselName": "VERIFY TEST",
+    })
+
+
+def test_clean_track_is_consistent():
+    result = verify_track(make_track())
+    assert result["verdict"] == "consistent" and result["is_consistent"]
+    assert result["points_checked"] == 10
+    assert sum(result["checks"].values()) == 0
+
+
+def test_each_check_fires_on_its_own_fix():
+    df = make_track(12)
+    df.loc[3, "LAT"] += 0.5                            # 30 nm in a minute -> teleport in and out
+    df.loc[6, "COG"] = 150.0                           # sharp turn
+    df.loc[8, "BaseDateTime"] = "2020-01-03 01:30:00"  # gap, then out-of-order fix
+    scored = score_tracks(df.sample(frac=1, random_state=1))
+
+    assert list(scored.index[scored["teleport"]]) == [3, 4]
+    assert list(scored.index[scored["sharp_turn"]]) == [6, 7]
+    assert list(scored.index[scored["gap"]]) == [11]
+    assert scored.loc[11, "BaseDateTime"] == "2020-01-03 01:30:00"
+    assert not scored["speed_mismatch"].any()
+    assert scored["anomaly_score"].between(0, 1).all()
+
+    result = verify_track(df)
+    assert result["verdict"] == "suspicious"
+    assert {a["type"] for a in result["anomalies"]} == {"large_jump", "course_change", "timestamp_gap"}
+
+
+def test_speed_mismatch_and_multi_vessel_summary():
+    fast = make_track(mmsi=1)
+    fast["SOG"] = 30.0  # reports 30 kn while moving at 10 kn
+    tracks = pd.concat([make_track(mmsi=2), fast], ignore_index=True)
+    summary = summarize_tracks(score_tracks(tracks)).set_index("MMSI")
+    assert summary.loc[1, "speed_mismatch"] == 9 and summary.loc[1, "verdict"] == "suspicious"
+    assert summary.loc[2, "verdict"] == "consistent"
+    assert summary.loc[2, "points"] == 10
+
+
+def test_unparseable_timestamp_is_a_time_error_not_a_gap():
+    df = make_track()
+    df.loc[9, "BaseDateTime"] = "not a time"
+    scored = score_tracks(df)
+    assert scored.loc[9, "time_error"] and np.isnan(scored.loc[9, "dt_seconds"])
+    assert not scored["gap"].any() and not scored["teleport"].any()
+    assert scored["time_error"].sum() == 1
+
+
+class TrackDB:
+    def __init__(self, df):
+        self.df = df
+        self.calls = []
+
+    def fetch_track_ending_at(self, vessel_name=None, mmsi=None, end_dt=None, limit=10):
+        self.calls.append((vessel_name, mmsi, end_dt, limit))
+        return self.df[self.df.BaseDateTime <= end_dt].tail(limit).reset_index(drop=True)
+
+
+def test_verify_intent_scores_most_recent_window():
+    df = make_track(80)
+    df.loc[5, "LAT"] += 0.5  # old teleport outside the newest 50 fixes
+    db = TrackDB(df)
+    result = IntentExecutor(db).handle({"intent": "VERIFY", "vessel_name": "VERIFY TEST", "identifiers": {}})
+    assert db.calls[0][3] == 50
+    assert result["verdict"] == "consistent"
+    assert result["points"][-1]["BaseDateTime"] == df.BaseDateTime.iloc[-1]
@@ -0,0 +1,75 @@
+import os
+import sqlite3
+import sys
+import time
+
+import pandas as pd
+
+# ensure we can import modules from src/app
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+sys.path.insert(0, ROOT)
+
+import worker_sync
+from db_handler import MMAP_BYTES, MaritimeDB
+from worker_sync import WorkerSync
+
+
+def test_events_replay_in_other_workers_only(tmp_path, monkeypatch):
+    path = str(tmp_path / "jobs.db")
+    other, this = WorkerSync(path), WorkerSync(path)
+    applied = []
+    this.subscribe("model_activate", applied.append)
+
+    # published by another process
+    monkeypatch.setattr(worker_sync.os, "getpid", lambda: 1)
+    other.publish("model_activate", {"model_id": "v2"})
+    monkeypatch.undo()
+    # published by this process: already applied locally, skipped on replay
+    this.publish("model_activate", {"model_id": "v3"})
+    this.publish("unhandled", {})
+
+    assert this.poll() == 1 and applied == [{"model_id": "v2"}]
+    assert this.poll() == 0
+
+
+def test_new_worker_starts_after_existing_events_unless_forked(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    parent = WorkerSync(path)
+    parent.publish("traffic_split", {"weights": {}})
+    late = WorkerSync(path)
+    assert late.last_seq == parent.current_seq()
+    # a forked worker keeps the parent's position and replays what came after the preload
+    parent.after_fork()
+    assert parent.last_seq == 0
+
+
+def test_transient_events_are_pruned(tmp_path, monkeypatch):
+    sync = WorkerSync(str(tmp_path / "jobs.db"))
+    sync.publish("feature_state", {"points": []})
+    sync.publish("model_register", {"model_id": "v1"})
+    monkeypatch.setattr(worker_sync.time, "time", lambda: time.monotonic() + 1e10)
+    assert sync.prune() == 1
+    ops = [r[0] for r in sqlite3.connect(sync.db_path).execute("SELECT op FROM control_events;")]
+    assert ops == ["model_register"]
+
+
+def test_heartbeats_report_memory(tmp_path):
+    sync = WorkerSync(str(tmp_path / "jobs.db"))
+    sync.requests = 7
+    sync.heartbeat()
+    [me] = sync.workers()
+    assert me["pid"] == os.getpid() and me["requests"] == 7
+    assert (me["memory"].get("rss_mb") or me["memory"].get("max_rss_mb")) > 0
+    sync.remove_heartbeat()
+    assert sync.workers() == []
+
+
+def test_db_connections_use_mmap(tmp_path):
+    path = str(tmp_path / "v.db")
+    conn = sqlite3.connect(path)
+    pd.DataFrame({"MMSI": [1], "BaseDateTime": ["2020-01-03 00:00:00"]}).to_sql("vessel_data", conn, index=False)
+    conn.close()
+    db = MaritimeDB(path)
+    assert db._read("PRAGMA mmap_size;", ()).iloc[0, 0] == MMAP_BYTES
+    db.after_fork()
+    assert db._read("PRAGMA mmap_size;", ()).iloc[0, 0] == MMAP_BYTES
@@ -1,32 +1,290 @@
+"""
+HTTP load benchmark for the API (run against a server started on a synthetic DB, see
+tools/make_synthetic_db.py and tools/e2e_runner.py).
+Drives /query, /vessels/search, /admin/describe_vessel and /predict/* with async clients:
+- open loop: requests are sent at --rps (uniform or Poisson arrivals) no matter how fast
+  the server answers. Latency is measured from the scheduled send time, so a server that
+  falls behind shows the queueing delay instead of hiding it (coordinated omission).
+- --concurrency caps the requests in flight; requests wait for a slot once it is reached
+- vessels, MMSIs and the time range are sampled from --db, so every request hits real rows
+- reports throughput, error counts and p50 / p95 / p99 latency per endpoint
+- writes the results as a JSON baseline. --compare loads an earlier baseline, prints the
+  change per endpoint and exits with status 1 when a p95 regresses by more than
+  --max-regression.
+
+Usage:
+    python tools/benchmark_api.py --db /data/ais_1m.db --rps 20 --duration 60
+    python tools/benchmark_api.py --db /data/ais_1m.db --endpoints search,describe --rps 100 \\
+        --output tools/benchmarks/search_1m.json --compare tools/benchmarks/search_1m_main.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
 import time
-import requests
-import statistics
-from tqdm import tqdm
+from pathlib import Path
+
+import httpx
+import numpy as np
 
 BACKEND = "http://127.0.0.1:8000"
+BASELINE_DIR = Path(__file__).resolve().parent / "benchmarks"
+QUERY_TEMPLATES = [
+    "Where is {name}?",
+    "show the track of {name} for the last 2 hours",
+    "what is the speed of {name} at {time}",
+    "Where was {name} at {time}?",
+    "predict the position of MMSI {mmsi} in 30 minutes",
+    "show vessel {mmsi}",
+]
+PERCENTILES = (50, 95, 99)
+
+
+# --- workload ---
+class Workload:
+    """Vessels and timestamps sampled from the benchmark DB (deterministic for a seed)"""
+
+    def __init__(self, db_path: str, sample: int, seed: int):
+        self.rng = random.Random(seed)
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            # the first rows hold every ship (fixes are interleaved by time); no full scan
+            rows = conn.execute("SELECT DISTINCT MMSI, VesselName FROM (SELECT MMSI, VesselName FROM vessel_data "
+                                "LIMIT ?) WHERE VesselName IS NOT NULL;", (sample * 50,)).fetchall()
+            self.first, self.last = conn.execute(
+                "SELECT MIN(BaseDateTime), MAX(BaseDateTime) FROM vessel_data;").fetchone()
+            self.rows = conn.execute("SELECT MAX(rowid) FROM vessel_data;").fetchone()[0] or 0
+        finally:
+            conn.close()
+        if not rows:
+            raise SystemExit(f"no vessels in {db_path}")
+        self.rng.shuffle(rows)
+        self.vessels = rows[:sample]
+        self.vessel_count = len(rows)
+
+    def dataset(self, db_path: str) -> dict:
+        return {"db": os.path.abspath(db_path), "rows": self.rows, "sampled_vessels": len(self.vessels),
+                "first": self.first, "last": self.last, "bytes": os.path.getsize(db_path)}
+
+    def vessel(self):
+        return self.rng.choice(self.vessels)
+
+    def timestamp(self) -> str:
+        # within the second half of the data, so "the last 2 hours" has fixes
+        start, end = np.datetime64(self.first, "s"), np.datetime64(self.last, "s")
+        span = int((end - start) / np.timedelta64(1, "s"))
+        offset = self.rng.randint(span // 2, max(span, 1))
+        return str(start + np.timedelta64(offset, "s")).replace("T", " ")
+
+    # each returns (endpoint label, method, path, kwargs for httpx)
+    def query(self):
+        mmsi, name = self.vessel()
+        text = self.rng.choice(QUERY_TEMPLATES).format(name=name, mmsi=mmsi, time=self.timestamp())
+        return "POST /query", "POST", "/query", {"json": {"text": text}}
+
+    def search(self):
+        _, name = self.vessel()
+        prefix = name[: self.rng.randint(2, 5)]
+        return "GET /vessels/search", "GET", "/vessels/search", {"params": {"q": prefix, "limit": 20}}
+
+    def describe(self):
+        mmsi, name = self.vessel()
+        params = {"limit": 100, "end_dt": self.timestamp()}
+        params.update({"mmsi": mmsi} if self.rng.random() < 0.5 else {"vessel": name})
+        return "GET /admin/describe_vessel", "GET", "/admin/describe_vessel", {"params": params}
+
+    def predict(self):
+        mmsi, name = self.vessel()
+        choice = self.rng.randrange(4)
+        if choice == 0:
+            return "GET /predict/mmsi/{mmsi}", "GET", f"/predict/mmsi/{mmsi}", {}
+        if choice == 1:
+            return "GET /predict/vessel/{vessel_name}", "GET", f"/predict/vessel/{name}", {}
+        if choice == 2:
+            return ("POST /predict/trajectory", "POST", "/predict/trajectory",
+                    {"json": {"mmsi": mmsi, "end_dt": self.timestamp()}})
+        return "GET /predict/state/{mmsi}", "GET", f"/predict/state/{mmsi}", {}
+
+    def fleet(self):
+        return ("GET /predict/fleet", "GET", "/predict/fleet",
+                {"params": {"horizons": "10,30", "end_dt": self.timestamp(), "limit": 1000}})
+
+
+ENDPOINTS = ("query", "search", "describe", "predict", "fleet")
+
+
+# --- load generation ---
+async def run_load(base_url: str, workload: Workload, mix: list, rps: float, duration: float, warmup: float,
+                   concurrency: int, timeout: float, poisson: bool, seed: int) -> tuple:
+    """Open-loop load -> (samples [(label, status, latency_s, service_s, is_error)], elapsed seconds)"""
+    rng = random.Random(seed)
+    labels, weights = zip(*mix)
+    slots = asyncio.Semaphore(concurrency)
+    samples = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        async def fire(scheduled: float, request, record: bool):
+            label, method, path, kwargs = request
+            async with slots:
+                sent = time.perf_counter()
+                try:
+                    response = await client.request(method, path, **kwargs)
+                    status = response.status_code
+                    # handlers report failures as {"error": ...} with a 200
+                    error = status >= 400 or response.content[:10].startswith(b'{"error"')
+                except httpx.HTTPError as e:
+                    status, error = type(e).__name__, True
+            done = time.perf_counter()
+            if record:
+                samples.append((label, status, done - scheduled, done - sent, error))
+
+        tasks = []
+        start = time.perf_counter()
+        at = start
+        total = warmup + duration
+        while at - start < total:
+            delay = at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            request = getattr(workload, rng.choices(labels, weights)[0])()
+            tasks.append(asyncio.create_task(fire(at, request, at - start >= warmup)))
+            at += rng.expovariate(rps) if poisson else 1.0 / rps
+        await asyncio.gather(*tasks)
+        # throughput over the measured window, including the drain of in-flight requests
+        elapsed = time.perf_counter() - start - warmup
+    return samples, elapsed
+
+
+def summarize(samples: list, elapsed: float) -> dict:
+    def stats(rows):
+        latency = np.array([r[2] for r in rows]) * 1000.0
+        service = np.array([r[3] for r in rows]) * 1000.0
+        statuses = {}
+        for r in rows:
+            statuses[str(r[1])] = statuses.get(str(r[1]), 0) + 1
+        result = {"requests": len(rows), "errors": sum(1 for r in rows if r[4]), "status": statuses,
+                  "throughput_rps": round(len(rows) / elapsed, 2) if elapsed > 0 else None,
+                  "mean_ms": round(float(latency.mean()), 2), "max_ms": round(float(latency.max()), 2)}
+        for p, value in zip(PERCENTILES, np.percentile(latency, PERCENTILES)):
+            result[f"p{p}_ms"] = round(float(value), 2)
+        result["service_p50_ms"] = round(float(np.percentile(service, 50)), 2)
+        return result
+
+    endpoints = {}
+    for label in sorted({s[0] for s in samples}):
+        endpoints[label] = stats([s for s in samples if s[0] == label])
+    return {"overall": stats(samples) if samples else {}, "endpoints": endpoints}
+
+
+# --- baselines ---
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(result: dict, baseline: dict, max_regression: float) -> list:
+    """Print the change per endpoint -> labels whose p95 regressed more than max_regression"""
+    regressed = []
+    print(f"\nvs baseline {baseline['meta'].get('label')} ({baseline['meta'].get('commit')}, "
+          f"{baseline['meta'].get('timestamp')})")
+    print(f"{'endpoint':<36} {'p50':>9} {'p95':>9} {'p99':>9} {'rps':>9}")
+    current = dict(result["endpoints"], overall=result["overall"])
+    previous = dict(baseline["endpoints"], overall=baseline["overall"])
+    for label, now in current.items():
+        before = previous.get(label)
+        if not before:
+            continue
+        change = {k: (now[k] - before[k]) / before[k] if before.get(k) else 0.0
+                  for k in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")}
+        print(f"{label:<36} " + " ".join(f"{change[k]:>+8.1%}" for k in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")))
+        if label != "overall" and change["p95_ms"] > max_regression:
+            regressed.append(label)
+    return regressed
+
+
+def print_report(result: dict):
+    print(f"{'endpoint':<36} {'n':>6} {'err':>5} {'rps':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    rows = list(result["endpoints"].items()) + [("overall", result["overall"])]
+    for label, s in rows:
+        print(f"{label:<36} {s['requests']:>6} {s['errors']:>5} {s['throughput_rps']:>7.1f} {s['p50_ms']:>9.1f} "
+              f"{s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f} {s['max_ms']:>9.1f}")
+
+
+def parse_mix(value: str) -> list:
+    """"query,search" or weighted "query:3,search:1" -> [(endpoint, weight)]"""
+    mix = []
+    for part in value.split(","):
+        name, _, weight = part.strip().partition(":")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name!r} (choose from {', '.join(ENDPOINTS)})")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--base-url", default=BACKEND)
+    parser.add_argument("--db", default=os.environ.get("BACKEND_DB_PATH"),
+                        help="DB the server runs on, to sample vessels and timestamps from")
+    parser.add_argument("--endpoints", type=parse_mix, default=parse_mix("query,search,describe,predict"),
+                        help=f"weighted mix of {', '.join(ENDPOINTS)}, e.g. query:2,search:1")
+    parser.add_argument("--rps", type=float, default=10.0, help="target request rate")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds of load before measuring")
+    parser.add_argument("--concurrency", type=int, default=64, help="max requests in flight")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--arrival", choices=["uniform", "poisson"], default="poisson")
+    parser.add_argument("--sample-vessels", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default=None, help="name stored in the baseline")
+    parser.add_argument("--output", default=None, help=f"baseline JSON (default {BASELINE_DIR}/<label>-<time>.json)")
+    parser.add_argument("--compare", default=None, help="baseline JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed p95 increase (0.2 = +20%%)")
+    args = parser.parse_args(argv)
+    if not args.db:
+        parser.error("--db (or BACKEND_DB_PATH) is required")
 
-# Vessels to test
-VESSELS = ["ABIGAIL", "+BRAVA"]
+    workload = Workload(args.db, args.sample_vessels, args.seed)
+    label = args.label or f"{Path(args.db).stem}-{args.rps:g}rps"
+    print(f"{label}: {args.rps:g} rps ({args.arrival}) for {args.duration:g}s after {args.warmup:g}s warm-up, "
+          f"mix {dict(args.endpoints)}, {workload.rows:,} rows / {workload.vessel_count:,} vessels sampled")
+    samples, elapsed = asyncio.run(run_load(args.base_url, workload, args.endpoints, args.rps, args.duration,
+                                            args.warmup, args.concurrency, args.timeout,
+                                            args.arrival == "poisson", args.seed))
+    if not samples:
+        raise SystemExit("no requests completed")
+    result = {
+        "meta": {"label": label, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": git_commit(),
+                 "base_url": args.base_url, "target_rps": args.rps, "duration": args.duration,
+                 "warmup": args.warmup, "concurrency": args.concurrency, "arrival": args.arrival,
+                 "mix": dict(args.endpoints), "seed": args.seed,
+                 "host": {"cpus": os.cpu_count(), "python": platform.python_version(), "platform": platform.platform()},
+                 "dataset": workload.dataset(args.db)},
+        **summarize(samples, elapsed),
+    }
+    print_report(result)
 
+    output = Path(args.output) if args.output else BASELINE_DIR / f"{label}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+    print(f"\nBaseline written to {output}")
 
-def run_once_by_name(vessel_name, timeout=120):
-    t0 = time.time()
-    r = requests.get(f"{BACKEND}/admin/describe_vessel", params={"vessel": vessel_name, "limit": 100}, timeout=timeout)
-    t1 = time.time()
-    return t1 - t0, r.status_code, r.text[:500]
+    if args.compare:
+        regressed = compare(result, json.loads(Path(args.compare).read_text()), args.max_regression)
+        if regressed:
+            print(f"p95 regressed more than {args.max_regression:.0%}: {', '.join(regressed)}")
+            return 1
+    return 0
 
 
 if __name__ == "__main__":
-    for vessel in VESSELS:
-        times = []
-        print(f"Benchmarking vessel: {vessel}")
-        for i in tqdm(range(3)):
-            try:
-                delta, code, snippet = run_once_by_name(vessel)
-                print(f"  Run {i+1}: {delta:.3f}s status={code}")
-                times.append(delta)
-            except Exception as e:
-                print(f"  Run {i+1} failed: {e}")
-        if times:
-            print(f"  --- stats for {vessel} ---")
-            print(f"  min {min(times):.3f}s, max {max(times):.3f}s, mean {statistics.mean(times):.3f}s")
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Multi-core throughput benchmark for the compute pool (src/app/compute_pool.py).
+Runs the same CPU-bound tasks through ComputePool with 1..N worker processes and through
+a thread pool of the same size (the previous execution model), reporting tasks/s and the
+speed-up over one worker:
+- parse:    MaritimeNLPInterpreter.parse_query over a query corpus (needs en_core_web_sm)
+- features: the predictor's 483-feature pipeline (6->28 dims, stats, haversine) on batches
+- predict:  predict_single_vessel on synthetic tracks with the auto-detected model
+            (DEMO predictions when no artifacts are found)
+
+Usage:
+    python tools/benchmark_compute_pool.py --workers 1,2,4,8 --tasks 400
+    python tools/benchmark_compute_pool.py --workload features --batch 32
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "app"))
+
+import compute_pool  # noqa: E402
+from compute_pool import ComputePool  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+from xgboost_predictor import get_predictor  # noqa: E402
+
+VESSELS = ["ABIGAIL", "CHAMPAGNE CHER", "ALPHA"]
+QUERIES = [
+    "Where was ABIGAIL at 6:25 PM on Jan 5, 2020?",
+    "show the track of CHAMPAGNE CHER for the last 2 hours",
+    "predict the position of MMSI 367000001 in 30 minutes",
+    "which vessels were near Miami within 10 nm yesterday",
+    "list ships around 25.76, -80.19 on 2020-01-03",
+    "what is the speed of ALPHA at 12:00",
+]
+
+
+def features_task(batch: np.ndarray) -> int:
+    """Feature pipeline of one batch on the worker's predictor (module-level so it pickles)"""
+    predictor = compute_pool._state["registry"].resolve()[1]
+    X = predictor._adapt_6_to_28_dimensions(batch)
+    features = np.hstack([predictor.extract_features_from_3d_array(X), predictor.add_haversine_features_3d(X)])
+    return features.shape[0]
+
+
+def synthetic_track(rng, n=24) -> pd.DataFrame:
+    return pd.DataFrame({
+        "LAT": 25 + np.cumsum(rng.normal(0, 1e-3, n)), "LON": -80 + np.cumsum(rng.normal(0, 1e-3, n)),
+        "SOG": rng.uniform(5, 15, n), "COG": rng.uniform(0, 360, n), "Heading": rng.uniform(0, 360, n),
+        "VesselType": 70.0,
+        "BaseDateTime": pd.date_range("2020-01-03", periods=n, freq="min").strftime("%Y-%m-%d %H:%M:%S"),
+    })
+
+
+def make_tasks(workload: str, count: int, batch: int):
+    rng = np.random.default_rng(0)
+    if workload == "parse":
+        return [(compute_pool.parse_query, (QUERIES[i % len(QUERIES)],)) for i in range(count)]
+    if workload == "features":
+        return [(features_task, (rng.normal(0, 1, (batch, 12, 6)),)) for _ in range(count)]
+    return [(compute_pool.predict_track, (synthetic_track(rng), "default")) for _ in range(count)]
+
+
+def run_processes(pool: ComputePool, tasks) -> float:
+    async def _all():
+        return await asyncio.gather(*(pool.run(fn, *args) for fn, args in tasks))
+
+    t0 = time.perf_counter()
+    asyncio.run(_all())
+    return time.perf_counter() - t0
+
+
+def run_threads(workers: int, tasks) -> float:
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        t0 = time.perf_counter()
+        list(pool.map(lambda task: task[0](*task[1]), tasks))
+        return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workload", choices=["parse", "features", "predict"], default="features")
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated pool sizes")
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=16, help="sequences per features task")
+    parser.add_argument("--start-method", default=os.environ.get("COMPUTE_START_METHOD", "spawn"))
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+    registry.register("default", predictor=get_predictor())
+    nlp_engine = None
+    if args.workload == "parse":
+        from nlp_interpreter import MaritimeNLPInterpreter
+        nlp_engine = MaritimeNLPInterpreter(vessel_list=VESSELS)
+
+    tasks = make_tasks(args.workload, args.tasks, args.batch)
+    print(f"{args.workload}: {args.tasks} tasks, {os.cpu_count()} cores, start method {args.start_method}")
+    print(f"{'workers':>7}  {'threads/s':>10}  {'processes/s':>12}  {'speed-up':>8}")
+    compute_pool._state.update(nlp=nlp_engine, registry=registry)
+    base = None
+    for n in [int(w) for w in args.workers.split(",")]:
+        thread_s = run_threads(n, tasks)
+        pool = ComputePool(VESSELS, registry, nlp_engine=nlp_engine, workers=n, start_method=args.start_method)
+        pool.start()
+        try:
+            run_processes(pool, tasks[: n * 2])  # warm-up
+            process_s = run_processes(pool, tasks)
+        finally:
+            pool.stop()
+        rate = args.tasks / process_s
+        base = base or rate
+        print(f"{n:>7}  {args.tasks / thread_s:>10.1f}  {rate:>12.1f}  {rate / base:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
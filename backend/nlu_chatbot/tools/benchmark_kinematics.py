@@ -0,0 +1,47 @@
+"""
+Micro-benchmark for the vectorized fleet kinematics (src/app/kinematics.py).
+Projects N synthetic vessels for several horizons with the rate-of-turn model and
+reports the median wall time.
+
+Usage:
+    python tools/benchmark_kinematics.py --vessels 100000 --horizons 10,30,60
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "app"))
+
+from kinematics import project_positions  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vessels", type=int, default=100000)
+    parser.add_argument("--horizons", default="10,30,60")
+    parser.add_argument("--repeats", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    n = args.vessels
+    lat, lon = rng.uniform(-60, 60, n), rng.uniform(-180, 180, n)
+    sog, cog = rng.uniform(0, 25, n), rng.uniform(0, 360, n)
+    rot, sog_rate = rng.normal(0, 2, n), rng.normal(0, 0.1, n)
+    horizons = [float(h) for h in args.horizons.split(",")]
+
+    times = []
+    for _ in range(args.repeats):
+        t0 = time.perf_counter()
+        project_positions(lat, lon, sog, cog, horizons, rate_of_turn=rot, sog_rate=sog_rate)
+        times.append(time.perf_counter() - t0)
+    median = statistics.median(times)
+    print(f"{n} vessels x {len(horizons)} horizons: median {median * 1000:.1f} ms "
+          f"({n * len(horizons) / median / 1e6:.1f} M projections/s)")
+
+
+if __name__ == "__main__":
+    main()
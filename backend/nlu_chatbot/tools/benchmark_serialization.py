@@ -0,0 +1,98 @@
+"""
+Benchmark for API response serialization (src/app/serialization.py).
+Serializes a synthetic N-row track (with NaN / Inf gaps) the old way - to_dict records,
+recursive NaN walk, stdlib json - and through the new layer (vectorized sanitize +
+orjson when installed), plus the column-oriented format. Reports median wall times.
+
+Usage:
+    python tools/benchmark_serialization.py --rows 10000
+"""
+import argparse
+import json
+import math
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "app"))
+
+import serialization  # noqa: E402
+from serialization import dumps, frame_records, frame_to_columns  # noqa: E402
+
+
+def legacy_clean(obj):
+    """The recursive walk main.py used before the serialization layer"""
+    if isinstance(obj, dict):
+        return {k: legacy_clean(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [legacy_clean(item) for item in obj]
+    elif isinstance(obj, float):
+        if math.isnan(obj) or math.isinf(obj):
+            return None
+        return obj
+    return obj
+
+
+def synthetic_track(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "MMSI": 367000000,
+        "BaseDateTime": pd.date_range("2020-01-01", periods=n, freq="min").strftime("%Y-%m-%d %H:%M:%S"),
+        "LAT": 25 + np.cumsum(rng.normal(0, 1e-3, n)),
+        "LON": -80 + np.cumsum(rng.normal(0, 1e-3, n)),
+        "SOG": rng.uniform(0, 20, n),
+        "COG": rng.uniform(0, 360, n),
+        "Heading": rng.uniform(0, 360, n),
+        "VesselName": "BENCH VESSEL",
+        "IMO": None,
+        "CallSign": "WXYZ",
+        "VesselType": 70.0,
+        "Status": np.nan,
+        "Length": 120.0,
+        "Width": 20.0,
+        "Draft": np.nan,
+        "Cargo": 70.0,
+    })
+    df.loc[df.sample(frac=0.05, random_state=0).index, "Heading"] = np.nan
+    df.loc[df.sample(frac=0.01, random_state=1).index, "SOG"] = np.inf
+    return df
+
+
+def timed(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times), len(out)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=7)
+    args = parser.parse_args()
+
+    df = synthetic_track(args.rows)
+    cases = {
+        "legacy (to_dict + recursive clean + json)":
+            lambda: json.dumps(legacy_clean({"track": df.to_dict(orient="records")})).encode(),
+        "records (vectorized sanitize + dumps)":
+            lambda: dumps({"track": frame_records(df)}),
+        "columns (vectorized sanitize + dumps)":
+            lambda: dumps({"track": frame_to_columns(df)}),
+    }
+    print(f"{args.rows} rows x {df.shape[1]} columns, orjson {'on' if serialization.orjson else 'off (stdlib json)'}")
+    baseline = None
+    for name, fn in cases.items():
+        median, size = timed(fn, args.repeats)
+        baseline = baseline or median
+        print(f"  {name:<45} {median * 1000:8.1f} ms  {size / 1e6:6.2f} MB  x{baseline / median:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Throughput benchmark for vectorized track validation (src/app/track_validation.py).
+Scores N synthetic vessels x M fixes (with injected jumps, turns and gaps) and
+reports points/sec for score_tracks + summarize_tracks.
+
+Usage:
+    python tools/benchmark_track_validation.py --vessels 2000 --points 500
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "app"))
+
+from track_validation import score_tracks, summarize_tracks  # noqa: E402
+
+
+def make_tracks(vessels: int, points: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n = vessels * points
+    mmsi = np.repeat(np.arange(vessels) + 367000000, points)
+    minutes = np.tile(np.arange(points, dtype=float), vessels)
+    minutes += np.cumsum(rng.random(n) < 0.002) * 45  # occasional 45 minute gaps
+    sog = np.repeat(rng.uniform(5, 20, vessels), points) + rng.normal(0, 0.3, n)
+    cog = (np.repeat(rng.uniform(0, 360, vessels), points) + rng.normal(0, 3, n)) % 360.0
+    step_deg = sog / 60.0 / 60.0  # nm per minute -> degrees of latitude
+    lat = np.repeat(rng.uniform(20, 45, vessels), points) + np.cumsum(step_deg * np.cos(np.radians(cog)))
+    lon = np.repeat(rng.uniform(-90, -60, vessels), points) + np.cumsum(step_deg * np.sin(np.radians(cog)) / np.cos(np.radians(lat)))
+    lat[rng.random(n) < 0.001] += 1.0  # teleports
+    return pd.DataFrame({
+        "MMSI": mmsi,
+        "BaseDateTime": (pd.Timestamp("2020-01-03") + pd.to_timedelta(minutes, unit="min")).strftime("%Y-%m-%d %H:%M:%S"),
+        "LAT": lat,
+        "LON": lon,
+        "SOG": sog,
+        "COG": cog,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vessels", type=int, default=2000)
+    parser.add_argument("--points", type=int, default=500)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    tracks = make_tracks(args.vessels, args.points)
+    times = []
+    for _ in range(args.repeats):
+        t0 = time.perf_counter()
+        summary = summarize_tracks(score_tracks(tracks))
+        times.append(time.perf_counter() - t0)
+    median = statistics.median(times)
+    print(f"{len(tracks)} points / {args.vessels} vessels: median {median:.3f}s "
+          f"({len(tracks) / median / 1e6:.2f} M points/s), "
+          f"{int((summary['verdict'] == 'suspicious').sum())} suspicious vessels")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,46 +1,91 @@
+"""
+End-to-end benchmark run: start the API on a benchmark DB, wait until it is ready, run
+tools/benchmark_api.py against it and stop the server.
+    python tools/e2e_runner.py --db /data/ais_1m.db -- --rps 20 --duration 60
+    python tools/e2e_runner.py --rows 1M -- --endpoints search,describe --compare base.json
+--rows generates a synthetic DB first (tools/make_synthetic_db.py, cached by size and seed
+under --data-dir, default <tmp>/maritime_bench). Arguments after "--" go to benchmark_api.py.
+"""
+import argparse
+import os
+import signal
 import subprocess
+import sys
+import tempfile
 import time
+from pathlib import Path
+
 import requests
-import os
-import signal
 
+TOOLS_DIR = Path(__file__).resolve().parent
 SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
-UVICORN_CMD = ["uvicorn", "main:app", "--port", "8000"]
+PORT = 8000
+UVICORN_CMD = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(PORT)]
 
 
-def start_server():
-    p = subprocess.Popen(UVICORN_CMD, cwd=SRC_DIR)
+def start_server(db_path: str = None):
+    env = dict(os.environ)
+    if db_path:
+        env["BACKEND_DB_PATH"] = os.path.abspath(db_path)
+    p = subprocess.Popen(UVICORN_CMD, cwd=SRC_DIR, env=env)
     time.sleep(2)
     return p
 
 
 def stop_server(p):
     try:
-        p.terminate()
-        p.wait(timeout=5)
+        p.send_signal(signal.SIGTERM)
+        p.wait(timeout=15)
     except Exception:
         p.kill()
 
 
+def synthetic_db(rows: str, seed: int, data_dir: str) -> str:
+    path = Path(data_dir) / f"ais_{rows.lower()}_seed{seed}.db"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        subprocess.run([sys.executable, str(TOOLS_DIR / "make_synthetic_db.py"), "--rows", rows, "--seed", str(seed),
+                        "--out", str(path), "--snapshots"], check=True)
+    return str(path)
+
+
 if __name__ == '__main__':
+    argv = sys.argv[1:]
+    bench_args = argv[argv.index("--") + 1:] if "--" in argv else []
+    argv = argv[:argv.index("--")] if "--" in argv else argv
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=os.environ.get("BACKEND_DB_PATH"), help="DB to serve and benchmark")
+    parser.add_argument("--rows", default=None, help="generate a synthetic DB of this size instead (e.g. 1M)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "maritime_bench"))
+    args = parser.parse_args(argv)
+
+    db_path = synthetic_db(args.rows, args.seed, args.data_dir) if args.rows else args.db
+    if not db_path:
+        parser.error("pass --db or --rows")
+
     print("Starting FastAPI server...")
-    p = start_server()
+    p = start_server(db_path)
+    code = 1
     try:
-        for i in range(10):
+        # /health/ready answers 503 until spaCy, the vessel list and the models are loaded
+        for i in range(120):
             try:
-                r = requests.get("http://127.0.0.1:8000/health", timeout=2)
+                r = requests.get(f"http://127.0.0.1:{PORT}/health/ready", timeout=2)
                 if r.status_code == 200:
                     print("Health OK")
                     break
             except Exception:
-                time.sleep(1)
+                pass
+            time.sleep(1)
         else:
             print("Server did not become healthy in time")
-            stop_server(p)
-            exit(1)
+            sys.exit(1)
 
         print("Running benchmark...")
-        os.system(f"python tools/benchmark_api.py")
+        code = subprocess.run([sys.executable, str(TOOLS_DIR / "benchmark_api.py"), "--db", db_path,
+                               "--base-url", f"http://127.0.0.1:{PORT}", *bench_args]).returncode
     finally:
         print("Stopping server")
         stop_server(p)
+    sys.exit(code)
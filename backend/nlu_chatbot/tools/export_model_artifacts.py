@@ -0,0 +1,94 @@
+"""
+Convert the pickled XGBoost artifacts (xgboost_model.pkl, scaler.pkl, pca.pkl) into the
+native format loaded by XGBoostPredictor: UBJ booster file(s), preprocessing.npz and a
+manifest.json with checksums and the feature schema.
+
+Optionally measures predictor cold-start time (fresh interpreter, import + load) for
+both formats so the improvement can be recorded.
+
+Usage:
+    python export_model_artifacts.py --model-dir results/xgboost_advanced_50_vessels
+    python export_model_artifacts.py --model-dir results/xgboost_advanced_50_vessels --benchmark --repeats 5
+"""
+import argparse
+import json
+import os
+import pickle
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_APP = Path(__file__).resolve().parents[1] / "src" / "app"
+sys.path.insert(0, str(SRC_APP))
+
+from model_artifacts import export_artifacts  # noqa: E402
+
+COLD_START_SNIPPET = """
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {src!r})
+from xgboost_predictor import XGBoostPredictor
+p = XGBoostPredictor({model_dir!r})
+print(json.dumps({{"total_seconds": time.perf_counter() - t0, "load_seconds": p.load_seconds,
+                  "format": p.artifact_format, "loaded": p.is_loaded}}))
+"""
+
+
+def load_pickles(model_dir: Path):
+    out = []
+    for name in ("xgboost_model.pkl", "scaler.pkl", "pca.pkl"):
+        with open(model_dir / name, "rb") as f:
+            out.append(pickle.load(f))
+    return out
+
+
+def measure_cold_start(model_dir: Path, artifact_format: str, repeats: int) -> dict:
+    """Run the predictor in fresh interpreters and report load timings"""
+    env = dict(os.environ, XGBOOST_ARTIFACT_FORMAT=artifact_format)
+    code = COLD_START_SNIPPET.format(src=str(SRC_APP), model_dir=str(model_dir))
+    runs = []
+    for _ in range(repeats):
+        proc = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    load = [r["load_seconds"] for r in runs if r["load_seconds"] is not None]
+    total = [r["total_seconds"] for r in runs]
+    return {
+        "format": artifact_format,
+        "loaded": all(r["loaded"] for r in runs),
+        "load_seconds_median": statistics.median(load) if load else None,
+        "total_seconds_median": statistics.median(total),
+        "runs": repeats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", required=True, help="Directory containing the .pkl artifacts")
+    parser.add_argument("--out-dir", default=None, help="Output directory (defaults to --model-dir)")
+    parser.add_argument("--benchmark", action="store_true", help="Measure cold-start time for pickle vs native")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    model_dir = Path(args.model_dir)
+    out_dir = Path(args.out_dir) if args.out_dir else model_dir
+
+    model, scaler, pca = load_pickles(model_dir)
+    manifest = export_artifacts(model, scaler, pca, out_dir)
+    print(f"Exported {len(manifest['model_files'])} booster file(s) and {manifest['preprocessing_file']} to {out_dir}")
+    for name, meta in manifest["files"].items():
+        print(f"  {name}: {meta['bytes']} bytes sha256={meta['sha256'][:12]}…")
+
+    if args.benchmark:
+        if out_dir != model_dir:
+            print("Benchmark requires --out-dir to equal --model-dir; skipping")
+            return
+        results = [measure_cold_start(model_dir, fmt, args.repeats) for fmt in ("pickle", "native")]
+        print(json.dumps(results, indent=2))
+        before, after = results[0]["load_seconds_median"], results[1]["load_seconds_median"]
+        if before and after:
+            print(f"Cold-start artifact load: pickle {before:.3f}s -> native {after:.3f}s ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
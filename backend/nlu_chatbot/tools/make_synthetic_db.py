@@ -0,0 +1,162 @@
+"""
+Synthetic AIS database for benchmarks (the idea of src/app/run_e2e.py, at scale).
+Writes a vessel_data table of --rows fixes (1M-100M): --vessels ships report every
+--interval seconds, rows interleaved by time like a live feed. Each ship keeps a speed and
+a slowly drifting course and is dead-reckoned from a random start off the US coasts.
+Names come from a word list ("NORTHERN STAR 17"), so prefix search and fuzzy resolution
+see realistic collisions. The output is deterministic for a given --seed.
+
+The table is bulk-loaded without indexes. MaritimeDB.create_tables() then adds the app's
+indexes, and --snapshots also builds the latest_position snapshot and the track tiers,
+so the API starts on the DB without running its own maintenance.
+
+Usage:
+    python tools/make_synthetic_db.py --rows 1M --out /data/ais_1m.db
+    python tools/make_synthetic_db.py --rows 100M --vessels 20000 --out /data/ais_100m.db --snapshots
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "app"))
+
+from db_handler import MaritimeDB  # noqa: E402
+
+COLUMNS = ["MMSI", "BaseDateTime", "LAT", "LON", "SOG", "COG", "Heading", "VesselName", "IMO", "CallSign",
+           "VesselType", "Status", "Length", "Width", "Draft", "Cargo", "TransceiverClass"]
+SCHEMA = """
+CREATE TABLE vessel_data (
+    MMSI INTEGER, BaseDateTime TEXT, LAT REAL, LON REAL, SOG REAL, COG REAL, Heading REAL,
+    VesselName TEXT, IMO TEXT, CallSign TEXT, VesselType REAL, Status REAL, Length REAL,
+    Width REAL, Draft REAL, Cargo REAL, TransceiverClass TEXT
+);
+"""
+FIRST_WORDS = ["ATLANTIC", "PACIFIC", "NORTHERN", "SOUTHERN", "OCEAN", "SEA", "GOLDEN", "SILVER", "BLUE",
+               "GRAND", "MORNING", "EVENING", "CAPE", "BAY", "ISLAND", "HARBOR", "STAR", "ROYAL", "LADY", "MISS"]
+SECOND_WORDS = ["STAR", "SPIRIT", "DAWN", "PRIDE", "EXPLORER", "TRADER", "VOYAGER", "QUEEN", "PRINCESS",
+                "EAGLE", "FALCON", "WIND", "WAVE", "TIDE", "HORIZON", "CHALLENGER", "ENDEAVOUR", "LIBERTY"]
+# (lat, lon, spread in degrees) of the regions ships start in
+REGIONS = [(25.8, -80.0, 1.5), (29.5, -89.5, 2.0), (40.5, -73.5, 1.5), (33.7, -118.3, 1.5), (47.6, -122.4, 1.0)]
+VESSEL_TYPES = np.array([30.0, 31.0, 37.0, 52.0, 60.0, 70.0, 80.0])
+NM_PER_DEGREE = 60.0
+
+
+def parse_count(value: str) -> int:
+    """1000000, 1e6, 1M, 250k"""
+    value = value.strip().upper()
+    scale = {"K": 10 ** 3, "M": 10 ** 6, "G": 10 ** 9}.get(value[-1:], 1)
+    return int(float(value[:-1] if scale > 1 else value) * scale)
+
+
+def vessel_fleet(n: int, rng: np.random.Generator) -> dict:
+    names = [f"{FIRST_WORDS[i % len(FIRST_WORDS)]} {SECOND_WORDS[(i // len(FIRST_WORDS)) % len(SECOND_WORDS)]}"
+             for i in range(n)]
+    names = [name if i < len(FIRST_WORDS) * len(SECOND_WORDS) else f"{name} {i // (len(FIRST_WORDS) * len(SECOND_WORDS))}"
+             for i, name in enumerate(names)]
+    order = rng.permutation(n)
+    region = np.array(REGIONS)[rng.integers(0, len(REGIONS), n)]
+    return {
+        "mmsi": 367000000 + np.arange(n),
+        "name": [names[i] for i in order],
+        "lat": region[:, 0] + rng.uniform(-1, 1, n) * region[:, 2],
+        "lon": region[:, 1] + rng.uniform(-1, 1, n) * region[:, 2],
+        "sog": np.where(rng.random(n) < 0.2, rng.uniform(0, 0.5, n), rng.uniform(6, 22, n)),  # 20% at anchor
+        "cog": rng.uniform(0, 360, n),
+        "type": VESSEL_TYPES[rng.integers(0, len(VESSEL_TYPES), n)],
+        "length": rng.uniform(20, 300, n).round(1),
+    }
+
+
+def tick_times(start: np.datetime64, first: int, count: int, interval: int) -> list:
+    stamps = start + (np.arange(first, first + count) * interval).astype("timedelta64[s]")
+    return [str(s).replace("T", " ") for s in stamps]
+
+
+def generate(out: str, rows: int, vessels: int, start: str, interval: int, seed: int, chunk_rows: int):
+    rng = np.random.default_rng(seed)
+    fleet = vessel_fleet(vessels, rng)
+    ticks = -(-rows // vessels)
+    ticks_per_chunk = max(1, chunk_rows // vessels)
+    t0 = np.datetime64(start, "s")
+    lat, lon, cog = fleet["lat"].copy(), fleet["lon"].copy(), fleet["cog"].copy()
+    names = np.array(fleet["name"], dtype=object)
+    call_signs = np.array([f"W{m % 100000:05d}" for m in fleet["mmsi"]], dtype=object)
+
+    conn = sqlite3.connect(out)
+    conn.execute("PRAGMA journal_mode=OFF;")
+    conn.execute("PRAGMA synchronous=OFF;")
+    conn.execute(SCHEMA)
+    insert = f"INSERT INTO vessel_data ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))});"
+    written, began = 0, time.time()
+    for first in range(0, ticks, ticks_per_chunk):
+        k = min(ticks_per_chunk, ticks - first)
+        # (k, vessels) course random walk, positions dead-reckoned tick by tick
+        courses = (cog + np.cumsum(rng.normal(0, 2.0, (k, vessels)), axis=0)) % 360
+        sog = np.clip(fleet["sog"] + rng.normal(0, 0.3, (k, vessels)), 0, None)
+        step_nm = sog * interval / 3600.0
+        rad = np.radians(courses)
+        lats = lat + np.cumsum(step_nm * np.cos(rad), axis=0) / NM_PER_DEGREE
+        lons = lon + np.cumsum(step_nm * np.sin(rad) / np.cos(np.radians(lats)), axis=0) / NM_PER_DEGREE
+        lat, lon, cog = lats[-1], lons[-1], courses[-1]
+
+        take = min(k * vessels, rows - written)
+        times = np.repeat(np.array(tick_times(t0, first, k, interval), dtype=object), vessels)[:take]
+        tile = lambda values: np.tile(values, k)[:take]  # noqa: E731
+        heading = np.where(sog < 0.5, np.nan, courses.round(0)).ravel()[:take]
+        conn.executemany(insert, zip(
+            tile(fleet["mmsi"]).tolist(), times.tolist(), lats.ravel()[:take].round(5).tolist(),
+            lons.ravel()[:take].round(5).tolist(), sog.ravel()[:take].round(1).tolist(),
+            courses.ravel()[:take].round(1).tolist(), heading.tolist(), tile(names).tolist(), [None] * take,
+            tile(call_signs).tolist(), tile(fleet["type"]).tolist(), [0.0] * take, tile(fleet["length"]).tolist(),
+            (tile(fleet["length"]) / 6).round(1).tolist(), [None] * take, tile(fleet["type"]).tolist(), ["A"] * take,
+        ))
+        conn.commit()
+        written += take
+        rate = written / max(time.time() - began, 1e-9)
+        print(f"\r  {written:,}/{rows:,} rows ({rate:,.0f} rows/s)", end="", flush=True)
+    print()
+    conn.close()
+    return fleet
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", default="1M", help="fixes to write: 1000000, 1e6, 1M, 100M")
+    parser.add_argument("--vessels", type=int, default=None, help="default: one ship per 1000 fixes (100..50000)")
+    parser.add_argument("--start", default="2020-01-01 00:00:00")
+    parser.add_argument("--interval", type=int, default=60, help="seconds between a ship's fixes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-rows", type=int, default=500000)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--force", action="store_true", help="overwrite --out")
+    parser.add_argument("--snapshots", action="store_true",
+                        help="also build latest_position and the track tiers")
+    args = parser.parse_args()
+
+    rows = parse_count(args.rows)
+    vessels = args.vessels or min(50000, max(100, rows // 1000))
+    if os.path.exists(args.out):
+        if not args.force:
+            parser.error(f"{args.out} exists (use --force)")
+        os.remove(args.out)
+    print(f"Writing {rows:,} fixes for {vessels:,} vessels to {args.out} (seed {args.seed})")
+    t0 = time.time()
+    generate(args.out, rows, vessels, args.start, args.interval, args.seed, args.chunk_rows)
+    print(f"  loaded in {time.time() - t0:.1f}s; building indexes...")
+
+    t1 = time.time()
+    db = MaritimeDB(args.out)
+    db.create_tables()
+    if args.snapshots:
+        print(f"  latest_position: {db.ensure_latest_positions()}")
+        print(f"  track tiers: {db.ensure_track_tiers()}")
+    print(f"  indexed in {time.time() - t1:.1f}s; {os.path.getsize(args.out) / 1e9:.2f} GB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Run the fleet-wide spoofing / AIS-gap screening job against a database and rebuild
+its `anomalies` table (see src/app/anomaly_job.py). Suitable for cron after imports.
+
+Usage:
+    python tools/run_anomaly_job.py --db maritime_data.db --workers 8
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "app"))
+
+from anomaly_job import CHUNK_ROWS, run_anomaly_job  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", required=True)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--gap-minutes", type=float, default=30.0)
+    args = parser.parse_args()
+
+    def progress(status):
+        print(f"  shard {status['shards_done']}/{status['shards']}: "
+              f"{status['rows_scanned']} rows, {status['anomalies']} anomalies", flush=True)
+
+    summary = run_anomaly_job(args.db, workers=args.workers, chunk_rows=args.chunk_rows,
+                              gap_minutes=args.gap_minutes, progress=progress)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()